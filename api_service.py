@@ -39,7 +39,17 @@ from services.gmail_fetcher_service import GmailFetcher as ServiceGmailFetcher
 from services.email_processor_service import EmailProcessorService
 from services.llm_service_interface import LLMServiceInterface
 from services.llm_service_factory import LLMServiceFactory
+from services.llm_metrics_collector import get_llm_metrics_collector
+from services.resource_governor import get_resource_governor
 from services.email_categorizer_service import EmailCategorizerService
+from services.budgeted_email_categorizer import BudgetedEmailCategorizer
+from services.llm_budget_service import LLMBudgetTracker
+from services.email_pipeline_config import EmailPipelineConfig
+from services.token_bucket_rate_limiter import TokenBucketRateLimiter
+from services.adaptive_scan_scheduler import AdaptiveScanScheduler
+from services.account_lease_service import AccountLeaseService
+from services.outbox_dispatcher import OutboxDispatcher
+from services.processed_message_filter import ProcessedMessageFilter
 from services.openai_llm_service import OpenAILLMService
 from services.categorize_emails_llm import LLMCategorizeEmails
 from services.rate_limiter_service import RateLimiterService
@@ -62,6 +72,9 @@ from models.oauth_models import (
 from services.oauth_flow_service import OAuthFlowService
 from services.ip_rate_limiter import IPRateLimiter
 from repositories.oauth_state_repository import OAuthStateRepository
+from repositories.account_lease_repository import AccountLeaseRepository
+from repositories.run_checkpoint_repository import RunCheckpointRepository
+from repositories.outbox_repository import OutboxRepository
 from validators.state_token_validator import StateTokenValidator
 from validators.redirect_uri_validator import RedirectUriValidator
 from models.standard_response import StandardResponse
@@ -379,10 +392,40 @@ validate_environment()
 BACKGROUND_PROCESSING_ENABLED = os.getenv("BACKGROUND_PROCESSING", "true").lower() == "true"
 BACKGROUND_SCAN_INTERVAL = int(os.getenv("BACKGROUND_SCAN_INTERVAL", "300"))  # 5 minutes default
 BACKGROUND_PROCESS_HOURS = int(os.getenv("BACKGROUND_PROCESS_HOURS", "2"))  # Look back 2 hours default
+BACKGROUND_MAX_WORKERS = max(1, int(os.getenv("BACKGROUND_MAX_WORKERS", "1")))  # Accounts processed concurrently
+BACKGROUND_ACCOUNT_START_RATE = float(os.getenv("BACKGROUND_ACCOUNT_START_RATE", "0.2"))  # Account starts (IMAP logins) per second
+# Adaptive per-account scan scheduling (intervals within the min/max bounds)
+BACKGROUND_ADAPTIVE_SCHEDULING = os.getenv("BACKGROUND_ADAPTIVE_SCHEDULING", "true").lower() == "true"
+BACKGROUND_MIN_SCAN_INTERVAL = int(os.getenv("BACKGROUND_MIN_SCAN_INTERVAL", str(max(60, BACKGROUND_SCAN_INTERVAL // 5))))
+BACKGROUND_MAX_SCAN_INTERVAL = int(os.getenv("BACKGROUND_MAX_SCAN_INTERVAL", str(BACKGROUND_SCAN_INTERVAL * 6)))
+# Database leases so several instances can share accounts without double-scanning
+BACKGROUND_ACCOUNT_LEASES = os.getenv("BACKGROUND_ACCOUNT_LEASES", "true").lower() == "true"
+BACKGROUND_LEASE_TTL_SECONDS = max(10, int(os.getenv("BACKGROUND_LEASE_TTL_SECONDS", "120")))
+# Background workers plus one slot for a force-processed account
+PROCESSING_MAX_CONCURRENT_SESSIONS = max(1, int(os.getenv("PROCESSING_MAX_CONCURRENT_SESSIONS", str(BACKGROUND_MAX_WORKERS + 1))))
+
+# Transactional outbox for run side effects (category stats/tallies, recommendation emails)
+OUTBOX_ENABLED = os.getenv("OUTBOX_ENABLED", "true").lower() == "true"
+OUTBOX_BATCH_SIZE = max(1, int(os.getenv("OUTBOX_BATCH_SIZE", "50")))
+OUTBOX_POLL_SECONDS = max(0.1, float(os.getenv("OUTBOX_POLL_SECONDS", "2")))
+OUTBOX_MAX_ATTEMPTS = max(1, int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8")))
+
+# Per-account Bloom filters in front of processed-email lookups
+DEDUP_FILTER_ENABLED = os.getenv("DEDUP_FILTER_ENABLED", "true").lower() == "true"
+DEDUP_FILTER_ERROR_RATE = min(0.5, max(0.0001, float(os.getenv("DEDUP_FILTER_ERROR_RATE", "0.01"))))
+DEDUP_FILTER_SNAPSHOT_DIR = os.getenv("DEDUP_FILTER_SNAPSHOT_DIR") or (
+    os.path.join(os.path.dirname(os.path.abspath(os.getenv("DATABASE_PATH"))), "dedup_filters")
+    if os.getenv("DATABASE_PATH") else None
+)
 
 # Category aggregation configuration
 ENABLE_CATEGORY_AGGREGATION = os.getenv("ENABLE_CATEGORY_AGGREGATION", "true").lower() == "true"
 CATEGORY_AGGREGATION_BUFFER_SIZE = int(os.getenv("CATEGORY_AGGREGATION_BUFFER_SIZE", "100"))
+CATEGORY_AGGREGATION_FLUSH_SECONDS = max(0.0, float(os.getenv("CATEGORY_AGGREGATION_FLUSH_SECONDS", "30")))
+CATEGORY_AGGREGATION_JOURNAL_DIR = os.getenv("CATEGORY_AGGREGATION_JOURNAL_DIR") or (
+    os.path.join(os.path.dirname(os.path.abspath(os.getenv("DATABASE_PATH"))), "category_tally_journal")
+    if os.getenv("DATABASE_PATH") else None
+)
 
 # OAuth configuration
 OAUTH_STATE_TTL_MINUTES = 10  # OAuth state tokens expire after 10 minutes
@@ -419,7 +462,10 @@ background_processor_service: Optional[BackgroundProcessorService] = None
 background_startup_task: Optional[asyncio.Task] = None
 
 # Global processing status manager instance
-processing_status_manager = ProcessingStatusManager(max_history=100)
+processing_status_manager = ProcessingStatusManager(
+    max_history=100,
+    max_concurrent_sessions=PROCESSING_MAX_CONCURRENT_SESSIONS
+)
 
 # Global WebSocket manager instance
 websocket_manager: Optional[StatusWebSocketManager] = None
@@ -429,12 +475,51 @@ websocket_manager: Optional[StatusWebSocketManager] = None
 default_db_path = os.getenv("DATABASE_PATH", DEFAULT_DB_PATH)
 settings_service = SettingsService(db_path=default_db_path)
 
+# Optional LLM record/replay (offline benchmarking without network access)
+LLM_RECORD_FILE = os.getenv("LLM_RECORD_FILE", "").strip()
+LLM_REPLAY_FILE = os.getenv("LLM_REPLAY_FILE", "").strip()
+LLM_REPLAY_LATENCY_MODE = os.getenv("LLM_REPLAY_LATENCY_MODE", "recorded").strip().lower()
+
+
+def _create_llm_service_factory():
+    """Create the LLM service factory, wrapped for recording or replay when configured."""
+    if LLM_REPLAY_FILE:
+        from services.llm_recording_store import LLMRecordingStore
+        from services.replay_llm_service import ReplayLLMServiceFactory
+        logger.info(f"🎞️  Replaying LLM responses from {LLM_REPLAY_FILE} (latency mode: {LLM_REPLAY_LATENCY_MODE})")
+        return ReplayLLMServiceFactory(
+            LLMRecordingStore(LLM_REPLAY_FILE),
+            latency_mode=LLM_REPLAY_LATENCY_MODE,
+            fixed_latency_seconds=float(os.getenv("LLM_REPLAY_FIXED_LATENCY_SECONDS", "0"))
+        )
+    if LLM_RECORD_FILE:
+        from services.llm_recording_store import LLMRecordingStore
+        from services.recording_llm_service import RecordingLLMServiceFactory
+        logger.info(f"⏺️  Recording LLM responses to {LLM_RECORD_FILE}")
+        return RecordingLLMServiceFactory(LLMServiceFactory(), LLMRecordingStore(LLM_RECORD_FILE))
+    return LLMServiceFactory()
+
+
 # Global LLM service factory instance
-llm_service_factory = LLMServiceFactory()
+llm_service_factory = _create_llm_service_factory()
 
 # Global email categorizer service instance
 email_categorizer_service = EmailCategorizerService(llm_service_factory)
 
+# Per-account LLM budgets (LLM_BUDGET_* env vars); unlimited when none are set
+llm_budget_tracker = LLMBudgetTracker()
+LLM_BUDGET_FALLBACK_MODEL = os.getenv("LLM_BUDGET_FALLBACK_MODEL", "").strip()
+if llm_budget_tracker.config.enabled:
+    logger.info(f"💸 LLM budgets enabled: {llm_budget_tracker.config}")
+    budgeted_email_categorizer = BudgetedEmailCategorizer(
+        email_categorizer_service,
+        llm_budget_tracker,
+        fallback_categorizer=email_categorizer_service if LLM_BUDGET_FALLBACK_MODEL else None,
+        fallback_model=LLM_BUDGET_FALLBACK_MODEL or None
+    )
+else:
+    budgeted_email_categorizer = None
+
 # Global WebSocket auth service instance
 websocket_auth_service = WebSocketAuthService(API_KEY)
 
@@ -479,8 +564,12 @@ def _initialize_category_aggregation():
         # Initialize aggregator
         category_aggregator = CategoryAggregator(
             repository=category_tally_repository,
-            buffer_size=CATEGORY_AGGREGATION_BUFFER_SIZE
+            buffer_size=CATEGORY_AGGREGATION_BUFFER_SIZE,
+            flush_interval=CATEGORY_AGGREGATION_FLUSH_SECONDS,
+            journal_dir=CATEGORY_AGGREGATION_JOURNAL_DIR
         )
+        if CATEGORY_AGGREGATION_FLUSH_SECONDS > 0:
+            category_aggregator.start()
 
         # Initialize cleanup service
         tally_cleanup_service = TallyCleanupService(
@@ -496,6 +585,37 @@ def _initialize_category_aggregation():
         return None
 
 
+# Outbox dispatcher delivering run side effects (created with the account email processor)
+outbox_dispatcher: Optional[OutboxDispatcher] = None
+
+
+def _initialize_outbox_dispatcher() -> Optional[OutboxDispatcher]:
+    """Create and start the outbox dispatcher, or None to deliver side effects inline."""
+    global outbox_dispatcher
+    if not OUTBOX_ENABLED:
+        return None
+    if outbox_dispatcher:
+        return outbox_dispatcher
+    try:
+        outbox_dispatcher = OutboxDispatcher(
+            OutboxRepository(settings_service.repository.engine),
+            batch_size=OUTBOX_BATCH_SIZE,
+            poll_interval=OUTBOX_POLL_SECONDS,
+            max_attempts=OUTBOX_MAX_ATTEMPTS
+        )
+    except Exception as e:
+        logger.error(f"❌ Outbox unavailable, delivering side effects inline: {e}")
+        return None
+    return outbox_dispatcher
+
+
+# Bloom filters of processed message IDs shared by all deduplication clients
+processed_message_filter: Optional[ProcessedMessageFilter] = (
+    ProcessedMessageFilter(snapshot_dir=DEDUP_FILTER_SNAPSHOT_DIR, error_rate=DEDUP_FILTER_ERROR_RATE)
+    if DEDUP_FILTER_ENABLED else None
+)
+
+
 # Initialize account email processor service after all dependencies are ready
 def _initialize_account_email_processor():
     """Initialize the account email processor service with all dependencies."""
@@ -506,13 +626,19 @@ def _initialize_account_email_processor():
         account_email_processor_service = AccountEmailProcessorService(
             processing_status_manager=processing_status_manager,
             settings_service=settings_service,
-            email_categorizer=email_categorizer_service,
+            email_categorizer=budgeted_email_categorizer or email_categorizer_service,
             api_token=CONTROL_TOKEN,
             llm_model=LLM_MODEL,
             account_category_client=AccountCategoryClient(repository=settings_service.repository),
-            deduplication_factory=EmailDeduplicationFactory()
+            deduplication_factory=EmailDeduplicationFactory(message_filter=processed_message_filter),
             # create_gmail_fetcher defaults to GmailFetcher constructor
+            llm_budget_tracker=llm_budget_tracker if budgeted_email_categorizer else None,
+            pipeline_config=EmailPipelineConfig.from_env(),
+            checkpoint_repository=RunCheckpointRepository(settings_service.repository.engine),
+            outbox=_initialize_outbox_dispatcher()
         )
+        if outbox_dispatcher:
+            outbox_dispatcher.start()
     return account_email_processor_service
 
 
@@ -640,6 +766,36 @@ def background_gmail_processor():
         next_execution_time = background_processor_service.get_next_execution_time()
 
 
+def _create_scan_scheduler() -> Optional[AdaptiveScanScheduler]:
+    """Create the adaptive scan scheduler, or None to scan every account each interval."""
+    if not BACKGROUND_ADAPTIVE_SCHEDULING:
+        return None
+    min_interval = max(1, min(BACKGROUND_MIN_SCAN_INTERVAL, BACKGROUND_SCAN_INTERVAL))
+    max_interval = max(BACKGROUND_MAX_SCAN_INTERVAL, BACKGROUND_SCAN_INTERVAL)
+    logger.info(f"🗓️ Adaptive scan scheduling enabled ({min_interval}s - {max_interval}s per account)")
+    return AdaptiveScanScheduler(
+        base_interval=BACKGROUND_SCAN_INTERVAL,
+        min_interval=min_interval,
+        max_interval=max_interval
+    )
+
+
+def _create_lease_manager() -> Optional[AccountLeaseService]:
+    """Create the account lease manager, or None to scan accounts without claiming them."""
+    if not BACKGROUND_ACCOUNT_LEASES:
+        return None
+    try:
+        lease_manager = AccountLeaseService(
+            AccountLeaseRepository(settings_service.repository.engine),
+            ttl_seconds=BACKGROUND_LEASE_TTL_SECONDS
+        )
+    except Exception as e:
+        logger.error(f"❌ Account leases unavailable, scanning without them: {e}")
+        return None
+    logger.info(f"🔒 Account leases enabled as {lease_manager.owner_id} (ttl {BACKGROUND_LEASE_TTL_SECONDS}s)")
+    return lease_manager
+
+
 def start_background_processor():
     """Start the background processing thread."""
     global background_thread, background_processor_service, next_execution_time
@@ -659,7 +815,15 @@ def start_background_processor():
             settings_service=settings_service,
             scan_interval=BACKGROUND_SCAN_INTERVAL,
             background_enabled=BACKGROUND_PROCESSING_ENABLED,
-            category_aggregator=aggregator
+            category_aggregator=aggregator,
+            max_workers=BACKGROUND_MAX_WORKERS,
+            account_rate_limiter=(
+                TokenBucketRateLimiter(BACKGROUND_ACCOUNT_START_RATE, burst=BACKGROUND_MAX_WORKERS)
+                if BACKGROUND_ACCOUNT_START_RATE > 0 else None
+            ),
+            scheduler=_create_scan_scheduler(),
+            lease_manager=_create_lease_manager(),
+            outbox=outbox_dispatcher
         )
 
         background_thread = threading.Thread(
@@ -1110,6 +1274,166 @@ async def get_processing_statistics(x_api_key: Optional[str] = Header(None)):
     }
 
 
+@app.get("/api/llm/metrics", tags=["processing-status"])
+async def get_llm_metrics(x_api_key: Optional[str] = Header(None)):
+    """
+    Get LLM call metrics
+
+    Returns in-process aggregates of LLM calls (latency histograms, token usage,
+    retries and outcomes) per model and per account since the service started.
+    """
+    verify_api_key(x_api_key)
+
+    return {
+        "llm_metrics": get_llm_metrics_collector().get_snapshot(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+@app.get("/api/outbox", tags=["processing-status"])
+async def get_outbox_metrics(x_api_key: Optional[str] = Header(None)):
+    """
+    Get outbox metrics
+
+    Returns the side effects (category statistics, tallies and recommendation
+    emails) pending, delivered and given up on, and the dispatcher's counters.
+    """
+    verify_api_key(x_api_key)
+
+    if not outbox_dispatcher:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Outbox is not enabled"
+        )
+
+    return {
+        "outbox": outbox_dispatcher.get_metrics(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+@app.get("/api/dedup/filter", tags=["processing-status"])
+async def get_dedup_filter_metrics(x_api_key: Optional[str] = Header(None)):
+    """
+    Get processed-message filter metrics
+
+    Returns how many deduplication lookups the per-account Bloom filters
+    answered without the database, and their observed and estimated
+    false-positive rates.
+    """
+    verify_api_key(x_api_key)
+
+    if not processed_message_filter:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Processed-message filter is not enabled"
+        )
+
+    return {
+        "filter": processed_message_filter.get_metrics(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+@app.get("/api/categories/aggregator", tags=["processing-status"])
+async def get_category_aggregator_metrics(x_api_key: Optional[str] = Header(None)):
+    """
+    Get category aggregator metrics
+
+    Returns how many category counts are buffered and how many flushes to
+    the daily tallies ran, with their latency and failures.
+    """
+    verify_api_key(x_api_key)
+
+    if not category_aggregator:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Category aggregation is not initialized"
+        )
+
+    return {
+        "aggregator": category_aggregator.get_metrics(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+@app.get("/api/resources/governor", tags=["processing-status"])
+async def get_resource_governor_metrics(x_api_key: Optional[str] = Header(None)):
+    """
+    Get resource governor metrics
+
+    Returns the limits, current usage, queued waiters and wait times of the
+    IMAP, LLM and database slots shared by all processing in this instance.
+    """
+    verify_api_key(x_api_key)
+
+    return {
+        "resources": get_resource_governor().get_metrics(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+@app.get("/api/processing/runs/{run_id}/llm-usage", tags=["processing-status"])
+async def get_processing_run_llm_usage(
+    run_id: str = Path(..., pattern=r"^run-\d+$", description="Processing run ID (format: run-<id>)"),
+    x_api_key: Optional[str] = Header(None)
+):
+    """
+    Get the LLM usage recorded for a processing run
+
+    Returns the per-model call counts, token usage, latency percentiles and
+    estimated cost persisted when the run completed.
+    """
+    verify_api_key(x_api_key)
+
+    try:
+        from services.database_service import DatabaseService
+        usage = DatabaseService(repository=settings_service.repository).get_processing_run_llm_usage(run_id)
+    except SQLAlchemyError as e:
+        logger.error(f"Failed to load LLM usage for {run_id}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to load LLM usage"
+        )
+
+    return {
+        "run_id": run_id,
+        "llm_usage": usage,
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+@app.get("/api/processing/runs/{run_id}/budget-hits", tags=["processing-status"])
+async def get_processing_run_budget_hits(
+    run_id: str = Path(..., pattern=r"^run-\d+$", description="Processing run ID (format: run-<id>)"),
+    x_api_key: Optional[str] = Header(None)
+):
+    """
+    Get the per-account budget hits recorded for a processing run
+
+    A run that reached its time or message budget stops early with state
+    'partial'; the hit records why, how far it got and where the next run
+    continues.
+    """
+    verify_api_key(x_api_key)
+
+    try:
+        from services.database_service import DatabaseService
+        hits = DatabaseService(repository=settings_service.repository).get_processing_run_budget_hits(run_id)
+    except SQLAlchemyError as e:
+        logger.error(f"Failed to load budget hits for {run_id}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to load budget hits"
+        )
+
+    return {
+        "run_id": run_id,
+        "budget_hits": hits,
+        "timestamp": datetime.now().isoformat()
+    }
+
+
 @app.get("/api/status", response_model=UnifiedStatusResponse, tags=["processing-status"])
 async def get_unified_status(
     include_recent: bool = Query(True, description="Include recent processing runs"),
@@ -1157,6 +1481,7 @@ async def get_unified_status(
         # Get processing status
         is_processing = processing_status_manager.is_processing()
         current_status = processing_status_manager.get_current_status()
+        aggregate_status = processing_status_manager.get_aggregate_status()
 
         # Get background thread info
         thread_info = None
@@ -1175,6 +1500,10 @@ async def get_unified_status(
             configuration=BackgroundConfiguration(
                 scan_interval_seconds=BACKGROUND_SCAN_INTERVAL,
                 process_hours=settings_service.get_lookback_hours()
+            ),
+            schedule=(
+                background_processor_service.scheduler.get_schedule()
+                if background_processor_service and background_processor_service.scheduler else None
             )
         )
 
@@ -1194,6 +1523,8 @@ async def get_unified_status(
         return UnifiedStatusResponse(
             is_processing=is_processing,
             current_status=current_status,
+            active_sessions=aggregate_status['sessions'],
+            max_concurrent_sessions=aggregate_status['max_concurrent_sessions'],
             background=background_status,
             recent_runs=recent_runs,
             statistics=statistics,
@@ -1364,12 +1695,8 @@ async def create_sample_data(x_api_key: Optional[str] = Header(None), report_typ
             }
             sample_emails.append(email)
         
-        # Save to current tracking file
-        tracking_file = Path(summary_service.current_file)
-        tracking_file.parent.mkdir(exist_ok=True)
-        
-        with open(tracking_file, 'w') as f:
-            json.dump(sample_emails, f, indent=2)
+        # Replace the tracked emails with the samples
+        summary_service.replace_tracked_data(sample_emails)
         
         return {
             "status": "success",
@@ -2362,7 +2689,10 @@ async def verify_account_password(
 
         try:
             conn = connection_service.connect()
-            conn.logout()
+            try:
+                conn.logout()
+            finally:
+                connection_service.release()
 
             response = StandardResponse(
                 status="success",
@@ -2652,15 +2982,13 @@ async def force_process_account(
                 }
             )
 
-        # Check if any processing is currently active
+        # Check for conflicting processing sessions
         global processing_status_manager
 
         if processing_status_manager.is_processing():
-            current_email = processing_status_manager.get_processing_email()
-            current_status = processing_status_manager.get_current_status()
-
-            # Check if it's the same account being requested
-            if current_email and current_email.lower() == email_address.lower():
+            # Check if the same account is already being processed
+            if processing_status_manager.is_processing_account(email_address):
+                current_status = processing_status_manager.get_current_status(email_address=email_address)
                 logger.warning(f"Account {email_address} is already being processed")
                 raise HTTPException(
                     status_code=status.HTTP_409_CONFLICT,
@@ -2677,19 +3005,25 @@ async def force_process_account(
                         )
                     ).model_dump()
                 )
-            else:
-                # Different account is being processed
-                logger.warning(f"Cannot process {email_address}: {current_email} is currently being processed")
+            elif not processing_status_manager.has_capacity():
+                # Other accounts are being processed and every session slot is taken
+                active_accounts = ", ".join(processing_status_manager.get_active_accounts())
+                logger.warning(
+                    f"Cannot process {email_address}: concurrent session limit reached ({active_accounts})"
+                )
                 raise HTTPException(
                     status_code=status.HTTP_409_CONFLICT,
                     detail=ForceProcessResponse(
                         status="already_processing",
-                        message=f"Cannot process {email_address}: another account ({current_email}) is currently being processed",
+                        message=(
+                            f"Cannot process {email_address}: concurrent processing limit reached, "
+                            f"other accounts ({active_accounts}) are currently being processed"
+                        ),
                         email_address=email_address,
                         timestamp=datetime.now().isoformat(),
                         processing_info=ProcessingInfo(
-                            state=current_status.get('state') if current_status else None,
-                            current_step=f"Processing {current_email}",
+                            state=None,
+                            current_step=f"Processing {active_accounts}",
                             status_url="/api/status",
                             websocket_url="/ws/status"
                         )
@@ -2716,6 +3050,22 @@ async def force_process_account(
         # Determine lookback hours
         lookback_hours = hours if hours is not None else settings_service.get_lookback_hours()
 
+        # With adaptive scheduling, run on the background worker pool ahead of scheduled accounts.
+        # A custom lookback window still needs a dedicated run below.
+        if hours is None and background_processor_service and background_processor_service.request_force_scan(email_address):
+            logger.info(f"Queued prioritized processing for {email_address}")
+            return ForceProcessResponse(
+                status="success",
+                message=f"Email processing queued for {email_address} ahead of scheduled accounts",
+                email_address=email_address,
+                timestamp=datetime.now().isoformat(),
+                processing_info=ProcessingInfo(
+                    hours=lookback_hours,
+                    status_url="/api/status",
+                    websocket_url="/ws/status"
+                )
+            )
+
         # Initialize account email processor service if not already initialized
         processor_service = _initialize_account_email_processor()
 
@@ -3116,11 +3466,25 @@ async def shutdown_event():
         # Stop background processor if running
         stop_background_processor()
 
-        # Flush category aggregator if enabled
+        # Deliver queued side effects that are already due before the aggregator's final flush
+        if outbox_dispatcher:
+            try:
+                logger.info("Stopping outbox dispatcher...")
+                outbox_dispatcher.stop()
+            except Exception as e:
+                logger.exception("Error stopping outbox dispatcher")
+
+        if processed_message_filter:
+            try:
+                processed_message_filter.save_snapshots()
+            except Exception as e:
+                logger.exception("Error saving processed-message filter snapshots")
+
+        # Stop the category aggregator's flusher and flush what is buffered
         if category_aggregator:
             try:
                 logger.info("Flushing category aggregator...")
-                category_aggregator.flush()
+                category_aggregator.stop()
                 logger.info("Category aggregator flushed successfully")
             except Exception as e:
                 logger.exception("Error flushing category aggregator")
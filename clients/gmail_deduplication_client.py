@@ -16,6 +16,7 @@ from clients.email_deduplication_client_interface import EmailDeduplicationClien
 from models.database import ProcessedEmailLog
 from models.processed_email_log_model import ProcessedEmailLogModel
 from repositories.database_repository_interface import DatabaseRepositoryInterface
+from services.processed_message_filter import ProcessedMessageFilter
 
 logger = get_logger(__name__)
 
@@ -28,7 +29,13 @@ class GmailDeduplicationClient(EmailDeduplicationClientInterface):
     processing when the application restarts or containers are rebuilt.
     """
     
-    def __init__(self, repository: DatabaseRepositoryInterface, account_email: str, session: Optional[Session] = None):
+    def __init__(
+        self,
+        repository: DatabaseRepositoryInterface,
+        account_email: str,
+        session: Optional[Session] = None,
+        message_filter: Optional[ProcessedMessageFilter] = None
+    ):
         """
         Initialize the deduplication service with dependency injection.
 
@@ -36,6 +43,7 @@ class GmailDeduplicationClient(EmailDeduplicationClientInterface):
             repository: Database repository for data access
             account_email: Email account being processed (for scoping)
             session: Optional SQLAlchemy session (legacy, for backward compatibility)
+            message_filter: Optional Bloom filters that answer "definitely new" without a database lookup
         """
         self.repository = repository
         self.account_email = account_email
@@ -47,6 +55,14 @@ class GmailDeduplicationClient(EmailDeduplicationClientInterface):
             )
         self.session = session  # Keep for backward compatibility with legacy code
 
+        self.message_filter = message_filter
+        if self.message_filter:
+            try:
+                self.message_filter.sync(self.account_email, self.repository)
+            except Exception as e:
+                logger.warning(f"⚠️ Processed-message filter unavailable for {self.account_email}, using the database only: {e}")
+                self.message_filter = None
+
         self.stats = {
             'checked': 0,
             'duplicates_found': 0,
@@ -74,9 +90,17 @@ class GmailDeduplicationClient(EmailDeduplicationClientInterface):
         
         self.stats['checked'] += 1
         
+        if self.message_filter and not self.message_filter.might_contain(self.account_email, message_id):
+            self.stats['new_emails'] += 1
+            logger.debug(f"🆕 New email detected: {message_id} for {self.account_email}")
+            return False
+        
         try:
             is_processed = self.repository.is_email_processed(self.account_email, message_id.strip())
             
+            if self.message_filter and not is_processed:
+                self.message_filter.record_false_positives(self.account_email)
+            
             if is_processed:
                 self.stats['duplicates_found'] += 1
                 logger.debug(f"📧 Email already processed: {message_id} for {self.account_email}")
@@ -118,6 +142,8 @@ class GmailDeduplicationClient(EmailDeduplicationClientInterface):
             )
             
             self.stats['logged'] += 1
+            if self.message_filter:
+                self.message_filter.add(self.account_email, [message_id])
             logger.info(f"✅ Marked email as processed: {self.account_email} -> {message_id}")
             # Return Pydantic model built from ORM record (requires from_attributes)
             return ProcessedEmailLogModel.model_validate(record)
@@ -143,17 +169,36 @@ class GmailDeduplicationClient(EmailDeduplicationClientInterface):
         if not emails:
             return []
         
+        message_ids = [(email.get('Message-ID') or '').strip() for email in emails]
+        to_check = [message_id for message_id in message_ids if message_id]
+        if self.message_filter:
+            # Only emails the filter cannot rule out need the database
+            to_check = [m for m in to_check if self.message_filter.might_contain(self.account_email, m)]
+        
+        # One set-based lookup for the whole batch instead of a query per email
+        try:
+            processed = self.repository.get_processed_message_ids(self.account_email, to_check) if to_check else set()
+            if self.message_filter:
+                self.message_filter.record_false_positives(self.account_email, len(set(to_check) - processed))
+        except Exception as e:
+            logger.error(f"❌ Error checking which emails were processed: {e}")
+            self.stats['errors'] += 1
+            processed = set()  # Assume not processed on error to avoid missing emails
+        
         new_emails = []
         
-        for email in emails:
-            message_id = email.get('Message-ID', '')
-            
+        for email, message_id in zip(emails, message_ids):
             if not message_id:
                 logger.warning(f"Email without Message-ID found, processing as new: {email.get('Subject', 'Unknown')}")
                 new_emails.append(email)
                 continue
             
-            if not self.is_email_processed(message_id):
+            self.stats['checked'] += 1
+            if message_id in processed:
+                self.stats['duplicates_found'] += 1
+                logger.debug(f"📧 Email already processed: {message_id} for {self.account_email}")
+            else:
+                self.stats['new_emails'] += 1
                 new_emails.append(email)
         
         logger.info(f"📊 Deduplication results for {self.account_email}:")
@@ -167,50 +212,34 @@ class GmailDeduplicationClient(EmailDeduplicationClientInterface):
         """
         Mark multiple emails as processed in a single transaction.
         
+        Emails that were already marked (e.g. from an overlapping scan window)
+        are skipped by the database's upsert and still count as successful.
+        
         Args:
             message_ids: List of Message-ID values to mark as processed
             
         Returns:
             Tuple of (successful_count, error_count)
         """
-        if not message_ids:
+        valid_ids = [message_id.strip() for message_id in message_ids or [] if message_id and message_id.strip()]
+        if not valid_ids:
             return 0, 0
         
-        successful = 0
-        errors = 0
-        
         try:
-            records = []
-            for message_id in message_ids:
-                if message_id and message_id.strip():
-                    records.append(ProcessedEmailLog(
-                        account_email=self.account_email,
-                        message_id=message_id.strip(),
-                        processed_at=datetime.utcnow()
-                    ))
-            
-            if records:
-                self.session.add_all(records)
-                self.session.commit()
-                successful = len(records)
-                self.stats['logged'] += successful
-                
-                logger.info(f"✅ Bulk marked {successful} emails as processed for {self.account_email}")
-            
+            inserted, skipped = self.repository.bulk_mark_emails_processed(self.account_email, valid_ids)
         except Exception as e:
-            self.session.rollback()
             logger.error(f"❌ Bulk marking failed for {self.account_email}: {e}")
-            
-            # Fallback to individual processing
-            for message_id in message_ids:
-                try:
-                    # Will raise on error (including duplicates); count successes/errors accordingly
-                    self.mark_email_as_processed(message_id)
-                    successful += 1
-                except Exception:
-                    errors += 1
+            self.stats['errors'] += len(valid_ids)
+            return 0, len(valid_ids)
         
-        return successful, errors
+        self.stats['logged'] += inserted
+        if self.message_filter:
+            self.message_filter.add(self.account_email, valid_ids)
+        logger.info(
+            f"✅ Bulk marked {inserted} emails as processed for {self.account_email}"
+            + (f" ({skipped} already processed)" if skipped else "")
+        )
+        return inserted + skipped, 0
     
     def get_processed_count(self, days_back: Optional[int] = None) -> int:
         """
@@ -273,6 +302,8 @@ class GmailDeduplicationClient(EmailDeduplicationClientInterface):
             self.session.commit()
             
             if deleted_count > 0:
+                if self.message_filter:
+                    self.message_filter.invalidate(self.account_email)
                 logger.info(f"🧹 Cleaned up {deleted_count} old processed email records for {self.account_email}")
             
             return deleted_count
@@ -296,6 +327,8 @@ class GmailDeduplicationClient(EmailDeduplicationClientInterface):
             ).delete()
             
             self.session.commit()
+            if self.message_filter:
+                self.message_filter.invalidate(self.account_email)
             
             logger.warning(f"🗑️  RESET: Deleted {deleted_count} processed email records for {self.account_email}")
             return True
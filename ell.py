@@ -4,7 +4,7 @@
 def init(verbose=False, store=None):
     return None
 
-def simple(model=None, temperature=None):
+def simple(model=None, temperature=None, **kwargs):
     def decorator(func):
         return func
     return decorator
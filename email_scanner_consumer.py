@@ -7,6 +7,8 @@ import os
 import re
 import time
 import argparse
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from kafka import KafkaConsumer
 from imapclient import IMAPClient
 from email import message_from_bytes
@@ -19,6 +21,10 @@ parser = argparse.ArgumentParser(description="Email Scanner Consumer")
 parser.add_argument("--base-url", default="10.1.1.144:11434", help="Base URL for the OpenAI API")
 parser.add_argument("--consumer-group", default="email-scanner-group", help="Kafka consumer group name")
 parser.add_argument("--delay-on-error-seconds", default=10, help="Delay on error seconds")
+parser.add_argument("--batch-mode", action="store_true", help="Consume records in batches with one IMAP fetch/expunge per batch")
+parser.add_argument("--batch-size", type=int, default=50, help="Maximum Kafka records per batch in batch mode")
+parser.add_argument("--poll-timeout-ms", type=int, default=1000, help="Kafka poll timeout in batch mode")
+parser.add_argument("--max-workers", type=int, default=4, help="Concurrent classification prompts in batch mode")
 args = parser.parse_args()
 
 ell.init(verbose=False, store='./logdir')
@@ -226,13 +232,16 @@ def get_sender_email(email_message):
         # Fallback: convert to string
         return str(sender)
     
-def set_email_label(client, msg_id, label):
+def normalize_label(label):
     if label.lower() == "spam":
         label = "Junk"
     # Remove surrounding quotes if present
     label = label.strip("\"'")
     # Capitalize each word in the label
-    label = capitalize_words(label)
+    return capitalize_words(label)
+
+def set_email_label(client, msg_id, label):
+    label = normalize_label(label)
     logger.info(f"Setting label '{label}' for email {msg_id}")
     try:
         client.add_gmail_labels(msg_id, [label])
@@ -392,6 +401,150 @@ def process_email(client, msg_id, category_counter=None):
     
     return category
 
+
+# Actions decided for an email by the classification cascade
+ACTION_KEEP_UNREAD = "keep_unread"
+ACTION_DELETE = "delete"
+ACTION_SKIP = "skip"
+
+
+def _decide_for_me(category):
+    category = category.replace('"', '').replace("'", "").replace('*', '').replace('=', '').replace('+', '').replace('-', '').replace('_', '')
+    category_lower = category.lower()
+    if category_lower != "other" and len(category_lower) > 4 and category_lower in ok:
+        return category, ACTION_KEEP_UNREAD
+    return category, None
+
+def _decide_marketing(category):
+    category = category.replace('"', '').replace("'", "")
+    category_lower = category.lower()
+    if category_lower != "other" and len(category_lower) > 4 and len(category_lower) <= 40:
+        return category, ACTION_DELETE
+    return category, None
+
+def _decide_generic(category):
+    category = category.replace('"', '').replace("'", "")
+    if len(category) > 4 and len(category) < 40:
+        return category, ACTION_DELETE
+    return category, ACTION_SKIP
+
+# Same precedence as the sequential cascade in process_email
+CASCADE = (
+    (lambda contents: categorize_email_ell_for_me(contents), _decide_for_me),
+    (lambda contents: categorize_email_ell_marketing(contents), _decide_marketing),
+    (lambda contents: categorize_email_ell_generic(contents), _decide_generic),
+)
+
+def submit_cascade(executor, contents, cascade=CASCADE):
+    """Start every prompt of the cascade concurrently; returns the futures in precedence order."""
+    return [executor.submit(prompt, contents) for prompt, _ in cascade]
+
+def resolve_cascade(futures, cascade=CASCADE):
+    """
+    Resolve a concurrently started cascade in precedence order.
+
+    As soon as a higher-precedence prompt gives a decisive answer the
+    remaining prompts are cancelled (queued prompts never run; prompts
+    already running are simply ignored).
+
+    Returns:
+        (category, action) where action is one of ACTION_KEEP_UNREAD, ACTION_DELETE, ACTION_SKIP
+    """
+    category, action = "", ACTION_SKIP
+    for index, (future, (_, decide)) in enumerate(zip(futures, cascade)):
+        category, action = decide(future.result())
+        if action is not None:
+            for pending in futures[index + 1:]:
+                pending.cancel()
+            return category, action
+    return category, ACTION_SKIP
+
+def fetch_batch(client, msg_ids):
+    """Fetch all messages of a batch with a single IMAP FETCH."""
+    return client.fetch(msg_ids, ['INTERNALDATE', 'RFC822', 'FLAGS', 'X-GM-LABELS'])
+
+def apply_batch_actions(client, decisions):
+    """
+    Apply the batch's labels and actions with one IMAP command per kind of action.
+
+    Unlike the per-message helpers, errors are raised so the caller does not
+    commit Kafka offsets for a batch whose actions failed.
+
+    :param decisions: mapping of msg_id -> (category, action)
+    """
+    by_label = defaultdict(list)
+    unread, deleted = [], []
+    for msg_id, (category, action) in decisions.items():
+        if action == ACTION_SKIP:
+            continue
+        by_label[normalize_label(category)].append(msg_id)
+        if action == ACTION_KEEP_UNREAD:
+            unread.append(msg_id)
+        elif action == ACTION_DELETE:
+            deleted.append(msg_id)
+
+    for label, msg_ids in by_label.items():
+        logger.info(f"Setting label '{label}' for {len(msg_ids)} emails")
+        client.add_gmail_labels(msg_ids, [label])
+    if unread:
+        logger.info(f"Marking {len(unread)} emails as unread")
+        client.remove_flags(unread, [b'\\Seen'])
+    if deleted:
+        logger.info(f"Deleting {len(deleted)} emails with a single expunge")
+        client.delete_messages(deleted)
+        client.expunge()
+
+def process_email_batch(client, msg_ids, executor, category_counter=None, payloads=None):
+    """
+    Classify and act on a batch of messages.
+
+    Messages whose content was embedded in the Kafka record by the producer
+    (see send_email_to_kafka.fetch_email_payloads) are classified without
+    touching IMAP; the rest are fetched with one FETCH. Every message's
+    cascade prompts run concurrently on the executor, and labels/flags/deletes
+    are applied with one command per action kind and a single expunge.
+
+    :param payloads: Optional mapping of msg_id -> embedded record payload
+    :return: mapping of msg_id -> category for the messages that were classified
+    """
+    payloads = payloads or {}
+    to_fetch = [msg_id for msg_id in msg_ids if msg_id not in payloads]
+    fetch_data = fetch_batch(client, to_fetch) if to_fetch else {}
+
+    pending = {}
+    for msg_id in msg_ids:
+        payload = payloads.get(msg_id)
+        if payload is not None:
+            existing_email_labels = payload.get('labels')
+            seen = existing_email_labels and any(label != '\\Important' for label in existing_email_labels)
+            subject, body = payload.get('subject'), payload.get('body', '')
+        else:
+            data = fetch_data.get(msg_id)
+            if not data:
+                logger.warning(f"Message {msg_id} not found in mailbox, skipping")
+                continue
+            existing_email_labels = data.get(b'X-GM-LABELS')
+            # The GMail label '\Important' is special and should be ignored when checking for seen labels
+            seen = existing_email_labels and any(label != b'\\Important' for label in existing_email_labels)
+            email_message = message_from_bytes(data[b'RFC822'])
+            subject, body = email_message['Subject'], get_email_body(email_message)
+
+        if seen:
+            logger.info(f"Message {msg_id} was previously seen. Labels: {existing_email_labels}")
+            continue
+
+        contents = remove_encoded_content(remove_images_from_email(remove_http_links(f"{subject}. {body}")))
+        pending[msg_id] = submit_cascade(executor, contents)
+
+    decisions = {msg_id: resolve_cascade(futures) for msg_id, futures in pending.items()}
+    apply_batch_actions(client, decisions)
+
+    for msg_id, (category, action) in decisions.items():
+        logger.info(f"Email {msg_id} - Category: {category} - Action: {action}")
+        if category_counter is not None:
+            category_counter[category] += 1
+    return {msg_id: category for msg_id, (category, _) in decisions.items()}
+
 def listen_to_kafka_topic(topic: str = 'gmail_messages', bootstrap_servers: str = 'localhost:9092', consumer_group: str = 'email-scanner-group', delay_on_error_seconds: str = '10'):
     """
     Listen to a Kafka topic and print incoming messages.
@@ -436,7 +589,78 @@ def listen_to_kafka_topic(topic: str = 'gmail_messages', bootstrap_servers: str
         consumer.close()
         client.logout()
         logger.info("Kafka consumer closed.")
+def listen_to_kafka_topic_batched(topic: str = 'gmail_messages', bootstrap_servers: str = 'localhost:9092', consumer_group: str = 'email-scanner-group', delay_on_error_seconds: str = '10', batch_size: int = 50, poll_timeout_ms: int = 1000, max_workers: int = 4):
+    """
+    Listen to a Kafka topic and process records in batches.
+
+    Offsets are committed manually, only after the batch's IMAP actions
+    succeeded. A failed batch is rewound so its records are redelivered.
+
+    :param batch_size: Maximum number of records per poll/batch
+    :param poll_timeout_ms: How long to wait for records on each poll
+    :param max_workers: Number of classification prompts run concurrently
+    """
+    consumer = KafkaConsumer(
+        topic,
+        bootstrap_servers=[bootstrap_servers],
+        group_id=consumer_group,
+        auto_offset_reset='latest',
+        enable_auto_commit=False,
+        max_poll_records=batch_size,
+        value_deserializer=lambda x: json.loads(x.decode('utf-8'))
+    )
+
+    client = get_imap_client()
+    client.select_folder('INBOX')
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ell-prompt")
+
+    logger.info(f"Starting to listen to Kafka topic in batch mode: {topic} (batch size {batch_size})")
+
+    try:
+        while True:
+            records_by_partition = consumer.poll(timeout_ms=poll_timeout_ms, max_records=batch_size)
+            if not records_by_partition:
+                continue
+
+            first_offsets = {}
+            msg_ids = []
+            payloads = {}
+            for partition, records in records_by_partition.items():
+                first_offsets[partition] = records[0].offset
+                for record in records:
+                    msg_id = record.value['msg_id']
+                    if msg_id not in msg_ids:
+                        msg_ids.append(msg_id)
+                    if 'body' in record.value:
+                        payloads[msg_id] = record.value
+            logger.info(f"Received batch of {len(msg_ids)} messages from {len(first_offsets)} partitions")
+
+            try:
+                process_email_batch(client, msg_ids, executor, payloads=payloads)
+                consumer.commit()
+            except Exception as e:
+                logger.error(f"Error processing batch, offsets not committed: {e}")
+                for partition, offset in first_offsets.items():
+                    consumer.seek(partition, offset)
+                client = get_imap_client()
+                client.select_folder('INBOX')
+                delay = int(delay_on_error_seconds)
+                logger.info(f"Sleeping for {delay} seconds because of above error")
+                time.sleep(delay)
+
+            logger.info("-" * 50)
+
+    except KeyboardInterrupt:
+        logger.info("Listener stopped by user.")
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        consumer.close()
+        client.logout()
+        logger.info("Kafka consumer closed.")
 
 if __name__ == "__main__":
     topic = 'gmail_messages'
-    listen_to_kafka_topic(topic=topic, bootstrap_servers="localhost:9092", consumer_group=args.consumer_group, delay_on_error_seconds=args.delay_on_error_seconds)
+    if args.batch_mode:
+        listen_to_kafka_topic_batched(topic=topic, bootstrap_servers="localhost:9092", consumer_group=args.consumer_group, delay_on_error_seconds=args.delay_on_error_seconds, batch_size=args.batch_size, poll_timeout_ms=args.poll_timeout_ms, max_workers=args.max_workers)
+    else:
+        listen_to_kafka_topic(topic=topic, bootstrap_servers="localhost:9092", consumer_group=args.consumer_group, delay_on_error_seconds=args.delay_on_error_seconds)
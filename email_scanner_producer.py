@@ -9,7 +9,12 @@ from imapclient import IMAPClient
 from email import message_from_bytes
 from bs4 import BeautifulSoup
 from anthropic import Anthropic
-from send_email_to_kafka import send_email_to_kafka
+from send_email_to_kafka import (
+    send_email_to_kafka,
+    create_batching_producer,
+    fetch_email_payloads,
+    publish_email_payloads,
+)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -74,7 +79,25 @@ def get_imap_client():
     logger.info("Successfully connected to Gmail IMAP server")
     return client
 
-def get_recent_emails(client, hours):
+def send_embedded_emails_to_kafka(client, msg_ids, producer, account, chunk_size=100):
+    """
+    Fetch headers and truncated bodies in bulk and publish them embedded in the Kafka records.
+
+    Consumers can classify from the record alone and only need IMAP to act on a message.
+    """
+    total_messages = len(msg_ids)
+    published = 0
+    for start in range(0, total_messages, chunk_size):
+        chunk = msg_ids[start:start + chunk_size]
+        logger.info(f"Fetching and publishing emails {start + 1}-{start + len(chunk)} of {total_messages}")
+        try:
+            payloads = fetch_email_payloads(client, chunk, account, chunk_size=chunk_size)
+            published += publish_email_payloads(producer, payloads)
+        except Exception as e:
+            logger.info(f"Problem publishing emails {start + 1}-{start + len(chunk)}: {e}")
+    return published
+
+def get_recent_emails(client, hours, producer=None, account=None):
     logger.info("Selecting INBOX folder...")
     client.select_folder('INBOX')
     time_ago = datetime.now() - timedelta(hours=hours)
@@ -82,7 +105,11 @@ def get_recent_emails(client, hours):
     logger.info(f"Searching for emails since {date_criterion}...")
     messages = client.search(['SINCE', date_criterion, 'NOT', 'KEYWORD', 'bogus-asdf'])
     logger.info(f"Found {len(messages)} recent emails")
-    
+
+    if producer is not None:
+        send_embedded_emails_to_kafka(client, messages, producer, account)
+        return None
+
     total_messages = len(messages)
     for index, msg_id in enumerate(messages, 1):
         logger.info(f"Processing {index} of {total_messages} emails, ID: {msg_id}")
@@ -97,12 +124,14 @@ def get_recent_emails(client, hours):
 from datetime import datetime
 
 # The expected format for the date? dd-MMM-yyyy
-def get_emails_by_date_range(start_date_str, end_date_str):
+def get_emails_by_date_range(start_date_str, end_date_str, producer=None, account=None):
     """
     Fetch email message IDs within a specified date range.
 
     :param start_date_str: Start date (inclusive) as a string in format "dd-MMM-yyyy"
     :param end_date_str: End date (inclusive) as a string in format "dd-MMM-yyyy"
+    :param producer: Optional batching producer; when given, message content is embedded in the records
+    :param account: Account used as the record key when embedding
     :return: List of message IDs
     """
     client = get_imap_client()    
@@ -120,6 +149,10 @@ def get_emails_by_date_range(start_date_str, end_date_str):
     
     total_messages = len(messages)
     logger.info(f"Found {total_messages} emails within the specified date range")
+    if producer is not None:
+        send_embedded_emails_to_kafka(client, messages, producer, account)
+        return messages
+
     for index, msg_id in enumerate(messages, 1):
         logger.info(f"Processing {index} of {total_messages} emails, ID: {msg_id}")
         try:
@@ -130,11 +163,11 @@ def get_emails_by_date_range(start_date_str, end_date_str):
     return messages
 
 
-def send_recent_emails_to_kafka(hours):
+def send_recent_emails_to_kafka(hours, producer=None, account=None):
     client = get_imap_client()    
     client.select_folder('INBOX')
     time_ago = datetime.now() - timedelta(hours=hours)
-    get_recent_emails(client, hours)
+    get_recent_emails(client, hours, producer=producer, account=account)
 
 
 def main():
@@ -143,6 +176,11 @@ def main():
     parser.add_argument("--hours", type=int, default=1, help="Number of hours to look back for emails")
     parser.add_argument("--start", help="Start date")
     parser.add_argument("--end", help="End date")
+    parser.add_argument("--embed-payloads", action="store_true", help="Embed headers and truncated bodies in the Kafka records")
+    parser.add_argument("--kafka-server", default="localhost:9092", help="Kafka server address for --embed-payloads")
+    parser.add_argument("--linger-ms", type=int, default=50, help="Producer linger.ms for --embed-payloads")
+    parser.add_argument("--batch-size", type=int, default=256 * 1024, help="Producer batch size in bytes for --embed-payloads")
+    parser.add_argument("--compression", default="gzip", help="Producer compression codec for --embed-payloads")
     args = parser.parse_args()
 
     hours = args.hours
@@ -163,13 +201,27 @@ def main():
             logger.error("Invalid end date format. Expected format: dd-MMM-yyyy. Example: 01-Jan-2021")
             return
 
-    if hours > 0:
-        logger.info(f"Fetching emails from the last {hours} hour(s)")
-        send_recent_emails_to_kafka(hours)
-
-    if start != "" and end != "":
-        logger.info(f"Fetching emails from {start} to {end}")
-        get_emails_by_date_range(start, end)
+    producer = None
+    account = os.environ.get('GMAIL_EMAIL')
+    if args.embed_payloads:
+        producer = create_batching_producer(
+            args.kafka_server,
+            linger_ms=args.linger_ms,
+            batch_size=args.batch_size,
+            compression_type=args.compression
+        )
+
+    try:
+        if hours > 0:
+            logger.info(f"Fetching emails from the last {hours} hour(s)")
+            send_recent_emails_to_kafka(hours, producer=producer, account=account)
+
+        if start != "" and end != "":
+            logger.info(f"Fetching emails from {start} to {end}")
+            get_emails_by_date_range(start, end, producer=producer, account=account)
+    finally:
+        if producer is not None:
+            producer.close()
 
     logger.info("Gmail Categorizer finished")
 
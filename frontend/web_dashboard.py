@@ -408,6 +408,8 @@ def api_metrics():
         if include_runs:
             response['data']['recent_runs'] = performance_data['recent_runs']
         
+        response['data']['query_cache'] = dashboard_service.get_cache_stats()
+        
         return jsonify(response)
         
     except ValueError as e:
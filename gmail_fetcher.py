@@ -25,6 +25,15 @@ from services.email_categorizer_service import EmailCategorizerService
 from services.llm_service_interface import LLMServiceInterface
 from services.llm_service_factory import LLMServiceFactory
 from services.openai_llm_service import OpenAILLMService
+from services.thread_local_email_categorizer import ThreadLocalEmailCategorizer
+from services.multi_account_runner import (
+    AccountJob,
+    MultiAccountRunner,
+    RunProgress,
+    account_file_name,
+    load_accounts_from_db,
+    load_accounts_from_file,
+)
 
 parser = argparse.ArgumentParser(description="Email Fetcher")
 parser.add_argument("--primary-host", default=os.environ.get('OLLAMA_HOST_PRIMARY', '10.1.1.247:11434'),
@@ -33,6 +42,14 @@ parser.add_argument("--secondary-host", default=os.environ.get('OLLAMA_HOST_SECO
                    help="Secondary Ollama host URL (for failover)")
 parser.add_argument("--base-url", help="Deprecated: Use --primary-host instead")
 parser.add_argument("--hours", type=int, default=int(os.environ.get('HOURS', '2')), help="The hours to fetch emails")
+parser.add_argument("--accounts-from-db", action="store_true",
+                   help="Process every active account in the database in parallel")
+parser.add_argument("--accounts-file",
+                   help="Process the accounts listed in a file (one email per line, optionally followed by its app password)")
+parser.add_argument("--workers", type=int, default=int(os.environ.get('BACKFILL_WORKERS', '4')),
+                   help="Accounts processed in parallel in multi-account mode")
+parser.add_argument("--results-dir", default=os.environ.get('BACKFILL_RESULTS_DIR'),
+                   help="Directory for per-account result summaries (default: email_summaries/backfills/<timestamp>)")
 args = parser.parse_args()
 
 # Configure logging
@@ -606,10 +623,7 @@ def test_api_connection(api_token: str) -> bool:
         logger.error(f"Failed to connect to control API: {str(e)}")
         return False
 
-def main(email_address: str, app_password: str, api_token: str,hours: int = 2):
-    logger.info("Starting email processing")
-    logger.info(f"Processing emails from the last {hours} hours")
-
+def _require_api_connection(api_token: str) -> None:
     # Test API connection first
     logger.info("Testing API connection")
     api_connected = test_api_connection(api_token)
@@ -619,8 +633,92 @@ def main(email_address: str, app_password: str, api_token: str,hours: int = 2):
         logger.error("Cannot connect to control API. Terminating service.")
         raise SystemExit(1)
 
+
+def main(email_address: str, app_password: str, api_token: str,hours: int = 2):
+    logger.info("Starting email processing")
+    logger.info(f"Processing emails from the last {hours} hours")
+
+    _require_api_connection(api_token)
+
+    # Create EmailCategorizerService instance
+    llm_service_factory = LLMServiceFactory()
+    email_categorizer_service = EmailCategorizerService(llm_service_factory)
+
+    process_account(
+        AccountJob(email_address, app_password),
+        api_token,
+        hours,
+        email_categorizer_service
+    )
+
+
+def main_multi(jobs: List[AccountJob], api_token: str, hours: int, workers: int, results_dir: str) -> None:
+    """Process many accounts in parallel, reusing one LLM client per worker."""
+    logger.info(f"Starting multi-account processing of {len(jobs)} accounts ({workers} workers, last {hours} hours)")
+    _require_api_connection(api_token)
+
+    categorizer = ThreadLocalEmailCategorizer(LLMServiceFactory())
+    # Each account tracks its emails in its own directory, so clearing one account's
+    # tracked data cannot drop entries of another account still being processed
+    runner = MultiAccountRunner(
+        lambda job, progress: process_account(
+            job, api_token, hours, categorizer, progress,
+            summary_data_dir=os.path.join("email_summaries", "accounts", account_file_name(job.email_address))
+        ),
+        max_workers=workers,
+        results_dir=results_dir
+    )
+    results = runner.run(jobs)
+
+    table = [
+        [r.email_address, "ok" if r.success else "FAILED", r.emails_found, r.emails_processed, f"{r.duration_seconds:.1f}s"]
+        for r in results
+    ]
+    print(tabulate(table, headers=['Account', 'Status', 'Found', 'Processed', 'Time'], tablefmt='grid'))
+    print(f"LLM clients created: {categorizer.clients_created}")
+    print(f"Per-account results written to {results_dir}")
+    if any(not r.success for r in results):
+        raise SystemExit(1)
+
+
+def process_account(
+    job: AccountJob,
+    api_token: str,
+    hours: int,
+    email_categorizer,
+    progress: Optional[RunProgress] = None,
+    summary_data_dir: Optional[str] = None
+) -> dict:
+    """
+    Fetch, categorize and label one account's recent emails.
+
+    Args:
+        job: Account and credential to process
+        api_token: Control API token
+        hours: How far back to fetch
+        email_categorizer: EmailCategorizerInterface used for every email of the account
+        progress: Aggregate progress of a multi-account run (prints a per-account summary when None)
+        summary_data_dir: Directory for the account's email tracking (defaults to the shared one)
+
+    Returns:
+        Summary of the account's run
+    """
+    email_address = job.email_address
+
     # Initialize and use the fetcher
-    fetcher = ServiceGmailFetcher(email_address, app_password, api_token)
+    if job.auth_method == 'oauth':
+        from services.gmail_connection_factory import GmailConnectionFactory
+        connection_service = GmailConnectionFactory.create_connection(
+            email_address=email_address,
+            auth_method='oauth',
+            refresh_token=job.secret,
+        )
+        fetcher = ServiceGmailFetcher(
+            email_address, job.secret, api_token,
+            connection_service=connection_service, summary_data_dir=summary_data_dir
+        )
+    else:
+        fetcher = ServiceGmailFetcher(email_address, job.secret, api_token, summary_data_dir=summary_data_dir)
 
     # Clear any existing tracked data to start fresh
     fetcher.summary_service.clear_tracked_data()
@@ -666,19 +764,21 @@ def main(email_address: str, app_password: str, api_token: str,hours: int = 2):
         # Update fetched count
         fetcher.summary_service.run_metrics['fetched'] = len(recent_emails)
 
-        print(f"Found {len(new_emails)} new emails to process:")
+        logger.info(f"Found {len(new_emails)} new emails to process for {email_address}")
 
-        # Create EmailCategorizerService instance
-        llm_service_factory = LLMServiceFactory()
-        email_categorizer_service = EmailCategorizerService(llm_service_factory)
-
-        processor = EmailProcessorService(fetcher, email_address, model, email_categorizer_service)
-        for msg in new_emails:
-            # Delegate processing to EmailProcessorService
-            processor.process_email(msg)
+        processor = EmailProcessorService(fetcher, email_address, model, email_categorizer)
+        try:
+            for msg in new_emails:
+                # Delegate processing to EmailProcessorService
+                processor.process_email(msg)
+                if progress:
+                    progress.email_processed()
+        finally:
+            processor.flush_repeat_offender_outcomes()
 
         # Print summary at the end
-        print_summary(hours, fetcher.stats)
+        if progress is None:
+            print_summary(hours, fetcher.stats)
 
         # Bulk mark emails as processed to prevent reprocessing
         processed_message_ids = processor.processed_message_ids
@@ -724,6 +824,16 @@ def main(email_address: str, app_password: str, api_token: str,hours: int = 2):
         # Complete processing run in database
         fetcher.summary_service.complete_processing_run(success=True)
 
+        return {
+            'account': email_address,
+            'success': True,
+            'emails_found': len(recent_emails),
+            'emails_processed': len(processor.processed_message_ids),
+            'deleted': fetcher.stats['deleted'],
+            'kept': fetcher.stats['kept'],
+            'category_counts': category_actions,
+        }
+
     except Exception as e:
         logger.error(f"Error during email processing: {str(e)}")
 
@@ -739,10 +849,23 @@ if __name__ == "__main__":
     app_password = os.getenv("GMAIL_PASSWORD")
     api_token = os.getenv("CONTROL_TOKEN")
 
-    if not email_address or not app_password:
-        raise ValueError("Please set GMAIL_EMAIL and GMAIL_PASSWORD environment variables")
-
     if not api_token:
         raise ValueError("Please set CONTROL_TOKEN environment variable")
 
-    main(email_address, app_password, api_token, args.hours)
+    if args.accounts_from_db or args.accounts_file:
+        account_client = AccountCategoryClient()
+        jobs = (
+            load_accounts_from_file(args.accounts_file, account_client)
+            if args.accounts_file else load_accounts_from_db(account_client)
+        )
+        if not jobs:
+            raise ValueError("No accounts to process")
+        results_dir = args.results_dir or os.path.join(
+            "email_summaries", "backfills", datetime.now().strftime("%Y%m%d_%H%M%S")
+        )
+        main_multi(jobs, api_token, args.hours, max(1, args.workers), results_dir)
+    else:
+        if not email_address or not app_password:
+            raise ValueError("Please set GMAIL_EMAIL and GMAIL_PASSWORD environment variables")
+
+        main(email_address, app_password, api_token, args.hours)
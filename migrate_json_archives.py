@@ -1,9 +1,11 @@
 #!/usr/bin/env python3
 """
 Migrate existing JSON archive files to the SQLite database.
+
+Reads both archive formats: tracked_*.jsonl journals (one email per line)
+and the older tracked_*.json lists.
 """
 import os
-import json
 import logging
 from utils.logger import get_logger
 from datetime import datetime
@@ -11,6 +13,8 @@ from pathlib import Path
 from collections import defaultdict
 
 from services.database_service import DatabaseService
+from repositories.rollup_repository import RollupRepository
+from services.tracking_journal import read_tracking_file
 
 # Configure logging
 logging.basicConfig(
@@ -21,13 +25,11 @@ logger = get_logger(__name__)
 
 
 def parse_json_archive(file_path: Path) -> dict:
-    """Parse a JSON archive file and extract summary data."""
+    """Parse a JSON or JSONL archive file and extract summary data."""
     try:
-        with open(file_path, 'r') as f:
-            data = json.load(f)
-        
-        if not isinstance(data, list):
-            logger.warning(f"Skipping {file_path}: Not a list format")
+        data = read_tracking_file(file_path)
+        if not data:
+            logger.warning(f"Skipping {file_path}: No tracked emails")
             return None
         
         # Initialize counters
@@ -46,7 +48,7 @@ def parse_json_archive(file_path: Path) -> dict:
             
             category = email.get('category', 'Unknown')
             sender = email.get('sender', '')
-            action = email.get('action', 'KEPT')
+            action = str(email.get('action', 'kept')).upper()  # Stored as EmailAction values ('kept', 'deleted')
             sender_domain = email.get('sender_domain', '')
             
             # Update category stats
@@ -83,7 +85,7 @@ def parse_json_archive(file_path: Path) -> dict:
         # Extract timestamp from filename or use first email's timestamp
         timestamp = None
         
-        # Try to get timestamp from filename (e.g., tracked_20241217_080001.json)
+        # Try to get timestamp from filename (e.g., tracked_20241217_080001.jsonl)
         filename = file_path.stem
         if 'tracked_' in filename:
             try:
@@ -123,6 +125,11 @@ def parse_json_archive(file_path: Path) -> dict:
         return None
 
 
+def find_archive_files(archive_path: Path) -> list:
+    """Archive files in either format, oldest first."""
+    return sorted(list(archive_path.glob("tracked_*.json")) + list(archive_path.glob("tracked_*.jsonl")))
+
+
 def migrate_archives(archive_dir: str = "./email_summaries/archives", 
                     db_path: str = "./email_summaries/summaries.db"):
     """Migrate all JSON archives to database."""
@@ -136,7 +143,7 @@ def migrate_archives(archive_dir: str = "./email_summaries/archives",
     db_service = DatabaseService(db_path=db_path)
     
     # Find all JSON files
-    json_files = list(archive_path.glob("tracked_*.json"))
+    json_files = find_archive_files(archive_path)
     logger.info(f"Found {len(json_files)} archive files to migrate")
     
     successful = 0
@@ -161,6 +168,9 @@ def migrate_archives(archive_dir: str = "./email_summaries/archives",
             with db_service.Session() as session:
                 from models.database import EmailSummary, CategorySummary, SenderSummary, DomainSummary
                 
+                rollups = RollupRepository(session)
+                rollups.ensure_backfilled()
+                
                 summary = EmailSummary(
                     date=summary_data['date'],
                     total_emails_processed=summary_data['total_processed'],
@@ -205,6 +215,7 @@ def migrate_archives(archive_dir: str = "./email_summaries/archives",
                     summary.domains.append(domain_summary)
                 
                 session.add(summary)
+                rollups.add_summary(summary)
                 session.commit()
             
             logger.info(f"Successfully migrated {json_file.name} (Date: {summary_data['date']})")
@@ -235,7 +246,7 @@ def main():
         logger.info("DRY RUN MODE - No changes will be made")
         archive_path = Path(args.archive_dir)
         if archive_path.exists():
-            json_files = list(archive_path.glob("tracked_*.json"))
+            json_files = find_archive_files(archive_path)
             logger.info(f"Would migrate {len(json_files)} files:")
             for f in sorted(json_files):
                 logger.info(f"  - {f.name}")
@@ -165,6 +165,15 @@ class RepeatOffenderPattern(Base):
     )
 
 
+class RepeatOffenderPatternVersion(Base):
+    """Per-account version stamp, bumped whenever the account's active repeat offender patterns change"""
+    __tablename__ = 'repeat_offender_pattern_versions'
+
+    account_name = Column(String(255), primary_key=True)
+    version = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
+
+
 class DomainSummary(Base):
     """Domain statistics for a summary period"""
     __tablename__ = 'domain_summaries'
@@ -242,6 +251,51 @@ class ProcessingRun(Base):
     )
 
 
+class ProcessingRunLLMUsage(Base):
+    """Per-model LLM usage summary recorded for a processing run"""
+    __tablename__ = 'processing_run_llm_usage'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    processing_run_id = Column(Integer, ForeignKey('processing_runs.id'), nullable=False)
+    model = Column(String(255), nullable=False)
+    calls = Column(Integer, default=0, nullable=False)
+    successes = Column(Integer, default=0, nullable=False)
+    parse_failures = Column(Integer, default=0, nullable=False)
+    failures = Column(Integer, default=0, nullable=False)
+    retries = Column(Integer, default=0, nullable=False)
+    prompt_tokens = Column(Integer, default=0, nullable=False)
+    completion_tokens = Column(Integer, default=0, nullable=False)
+    avg_latency_ms = Column(Float, nullable=True)
+    p50_latency_ms = Column(Float, nullable=True)
+    p95_latency_ms = Column(Float, nullable=True)
+    max_latency_ms = Column(Float, nullable=True)
+    estimated_cost_usd = Column(Float, default=0.0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index('idx_run_llm_usage_run', 'processing_run_id'),
+    )
+
+
+class ProcessingRunBudgetHit(Base):
+    """Per-account time or message budget reached by a processing run, which then stopped as partial"""
+    __tablename__ = 'processing_run_budget_hits'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    processing_run_id = Column(Integer, ForeignKey('processing_runs.id'), nullable=False)
+    reason = Column(String(32), nullable=False)  # 'time' or 'messages'
+    messages_processed = Column(Integer, default=0, nullable=False)
+    elapsed_seconds = Column(Float, nullable=True)
+    max_seconds = Column(Integer, nullable=True)
+    max_messages = Column(Integer, nullable=True)
+    continuation_cursor = Column(Text, nullable=True)  # Where the next run resumes
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index('idx_run_budget_hits_run', 'processing_run_id'),
+    )
+
+
 class ProcessedEmailLog(Base):
     """Log of processed emails to prevent duplicate processing per account"""
     __tablename__ = 'processed_email_log'
@@ -278,6 +332,115 @@ class CategoryDailyTally(Base):
     )
 
 
+class AccountScanLease(Base):
+    """Expiring lease on an account so only one processor instance scans it at a time"""
+    __tablename__ = 'account_scan_leases'
+
+    account_email = Column(String(255), primary_key=True)
+    owner_id = Column(String(255), nullable=True)
+    lease_version = Column(Integer, default=0, nullable=False)  # Fencing token, bumped on every claim
+    lease_expires_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    next_scan_at = Column(DateTime, nullable=True)  # Earliest time any instance should scan again
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        Index('idx_scan_leases_expires', 'lease_expires_at'),
+        Index('idx_scan_leases_next_scan', 'next_scan_at'),
+    )
+
+
+class AccountRunCheckpoint(Base):
+    """Progress of an account's in-flight processing run; a row left behind marks an interrupted run"""
+    __tablename__ = 'account_run_checkpoints'
+
+    account_email = Column(String(255), primary_key=True)
+    run_id = Column(String(64), nullable=True)
+    window_start = Column(DateTime, nullable=False)  # Oldest email time the run (and any resume) must cover
+    started_at = Column(DateTime, nullable=False)
+    resumed_runs = Column(Integer, default=0, nullable=False)  # Consecutive interrupted runs folded into this one
+    messages_checkpointed = Column(Integer, default=0, nullable=False)
+    last_checkpoint_at = Column(DateTime, nullable=True)
+
+
+class OutboxEvent(Base):
+    """Side effect of a processing run (notification, statistics write) awaiting delivery by the outbox dispatcher"""
+    __tablename__ = 'outbox_events'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    event_type = Column(String(64), nullable=False)
+    account_email = Column(String(255), nullable=True)
+    processing_run_id = Column(String(64), nullable=True)
+    payload = Column(Text, nullable=False)  # JSON
+    status = Column(String(16), default='pending', nullable=False)  # 'pending', 'delivered' or 'dead'
+    attempts = Column(Integer, default=0, nullable=False)
+    available_at = Column(DateTime, nullable=False)  # Not delivered before this (retry backoff)
+    locked_by = Column(String(128), nullable=True)
+    locked_until = Column(DateTime, nullable=True)
+    claim_token = Column(String(32), nullable=True)  # Identifies the claim that locked the event
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    delivered_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index('idx_outbox_status_available', 'status', 'available_at'),
+    )
+
+
+class SummaryRollup(Base):
+    """Email summary totals per day, week or month, maintained as summaries are saved"""
+    __tablename__ = 'summary_rollups'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    period = Column(String(8), nullable=False)  # 'day', 'week' (starting Monday) or 'month'
+    period_start = Column(Date, nullable=False)
+    account_id = Column(Integer, default=0, nullable=False)  # 0 for summaries without an account
+    dimension = Column(String(16), nullable=False)  # 'total', 'category', 'sender' or 'domain'
+    key = Column(String(255), default='', nullable=False)  # Category name, sender email or domain ('' for totals)
+    sender_name = Column(String(255), default='', nullable=False)
+    is_blocked = Column(Boolean, default=False, nullable=False)
+    email_count = Column(Integer, default=0, nullable=False)
+    deleted_count = Column(Integer, default=0, nullable=False)
+    archived_count = Column(Integer, default=0, nullable=False)
+    skipped_count = Column(Integer, default=0, nullable=False)
+    duration_seconds = Column(Float, default=0, nullable=False)
+    duration_count = Column(Integer, default=0, nullable=False)  # Summaries with a processing duration
+    summary_count = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('period', 'period_start', 'account_id', 'dimension', 'key', 'sender_name', 'is_blocked',
+                         name='uq_summary_rollup'),
+        Index('idx_summary_rollup_period', 'period', 'period_start', 'dimension'),
+    )
+
+
+class CategoryTallyRollup(Base):
+    """Category tallies per account and week or month, maintained as daily tallies are written"""
+    __tablename__ = 'category_tally_rollups'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    email_address = Column(String(255), nullable=False)
+    period = Column(String(8), nullable=False)  # 'week' (starting Monday) or 'month'
+    period_start = Column(Date, nullable=False)
+    category = Column(String(100), nullable=False)  # '*' holds the account's total and days with data
+    count = Column(Integer, default=0, nullable=False)
+    days_with_data = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('email_address', 'period', 'period_start', 'category', name='uq_tally_rollup'),
+    )
+
+
+class RollupBackfill(Base):
+    """Marker claimed by the one process that rolls up history written before the rollup tables"""
+    __tablename__ = 'rollup_backfills'
+
+    name = Column(String(64), primary_key=True)
+    completed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
 # Database initialization functions
 def get_database_url(db_path: Optional[str] = None) -> str:
     """
@@ -22,6 +22,8 @@ class BackgroundStatus(BaseModel):
     running: bool
     thread: Optional[BackgroundThreadInfo] = None
     configuration: BackgroundConfiguration
+    # Per-account intervals and next-due times when adaptive scheduling is on
+    schedule: Optional[Dict[str, Dict]] = None
 
 
 class ProcessingCurrentStatusResponse(BaseModel):
@@ -46,6 +48,8 @@ class UnifiedStatusResponse(BaseModel):
     # Processing status
     is_processing: bool
     current_status: Optional[Dict] = None
+    active_sessions: Optional[List[Dict]] = None
+    max_concurrent_sessions: Optional[int] = None
 
     # Background status
     background: BackgroundStatus
@@ -0,0 +1,187 @@
+"""Repository for account scan leases shared by processor instances."""
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import Engine, bindparam, text
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class AccountLease:
+    """A lease held on one account; version is the fencing token for renew/release."""
+    account_email: str
+    owner_id: str
+    version: int
+    expires_at: datetime
+
+
+class AccountLeaseRepository:
+    """
+    Claims, renews and releases expiring per-account leases.
+
+    On MySQL, candidate rows are locked with SELECT ... FOR UPDATE SKIP LOCKED,
+    so concurrent claimers never block on or double-claim the same account.
+    Other dialects (SQLite) fall back to compare-and-set UPDATEs, which are
+    atomic per row. Either way every claim bumps lease_version, so a worker
+    whose lease expired and was reclaimed can no longer renew or release it.
+    """
+
+    def __init__(self, engine: Engine, clock=datetime.utcnow):
+        """
+        Initialize repository with a shared SQLAlchemy engine.
+
+        Args:
+            engine: SQLAlchemy Engine instance to use for database connections
+            clock: Returns the current naive UTC time (injectable for tests)
+        """
+        self.engine = engine
+        self._clock = clock
+        self.supports_skip_locked = engine.dialect.name == 'mysql'
+
+    def ensure_accounts(self, account_emails: Iterable[str]) -> None:
+        """Create lease rows for accounts that do not have one yet."""
+        emails = list(dict.fromkeys(account_emails))
+        if not emails:
+            return
+        insert_ignore = "INSERT IGNORE" if self.supports_skip_locked else "INSERT OR IGNORE"
+        insert = text(f"{insert_ignore} INTO account_scan_leases (account_email, lease_version) VALUES (:email, 0)")
+        with self.engine.begin() as connection:
+            connection.execute(insert, [{'email': email} for email in emails])
+
+    def claim(
+        self,
+        owner_id: str,
+        account_emails: Iterable[str],
+        ttl_seconds: float,
+        limit: Optional[int] = None,
+        ignore_next_scan: bool = False
+    ) -> List[AccountLease]:
+        """
+        Claim free or expired leases among the given accounts.
+
+        Args:
+            owner_id: Identity of the claiming instance
+            account_emails: Candidate accounts
+            ttl_seconds: Lease lifetime unless renewed
+            limit: Maximum number of leases to claim
+            ignore_next_scan: Claim even if next_scan_at is in the future (force requests)
+
+        Returns:
+            Leases claimed by this call
+        """
+        emails = list(dict.fromkeys(account_emails))
+        if not emails or (limit is not None and limit <= 0):
+            return []
+        self.ensure_accounts(emails)
+
+        now = self._clock()
+        expires_at = now + timedelta(seconds=ttl_seconds)
+        available = (
+            "(lease_expires_at IS NULL OR lease_expires_at < :now)"
+            + ("" if ignore_next_scan else " AND (next_scan_at IS NULL OR next_scan_at <= :now)")
+        )
+        claim_update = text(f"""
+            UPDATE account_scan_leases
+            SET owner_id = :owner_id, lease_version = lease_version + 1,
+                lease_expires_at = :expires_at, heartbeat_at = :now
+            WHERE account_email = :email AND {available}
+        """)
+        params = {'owner_id': owner_id, 'now': now, 'expires_at': expires_at}
+
+        claimed: List[str] = []
+        with self.engine.begin() as connection:
+            if self.supports_skip_locked:
+                select = text(f"""
+                    SELECT account_email FROM account_scan_leases
+                    WHERE account_email IN :emails AND {available}
+                    ORDER BY next_scan_at
+                    {"LIMIT :limit" if limit is not None else ""}
+                    FOR UPDATE SKIP LOCKED
+                """).bindparams(bindparam('emails', expanding=True))
+                select_params = {'emails': emails, 'now': now}
+                if limit is not None:
+                    select_params['limit'] = limit
+                candidates = [row[0] for row in connection.execute(select, select_params)]
+            else:
+                candidates = emails
+
+            for email in candidates:
+                if limit is not None and len(claimed) >= limit:
+                    break
+                # Compare-and-set: only succeeds if the lease is still free or expired
+                if connection.execute(claim_update, {**params, 'email': email}).rowcount == 1:
+                    claimed.append(email)
+
+            if not claimed:
+                return []
+            versions = connection.execute(
+                text("SELECT account_email, lease_version FROM account_scan_leases WHERE account_email IN :emails")
+                .bindparams(bindparam('emails', expanding=True)),
+                {'emails': claimed}
+            ).fetchall()
+
+        leases = [AccountLease(email, owner_id, int(version), expires_at) for email, version in versions]
+        logger.debug(f"Lease owner {owner_id} claimed {[lease.account_email for lease in leases]}")
+        return leases
+
+    def renew(self, leases: Iterable[AccountLease], ttl_seconds: float) -> Set[str]:
+        """
+        Extend held leases (heartbeat).
+
+        Returns:
+            Accounts whose lease was lost (expired and reclaimed by another owner)
+        """
+        now = self._clock()
+        renew = text("""
+            UPDATE account_scan_leases
+            SET lease_expires_at = :expires_at, heartbeat_at = :now
+            WHERE account_email = :email AND owner_id = :owner_id AND lease_version = :version
+        """)
+        lost: Set[str] = set()
+        with self.engine.begin() as connection:
+            for lease in leases:
+                result = connection.execute(renew, {
+                    'expires_at': now + timedelta(seconds=ttl_seconds),
+                    'now': now,
+                    'email': lease.account_email,
+                    'owner_id': lease.owner_id,
+                    'version': lease.version,
+                })
+                if result.rowcount != 1:
+                    lost.add(lease.account_email)
+        return lost
+
+    def release(self, lease: AccountLease, next_scan_at: Optional[datetime] = None) -> bool:
+        """
+        Release a lease and record when the account is next due.
+
+        Returns:
+            False if the lease had already been lost to another owner
+        """
+        release = text("""
+            UPDATE account_scan_leases
+            SET owner_id = NULL, lease_expires_at = NULL, next_scan_at = :next_scan_at
+            WHERE account_email = :email AND owner_id = :owner_id AND lease_version = :version
+        """)
+        with self.engine.begin() as connection:
+            result = connection.execute(release, {
+                'next_scan_at': next_scan_at,
+                'email': lease.account_email,
+                'owner_id': lease.owner_id,
+                'version': lease.version,
+            })
+        return result.rowcount == 1
+
+    def get_leases(self) -> Dict[str, Dict]:
+        """Current lease rows keyed by account."""
+        with self.engine.connect() as connection:
+            rows = connection.execute(text("""
+                SELECT account_email, owner_id, lease_version, lease_expires_at, heartbeat_at, next_scan_at
+                FROM account_scan_leases
+            """)).mappings().fetchall()
+        return {row['account_email']: dict(row) for row in rows}
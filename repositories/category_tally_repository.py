@@ -3,19 +3,25 @@ Category Tally Repository Implementation.
 
 This implementation uses SQLAlchemy ORM to persist and retrieve email category tallies.
 """
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple
 from datetime import datetime, date
 from collections import defaultdict
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func
+from sqlalchemy import and_, bindparam, func, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
-from repositories.category_tally_repository_interface import ICategoryTallyRepository
+from repositories.category_tally_repository_interface import ICategoryTallyRepository, merge_daily_tallies
 from models.category_tally_models import (
     DailyCategoryTally,
     CategorySummaryItem,
     AggregatedCategoryTally
 )
 from models.database import CategoryDailyTally
+from repositories.rollup_repository import RollupRepository
+
+# Rows per multi-row upsert; seven bound parameters per row stays under SQLite's default limit of 999
+BULK_UPSERT_CHUNK_SIZE = 100
 
 
 class CategoryTallyRepository(ICategoryTallyRepository):
@@ -48,25 +54,33 @@ class CategoryTallyRepository(ICategoryTallyRepository):
         Implements upsert semantics by updating existing records or creating new ones.
         """
         now = datetime.utcnow()
+        rollups = RollupRepository(self.session)
+        rollups.ensure_backfilled()
 
-        # For each category in the counts, upsert a row
-        for category, count in category_counts.items():
-            # Check if record exists
-            existing = self.session.query(CategoryDailyTally).filter(
+        existing_records = {
+            record.category: record
+            for record in self.session.query(CategoryDailyTally).filter(
                 and_(
                     CategoryDailyTally.email_address == email_address,
-                    CategoryDailyTally.tally_date == tally_date,
-                    CategoryDailyTally.category == category
+                    CategoryDailyTally.tally_date == tally_date
                 )
-            ).first()
+            ).all()
+        }
+
+        # For each category in the counts, upsert a row
+        count_changes = {}
+        for category, count in category_counts.items():
+            existing = existing_records.get(category)
 
             if existing:
                 # Replace count with new value (upsert semantics)
+                count_changes[category] = count - existing.count
                 existing.count = count
                 existing.total_emails = total_emails
                 existing.updated_at = now
             else:
                 # Create new record
+                count_changes[category] = count
                 new_tally = CategoryDailyTally(
                     email_address=email_address,
                     tally_date=tally_date,
@@ -78,12 +92,125 @@ class CategoryTallyRepository(ICategoryTallyRepository):
                 )
                 self.session.add(new_tally)
 
+        new_days = [] if existing_records or not category_counts else [(email_address, tally_date)]
+        rollups.add_tallies({(email_address, tally_date): count_changes}, new_days)
+
         # Commit once after all category updates for better transaction management
         self.session.commit()
 
         # Return the consolidated tally
         return self._build_daily_tally(email_address, tally_date, category_counts, total_emails)
 
+    def add_to_daily_tallies(
+        self,
+        increments: Dict[Tuple[str, date], Dict[str, int]]
+    ) -> int:
+        """
+        Add counts to daily tallies with multi-row upserts in one transaction.
+
+        Counts are added with INSERT ... ON DUPLICATE KEY UPDATE (MySQL) or
+        INSERT ... ON CONFLICT DO UPDATE (SQLite); total_emails is then set
+        from one grouped query over the affected tallies. The week and month
+        rollups are updated in the same transaction.
+        """
+        now = datetime.utcnow()
+        rows = [
+            {
+                'email_address': email_address,
+                'tally_date': tally_date,
+                'category': category,
+                'count': count,
+                'total_emails': 0,
+                'created_at': now,
+                'updated_at': now
+            }
+            for (email_address, tally_date), category_counts in increments.items()
+            for category, count in category_counts.items()
+        ]
+        if not rows:
+            return 0
+
+        dialect = self.session.get_bind().dialect.name
+        if dialect not in ('mysql', 'sqlite'):
+            return merge_daily_tallies(self, increments)
+
+        table = CategoryDailyTally.__table__
+        rollups = RollupRepository(self.session)
+        rollups.ensure_backfilled()
+        try:
+            existing_days = set(self._existing_days(list(increments.keys())))
+            for start in range(0, len(rows), BULK_UPSERT_CHUNK_SIZE):
+                chunk = rows[start:start + BULK_UPSERT_CHUNK_SIZE]
+                if dialect == 'mysql':
+                    statement = mysql_insert(table).values(chunk)
+                    statement = statement.on_duplicate_key_update(
+                        count=table.c.count + statement.inserted.count,
+                        updated_at=statement.inserted.updated_at
+                    )
+                else:
+                    statement = sqlite_insert(table).values(chunk)
+                    statement = statement.on_conflict_do_update(
+                        index_elements=['email_address', 'tally_date', 'category'],
+                        set_={
+                            'count': table.c.count + statement.excluded.count,
+                            'updated_at': statement.excluded.updated_at
+                        }
+                    )
+                self.session.execute(statement)
+
+            rollups.add_tallies(increments, new_days=[
+                key for key, category_counts in increments.items()
+                if category_counts and key not in existing_days
+            ])
+            self._update_total_emails(list(increments.keys()))
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+        return len(rows)
+
+    def _existing_days(self, keys: List[Tuple[str, date]]) -> List[Tuple[str, date]]:
+        """The (email_address, tally_date) pairs among keys that already have a tally."""
+        wanted = set(keys)
+        rows = self.session.query(
+            CategoryDailyTally.email_address,
+            CategoryDailyTally.tally_date
+        ).filter(
+            CategoryDailyTally.email_address.in_({email_address for email_address, _ in wanted}),
+            CategoryDailyTally.tally_date.in_({tally_date for _, tally_date in wanted})
+        ).distinct().all()
+        return [(email_address, tally_date) for email_address, tally_date in rows if (email_address, tally_date) in wanted]
+
+    def _update_total_emails(self, keys: List[Tuple[str, date]]) -> None:
+        """Set total_emails of the given tallies to the sum of their category counts."""
+        wanted = set(keys)
+        totals = self.session.query(
+            CategoryDailyTally.email_address,
+            CategoryDailyTally.tally_date,
+            func.sum(CategoryDailyTally.count)
+        ).filter(
+            CategoryDailyTally.email_address.in_({email_address for email_address, _ in wanted}),
+            CategoryDailyTally.tally_date.in_({tally_date for _, tally_date in wanted})
+        ).group_by(
+            CategoryDailyTally.email_address,
+            CategoryDailyTally.tally_date
+        ).all()
+
+        table = CategoryDailyTally.__table__
+        statement = update(table).where(
+            and_(
+                table.c.email_address == bindparam('b_email_address'),
+                table.c.tally_date == bindparam('b_tally_date')
+            )
+        ).values(total_emails=bindparam('b_total_emails'))
+        parameters = [
+            {'b_email_address': email_address, 'b_tally_date': tally_date, 'b_total_emails': int(total)}
+            for email_address, tally_date, total in totals
+            if (email_address, tally_date) in wanted
+        ]
+        if parameters:
+            self.session.execute(statement, parameters)
+
     def get_tally(
         self,
         email_address: str,
@@ -175,17 +302,16 @@ class CategoryTallyRepository(ICategoryTallyRepository):
     ) -> AggregatedCategoryTally:
         """
         Get aggregated statistics across a date range for an account.
+
+        Whole weeks and months of the range are read from the tally rollups,
+        so the cost depends on the length of the range rather than on the
+        number of stored tallies.
         """
-        # Query all records in the date range
-        records = self.session.query(CategoryDailyTally).filter(
-            and_(
-                CategoryDailyTally.email_address == email_address,
-                CategoryDailyTally.tally_date >= start_date,
-                CategoryDailyTally.tally_date <= end_date
-            )
-        ).all()
+        category_totals, days_with_data = RollupRepository(self.session).get_category_totals(
+            email_address, start_date, end_date
+        )
 
-        if not records:
+        if not days_with_data:
             # Return empty aggregation
             return AggregatedCategoryTally(
                 email_address=email_address,
@@ -196,16 +322,6 @@ class CategoryTallyRepository(ICategoryTallyRepository):
                 category_summaries=[]
             )
 
-        # Calculate total emails (use the total_emails field from any record)
-        # Get unique dates to count days with data
-        unique_dates = set(record.tally_date for record in records)
-        days_with_data = len(unique_dates)
-
-        # Aggregate by category
-        category_totals = defaultdict(int)
-        for record in records:
-            category_totals[record.category] += record.count
-
         # Calculate total emails across all categories
         total_emails = sum(category_totals.values())
 
@@ -235,6 +351,20 @@ class CategoryTallyRepository(ICategoryTallyRepository):
             category_summaries=category_summaries
         )
 
+    def get_category_totals(
+        self,
+        email_address: str,
+        start_date: date,
+        end_date: date
+    ) -> Dict[str, int]:
+        """
+        Get the total count of each category across a date range, from the tally rollups.
+        """
+        category_totals, _ = RollupRepository(self.session).get_category_totals(
+            email_address, start_date, end_date
+        )
+        return category_totals
+
     def delete_tallies_before(
         self,
         email_address: str,
@@ -243,6 +373,9 @@ class CategoryTallyRepository(ICategoryTallyRepository):
         """
         Delete all tallies for an account before a cutoff date.
         """
+        rollups = RollupRepository(self.session)
+        rollups.ensure_backfilled()
+
         # Count records to be deleted
         deleted_count = self.session.query(CategoryDailyTally).filter(
             and_(
@@ -251,6 +384,7 @@ class CategoryTallyRepository(ICategoryTallyRepository):
             )
         ).delete(synchronize_session=False)
 
+        rollups.delete_tallies_before(email_address, cutoff_date)
         self.session.commit()
         return deleted_count
 
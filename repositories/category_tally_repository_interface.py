@@ -5,7 +5,7 @@ This interface defines the contract for persisting and retrieving email category
 It follows the Repository Pattern to decouple business logic from data access.
 """
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from datetime import date
 
 from models.category_tally_models import (
@@ -20,6 +20,7 @@ class ICategoryTallyRepository(ABC):
 
     This interface defines methods for:
     - Saving daily tallies (with upsert semantics)
+    - Adding buffered counts to daily tallies
     - Retrieving tallies by date or date range
     - Aggregating tallies across date ranges
     - Deleting old tallies
@@ -54,6 +55,27 @@ class ICategoryTallyRepository(ABC):
         """
         pass
 
+    def add_to_daily_tallies(
+        self,
+        increments: Dict[Tuple[str, date], Dict[str, int]]
+    ) -> int:
+        """
+        Add counts to the daily tallies of several accounts and dates.
+
+        Unlike save_daily_tally, counts are added to the stored ones, and
+        total_emails becomes the sum of each tally's merged counts.
+
+        The default merges each tally with get_tally and save_daily_tally;
+        implementations should override it with a set-based upsert.
+
+        Args:
+            increments: Category counts to add, keyed by (email_address, tally_date)
+
+        Returns:
+            Number of category counts written
+        """
+        return merge_daily_tallies(self, increments)
+
     @abstractmethod
     def get_tally(
         self,
@@ -117,6 +139,32 @@ class ICategoryTallyRepository(ABC):
         """
         pass
 
+    def get_category_totals(
+        self,
+        email_address: str,
+        start_date: date,
+        end_date: date
+    ) -> Dict[str, int]:
+        """
+        Get the total count of each category across a date range for an account.
+
+        The default sums the tallies of get_tallies_for_period; implementations
+        that keep rollups should override it.
+
+        Args:
+            email_address: Email account address
+            start_date: Start of date range (inclusive)
+            end_date: End of date range (inclusive)
+
+        Returns:
+            Total count keyed by category (empty if there are no tallies)
+        """
+        category_totals: Dict[str, int] = {}
+        for tally in self.get_tallies_for_period(email_address, start_date, end_date):
+            for category, count in tally.category_counts.items():
+                category_totals[category] = category_totals.get(category, 0) + count
+        return category_totals
+
     @abstractmethod
     def delete_tallies_before(
         self,
@@ -136,3 +184,30 @@ class ICategoryTallyRepository(ABC):
             Number of tallies deleted
         """
         pass
+
+
+def merge_daily_tallies(
+    repository,
+    increments: Dict[Tuple[str, date], Dict[str, int]]
+) -> int:
+    """
+    Add counts to daily tallies one tally at a time, with get_tally and save_daily_tally.
+
+    Args:
+        repository: Repository providing get_tally and save_daily_tally
+        increments: Category counts to add, keyed by (email_address, tally_date)
+
+    Returns:
+        Number of category counts written
+    """
+    written = 0
+    for (email_address, tally_date), category_counts in increments.items():
+        # save_daily_tally replaces the stored counts, so it is given the merged ones
+        existing_tally = repository.get_tally(email_address, tally_date)
+        merged_counts = existing_tally.category_counts.copy() if existing_tally else {}
+        for category, count in category_counts.items():
+            merged_counts[category] = merged_counts.get(category, 0) + count
+
+        repository.save_daily_tally(email_address, tally_date, merged_counts, sum(merged_counts.values()))
+        written += len(category_counts)
+    return written
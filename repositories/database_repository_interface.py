@@ -8,7 +8,7 @@ from data access implementation, making it easier to:
 - Apply consistent data access patterns
 """
 from abc import ABC, abstractmethod
-from typing import List, Dict, Optional, Any, TypeVar, Type
+from typing import List, Dict, Optional, Any, TypeVar, Type, Iterable, Set, Tuple
 from datetime import datetime, date
 
 # Generic type for database models
@@ -44,6 +44,15 @@ class DatabaseRepositoryInterface(ABC):
         """Check if repository is connected to database"""
         pass
 
+    def release_session(self) -> None:
+        """
+        Release the calling thread's session at the end of a unit of work.
+
+        Long-lived worker threads call this after each account so an idle
+        session does not keep a pooled connection checked out.
+        """
+        pass
+
     @abstractmethod
     def get_connection_status(self) -> Dict[str, Any]:
         """
@@ -246,6 +255,54 @@ class DatabaseRepositoryInterface(ABC):
         """
         pass
     
+    @abstractmethod
+    def save_processing_run_llm_usage(self, run_id: str, usage: List[Dict[str, Any]]) -> None:
+        """
+        Persist the per-model LLM usage summary of a processing run.
+        
+        Args:
+            run_id: Processing run ID
+            usage: Per-model summaries as produced by LLMMetricsCollector.end_run
+        """
+        pass
+    
+    @abstractmethod
+    def get_processing_run_llm_usage(self, run_id: str) -> List[Any]:
+        """
+        Get the LLM usage rows recorded for a processing run.
+        
+        Args:
+            run_id: Processing run ID
+            
+        Returns:
+            List of ProcessingRunLLMUsage entities
+        """
+        pass
+    
+    @abstractmethod
+    def save_processing_run_budget_hit(self, run_id: str, budget_hit: Dict[str, Any]) -> None:
+        """
+        Record that a processing run stopped at its per-account budget and mark it partial.
+        
+        Args:
+            run_id: Processing run ID
+            budget_hit: Budget summary as produced by AccountRunBudget.to_dict
+        """
+        pass
+    
+    @abstractmethod
+    def get_processing_run_budget_hits(self, run_id: str) -> List[Any]:
+        """
+        Get the budget hits recorded for a processing run.
+        
+        Args:
+            run_id: Processing run ID
+            
+        Returns:
+            List of ProcessingRunBudgetHit entities
+        """
+        pass
+    
     # ==================== Email Summary Operations ====================
     
     @abstractmethod
@@ -444,6 +501,40 @@ class DatabaseRepositoryInterface(ABC):
         """
         pass
     
+    @abstractmethod
+    def get_processed_message_ids(self, email_address: str, message_ids: Iterable[str]) -> Set[str]:
+        """
+        Find which of a batch of emails have been processed already.
+        
+        Args:
+            email_address: Email account
+            message_ids: Message IDs to look up
+            
+        Returns:
+            The subset of message_ids that are already processed
+        """
+        pass
+    
+    @abstractmethod
+    def list_processed_message_ids(
+        self,
+        email_address: str,
+        after_id: int = 0,
+        limit: int = 10000
+    ) -> List[Tuple[int, str]]:
+        """
+        Page through an account's processed emails in insertion order.
+        
+        Args:
+            email_address: Email account
+            after_id: Only return log rows with a larger id
+            limit: Maximum rows to return
+            
+        Returns:
+            (log row id, message ID) tuples ordered by id
+        """
+        pass
+    
     @abstractmethod
     def mark_email_processed(
         self,
@@ -466,6 +557,28 @@ class DatabaseRepositoryInterface(ABC):
         """
         pass
     
+    @abstractmethod
+    def bulk_mark_emails_processed(
+        self,
+        email_address: str,
+        message_ids: Iterable[str],
+        chunk_size: Optional[int] = None
+    ) -> Tuple[int, int]:
+        """
+        Mark many emails as processed, skipping ones already recorded.
+        
+        Uses one multi-row insert that ignores duplicates per chunk.
+        
+        Args:
+            email_address: Email account
+            message_ids: Gmail message IDs
+            chunk_size: Rows per insert statement (defaults to the repository's)
+            
+        Returns:
+            Tuple of (inserted_count, skipped_count)
+        """
+        pass
+    
     @abstractmethod
     def get_processed_emails_count(
         self,
@@ -5,27 +5,37 @@ This concrete implementation uses SQLAlchemy ORM to interact with MySQL database
 Supports both local MySQL servers and cloud-hosted MySQL (e.g., AWS RDS, Google Cloud SQL, Azure Database).
 """
 import os
-from typing import List, Dict, Optional, Any, TypeVar, Type
+from typing import List, Dict, Optional, Any, TypeVar, Type, Iterable, Set, Tuple
 from datetime import datetime, date, timedelta
 from sqlalchemy import create_engine, and_, func, text
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.dialects.mysql import insert as mysql_insert
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy.engine.url import make_url
 from sqlalchemy.pool import QueuePool, NullPool
 
 from repositories.database_repository_interface import DatabaseRepositoryInterface
+from repositories.rollup_repository import RollupRepository
+from repositories.thread_sessions import ThreadSessions
 from models.database import (
     Base, EmailAccount, EmailSummary, CategorySummary, SenderSummary,
-    DomainSummary, ProcessingRun, UserSettings, AccountCategoryStats,
-    ProcessedEmailLog
+    DomainSummary, ProcessingRun, UserSettings, AccountCategoryStats, CategoryDailyTally,
+    ProcessedEmailLog, ProcessingRunLLMUsage, ProcessingRunBudgetHit
 )
 from utils.logger import get_logger
 from migrations.add_audit_count_columns_mysql import run_audit_columns_migration
+from services.resource_governor import ResourceGovernor, get_resource_governor
 
 logger = get_logger(__name__)
 
 T = TypeVar('T')
 
+# Message IDs per IN (...) lookup; keeps each statement well within max_allowed_packet
+PROCESSED_ID_CHUNK_SIZE = 1000
+
+# Rows per multi-row insert
+BULK_INSERT_CHUNK_SIZE = 1000
+
 
 class MySQLRepository(DatabaseRepositoryInterface):
     """MySQL-based repository implementation"""
@@ -41,7 +51,8 @@ class MySQLRepository(DatabaseRepositoryInterface):
         pool_size: int = 5,
         max_overflow: int = 10,
         pool_recycle: int = 3600,
-        echo: bool = False
+        echo: bool = False,
+        governor: Optional[ResourceGovernor] = None
     ):
         """
         Initialize MySQL repository.
@@ -58,6 +69,7 @@ class MySQLRepository(DatabaseRepositoryInterface):
             max_overflow: Max connections beyond pool_size (default: 10)
             pool_recycle: Recycle connections after this many seconds (default: 3600)
             echo: Enable SQLAlchemy query logging (default: False)
+            governor: Resource governor metering checked-out connections (defaults to the process-wide one)
         
         Environment Variables (used if parameters not provided):
             MYSQL_HOST or DATABASE_HOST
@@ -71,6 +83,7 @@ class MySQLRepository(DatabaseRepositoryInterface):
             MYSQL_POOL_RECYCLE (default: 3600)
         """
         self.connection_string = connection_string
+        self.governor = governor
         self.host = host
         # Defer defaulting to 3306 to _build_connection_string so URL parsing
         # can fill self.port when only a connection string is provided.
@@ -127,7 +140,8 @@ class MySQLRepository(DatabaseRepositoryInterface):
         
         self.engine = None
         self.SessionFactory = None
-        self._session: Optional[Session] = None
+        # One session per thread so concurrent account workers don't share a Session
+        self._sessions = ThreadSessions()
 
         # Auto-connect if credentials provided or available in environment
         if connection_string or (host and database and username):
@@ -222,6 +236,7 @@ class MySQLRepository(DatabaseRepositoryInterface):
                 poolclass=pool_class,
                 **pool_args
             )
+            (self.governor or get_resource_governor()).instrument_engine(self.engine)
             
             # Create all tables if they don't exist
             Base.metadata.create_all(self.engine)
@@ -295,9 +310,7 @@ class MySQLRepository(DatabaseRepositoryInterface):
     
     def disconnect(self) -> None:
         """Close MySQL database connection"""
-        if self._session:
-            self._session.close()
-            self._session = None
+        self._sessions.close_all()
         
         if self.engine:
             self.engine.dispose()
@@ -370,11 +383,12 @@ class MySQLRepository(DatabaseRepositoryInterface):
         if not self.is_connected():
             raise ConnectionError("Repository not connected. Call connect() first.")
         
-        # Use existing session or create new one
-        if self._session is None:
-            self._session = self.SessionFactory()
-        
-        return self._session
+        # Use this thread's session or create a new one
+        return self._sessions.get(self.SessionFactory)
+
+    def release_session(self) -> None:
+        """Close the calling thread's session at the end of a unit of work"""
+        self._sessions.release()
     
     # ==================== Generic CRUD Operations ====================
     
@@ -557,12 +571,85 @@ class MySQLRepository(DatabaseRepositoryInterface):
             logger.exception("Database error in get_recent_processing_runs")
             raise
     
+    def save_processing_run_llm_usage(self, run_id: str, usage: List[Dict[str, Any]]) -> None:
+        """Persist the per-model LLM usage summary of a processing run"""
+        if not usage:
+            return
+        numeric_id = int(run_id.replace('run-', ''))
+        session = self._get_session()
+        try:
+            for entry in usage:
+                latency = entry.get('latency', {})
+                session.add(ProcessingRunLLMUsage(
+                    processing_run_id=numeric_id,
+                    model=entry.get('model', 'unknown'),
+                    calls=entry.get('calls', 0),
+                    successes=entry.get('successes', 0),
+                    parse_failures=entry.get('parse_failures', 0),
+                    failures=entry.get('failures', 0),
+                    retries=entry.get('retries', 0),
+                    prompt_tokens=entry.get('prompt_tokens', 0),
+                    completion_tokens=entry.get('completion_tokens', 0),
+                    avg_latency_ms=latency.get('avg_ms'),
+                    p50_latency_ms=latency.get('p50_ms'),
+                    p95_latency_ms=latency.get('p95_ms'),
+                    max_latency_ms=latency.get('max_ms'),
+                    estimated_cost_usd=entry.get('estimated_cost_usd', 0.0)
+                ))
+            session.commit()
+        except SQLAlchemyError as e:
+            session.rollback()
+            logger.error(f"Error saving LLM usage for processing run: {str(e)}")
+            raise
+    
+    def get_processing_run_llm_usage(self, run_id: str) -> List[ProcessingRunLLMUsage]:
+        """Get the LLM usage rows recorded for a processing run"""
+        numeric_id = int(run_id.replace('run-', ''))
+        session = self._get_session()
+        return session.query(ProcessingRunLLMUsage).filter_by(
+            processing_run_id=numeric_id
+        ).order_by(ProcessingRunLLMUsage.model).all()
+    
+    def save_processing_run_budget_hit(self, run_id: str, budget_hit: Dict[str, Any]) -> None:
+        """Record a per-account budget hit and mark the processing run partial"""
+        numeric_id = int(run_id.replace('run-', ''))
+        session = self._get_session()
+        try:
+            session.add(ProcessingRunBudgetHit(
+                processing_run_id=numeric_id,
+                reason=budget_hit.get('exhausted') or 'unknown',
+                messages_processed=budget_hit.get('messages', 0),
+                elapsed_seconds=budget_hit.get('elapsed_seconds'),
+                max_seconds=budget_hit.get('max_seconds') or None,
+                max_messages=budget_hit.get('max_messages') or None,
+                continuation_cursor=budget_hit.get('continuation_cursor')
+            ))
+            run = session.get(ProcessingRun, numeric_id)
+            if run:
+                run.state = 'partial'
+            session.commit()
+        except SQLAlchemyError as e:
+            session.rollback()
+            logger.error(f"Error saving budget hit for processing run: {str(e)}")
+            raise
+    
+    def get_processing_run_budget_hits(self, run_id: str) -> List[ProcessingRunBudgetHit]:
+        """Get the budget hits recorded for a processing run"""
+        numeric_id = int(run_id.replace('run-', ''))
+        session = self._get_session()
+        return session.query(ProcessingRunBudgetHit).filter_by(
+            processing_run_id=numeric_id
+        ).order_by(ProcessingRunBudgetHit.id).all()
+    
     # ==================== Email Summary Operations ====================
     
     def save_email_summary(self, summary_data: Dict, account_id: Optional[int] = None) -> EmailSummary:
         """Save email processing summary with categories and senders"""
         session = self._get_session()
         try:
+            rollups = RollupRepository(session)
+            rollups.ensure_backfilled()
+
             # Create main summary
             summary = EmailSummary(
                 account_id=account_id,
@@ -605,6 +692,7 @@ class MySQLRepository(DatabaseRepositoryInterface):
                 summary.domains.append(domain_summary)
             
             session.add(summary)
+            rollups.add_summary(summary)
             session.commit()
             session.refresh(summary)
             return summary
@@ -716,10 +804,23 @@ class MySQLRepository(DatabaseRepositoryInterface):
     def delete_account(self, email_address: str) -> bool:
         """Delete account and all related data"""
         account = self.get_account_by_email(email_address)
-        if account:
-            self.delete(account)
+        if not account:
+            return False
+
+        session = self._get_session()
+        try:
+            # Summaries cascade with the account; its tallies and rollups are keyed by id or address
+            RollupRepository(session).delete_account(account.id, account.email_address)
+            session.query(CategoryDailyTally).filter(
+                CategoryDailyTally.email_address == account.email_address
+            ).delete(synchronize_session=False)
+            session.delete(account)
+            session.commit()
             return True
-        return False
+        except SQLAlchemyError as e:
+            session.rollback()
+            logger.error(f"Error deleting account: {str(e)}")
+            raise
     
     # ==================== Settings Operations ====================
     
@@ -834,6 +935,54 @@ class MySQLRepository(DatabaseRepositoryInterface):
         count = self.count(ProcessedEmailLog, account_email=email_address, message_id=message_id)
         return count > 0
     
+    def get_processed_message_ids(self, email_address: str, message_ids: Iterable[str]) -> Set[str]:
+        """Find already-processed emails among message_ids with one IN (...) query per chunk"""
+        pending = list(dict.fromkeys(message_id for message_id in message_ids if message_id))
+        if not pending:
+            return set()
+
+        # The column's collation is case-insensitive, so a stored ID can match
+        # inputs that differ only in case; map matches back to the inputs as given
+        by_folded: Dict[str, List[str]] = {}
+        for message_id in pending:
+            by_folded.setdefault(message_id.lower(), []).append(message_id)
+
+        session = self._get_session()
+        processed: Set[str] = set()
+        try:
+            for start in range(0, len(pending), PROCESSED_ID_CHUNK_SIZE):
+                chunk = pending[start:start + PROCESSED_ID_CHUNK_SIZE]
+                rows = session.query(ProcessedEmailLog.message_id).filter(
+                    ProcessedEmailLog.account_email == email_address,
+                    ProcessedEmailLog.message_id.in_(chunk)
+                ).all()
+                for row in rows:
+                    processed.update(by_folded.get(row[0].lower(), ()))
+            return processed
+        except SQLAlchemyError as e:
+            session.rollback()
+            logger.error(f"Error looking up processed emails: {str(e)}")
+            raise
+    
+    def list_processed_message_ids(
+        self,
+        email_address: str,
+        after_id: int = 0,
+        limit: int = 10000
+    ) -> List[Tuple[int, str]]:
+        """Page through an account's processed emails in insertion order"""
+        session = self._get_session()
+        try:
+            rows = session.query(ProcessedEmailLog.id, ProcessedEmailLog.message_id).filter(
+                ProcessedEmailLog.account_email == email_address,
+                ProcessedEmailLog.id > after_id
+            ).order_by(ProcessedEmailLog.id).limit(limit).all()
+            return [(row[0], row[1]) for row in rows]
+        except SQLAlchemyError as e:
+            session.rollback()
+            logger.error(f"Error listing processed emails: {str(e)}")
+            raise
+    
     def mark_email_processed(
         self,
         email_address: str,
@@ -867,6 +1016,39 @@ class MySQLRepository(DatabaseRepositoryInterface):
             logger.error(f"Error marking email as processed: {str(e)}")
             raise
     
+    def bulk_mark_emails_processed(
+        self,
+        email_address: str,
+        message_ids: Iterable[str],
+        chunk_size: Optional[int] = None
+    ) -> Tuple[int, int]:
+        """Mark many emails as processed with one INSERT IGNORE per chunk"""
+        cleaned = [message_id.strip() for message_id in message_ids if message_id and message_id.strip()]
+        if not cleaned:
+            return 0, 0
+        pending = list(dict.fromkeys(cleaned))
+        chunk_size = max(1, chunk_size or BULK_INSERT_CHUNK_SIZE)
+
+        session = self._get_session()
+        inserted = 0
+        now = datetime.utcnow()
+        try:
+            for start in range(0, len(pending), chunk_size):
+                chunk = pending[start:start + chunk_size]
+                # INSERT IGNORE rather than ON DUPLICATE KEY UPDATE: with the FOUND_ROWS
+                # client flag SQLAlchemy sets, the latter counts duplicates as affected rows
+                statement = mysql_insert(ProcessedEmailLog).prefix_with('IGNORE').values([
+                    {'account_email': email_address, 'message_id': message_id, 'processed_at': now}
+                    for message_id in chunk
+                ])
+                inserted += session.execute(statement).rowcount
+            session.commit()
+            return inserted, len(cleaned) - inserted
+        except SQLAlchemyError as e:
+            session.rollback()
+            logger.error(f"Error bulk marking emails as processed: {str(e)}")
+            raise
+    
     def get_processed_emails_count(
         self,
         email_address: str,
@@ -0,0 +1,222 @@
+"""Repository for the transactional outbox of processing side effects."""
+
+import json
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import Engine, func, or_
+from sqlalchemy.orm import sessionmaker
+
+from models.database import OutboxEvent
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+STATUS_PENDING = 'pending'
+STATUS_DELIVERED = 'delivered'
+STATUS_DEAD = 'dead'
+
+
+@dataclass(frozen=True)
+class OutboxMessage:
+    """A side effect to deliver, as handed to the dispatcher."""
+    id: int
+    event_type: str
+    account_email: Optional[str]
+    processing_run_id: Optional[str]
+    payload: Dict[str, Any]
+    attempts: int
+
+
+@dataclass(frozen=True)
+class NewOutboxEvent:
+    """A side effect to enqueue."""
+    event_type: str
+    payload: Dict[str, Any]
+    account_email: Optional[str] = None
+    processing_run_id: Optional[str] = None
+
+
+class OutboxRepository:
+    """
+    Stores side effects until they have been delivered.
+
+    A run enqueues all of its side effects in one transaction, so they are
+    either all queued or none are. Dispatchers claim due events by setting a
+    lock that expires, so an instance that dies mid-delivery does not keep
+    them forever; the event is then delivered again, which is why handlers
+    must tolerate duplicates.
+    """
+
+    def __init__(self, engine: Engine, clock=datetime.utcnow):
+        """
+        Initialize repository with a shared SQLAlchemy engine.
+
+        Args:
+            engine: SQLAlchemy Engine instance to use for database connections
+            clock: Returns the current naive UTC time (injectable for tests)
+        """
+        self.engine = engine
+        self._clock = clock
+        self._Session = sessionmaker(bind=engine)
+
+    def enqueue(self, events: Iterable[NewOutboxEvent]) -> List[int]:
+        """
+        Queue side effects in a single transaction.
+
+        Returns:
+            Ids of the queued events
+        """
+        now = self._clock()
+        rows = [
+            OutboxEvent(
+                event_type=event.event_type,
+                account_email=event.account_email,
+                processing_run_id=event.processing_run_id,
+                payload=json.dumps(event.payload, default=str),
+                status=STATUS_PENDING,
+                attempts=0,
+                available_at=now,
+                created_at=now,
+            )
+            for event in events
+        ]
+        if not rows:
+            return []
+        with self._Session() as session:
+            session.add_all(rows)
+            session.commit()
+            return [row.id for row in rows]
+
+    def claim_due(self, owner_id: str, limit: int, lock_seconds: float) -> List[OutboxMessage]:
+        """
+        Lock up to limit due events for delivery by owner_id, oldest first.
+
+        Args:
+            owner_id: Identity of the claiming dispatcher
+            limit: Maximum number of events to claim
+            lock_seconds: How long other dispatchers leave the claimed events alone
+
+        Returns:
+            Claimed events in enqueue order
+        """
+        now = self._clock()
+        locked_until = now + timedelta(seconds=lock_seconds)
+        # Claimed rows are read back by this token; locked_until may be stored with less precision
+        claim_token = uuid.uuid4().hex
+        due = (
+            OutboxEvent.status == STATUS_PENDING,
+            OutboxEvent.available_at <= now,
+            or_(OutboxEvent.locked_until.is_(None), OutboxEvent.locked_until < now),
+        )
+        with self._Session() as session:
+            ids = [
+                row.id for row in
+                session.query(OutboxEvent.id).filter(*due).order_by(OutboxEvent.id).limit(limit)
+            ]
+            if not ids:
+                return []
+            # Only rows still due are taken, so a concurrent dispatcher that got there first keeps them
+            session.query(OutboxEvent).filter(OutboxEvent.id.in_(ids), *due).update(
+                {
+                    OutboxEvent.locked_by: owner_id,
+                    OutboxEvent.locked_until: locked_until,
+                    OutboxEvent.claim_token: claim_token,
+                },
+                synchronize_session=False
+            )
+            session.commit()
+            claimed = (
+                session.query(OutboxEvent)
+                .filter(OutboxEvent.id.in_(ids), OutboxEvent.claim_token == claim_token)
+                .order_by(OutboxEvent.id)
+                .all()
+            )
+            return [self._to_message(row) for row in claimed]
+
+    def mark_delivered(self, event_ids: List[int]) -> None:
+        """Record successful delivery of events."""
+        if not event_ids:
+            return
+        now = self._clock()
+        with self._Session() as session:
+            session.query(OutboxEvent).filter(OutboxEvent.id.in_(event_ids)).update(
+                {
+                    OutboxEvent.status: STATUS_DELIVERED,
+                    OutboxEvent.attempts: OutboxEvent.attempts + 1,
+                    OutboxEvent.delivered_at: now,
+                    OutboxEvent.locked_by: None,
+                    OutboxEvent.locked_until: None,
+                    OutboxEvent.claim_token: None,
+                    OutboxEvent.last_error: None,
+                },
+                synchronize_session=False
+            )
+            session.commit()
+
+    def mark_failed(self, event_id: int, error: str, retry_in: Optional[float]) -> None:
+        """
+        Record a failed delivery attempt.
+
+        Args:
+            event_id: Event that failed
+            error: Error message
+            retry_in: Seconds until the next attempt, or None to give up (status 'dead')
+        """
+        now = self._clock()
+        values = {
+            OutboxEvent.attempts: OutboxEvent.attempts + 1,
+            OutboxEvent.last_error: error[:2000],
+            OutboxEvent.locked_by: None,
+            OutboxEvent.locked_until: None,
+            OutboxEvent.claim_token: None,
+        }
+        if retry_in is None:
+            values[OutboxEvent.status] = STATUS_DEAD
+        else:
+            values[OutboxEvent.available_at] = now + timedelta(seconds=retry_in)
+        with self._Session() as session:
+            session.query(OutboxEvent).filter(OutboxEvent.id == event_id).update(values, synchronize_session=False)
+            session.commit()
+
+    def purge_delivered(self, older_than: timedelta) -> int:
+        """Delete delivered events older than the given age; returns the number removed."""
+        cutoff = self._clock() - older_than
+        with self._Session() as session:
+            removed = session.query(OutboxEvent).filter(
+                OutboxEvent.status == STATUS_DELIVERED,
+                OutboxEvent.delivered_at < cutoff,
+            ).delete(synchronize_session=False)
+            session.commit()
+        return removed
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Event counts by status and the age of the oldest pending event."""
+        with self._Session() as session:
+            counts = dict(
+                session.query(OutboxEvent.status, func.count(OutboxEvent.id)).group_by(OutboxEvent.status).all()
+            )
+            oldest_pending = session.query(func.min(OutboxEvent.created_at)).filter(
+                OutboxEvent.status == STATUS_PENDING
+            ).scalar()
+        return {
+            'pending': counts.get(STATUS_PENDING, 0),
+            'delivered': counts.get(STATUS_DELIVERED, 0),
+            'dead': counts.get(STATUS_DEAD, 0),
+            'oldest_pending_seconds': (
+                round((self._clock() - oldest_pending).total_seconds(), 1) if oldest_pending else None
+            ),
+        }
+
+    @staticmethod
+    def _to_message(row: OutboxEvent) -> OutboxMessage:
+        return OutboxMessage(
+            id=row.id,
+            event_type=row.event_type,
+            account_email=row.account_email,
+            processing_run_id=row.processing_run_id,
+            payload=json.loads(row.payload),
+            attempts=row.attempts or 0,
+        )
@@ -0,0 +1,500 @@
+"""
+Repository for the materialized rollups of email summaries and category tallies.
+
+Dashboard and recommendation reads used to aggregate every summary or tally
+row in the requested range. The rollup tables hold the same sums per day,
+week (starting Monday) and month; they are updated in the transaction that
+writes a summary or tally, so a read only sums the few whole periods that
+cover its range:
+
+    split_into_periods(date(2026, 9, 28), date(2026, 11, 3))
+    -> [('week', 2026-09-28), ('month', 2026-10-01), ('day', 2026-11-01), ...]
+
+The number of periods depends on the length of the range, not on how much
+history has been stored. Category tallies are already one row per day, so
+their rollups only hold weeks and months; the days of a range are read from
+category_daily_tallies.
+
+History written before the rollup tables existed is rolled up on first use.
+The first process to insert the rollup_backfills marker row does this, in
+the same transaction as the marker, so instances that share the database
+backfill only once.
+"""
+import threading
+import weakref
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import and_, func, or_
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from models.database import (
+    CategoryDailyTally, CategorySummary, CategoryTallyRollup, DomainSummary,
+    EmailSummary, RollupBackfill, SenderSummary, SummaryRollup
+)
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+PERIOD_DAY = 'day'
+PERIOD_WEEK = 'week'
+PERIOD_MONTH = 'month'
+SUMMARY_PERIODS = (PERIOD_DAY, PERIOD_WEEK, PERIOD_MONTH)
+TALLY_PERIODS = (PERIOD_WEEK, PERIOD_MONTH)
+
+# Category of the tally rollup row holding an account's total and days with data
+ALL_CATEGORIES = '*'
+
+# Rows per multi-row upsert; up to fifteen bound parameters per row stays under SQLite's default limit of 999
+ROLLUP_UPSERT_CHUNK_SIZE = 50
+
+SUMMARY_KEY_COLUMNS = ('period', 'period_start', 'account_id', 'dimension', 'key', 'sender_name', 'is_blocked')
+SUMMARY_COUNT_COLUMNS = ('email_count', 'deleted_count', 'archived_count', 'skipped_count',
+                         'duration_seconds', 'duration_count', 'summary_count')
+TALLY_KEY_COLUMNS = ('email_address', 'period', 'period_start', 'category')
+TALLY_COUNT_COLUMNS = ('count', 'days_with_data')
+
+# Name of the rollup_backfills marker row
+BACKFILL_MARKER = 'rollups'
+
+# Engines whose rollups have been checked for a backfill of existing history
+_backfilled_engines = weakref.WeakSet()
+_backfill_lock = threading.Lock()
+
+
+def period_start(period: str, day: date) -> date:
+    """First day of the day, week (Monday) or month containing day."""
+    if period == PERIOD_WEEK:
+        return day - timedelta(days=day.weekday())
+    if period == PERIOD_MONTH:
+        return day.replace(day=1)
+    return day
+
+
+def period_end(period: str, start: date) -> date:
+    """Last day of the period starting on start."""
+    if period == PERIOD_WEEK:
+        return start + timedelta(days=6)
+    if period == PERIOD_MONTH:
+        next_month = (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+        return next_month - timedelta(days=1)
+    return start
+
+
+def split_into_periods(start_date: date, end_date: date) -> List[Tuple[str, date]]:
+    """
+    Cover the days from start_date to end_date (inclusive) with the fewest whole periods.
+
+    Whole months are used where they fit, then whole weeks that stay within
+    one month (so later months still line up), then single days.
+
+    Returns:
+        (period, period_start) pairs in date order
+    """
+    periods = []
+    day = start_date
+    while day <= end_date:
+        if day.day == 1 and period_end(PERIOD_MONTH, day) <= end_date:
+            period = PERIOD_MONTH
+        elif (day.weekday() == 0 and period_end(PERIOD_WEEK, day) <= end_date
+              and period_end(PERIOD_WEEK, day).month == day.month):
+            period = PERIOD_WEEK
+        else:
+            period = PERIOD_DAY
+        periods.append((period, day))
+        day = period_end(period, day) + timedelta(days=1)
+    return periods
+
+
+def _group_periods(periods: Iterable[Tuple[str, date]]) -> Dict[str, List[date]]:
+    grouped = defaultdict(list)
+    for period, start in periods:
+        grouped[period].append(start)
+    return grouped
+
+
+def _periods_filter(model, grouped: Dict[str, List[date]]):
+    return or_(*[
+        and_(model.period == period, model.period_start.in_(starts))
+        for period, starts in grouped.items()
+    ])
+
+
+class RollupRepository:
+    """
+    Maintains and reads the summary and category tally rollups.
+
+    Writes go through the caller's session and are committed with the
+    summary or tallies they roll up. Counts are added with the same
+    multi-row upserts as category tallies (INSERT ... ON DUPLICATE KEY
+    UPDATE on MySQL, INSERT ... ON CONFLICT DO UPDATE on SQLite).
+    """
+
+    def __init__(self, session: Session):
+        """
+        Initialize the repository with a SQLAlchemy session.
+
+        Args:
+            session: SQLAlchemy database session
+        """
+        self.session = session
+
+    # ==================== Maintenance ====================
+
+    def ensure_backfilled(self) -> None:
+        """
+        Roll up history written before the rollup tables existed.
+
+        Runs once per engine, before its first rollup read or write; a table
+        is rebuilt only when it is empty while its source rows are not. Only
+        the process that claims the marker row checks the tables; the claim
+        commits with the backfill, so a concurrent claim waits for it.
+        """
+        engine = self.session.get_bind()
+        if engine in _backfilled_engines:
+            return
+        with _backfill_lock:
+            if engine in _backfilled_engines:
+                return
+            try:
+                if self._claim_backfill():
+                    if (self.session.query(SummaryRollup.id).first() is None
+                            and self.session.query(EmailSummary.id).first() is not None):
+                        self._backfill_summaries()
+                    if (self.session.query(CategoryTallyRollup.id).first() is None
+                            and self.session.query(CategoryDailyTally.id).first() is not None):
+                        self._backfill_tallies()
+                self.session.commit()
+            except Exception:
+                self.session.rollback()
+                raise
+            _backfilled_engines.add(engine)
+
+    def add_summary(self, summary: EmailSummary) -> None:
+        """Add a new email summary and its category, sender and domain rows to the rollups."""
+        day = (summary.date or datetime.utcnow()).date()
+        account_id = summary.account_id or 0
+        duration = summary.processing_duration_seconds
+        entries = defaultdict(lambda: defaultdict(int))
+        self._add_entry(entries, day, account_id, 'total', '', '', False, {
+            'email_count': summary.total_emails_processed or 0,
+            'deleted_count': summary.total_emails_deleted or 0,
+            'archived_count': summary.total_emails_archived or 0,
+            'skipped_count': summary.total_emails_skipped or 0,
+            'duration_seconds': duration or 0,
+            'duration_count': 0 if duration is None else 1,
+            'summary_count': 1,
+        })
+        for category in summary.categories:
+            self._add_entry(entries, day, account_id, 'category', category.category_name, '', False,
+                            self._item_counts(category))
+        for sender in summary.senders:
+            self._add_entry(entries, day, account_id, 'sender', sender.sender_email, sender.sender_name or '', False,
+                            self._item_counts(sender))
+        for domain in summary.domains:
+            self._add_entry(entries, day, account_id, 'domain', domain.domain, '', bool(domain.is_blocked),
+                            self._item_counts(domain))
+        self._upsert(SummaryRollup, SUMMARY_KEY_COLUMNS, SUMMARY_COUNT_COLUMNS, entries)
+
+    def add_tallies(
+        self,
+        increments: Dict[Tuple[str, date], Dict[str, int]],
+        new_days: Iterable[Tuple[str, date]] = ()
+    ) -> None:
+        """
+        Add category count changes of daily tallies to the week and month rollups.
+
+        Args:
+            increments: Category count changes (may be negative), keyed by (email_address, tally_date)
+            new_days: (email_address, tally_date) pairs that had no tally before
+        """
+        entries = defaultdict(lambda: defaultdict(int))
+        for (email_address, tally_date), category_counts in increments.items():
+            for category, count in category_counts.items():
+                for period in TALLY_PERIODS:
+                    start = period_start(period, tally_date)
+                    entries[(email_address, period, start, category)]['count'] += count
+                    entries[(email_address, period, start, ALL_CATEGORIES)]['count'] += count
+        for email_address, tally_date in new_days:
+            for period in TALLY_PERIODS:
+                entries[(email_address, period, period_start(period, tally_date), ALL_CATEGORIES)]['days_with_data'] += 1
+        self._upsert(CategoryTallyRollup, TALLY_KEY_COLUMNS, TALLY_COUNT_COLUMNS, entries)
+
+    def delete_tallies_before(self, email_address: str, cutoff_date: date) -> None:
+        """
+        Bring an account's tally rollups in line after its daily tallies before cutoff_date were deleted.
+
+        Periods that ended before the cutoff are dropped; the week and month
+        containing it are recomputed from the remaining daily tallies.
+        """
+        self.session.query(CategoryTallyRollup).filter(
+            CategoryTallyRollup.email_address == email_address,
+            CategoryTallyRollup.period_start < cutoff_date
+        ).delete(synchronize_session=False)
+
+        remaining = [
+            (period, period_start(period, cutoff_date)) for period in TALLY_PERIODS
+            if period_start(period, cutoff_date) < cutoff_date
+        ]
+        if not remaining:
+            return
+        first_day = min(start for _, start in remaining)
+        last_day = max(period_end(period, start) for period, start in remaining)
+        rows = self.session.query(
+            CategoryDailyTally.tally_date,
+            CategoryDailyTally.category,
+            CategoryDailyTally.count
+        ).filter(
+            CategoryDailyTally.email_address == email_address,
+            CategoryDailyTally.tally_date >= first_day,
+            CategoryDailyTally.tally_date <= last_day
+        ).all()
+
+        entries = defaultdict(lambda: defaultdict(int))
+        for period, start in remaining:
+            end = period_end(period, start)
+            days = set()
+            for tally_date, category, count in rows:
+                if start <= tally_date <= end:
+                    entries[(email_address, period, start, category)]['count'] += count
+                    entries[(email_address, period, start, ALL_CATEGORIES)]['count'] += count
+                    days.add(tally_date)
+            entries[(email_address, period, start, ALL_CATEGORIES)]['days_with_data'] += len(days)
+        self._upsert(CategoryTallyRollup, TALLY_KEY_COLUMNS, TALLY_COUNT_COLUMNS, entries)
+
+    def delete_account(self, account_id: int, email_address: str) -> None:
+        """Drop the summary and tally rollups of an account whose summaries and tallies are being deleted."""
+        self.session.query(SummaryRollup).filter(
+            SummaryRollup.account_id == account_id
+        ).delete(synchronize_session=False)
+        self.session.query(CategoryTallyRollup).filter(
+            CategoryTallyRollup.email_address == email_address
+        ).delete(synchronize_session=False)
+
+    # ==================== Reads ====================
+
+    def get_summary(self, start_date: date, end_date: date):
+        """
+        Summary totals and top categories, domains and senders for whole days.
+
+        Returns:
+            (metrics, categories, domains, senders) rows labelled like the
+            aggregates of DatabaseService.get_summary_by_period
+        """
+        self.ensure_backfilled()
+        in_range = _periods_filter(SummaryRollup, _group_periods(split_into_periods(start_date, end_date)))
+
+        metrics = self.session.query(
+            func.sum(SummaryRollup.email_count).label('total_processed'),
+            func.sum(SummaryRollup.deleted_count).label('total_deleted'),
+            func.sum(SummaryRollup.archived_count).label('total_archived'),
+            func.sum(SummaryRollup.skipped_count).label('total_skipped'),
+            (func.sum(SummaryRollup.duration_seconds)
+             / func.nullif(func.sum(SummaryRollup.duration_count), 0)).label('avg_duration'),
+            func.sum(SummaryRollup.summary_count).label('summary_count')
+        ).filter(in_range, SummaryRollup.dimension == 'total').first()
+
+        total_count = func.sum(SummaryRollup.email_count)
+        categories = self.session.query(
+            SummaryRollup.key.label('category_name'),
+            total_count.label('total_count'),
+            func.sum(SummaryRollup.deleted_count).label('total_deleted')
+        ).filter(in_range, SummaryRollup.dimension == 'category').group_by(
+            SummaryRollup.key
+        ).order_by(total_count.desc()).limit(10).all()
+
+        domains = self.session.query(
+            SummaryRollup.key.label('domain'),
+            total_count.label('total_count'),
+            func.sum(SummaryRollup.deleted_count).label('total_deleted'),
+            SummaryRollup.is_blocked
+        ).filter(in_range, SummaryRollup.dimension == 'domain').group_by(
+            SummaryRollup.key, SummaryRollup.is_blocked
+        ).order_by(total_count.desc()).limit(10).all()
+
+        senders = self.session.query(
+            SummaryRollup.key.label('sender_email'),
+            func.nullif(SummaryRollup.sender_name, '').label('sender_name'),
+            total_count.label('total_count'),
+            func.sum(SummaryRollup.deleted_count).label('total_deleted')
+        ).filter(in_range, SummaryRollup.dimension == 'sender').group_by(
+            SummaryRollup.key, SummaryRollup.sender_name
+        ).order_by(total_count.desc()).limit(10).all()
+
+        return metrics, categories, domains, senders
+
+    def get_category_totals(
+        self,
+        email_address: str,
+        start_date: date,
+        end_date: date
+    ) -> Tuple[Dict[str, int], int]:
+        """
+        Category counts of an account's daily tallies from start_date to end_date (inclusive).
+
+        Returns:
+            (counts by category, number of days with a tally)
+        """
+        self.ensure_backfilled()
+        grouped = _group_periods(split_into_periods(start_date, end_date))
+        days = grouped.pop(PERIOD_DAY, [])
+
+        category_totals: Dict[str, int] = {}
+        days_with_data = 0
+        if grouped:
+            rows = self.session.query(
+                CategoryTallyRollup.category,
+                func.sum(CategoryTallyRollup.count),
+                func.sum(CategoryTallyRollup.days_with_data)
+            ).filter(
+                CategoryTallyRollup.email_address == email_address,
+                _periods_filter(CategoryTallyRollup, grouped)
+            ).group_by(CategoryTallyRollup.category).all()
+            for category, count, rollup_days in rows:
+                if category == ALL_CATEGORIES:
+                    days_with_data += int(rollup_days or 0)
+                else:
+                    category_totals[category] = int(count or 0)
+
+        if days:
+            rows = self.session.query(
+                CategoryDailyTally.tally_date,
+                CategoryDailyTally.category,
+                CategoryDailyTally.count
+            ).filter(
+                CategoryDailyTally.email_address == email_address,
+                CategoryDailyTally.tally_date.in_(days)
+            ).all()
+            for _, category, count in rows:
+                category_totals[category] = category_totals.get(category, 0) + count
+            days_with_data += len({tally_date for tally_date, _, _ in rows})
+
+        return category_totals, days_with_data
+
+    # ==================== Helpers ====================
+
+    @staticmethod
+    def _item_counts(item) -> Dict[str, int]:
+        return {
+            'email_count': item.email_count or 0,
+            'deleted_count': item.deleted_count or 0,
+            'archived_count': item.archived_count or 0,
+        }
+
+    @staticmethod
+    def _add_entry(entries, day: date, account_id: int, dimension: str, key: str,
+                   sender_name: str, is_blocked: bool, counts: Dict[str, float]) -> None:
+        for period in SUMMARY_PERIODS:
+            entry = entries[(period, period_start(period, day), account_id, dimension, key or '', sender_name, is_blocked)]
+            for column, value in counts.items():
+                entry[column] += value
+
+    def _claim_backfill(self) -> bool:
+        """Insert the backfill marker unless it exists; True if this session inserted it."""
+        dialect = self.session.get_bind().dialect.name
+        row = {'name': BACKFILL_MARKER, 'completed_at': datetime.utcnow()}
+        if dialect == 'mysql':
+            statement = mysql_insert(RollupBackfill.__table__).values(row).prefix_with('IGNORE')
+        elif dialect == 'sqlite':
+            statement = sqlite_insert(RollupBackfill.__table__).values(row).on_conflict_do_nothing()
+        else:
+            if self.session.get(RollupBackfill, BACKFILL_MARKER) is not None:
+                return False
+            self.session.add(RollupBackfill(**row))
+            self.session.flush()
+            return True
+        return self.session.execute(statement).rowcount == 1
+
+    def _backfill_summaries(self) -> None:
+        logger.info("📊 Rolling up existing email summaries...")
+        entries = defaultdict(lambda: defaultdict(int))
+        for row in self.session.query(
+            EmailSummary.date, EmailSummary.account_id, EmailSummary.total_emails_processed,
+            EmailSummary.total_emails_deleted, EmailSummary.total_emails_archived,
+            EmailSummary.total_emails_skipped, EmailSummary.processing_duration_seconds
+        ).yield_per(1000):
+            self._add_entry(entries, row.date.date(), row.account_id or 0, 'total', '', '', False, {
+                'email_count': row.total_emails_processed or 0,
+                'deleted_count': row.total_emails_deleted or 0,
+                'archived_count': row.total_emails_archived or 0,
+                'skipped_count': row.total_emails_skipped or 0,
+                'duration_seconds': row.processing_duration_seconds or 0,
+                'duration_count': 0 if row.processing_duration_seconds is None else 1,
+                'summary_count': 1,
+            })
+
+        items = (
+            ('category', CategorySummary, CategorySummary.category_name, None, None),
+            ('sender', SenderSummary, SenderSummary.sender_email, SenderSummary.sender_name, None),
+            ('domain', DomainSummary, DomainSummary.domain, None, DomainSummary.is_blocked),
+        )
+        for dimension, model, key_column, name_column, blocked_column in items:
+            columns = [EmailSummary.date, EmailSummary.account_id, key_column, model.email_count,
+                       model.deleted_count, model.archived_count]
+            columns += [c for c in (name_column, blocked_column) if c is not None]
+            for row in self.session.query(*columns).join(EmailSummary).yield_per(1000):
+                sender_name = (row[6] or '') if name_column is not None else ''
+                is_blocked = bool(row[6]) if blocked_column is not None else False
+                self._add_entry(entries, row[0].date(), row[1] or 0, dimension, row[2], sender_name, is_blocked, {
+                    'email_count': row[3] or 0,
+                    'deleted_count': row[4] or 0,
+                    'archived_count': row[5] or 0,
+                })
+        self._upsert(SummaryRollup, SUMMARY_KEY_COLUMNS, SUMMARY_COUNT_COLUMNS, entries)
+        logger.info(f"✅ Rolled up email summaries into {len(entries)} rows")
+
+    def _backfill_tallies(self) -> None:
+        logger.info("📊 Rolling up existing category tallies...")
+        increments = defaultdict(dict)
+        for email_address, tally_date, category, count in self.session.query(
+            CategoryDailyTally.email_address, CategoryDailyTally.tally_date,
+            CategoryDailyTally.category, CategoryDailyTally.count
+        ).yield_per(1000):
+            increments[(email_address, tally_date)][category] = count
+        self.add_tallies(increments, new_days=increments.keys())
+        logger.info(f"✅ Rolled up {len(increments)} daily category tallies")
+
+    def _upsert(self, model, key_columns: Tuple[str, ...], count_columns: Tuple[str, ...], entries) -> None:
+        """Add counts to rollup rows, creating the rows that do not exist yet."""
+        if not entries:
+            return
+        now = datetime.utcnow()
+        rows = []
+        for key, counts in entries.items():
+            row = dict(zip(key_columns, key))
+            row.update({column: counts.get(column, 0) for column in count_columns})
+            row['updated_at'] = now
+            rows.append(row)
+
+        dialect = self.session.get_bind().dialect.name
+        table = model.__table__
+        if dialect not in ('mysql', 'sqlite'):
+            for row in rows:
+                existing = self.session.query(model).filter_by(
+                    **{column: row[column] for column in key_columns}
+                ).first()
+                if existing is None:
+                    self.session.add(model(**row))
+                    continue
+                for column in count_columns:
+                    setattr(existing, column, getattr(existing, column) + row[column])
+                existing.updated_at = now
+            self.session.flush()
+            return
+
+        for start in range(0, len(rows), ROLLUP_UPSERT_CHUNK_SIZE):
+            chunk = rows[start:start + ROLLUP_UPSERT_CHUNK_SIZE]
+            if dialect == 'mysql':
+                statement = mysql_insert(table).values(chunk)
+                changes = {column: table.c[column] + statement.inserted[column] for column in count_columns}
+                changes['updated_at'] = statement.inserted.updated_at
+                statement = statement.on_duplicate_key_update(**changes)
+            else:
+                statement = sqlite_insert(table).values(chunk)
+                changes = {column: table.c[column] + statement.excluded[column] for column in count_columns}
+                changes['updated_at'] = statement.excluded.updated_at
+                statement = statement.on_conflict_do_update(index_elements=list(key_columns), set_=changes)
+            self.session.execute(statement)
@@ -0,0 +1,122 @@
+"""Repository for per-account processing run checkpoints."""
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Engine
+from sqlalchemy.orm import sessionmaker
+
+from models.database import AccountRunCheckpoint
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class InterruptedRun:
+    """Checkpoint left behind by a run that never completed."""
+    run_id: Optional[str]
+    window_start: datetime
+    started_at: datetime
+    messages_checkpointed: int
+    resumed_runs: int
+
+
+class RunCheckpointRepository:
+    """
+    Tracks the in-flight run of each account.
+
+    begin_run writes a row when a run starts, record_progress advances it as
+    batches of outcomes are persisted, and complete_run deletes it. A row
+    still present when the next run begins belongs to a run that crashed or
+    failed, and its window tells the new run how far back to fetch.
+    """
+
+    def __init__(self, engine: Engine, clock=datetime.utcnow):
+        """
+        Initialize repository with a shared SQLAlchemy engine.
+
+        Args:
+            engine: SQLAlchemy Engine instance to use for database connections
+            clock: Returns the current naive UTC time (injectable for tests)
+        """
+        self.engine = engine
+        self._clock = clock
+        self._Session = sessionmaker(bind=engine)
+
+    def begin_run(self, account_email: str, window_start: datetime, run_id: Optional[str] = None) -> Optional[InterruptedRun]:
+        """
+        Record the start of a run, folding in any interrupted run.
+
+        Args:
+            account_email: Account being processed
+            window_start: Oldest email time this run fetches
+            run_id: Processing run identifier, if one was created
+
+        Returns:
+            The interrupted run being resumed, or None. When present, the
+            stored window is widened to cover it so a second crash still
+            resumes from the original window.
+        """
+        now = self._clock()
+        with self._Session() as session:
+            checkpoint = session.get(AccountRunCheckpoint, account_email)
+            interrupted = None
+            if checkpoint is None:
+                session.add(AccountRunCheckpoint(
+                    account_email=account_email,
+                    run_id=run_id,
+                    window_start=window_start,
+                    started_at=now,
+                    resumed_runs=0,
+                    messages_checkpointed=0,
+                ))
+            else:
+                interrupted = InterruptedRun(
+                    run_id=checkpoint.run_id,
+                    window_start=checkpoint.window_start,
+                    started_at=checkpoint.started_at,
+                    messages_checkpointed=checkpoint.messages_checkpointed or 0,
+                    resumed_runs=checkpoint.resumed_runs or 0,
+                )
+                checkpoint.run_id = run_id
+                checkpoint.window_start = min(checkpoint.window_start, window_start)
+                checkpoint.started_at = now
+                checkpoint.resumed_runs = interrupted.resumed_runs + 1
+                checkpoint.messages_checkpointed = 0
+                checkpoint.last_checkpoint_at = None
+            session.commit()
+        return interrupted
+
+    def record_progress(self, account_email: str, messages: int) -> None:
+        """Add a persisted batch of outcomes to the account's checkpoint."""
+        with self._Session() as session:
+            checkpoint = session.get(AccountRunCheckpoint, account_email)
+            if checkpoint is None:
+                return
+            checkpoint.messages_checkpointed = (checkpoint.messages_checkpointed or 0) + messages
+            checkpoint.last_checkpoint_at = self._clock()
+            session.commit()
+
+    def complete_run(self, account_email: str) -> None:
+        """Drop the checkpoint of a run that finished successfully."""
+        with self._Session() as session:
+            checkpoint = session.get(AccountRunCheckpoint, account_email)
+            if checkpoint is not None:
+                session.delete(checkpoint)
+                session.commit()
+
+    def get_checkpoint(self, account_email: str) -> Optional[InterruptedRun]:
+        """Current checkpoint of an account, if a run is in flight or was interrupted."""
+        with self._Session() as session:
+            checkpoint = session.get(AccountRunCheckpoint, account_email)
+            if checkpoint is None:
+                return None
+            return InterruptedRun(
+                run_id=checkpoint.run_id,
+                window_start=checkpoint.window_start,
+                started_at=checkpoint.started_at,
+                messages_checkpointed=checkpoint.messages_checkpointed or 0,
+                resumed_runs=checkpoint.resumed_runs or 0,
+            )
@@ -0,0 +1,74 @@
+"""
+Thread-bound SQLAlchemy sessions for the database repositories.
+
+Concurrent account workers must not share a Session, so each thread gets
+its own. A Session that has run a query keeps its pool connection checked
+out until it is closed, so sessions are closed:
+
+- when the thread that owns one exits (pipeline and one-off worker threads),
+- when that thread calls release() at the end of a unit of work
+  (long-lived pool threads), and
+- all at once by close_all() on disconnect.
+"""
+import threading
+import weakref
+from typing import Callable, Set
+
+from sqlalchemy.orm import Session
+
+
+class _SessionHolder:
+    """Owns a thread's Session; dropped with the thread's locals when the thread exits."""
+
+    def __init__(self, session: Session):
+        self.session = session
+
+
+class ThreadSessions:
+    """One Session per thread, closed when the thread exits or releases it."""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._sessions: Set[Session] = set()
+        self._lock = threading.Lock()
+
+    def get(self, session_factory: Callable[[], Session]) -> Session:
+        """The calling thread's Session, created with session_factory on first use."""
+        holder = getattr(self._local, "holder", None)
+        if holder is None:
+            session = session_factory()
+            holder = _SessionHolder(session)
+            with self._lock:
+                self._sessions.add(session)
+            # Runs when the thread exits and its locals are cleared, or on release()
+            weakref.finalize(holder, self._close, session)
+            self._local.holder = holder
+        return holder.session
+
+    def release(self) -> None:
+        """Close the calling thread's Session, returning its connection to the pool."""
+        holder = getattr(self._local, "holder", None)
+        if holder is not None:
+            del self._local.holder
+            self._close(holder.session)
+
+    def close_all(self) -> None:
+        """Close every thread's Session; each thread gets a new one on its next call."""
+        with self._lock:
+            sessions = list(self._sessions)
+            self._sessions.clear()
+        # Outside the lock: dropping the old locals runs the finalizer of this thread's holder
+        self._local = threading.local()
+        for session in sessions:
+            session.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+    def _close(self, session: Session) -> None:
+        with self._lock:
+            if session not in self._sessions:
+                return
+            self._sessions.discard(session)
+        session.close()
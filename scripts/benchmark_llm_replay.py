@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Offline categorization benchmark using recorded LLM responses.
+
+Record once against the real provider, then replay as often as needed on a
+machine without network access:
+
+Usage:
+    # Record responses for a corpus of .eml files (needs REQUESTYAI_API_KEY)
+    python3 scripts/benchmark_llm_replay.py --emails ./corpus --recording ./llm.jsonl --record
+
+    # Replay with the recorded latencies and 4 concurrent workers
+    python3 scripts/benchmark_llm_replay.py --emails ./corpus --recording ./llm.jsonl --workers 4
+
+    # Replay with latencies sampled from the recording (seeded, repeatable)
+    python3 scripts/benchmark_llm_replay.py --emails ./corpus --recording ./llm.jsonl --latency-mode sampled
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email import message_from_bytes
+from pathlib import Path
+from typing import List
+
+# Add the project root to Python path for imports
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from services.email_categorizer_service import EmailCategorizerService
+from services.llm_recording_store import LLMRecordingStore
+from services.llm_service_factory import LLMServiceFactory
+from services.recording_llm_service import RecordingLLMServiceFactory
+from services.replay_llm_service import LATENCY_MODES, ReplayLLMServiceFactory
+
+
+def load_email_contents(emails_dir: str) -> List[str]:
+    """Load 'subject. body' strings from every .eml file in a directory (sorted for stability)."""
+    contents = []
+    for path in sorted(Path(emails_dir).glob("*.eml")):
+        message = message_from_bytes(path.read_bytes())
+        body = ""
+        for part in message.walk():
+            if part.get_content_type() == "text/plain":
+                payload = part.get_payload(decode=True) or b""
+                body = payload.decode(errors="ignore")
+                break
+        contents.append(f"{message.get('Subject', '')}. {body}".strip())
+    return contents
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark email categorization against recorded LLM responses")
+    parser.add_argument("--emails", required=True, help="Directory of .eml files to categorize")
+    parser.add_argument("--recording", required=True, help="JSONL recording file")
+    parser.add_argument("--record", action="store_true", help="Call the real provider and record responses")
+    parser.add_argument("--model", default=os.getenv("LLM_MODEL", "vertex/google/gemini-2.5-flash"), help="Model name")
+    parser.add_argument("--workers", type=int, default=1, help="Concurrent categorization workers")
+    parser.add_argument("--latency-mode", choices=LATENCY_MODES, default="recorded", help="Replay latency emulation")
+    parser.add_argument("--fixed-latency", type=float, default=0.0, help="Seconds per call for --latency-mode fixed")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for --latency-mode sampled")
+    args = parser.parse_args()
+
+    contents = load_email_contents(args.emails)
+    if not contents:
+        print(f"No .eml files found in {args.emails}")
+        return 1
+
+    store = LLMRecordingStore(args.recording)
+    if args.record:
+        factory = RecordingLLMServiceFactory(LLMServiceFactory(), store)
+    else:
+        factory = ReplayLLMServiceFactory(
+            store,
+            latency_mode=args.latency_mode,
+            fixed_latency_seconds=args.fixed_latency,
+            seed=args.seed
+        )
+    categorizer = EmailCategorizerService(factory)
+
+    latencies: List[float] = []
+    failures: List[str] = []
+
+    def categorize(text: str) -> None:
+        started = time.monotonic()
+        try:
+            categorizer.categorize(text, args.model)
+        except Exception as e:
+            failures.append(str(e))
+        latencies.append(time.monotonic() - started)
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        list(executor.map(categorize, contents))
+    elapsed = time.monotonic() - started
+
+    print(f"Emails:        {len(contents)}")
+    print(f"Workers:       {args.workers}")
+    print(f"Mode:          {'record' if args.record else 'replay/' + args.latency_mode}")
+    print(f"Wall time:     {elapsed:.2f}s")
+    print(f"Throughput:    {len(contents) / elapsed if elapsed else 0:.1f} emails/s")
+    print(f"Latency p50:   {percentile(latencies, 50) * 1000:.1f} ms")
+    print(f"Latency p95:   {percentile(latencies, 95) * 1000:.1f} ms")
+    print(f"Failures:      {len(failures)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,6 +2,7 @@ import json
 import logging
 from utils.logger import get_logger
 import os
+from email import message_from_bytes
 from bs4 import BeautifulSoup
 from imapclient import IMAPClient
 from kafka import KafkaProducer
@@ -98,3 +99,125 @@ def send_email_to_kafka(msg_id: str, kafka_topic: str = 'gmail_messages', kafka_
         
     if not has_message_published:
         raise Exception(f"Failed to publish message {msg_id} to Kafka")
+
+
+# Record format version for messages that embed the email content
+EMBEDDED_PAYLOAD_FORMAT = "embedded-v1"
+
+# Producer tuning for bulk publishing: wait briefly so records for the same
+# partition are sent together, and compress each batch on the wire
+DEFAULT_LINGER_MS = 50
+DEFAULT_BATCH_SIZE_BYTES = 256 * 1024
+DEFAULT_COMPRESSION_TYPE = 'gzip'
+
+# Bytes of each message fetched from IMAP and characters of body text embedded
+DEFAULT_FETCH_BYTES = 64 * 1024
+DEFAULT_MAX_BODY_CHARS = 4000
+
+
+def create_batching_producer(kafka_server: str = 'localhost:9092',
+                             linger_ms: int = DEFAULT_LINGER_MS,
+                             batch_size: int = DEFAULT_BATCH_SIZE_BYTES,
+                             compression_type: str = DEFAULT_COMPRESSION_TYPE):
+    """
+    Create a long-lived Kafka producer tuned for publishing many records at once.
+
+    Records are keyed by account (UTF-8) so all messages of an account land on
+    the same partition and are consumed in order by one consumer.
+
+    :param kafka_server: The Kafka server address
+    :param linger_ms: How long the producer waits to fill a batch
+    :param batch_size: Maximum batch size in bytes per partition
+    :param compression_type: Batch compression codec ('gzip' needs no extra libraries)
+    """
+    return KafkaProducer(
+        bootstrap_servers=[kafka_server],
+        linger_ms=linger_ms,
+        batch_size=batch_size,
+        compression_type=compression_type,
+        key_serializer=lambda k: k.encode('utf-8') if k is not None else None,
+        value_serializer=lambda v: json.dumps(v).encode('utf-8')
+    )
+
+
+def build_email_payload(msg_id, raw_message: bytes, account: str, labels=None,
+                        max_body_chars: int = DEFAULT_MAX_BODY_CHARS):
+    """
+    Build the Kafka record value embedding headers and a truncated body.
+
+    :param msg_id: The Gmail message UID
+    :param raw_message: The (possibly truncated) raw RFC822 bytes
+    :param account: The account the message belongs to
+    :param labels: Existing Gmail labels of the message
+    :param max_body_chars: Maximum characters of body text to embed
+    """
+    email_message = message_from_bytes(raw_message)
+    body = get_email_body(email_message)
+    return {
+        'format': EMBEDDED_PAYLOAD_FORMAT,
+        'msg_id': msg_id,
+        'account': account,
+        'subject': str(email_message['Subject'] or ''),
+        'from': str(email_message['From'] or ''),
+        'date': str(email_message['Date'] or ''),
+        'labels': [label.decode('utf-8', 'ignore') if isinstance(label, bytes) else str(label) for label in (labels or ())],
+        'body': body[:max_body_chars],
+        'body_truncated': len(body) > max_body_chars,
+    }
+
+
+def fetch_email_payloads(client, msg_ids, account: str, chunk_size: int = 100,
+                         fetch_bytes: int = DEFAULT_FETCH_BYTES,
+                         max_body_chars: int = DEFAULT_MAX_BODY_CHARS):
+    """
+    Fetch the leading bytes of many messages in bulk and build their payloads.
+
+    Uses one IMAP FETCH per chunk of message IDs and BODY.PEEK so messages
+    are not marked as seen.
+
+    :return: List of payload dicts, in msg_ids order
+    """
+    section = f'BODY.PEEK[]<0.{fetch_bytes}>'
+    payloads = []
+    for start in range(0, len(msg_ids), chunk_size):
+        chunk = list(msg_ids[start:start + chunk_size])
+        fetch_data = client.fetch(chunk, [section, 'X-GM-LABELS'])
+        for msg_id in chunk:
+            data = fetch_data.get(msg_id)
+            if not data:
+                logger.warning(f"Message {msg_id} not found while fetching payloads")
+                continue
+            raw_message = data.get(b'BODY[]<0>') or data.get(b'BODY[]') or b''
+            try:
+                payloads.append(build_email_payload(msg_id, raw_message, account, data.get(b'X-GM-LABELS'), max_body_chars))
+            except Exception as e:
+                logger.warning(f"Could not build payload for message {msg_id}: {e}")
+    return payloads
+
+
+def publish_email_payloads(producer, payloads, kafka_topic: str = 'gmail_messages', timeout: int = 30):
+    """
+    Publish embedded payloads keyed by account and wait for all acknowledgements.
+
+    :return: Number of records acknowledged by Kafka
+    :raises Exception: If any record could not be published
+    """
+    futures = [
+        (payload['msg_id'], producer.send(kafka_topic, key=payload.get('account'), value=payload))
+        for payload in payloads
+    ]
+    producer.flush(timeout=timeout)
+
+    failed = []
+    for msg_id, future in futures:
+        try:
+            future.get(timeout=timeout)
+        except Exception as e:
+            logger.info(f"Error sending message {msg_id} to Kafka: {str(e)}")
+            failed.append(msg_id)
+
+    published = len(futures) - len(failed)
+    logger.info(f"Published {published} of {len(futures)} embedded messages to Kafka topic {kafka_topic}")
+    if failed:
+        raise Exception(f"Failed to publish {len(failed)} messages to Kafka: {failed[:10]}")
+    return published
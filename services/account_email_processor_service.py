@@ -1,25 +1,54 @@
+import math
 import os
+import threading
 import time
 import logging
 from utils.logger import get_logger
-from datetime import datetime, date
-from typing import Dict, Callable, Optional
+from datetime import datetime, date, timedelta
+from typing import Any, Dict, Callable, Iterable, Iterator, List, Optional, Tuple
 from services.account_email_processor_interface import AccountEmailProcessorInterface
 from clients.account_category_client_interface import AccountCategoryClientInterface
 from services.email_deduplication_factory_interface import EmailDeduplicationFactoryInterface
 from services.email_categorizer_interface import EmailCategorizerInterface
 from services.gmail_fetcher_interface import GmailFetcherInterface
 from services.gmail_fetcher_service import GmailFetcher
-from services.email_processor_service import EmailProcessorService
+from services.email_processor_service import EmailProcessorService, EmailWorkItem
+from services.email_pipeline_config import EmailPipelineConfig
+from services.staged_pipeline import PipelineStage, StagedPipeline
+from services.processing_checkpointer import ProcessingCheckpointer
+from services.account_run_budget import AccountRunBudget
+from repositories.run_checkpoint_repository import InterruptedRun, RunCheckpointRepository
 from services.extract_sender_email_service import ExtractSenderEmailService
 from services.processing_status_manager import ProcessingState
 from services.interfaces.blocking_recommendation_collector_interface import IBlockingRecommendationCollector
 from services.interfaces.recommendation_email_notifier_interface import IRecommendationEmailNotifier
 from services.domain_extractor import extract_domain
+from services.llm_metrics_collector import LLMMetricsCollector, get_llm_metrics_collector
+from services.llm_budget_service import LLMBudgetTracker
+from services.outbox_dispatcher import (
+    EVENT_CATEGORY_STATS,
+    EVENT_RECOMMENDATION_EMAIL,
+    OutboxDispatcher,
+    category_stats_handler,
+    recommendation_email_handler,
+)
+from repositories.outbox_repository import NewOutboxEvent
 
 logger = get_logger(__name__)
 
 
+def _locked_iter(iterable: Iterable[Any], lock: threading.Lock) -> Iterator[Any]:
+    """Advance an iterator only while holding lock, releasing it between items."""
+    iterator = iter(iterable)
+    done = object()
+    while True:
+        with lock:
+            item = next(iterator, done)
+        if item is done:
+            return
+        yield item
+
+
 class AccountEmailProcessorService(AccountEmailProcessorInterface):
     """Service for processing emails for Gmail accounts with real-time status tracking."""
 
@@ -34,7 +63,12 @@ class AccountEmailProcessorService(AccountEmailProcessorInterface):
         deduplication_factory: EmailDeduplicationFactoryInterface,
         create_gmail_fetcher: Optional[Callable[[str, str, str], GmailFetcherInterface]] = None,
         blocking_recommendation_collector: Optional[IBlockingRecommendationCollector] = None,
-        recommendation_email_notifier: Optional[IRecommendationEmailNotifier] = None
+        recommendation_email_notifier: Optional[IRecommendationEmailNotifier] = None,
+        llm_metrics_collector: Optional[LLMMetricsCollector] = None,
+        llm_budget_tracker: Optional[LLMBudgetTracker] = None,
+        pipeline_config: Optional[EmailPipelineConfig] = None,
+        checkpoint_repository: Optional[RunCheckpointRepository] = None,
+        outbox: Optional[OutboxDispatcher] = None
     ):
         """
         Initialize the account email processor service.
@@ -50,6 +84,13 @@ class AccountEmailProcessorService(AccountEmailProcessorInterface):
             create_gmail_fetcher: Optional callable to create GmailFetcherInterface instances (defaults to GmailFetcher constructor)
             blocking_recommendation_collector: Optional IBlockingRecommendationCollector for collecting domain recommendations
             recommendation_email_notifier: Optional IRecommendationEmailNotifier for sending recommendation emails
+            llm_metrics_collector: Optional LLMMetricsCollector for per-run LLM usage (defaults to the process-wide one)
+            llm_budget_tracker: Optional LLMBudgetTracker whose per-cycle budget is reset and reported for each run
+            pipeline_config: Optional EmailPipelineConfig sizing the fetch/parse/pre-filter/classify/action/persist stages
+            checkpoint_repository: Optional RunCheckpointRepository; when set, interrupted runs are detected
+                                   and the next run widens its fetch window to resume them
+            outbox: Optional OutboxDispatcher; when set, category statistics and the recommendation
+                    email are queued at the end of a run and delivered in the background
         """
         self.processing_status_manager = processing_status_manager
         self.settings_service = settings_service
@@ -61,6 +102,111 @@ class AccountEmailProcessorService(AccountEmailProcessorInterface):
         self.create_gmail_fetcher = create_gmail_fetcher if create_gmail_fetcher is not None else GmailFetcher
         self.blocking_recommendation_collector = blocking_recommendation_collector
         self.recommendation_email_notifier = recommendation_email_notifier
+        self.llm_metrics_collector = llm_metrics_collector or get_llm_metrics_collector()
+        self.llm_budget_tracker = llm_budget_tracker
+        self.pipeline_config = pipeline_config or EmailPipelineConfig()
+        self.checkpoint_repository = checkpoint_repository
+        self.outbox = outbox
+        if self.outbox:
+            self.outbox.register(EVENT_CATEGORY_STATS, category_stats_handler(self.account_category_client))
+            if self.recommendation_email_notifier:
+                self.outbox.register(
+                    EVENT_RECOMMENDATION_EMAIL, recommendation_email_handler(self.recommendation_email_notifier)
+                )
+        if self.llm_budget_tracker:
+            self.llm_metrics_collector.add_listener(self.llm_budget_tracker.on_llm_call)
+
+    def _build_pipeline(
+        self,
+        email_address: str,
+        processor: EmailProcessorService,
+        checkpointer: ProcessingCheckpointer,
+        imap_lock: threading.Lock,
+        budget: Optional[AccountRunBudget] = None
+    ) -> StagedPipeline:
+        """
+        Build the per-account stage pipeline.
+
+        Fetching (the pipeline source) and IMAP actions share imap_lock, so
+        LLM classification overlaps with both while the single IMAP
+        connection only ever runs one command at a time. Emails leaving the
+        persist stage are checkpointed in small batches. New emails beyond
+        the run's budget are dropped at the pre-filter and left for the next run.
+        """
+        config = self.pipeline_config
+
+        def prefilter(item: EmailWorkItem) -> Optional[EmailWorkItem]:
+            # Drop emails processed (or checkpointed) in earlier runs before they reach the LLM
+            message_id = item.msg.get('Message-ID', '')
+            if message_id and checkpointer.is_processed(message_id):
+                return None
+            if budget and not budget.admit():
+                return None
+            return processor.prefilter(item)
+
+        def act(item: EmailWorkItem) -> EmailWorkItem:
+            if item.finished:
+                return item
+            with imap_lock:
+                return processor.apply_actions(item)
+
+        def persist(item: EmailWorkItem) -> EmailWorkItem:
+            if item.finished:
+                return item
+            item = processor.persist(item)
+            if not item.finished and item.message_id:
+                checkpointer.record(item.message_id)
+            return item
+
+        return StagedPipeline([
+            PipelineStage("parse", processor.parse, workers=config.parse_workers, queue_size=config.queue_size),
+            PipelineStage("prefilter", prefilter, queue_size=config.queue_size),
+            PipelineStage("classify", processor.classify, workers=config.classify_workers, queue_size=config.queue_size),
+            PipelineStage("action", act, queue_size=config.queue_size),
+            PipelineStage("persist", persist, queue_size=config.queue_size),
+        ], name=f"pipeline-{email_address}")
+
+    def _begin_checkpointed_run(
+        self,
+        email_address: str,
+        lookback_hours: int,
+        run_id: Optional[str]
+    ) -> Tuple[int, Optional[InterruptedRun]]:
+        """
+        Record the run's checkpoint and widen the fetch window to resume an interrupted run.
+
+        Returns:
+            Tuple of (hours to fetch, interrupted run being resumed or None)
+        """
+        if not self.checkpoint_repository:
+            return lookback_hours, None
+        now = datetime.utcnow()
+        try:
+            interrupted = self.checkpoint_repository.begin_run(
+                email_address, now - timedelta(hours=lookback_hours), run_id=run_id
+            )
+        except Exception as e:
+            logger.error(f"Failed to record run checkpoint for {email_address}: {e}")
+            return lookback_hours, None
+        if interrupted is None:
+            return lookback_hours, None
+
+        hours_needed = math.ceil((now - interrupted.window_start).total_seconds() / 3600)
+        fetch_hours = max(lookback_hours, min(hours_needed, self.pipeline_config.max_resume_hours))
+        logger.warning(
+            f"♻️ Resuming interrupted run for {email_address} (started {interrupted.started_at}, "
+            f"{interrupted.messages_checkpointed} emails checkpointed): fetching last {fetch_hours} hours"
+        )
+        return fetch_hours, interrupted
+
+    def _enqueue_side_effects(self, events: List[NewOutboxEvent]) -> None:
+        """Queue a run's side effects in one transaction; if the outbox is unavailable, deliver them now."""
+        try:
+            self.outbox.enqueue(events)
+            logger.info(f"📮 Queued {len(events)} side effects for {events[0].account_email}")
+        except Exception as e:
+            logger.error(f"❌ Failed to queue side effects, delivering them inline: {e}")
+            self.outbox.deliver_inline(events)
 
     def process_account(self, email_address: str) -> Dict:
         """
@@ -71,8 +217,14 @@ class AccountEmailProcessorService(AccountEmailProcessorInterface):
         2. Fetches recent emails
         3. Categorizes them using AI
         4. Applies labels and actions
+
+        Steps 2-4 run as a staged pipeline (fetch, parse, pre-filter, classify,
+        IMAP action, persist) connected by bounded queues, so fetching and
+        labelling overlap with LLM categorization.
         5. Collects domain blocking recommendations (if collector provided)
-        6. Sends recommendation notification email (if notifier provided)
+        6. Sends recommendation notification email (if notifier provided);
+           with an outbox, the notification and category statistics are
+           queued and delivered in the background instead
 
         Args:
             email_address: The Gmail account to process
@@ -83,9 +235,13 @@ class AccountEmailProcessorService(AccountEmailProcessorInterface):
             - Recommendation fields (if collector provided):
               recommended_domains_to_block, total_emails_matched, unique_domains_count
             - Notification fields (if notifier provided):
-              notification_sent, notification_error
+              notification_sent, notification_error, notification_queued
+            - side_effects_queued: number of side effects handed to the outbox
         """
         logger.info(f"🔍 Processing emails for account: {email_address}")
+        checkpointer: Optional[ProcessingCheckpointer] = None
+        processor: Optional[EmailProcessorService] = None
+        fetcher: Optional[GmailFetcherInterface] = None
 
         try:
             # Start processing session
@@ -162,6 +318,10 @@ class AccountEmailProcessorService(AccountEmailProcessorInterface):
                 logger.info(f"Using IMAP authentication for {email_address}")
 
             start_time = time.time()
+            budget = AccountRunBudget(
+                max_seconds=self.pipeline_config.account_time_budget_seconds,
+                max_messages=self.pipeline_config.account_message_budget
+            )
 
             # Clear the recommendation collector for this processing run
             if self.blocking_recommendation_collector:
@@ -196,6 +356,20 @@ class AccountEmailProcessorService(AccountEmailProcessorInterface):
             # Start processing run in database
             fetcher.summary_service.start_processing_run(scan_hours=current_lookback_hours)
 
+            # Pick up where an interrupted run for this account left off
+            run_id = getattr(fetcher.summary_service, 'current_run_id', None)
+            fetch_hours, interrupted_run = self._begin_checkpointed_run(
+                email_address,
+                current_lookback_hours,
+                run_id if isinstance(run_id, str) else None
+            )
+            run_started_utc = datetime.utcnow()
+
+            # Attribute LLM calls made during this run to the account
+            self.llm_metrics_collector.begin_run(email_address)
+            if self.llm_budget_tracker:
+                self.llm_budget_tracker.begin_cycle(email_address)
+
             # Step 1: Connect to Gmail IMAP
             self.processing_status_manager.update_status(
                 ProcessingState.CONNECTING,
@@ -205,39 +379,28 @@ class AccountEmailProcessorService(AccountEmailProcessorInterface):
 
             fetcher.connect()
 
-            # Step 2: Fetch emails
+            # Step 2: Fetch and process emails through the staged pipeline
             self.processing_status_manager.update_status(
                 ProcessingState.FETCHING,
-                f"Fetching emails from last {current_lookback_hours} hours"
+                f"Fetching emails from last {fetch_hours} hours"
             )
-            logger.info(f"  🔎 Fetching emails from last {current_lookback_hours} hours...")
-
-            recent_emails = fetcher.get_recent_emails(current_lookback_hours)
-            logger.info(f"Fetched {len(recent_emails)} records from the last {current_lookback_hours} hours.")
+            logger.info(f"  🔎 Fetching emails from last {fetch_hours} hours...")
 
             # Identify which emails are new using deduplication client
             deduplication_client = self.deduplication_factory.create_deduplication_client(email_address)
-            new_emails = deduplication_client.filter_new_emails(recent_emails)
-
-            # Log deduplication stats
-            stats = deduplication_client.get_stats()
-            logger.info(f"📊 Email deduplication stats: {stats}")
-
-            # Update fetched count
-            fetcher.summary_service.run_metrics['fetched'] = len(recent_emails)
-
-            logger.info(f"  📧 Found {len(new_emails)} emails to process")
-
-            # Step 3: Process emails
-            self.processing_status_manager.update_status(
-                ProcessingState.PROCESSING,
-                f"Processing {len(new_emails)} emails",
-                {"current": 0, "total": len(new_emails)}
+            checkpointer = ProcessingCheckpointer(
+                deduplication_client,
+                batch_size=self.pipeline_config.checkpoint_batch_size,
+                flush_interval=self.pipeline_config.checkpoint_interval_seconds,
+                on_flush=(
+                    (lambda count: self.checkpoint_repository.record_progress(email_address, count))
+                    if self.checkpoint_repository else None
+                )
             )
 
             # Create email extractor service
             email_extractor = ExtractSenderEmailService()
-            
+
             processor = EmailProcessorService(
                 fetcher,
                 email_address,
@@ -251,32 +414,51 @@ class AccountEmailProcessorService(AccountEmailProcessorInterface):
                 fetcher.get_blocked_domains() if self.blocking_recommendation_collector else set()
             )
 
-            for i, msg in enumerate(new_emails, 1):
-                logger.info(f"    ⚡ Processing email {i}/{len(new_emails)}")
+            # Step 3: Process emails as they arrive
+            self.processing_status_manager.update_status(
+                ProcessingState.PROCESSING,
+                "Processing emails as they are fetched",
+                {"current": 0, "total": 0}
+            )
+
+            # The fetch and IMAP action stages share one connection
+            imap_lock = threading.Lock()
+            pipeline = self._build_pipeline(email_address, processor, checkpointer, imap_lock, budget)
+            source = (
+                fetcher.iter_recent_emails(fetch_hours)
+                if isinstance(fetcher, GmailFetcherInterface)
+                else fetcher.get_recent_emails(fetch_hours)
+            )
+
+            processed_count = 0
+            # Fetched emails are checked against the dedup log a batch at a time, ahead of the pre-filter
+            source = checkpointer.lookup(
+                _locked_iter(budget.limit(source), imap_lock), batch_size=self.pipeline_config.dedup_batch_size
+            )
+            for item in pipeline.run(source, source_name="fetch"):
+                processed_count += 1
+                i = processed_count
+                total = pipeline.get_metrics()["fetch"]["emitted"]
+                logger.info(f"    ⚡ Processed email {i}/{total}")
                 self.processing_status_manager.update_status(
                     ProcessingState.PROCESSING,
-                    f"Processing email {i} of {len(new_emails)}",
-                    {"current": i, "total": len(new_emails)}
+                    f"Processing email {i} of {total}",
+                    {"current": i, "total": total}
                 )
 
-                # Update status for categorization periodically
-                if i % 3 == 1:
-                    self.processing_status_manager.update_status(
-                        ProcessingState.CATEGORIZING,
-                        f"Categorizing email {i} with AI",
-                        {"current": i, "total": len(new_emails)}
+                if self.llm_budget_tracker and i % 5 == 0:
+                    self.processing_status_manager.update_llm_budget(
+                        self.llm_budget_tracker.get_usage(email_address)
                     )
 
-                # Process the email
-                category = processor.process_email(msg)
-
                 # Track that this email was reviewed
                 self.processing_status_manager.increment_reviewed()
 
                 # Collect domain recommendation if collector is present and email was categorized
+                category = item.category if item.action_taken else None
                 if self.blocking_recommendation_collector and category:
                     try:
-                        from_header = str(msg.get("From", ""))
+                        from_header = str(item.msg.get("From", ""))
                         if from_header and "@" in from_header:
                             # Extract sender email using the email extractor
                             sender_email = email_extractor.extract_sender_email(from_header)
@@ -293,36 +475,66 @@ class AccountEmailProcessorService(AccountEmailProcessorInterface):
                     except Exception:
                         logger.exception("Unexpected error collecting domain recommendation")
 
-                # Update status for labeling periodically
-                if i % 3 == 2:
-                    self.processing_status_manager.update_status(
-                        ProcessingState.LABELING,
-                        f"Applying Gmail labels for email {i}",
-                        {"current": i, "total": len(new_emails)}
-                    )
-
                 # Log progress every 5 emails
                 if i % 5 == 0:
-                    logger.info(f"    📊 Progress: {i}/{len(new_emails)} emails processed")
-                    self.processing_status_manager.update_status(
-                        ProcessingState.PROCESSING,
-                        f"Processed {i} of {len(new_emails)} emails",
-                        {"current": i, "total": len(new_emails)}
-                    )
+                    logger.info(f"    📊 Progress: {i}/{total} emails processed")
+
+            pipeline_metrics = pipeline.get_metrics()
+            fetched_count = pipeline_metrics["fetch"]["emitted"]
+            logger.info(f"Fetched {fetched_count} records from the last {fetch_hours} hours.")
+            logger.info(f"  📧 Processed {processed_count} new emails")
+            logger.info(f"📈 Pipeline metrics for {email_address}: {pipeline_metrics}")
+
+            # A run that hit its budget is partial; the rest of the window continues next cycle
+            budget_hit = None
+            if budget.enabled:
+                self.processing_status_manager.update_run_budget(budget.to_dict())
+            if budget.exhausted:
+                # The next run resumes from this run's window start; finished emails are skipped by dedup
+                fetch_window_start = run_started_utc - timedelta(hours=fetch_hours)
+                budget_hit = {**budget.to_dict(), 'continuation_cursor': fetch_window_start.isoformat()}
+                logger.warning(
+                    f"⏱️ {email_address} reached its {budget.exhausted} budget after {budget.messages} emails "
+                    f"in {budget.elapsed():.1f}s; remaining emails continue next cycle"
+                )
 
-            # Bulk mark emails as processed
-            processed_message_ids = processor.processed_message_ids
-            if processed_message_ids:
-                logger.info(f"🔄 Bulk marking {len(processed_message_ids)} emails as processed...")
-                try:
-                    successful, errors = deduplication_client.bulk_mark_as_processed(processed_message_ids)
-                    logger.info(f"✅ Bulk processing completed: {successful} successful, {errors} errors")
-                except Exception as e:
-                    logger.error(f"❌ Bulk deduplication failed: {e}")
+            # Log deduplication stats
+            stats = deduplication_client.get_stats()
+            logger.info(f"📊 Email deduplication stats: {stats}")
+
+            # Update fetched count
+            fetcher.summary_service.run_metrics['fetched'] = fetched_count
+
+            # Mark the last partial batch as processed
+            checkpointer.flush()
+            processor.flush_repeat_offender_outcomes()
+            checkpoint_stats = checkpointer.get_stats()
+            if checkpoint_stats['checkpointed'] or checkpoint_stats['errors']:
+                logger.info(
+                    f"✅ Checkpointed {checkpoint_stats['checkpointed']} emails in "
+                    f"{checkpoint_stats['flushes']} batches, {checkpoint_stats['errors']} errors"
+                )
 
             # Record category statistics
             category_actions = processor.category_actions
-            if fetcher.account_service and category_actions:
+            side_effects = []
+            if self.outbox and category_actions:
+                side_effects.append(NewOutboxEvent(
+                    event_type=EVENT_CATEGORY_STATS,
+                    account_email=email_address,
+                    processing_run_id=run_id if isinstance(run_id, str) else None,
+                    payload={
+                        'email_address': email_address,
+                        'stats_date': date.today().isoformat(),
+                        'category_stats': category_actions,
+                    }
+                ))
+            if self.outbox and fetcher.account_service:
+                try:
+                    fetcher.account_service.update_account_last_scan(email_address)
+                except Exception as e:
+                    logger.error(f"Failed to update last scan timestamp for {email_address}: {str(e)}")
+            elif fetcher.account_service and category_actions:
                 try:
                     today = date.today()
                     fetcher.account_service.record_category_stats(
@@ -343,14 +555,36 @@ class AccountEmailProcessorService(AccountEmailProcessorInterface):
 
             processing_time = time.time() - start_time
 
+            # Report budget consumption and any emails deferred to the next cycle
+            llm_budget = None
+            deferred_count = len(processor.deferred_message_ids)
+            if self.llm_budget_tracker:
+                llm_budget = self.llm_budget_tracker.get_usage(email_address)
+                self.processing_status_manager.update_llm_budget(llm_budget)
+            if deferred_count:
+                logger.warning(f"⏭️ Deferred {deferred_count} emails for {email_address} to the next cycle (LLM budget exhausted)")
+
+            # Persist the run's LLM usage alongside the processing run
+            llm_usage = self.llm_metrics_collector.end_run(email_address)
+            fetcher.summary_service.record_llm_usage(llm_usage)
+
             # Complete processing run in database
-            fetcher.summary_service.complete_processing_run(success=True)
+            fetcher.summary_service.complete_processing_run(success=True, budget_hit=budget_hit)
+            # Keep the checkpoint of a partial run so the next run covers its whole window
+            if self.checkpoint_repository and not budget_hit:
+                try:
+                    self.checkpoint_repository.complete_run(email_address)
+                except Exception as e:
+                    logger.error(f"Failed to clear run checkpoint for {email_address}: {e}")
 
             # Mark processing as completed
             self.processing_status_manager.update_status(
                 ProcessingState.COMPLETED,
-                f"Successfully processed {len(new_emails)} emails",
-                {"current": len(new_emails), "total": len(new_emails)}
+                (
+                    f"Processed {processed_count} emails before reaching the {budget_hit['exhausted']} budget"
+                    if budget_hit else f"Successfully processed {processed_count} emails"
+                ),
+                {"current": processed_count, "total": processed_count}
             )
 
             # Get recommendation summary and send notification
@@ -368,7 +602,17 @@ class AccountEmailProcessorService(AccountEmailProcessorInterface):
                     unique_domains = summary.domain_count
 
                     # Only send notification if there are recommendations
-                    if self.recommendation_email_notifier and unique_domains > 0:
+                    if self.outbox and self.recommendation_email_notifier and unique_domains > 0:
+                        side_effects.append(NewOutboxEvent(
+                            event_type=EVENT_RECOMMENDATION_EMAIL,
+                            account_email=email_address,
+                            processing_run_id=run_id if isinstance(run_id, str) else None,
+                            payload={
+                                'recipient': email_address,
+                                'recommendations': [r.to_dict() for r in recommendations],
+                            }
+                        ))
+                    elif self.recommendation_email_notifier and unique_domains > 0:
                         try:
                             notification_result = self.recommendation_email_notifier.send_recommendations(
                                 email_address,
@@ -383,12 +627,15 @@ class AccountEmailProcessorService(AccountEmailProcessorInterface):
                 except Exception:
                     logger.exception("Unexpected error in recommendation summary")
 
+            if side_effects:
+                self._enqueue_side_effects(side_effects)
+
             result = {
                 "account": email_address,
-                "emails_found": len(recent_emails),
-                "emails_processed": len(new_emails),
-                "emails_categorized": len(new_emails),
-                "emails_labeled": len(new_emails),
+                "emails_found": fetched_count,
+                "emails_processed": processed_count,
+                "emails_categorized": processed_count,
+                "emails_labeled": processed_count,
                 "category_counts": category_actions,  # Add category counts for aggregator
                 "processing_time_seconds": round(processing_time, 2),
                 "timestamp": datetime.now().isoformat(),
@@ -397,22 +644,38 @@ class AccountEmailProcessorService(AccountEmailProcessorInterface):
                 "total_emails_matched": total_matched,
                 "unique_domains_count": unique_domains,
                 "notification_sent": notification_result.success if notification_result else False,
-                "notification_error": notification_result.error_message if notification_result else None
+                "notification_error": notification_result.error_message if notification_result else None,
+                "notification_queued": any(e.event_type == EVENT_RECOMMENDATION_EMAIL for e in side_effects),
+                "side_effects_queued": len(side_effects),
+                "llm_usage": llm_usage,
+                "llm_budget": llm_budget,
+                "emails_deferred": deferred_count,
+                "pipeline_metrics": pipeline_metrics,
+                "checkpoints": checkpoint_stats,
+                "resumed_interrupted_run": interrupted_run is not None,
+                "budget_exhausted": budget.exhausted,
+                "continuation_cursor": budget_hit['continuation_cursor'] if budget_hit else None
             }
 
-            logger.info(f"✅ Successfully processed {email_address}: {len(new_emails)} emails in {processing_time:.2f}s")
+            logger.info(f"✅ Successfully processed {email_address}: {processed_count} emails in {processing_time:.2f}s")
 
             # Complete the processing session
             self.processing_status_manager.complete_processing()
 
-            # Disconnect from Gmail
-            fetcher.disconnect()
-
             return result
 
         except Exception as e:
             logger.error(f"❌ Error processing emails for {email_address}: {str(e)}")
 
+            # Keep what finished before the failure; the checkpoint row stays so the next run resumes
+            if checkpointer:
+                checkpointer.flush()
+            if processor:
+                processor.flush_repeat_offender_outcomes()
+
+            # Discard any partially collected LLM usage for this run
+            self.llm_metrics_collector.end_run(email_address)
+
             # Update status to error and complete processing
             try:
                 self.processing_status_manager.update_status(
@@ -433,3 +696,11 @@ class AccountEmailProcessorService(AccountEmailProcessorInterface):
                 "success": False,
                 "timestamp": datetime.now().isoformat()
             }
+
+        finally:
+            # Disconnect from Gmail on every path; this also frees the account's IMAP slot
+            if fetcher is not None:
+                try:
+                    fetcher.disconnect()
+                except Exception as e:
+                    logger.warning(f"⚠️ Error disconnecting from Gmail for {email_address}: {str(e)}")
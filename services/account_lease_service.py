@@ -0,0 +1,148 @@
+"""
+Account leases for running several processor instances against one database.
+
+Each instance claims the accounts it is about to scan, keeps the leases
+alive from a heartbeat thread while the scans run, and releases them with
+the time the account is next due. A crashed instance stops renewing, its
+leases expire after ttl_seconds, and another instance reclaims them.
+"""
+import os
+import socket
+import threading
+import uuid
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional
+
+from repositories.account_lease_repository import AccountLease, AccountLeaseRepository
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def default_owner_id() -> str:
+    """Identity of this processor instance: host, process and a random suffix."""
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+
+class AccountLeaseService:
+    """Claims, heartbeats and releases account leases for one processor instance."""
+
+    def __init__(
+        self,
+        repository: AccountLeaseRepository,
+        owner_id: Optional[str] = None,
+        ttl_seconds: float = 120.0,
+        heartbeat_interval: Optional[float] = None
+    ):
+        """
+        Initialize the lease service.
+
+        Args:
+            repository: AccountLeaseRepository backed by the shared database
+            owner_id: Identity of this instance (defaults to host-pid-random)
+            ttl_seconds: Lease lifetime without a heartbeat
+            heartbeat_interval: Seconds between renewals (defaults to a third of the TTL)
+        """
+        self.repository = repository
+        self.owner_id = owner_id or default_owner_id()
+        self.ttl_seconds = ttl_seconds
+        self.heartbeat_interval = heartbeat_interval or ttl_seconds / 3
+        self._held: Dict[str, AccountLease] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._heartbeat_thread: Optional[threading.Thread] = None
+        self.lost_leases = 0
+
+    def claim(self, account_emails: Iterable[str], limit: Optional[int] = None, force: bool = False) -> List[str]:
+        """
+        Claim leases for accounts that no other instance holds and that are due.
+
+        Args:
+            account_emails: Candidate accounts
+            limit: Maximum number of accounts to claim
+            force: Ignore the shared next-due time (force-process requests)
+
+        Returns:
+            Accounts this instance may now scan
+        """
+        with self._lock:
+            candidates = [email for email in account_emails if email not in self._held]
+        leases = self.repository.claim(
+            self.owner_id, candidates, self.ttl_seconds, limit=limit, ignore_next_scan=force
+        )
+        with self._lock:
+            for lease in leases:
+                self._held[lease.account_email] = lease
+        return [lease.account_email for lease in leases]
+
+    def release(self, account_email: str, next_scan_in: Optional[float] = None) -> None:
+        """
+        Release an account's lease.
+
+        Args:
+            account_email: Account to release
+            next_scan_in: Seconds until any instance should scan the account again
+        """
+        with self._lock:
+            lease = self._held.pop(account_email, None)
+        if lease is None:
+            return
+        next_scan_at = None
+        if next_scan_in is not None:
+            next_scan_at = self.repository._clock() + timedelta(seconds=next_scan_in)
+        try:
+            if not self.repository.release(lease, next_scan_at=next_scan_at):
+                logger.warning(f"⚠️ Lease on {account_email} was reclaimed by another instance before release")
+        except Exception as e:
+            logger.error(f"❌ Failed to release lease on {account_email}: {e}")
+
+    def release_all(self) -> None:
+        """Release every held lease without setting a next-due time."""
+        with self._lock:
+            held = list(self._held)
+        for account_email in held:
+            self.release(account_email)
+
+    def held_accounts(self) -> List[str]:
+        with self._lock:
+            return list(self._held)
+
+    def renew(self) -> None:
+        """Heartbeat: extend all held leases and forget any that were lost."""
+        with self._lock:
+            leases = list(self._held.values())
+        if not leases:
+            return
+        lost = self.repository.renew(leases, self.ttl_seconds)
+        if lost:
+            with self._lock:
+                for account_email in lost:
+                    self._held.pop(account_email, None)
+            self.lost_leases += len(lost)
+            logger.warning(f"⚠️ Lost leases (expired and reclaimed elsewhere): {sorted(lost)}")
+
+    def _heartbeat_loop(self) -> None:
+        while not self._stop.wait(self.heartbeat_interval):
+            try:
+                self.renew()
+            except Exception as e:
+                logger.error(f"❌ Lease heartbeat failed: {e}")
+
+    def start_heartbeat(self) -> None:
+        """Start renewing held leases in a background thread."""
+        if self._heartbeat_thread and self._heartbeat_thread.is_alive():
+            return
+        self._stop.clear()
+        self._heartbeat_thread = threading.Thread(
+            target=self._heartbeat_loop, name="AccountLeaseHeartbeat", daemon=True
+        )
+        self._heartbeat_thread.start()
+        logger.info(f"💓 Account lease heartbeat started for {self.owner_id} (ttl {self.ttl_seconds:.0f}s)")
+
+    def stop_heartbeat(self) -> None:
+        """Stop the heartbeat thread and release all held leases."""
+        self._stop.set()
+        if self._heartbeat_thread:
+            self._heartbeat_thread.join(timeout=self.heartbeat_interval + 5)
+            self._heartbeat_thread = None
+        self.release_all()
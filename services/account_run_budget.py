@@ -0,0 +1,96 @@
+"""
+Per-account wall-clock and message budgets for a single processing run.
+
+A mailbox with thousands of new emails would otherwise hold a worker (and,
+with one worker, every other account) until it is done. Once either budget
+is reached, no further emails are admitted; emails already in the pipeline
+finish normally, the run is recorded as partial, and the remaining emails
+are picked up by the account's next run.
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+BUDGET_TIME = 'time'
+BUDGET_MESSAGES = 'messages'
+
+
+class AccountRunBudget:
+    """Thread-safe time and message budget for one account run (0 disables a limit)."""
+
+    def __init__(self, max_seconds: float = 0, max_messages: int = 0, clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the budget; the clock starts immediately.
+
+        Args:
+            max_seconds: Wall-clock budget for the run in seconds (0 for unlimited)
+            max_messages: Number of new emails the run may process (0 for unlimited)
+            clock: Monotonic clock in seconds (injectable for tests)
+        """
+        self.max_seconds = max_seconds
+        self.max_messages = max_messages
+        self._clock = clock
+        self._started = clock()
+        self._lock = threading.Lock()
+        self.messages = 0
+        self.exhausted: Optional[str] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.max_seconds or self.max_messages)
+
+    def elapsed(self) -> float:
+        return self._clock() - self._started
+
+    def _check_time(self) -> bool:
+        # Caller holds the lock
+        if self.exhausted:
+            return False
+        if self.max_seconds and self.elapsed() >= self.max_seconds:
+            self.exhausted = BUDGET_TIME
+            return False
+        return True
+
+    def has_time(self) -> bool:
+        """Whether the run may keep fetching."""
+        with self._lock:
+            return self._check_time()
+
+    def admit(self) -> bool:
+        """
+        Take one new email out of the budget.
+
+        Returns:
+            False once either budget is reached; the email should be left for the next run
+        """
+        with self._lock:
+            if not self._check_time():
+                return False
+            if self.max_messages and self.messages >= self.max_messages:
+                self.exhausted = BUDGET_MESSAGES
+                return False
+            self.messages += 1
+            return True
+
+    def limit(self, source: Iterable[Any]) -> Iterator[Any]:
+        """
+        Stop pulling from source once the budget is exhausted.
+
+        The message budget is only marked exhausted when admit() refuses an
+        email, so a run that had exactly max_messages new emails completes
+        normally.
+        """
+        for item in source:
+            if not self.has_time():
+                return
+            yield item
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'max_seconds': self.max_seconds,
+                'max_messages': self.max_messages,
+                'elapsed_seconds': round(self.elapsed(), 2),
+                'messages': self.messages,
+                'exhausted': self.exhausted,
+            }
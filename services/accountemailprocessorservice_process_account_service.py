@@ -247,8 +247,11 @@ class AccountEmailProcessorServiceProcessAccountService:
             email_categorizer, email_extractor
         )
 
-        for i, msg in enumerate(new_emails, 1):
-            self._process_single_email(processor, msg, i, total)
+        try:
+            for i, msg in enumerate(new_emails, 1):
+                self._process_single_email(processor, msg, i, total)
+        finally:
+            processor.flush_repeat_offender_outcomes()
 
         self._bulk_mark_processed(processor, email_address)
         self._update_category_stats(fetcher, processor, email_address)
@@ -0,0 +1,321 @@
+"""
+Adaptive per-account scan scheduler.
+
+Instead of scanning every account every scan interval, each account keeps
+its own interval and next-due time in a min-heap. After each scan the
+interval is recomputed from the account's observed arrival rate (an
+exponentially weighted average of new emails per second) and the scan's
+yield:
+
+- busy accounts are scanned often enough to pick up about
+  `target_emails_per_scan` new emails per scan
+- a scan that finds nothing backs the interval off by `backoff_factor`
+- intervals always stay within [min_interval, max_interval]
+
+Force-process requests jump the queue: they are due immediately and are
+popped ahead of regular due accounts.
+"""
+import heapq
+import itertools
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Heap priorities; lower pops first among accounts due at the same time
+PRIORITY_FORCED = 0
+PRIORITY_SCHEDULED = 1
+
+
+@dataclass
+class _AccountSchedule:
+    interval: float
+    next_due: float
+    arrival_rate: Optional[float] = None  # EWMA of new emails per second
+    last_scan_at: Optional[float] = None
+    last_yield: Optional[int] = None
+    scans: int = 0
+    in_flight: bool = False
+    in_flight_forced: bool = False
+    force_pending: bool = False
+    entry: Optional[list] = None
+
+
+class AdaptiveScanScheduler:
+    """Thread-safe heap of per-account next-due times with adaptive intervals."""
+
+    def __init__(
+        self,
+        base_interval: float,
+        min_interval: float,
+        max_interval: float,
+        target_emails_per_scan: float = 5.0,
+        backoff_factor: float = 1.5,
+        smoothing: float = 0.3,
+        clock: Callable[[], float] = time.time
+    ):
+        """
+        Initialize the scheduler.
+
+        Args:
+            base_interval: Interval for accounts without history (seconds)
+            min_interval: Shortest allowed interval (seconds)
+            max_interval: Longest allowed interval (seconds)
+            target_emails_per_scan: New emails a busy account should yield per scan
+            backoff_factor: Interval multiplier after a scan that found nothing
+            smoothing: Weight of the latest observation in the arrival-rate average (0-1]
+            clock: Wall clock in seconds (injectable for tests)
+
+        Raises:
+            ValueError: If the bounds are inconsistent
+        """
+        if min_interval <= 0 or max_interval < min_interval:
+            raise ValueError("Require 0 < min_interval <= max_interval")
+        if not 0 < smoothing <= 1:
+            raise ValueError("smoothing must be in (0, 1]")
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.base_interval = base_interval
+        self.target_emails_per_scan = target_emails_per_scan
+        self.backoff_factor = backoff_factor
+        self.smoothing = smoothing
+        self._clock = clock
+        self._max_interval_cap: Optional[float] = None
+        self._heap: List[list] = []
+        self._accounts: Dict[str, _AccountSchedule] = {}
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+
+    def _clamp(self, interval: float) -> float:
+        upper = self.max_interval
+        if self._max_interval_cap is not None:
+            upper = max(self.min_interval, min(upper, self._max_interval_cap))
+        return min(max(interval, self.min_interval), upper)
+
+    def _push(self, email_address: str, schedule: _AccountSchedule, due: float, priority: int) -> None:
+        # Caller holds the lock; older heap entries for the account become stale
+        if schedule.entry is not None:
+            schedule.entry[-1] = None
+        entry = [due, priority, next(self._counter), email_address]
+        schedule.entry = entry
+        schedule.next_due = due
+        heapq.heappush(self._heap, entry)
+
+    def cap_max_interval(self, seconds: Optional[float]) -> None:
+        """
+        Cap intervals below max_interval, e.g. to stay inside the fetch lookback window.
+
+        Args:
+            seconds: Cap in seconds, or None to remove it
+        """
+        with self._lock:
+            self._max_interval_cap = seconds
+
+    def sync_accounts(self, email_addresses: Iterable[str]) -> None:
+        """
+        Align the schedule with the set of active accounts.
+
+        New accounts are due immediately; accounts no longer listed are dropped.
+        """
+        wanted = list(dict.fromkeys(email_addresses))
+        now = self._clock()
+        added = False
+        with self._lock:
+            for email_address in wanted:
+                if email_address not in self._accounts:
+                    added = True
+                    schedule = _AccountSchedule(interval=self._clamp(self.base_interval), next_due=now)
+                    self._accounts[email_address] = schedule
+                    self._push(email_address, schedule, now, PRIORITY_SCHEDULED)
+            removed = set(self._accounts) - set(wanted)
+            for email_address in removed:
+                schedule = self._accounts.pop(email_address)
+                if schedule.entry is not None:
+                    schedule.entry[-1] = None
+        if added:
+            self._wakeup.set()
+
+    def request_force(self, email_address: str) -> None:
+        """
+        Make an account due immediately, ahead of regularly scheduled accounts.
+
+        If the account is being scanned right now, it is rescheduled as
+        forced as soon as that scan completes.
+        """
+        now = self._clock()
+        with self._lock:
+            schedule = self._accounts.get(email_address)
+            if schedule is None:
+                schedule = _AccountSchedule(interval=self._clamp(self.base_interval), next_due=now)
+                self._accounts[email_address] = schedule
+            if schedule.in_flight:
+                schedule.force_pending = True
+            else:
+                self._push(email_address, schedule, now, PRIORITY_FORCED)
+        logger.info(f"⏩ Prioritized scan requested for {email_address}")
+        self._wakeup.set()
+
+    def pop_due(self, limit: Optional[int] = None) -> List[str]:
+        """
+        Take accounts that are due now, forced requests first.
+
+        Popped accounts stay out of the heap until record_result is called.
+
+        Args:
+            limit: Maximum number of accounts to return
+
+        Returns:
+            Email addresses to scan
+        """
+        now = self._clock()
+        due: List[Tuple[int, float, int, str]] = []
+        with self._lock:
+            # Collect everything due so forced entries can be ordered first
+            while self._heap and self._heap[0][0] <= now:
+                entry = heapq.heappop(self._heap)
+                if entry[-1] is None:
+                    continue
+                due.append((entry[1], entry[0], entry[2], entry[3]))
+            due.sort()
+            if limit is not None and len(due) > limit:
+                for priority, due_at, _, email_address in due[limit:]:
+                    self._push(email_address, self._accounts[email_address], due_at, priority)
+                due = due[:limit]
+            for priority, _, _, email_address in due:
+                schedule = self._accounts[email_address]
+                schedule.entry = None
+                schedule.in_flight = True
+                schedule.in_flight_forced = priority == PRIORITY_FORCED
+        return [email_address for _, _, _, email_address in due]
+
+    def is_forced(self, email_address: str) -> bool:
+        """Whether an in-flight account was popped for a force request."""
+        with self._lock:
+            schedule = self._accounts.get(email_address)
+            return bool(schedule and schedule.in_flight and schedule.in_flight_forced)
+
+    def defer(self, email_address: str, delay: Optional[float] = None) -> None:
+        """
+        Return a popped account to the heap without recording a scan.
+
+        Used when the account could not be scanned right now (e.g. another
+        processor instance holds its lease). Forced requests stay forced.
+
+        Args:
+            email_address: Account popped by pop_due
+            delay: Seconds until it is due again (defaults to its interval)
+        """
+        now = self._clock()
+        with self._lock:
+            schedule = self._accounts.get(email_address)
+            if schedule is None:
+                return
+            priority = PRIORITY_FORCED if schedule.in_flight_forced or schedule.force_pending else PRIORITY_SCHEDULED
+            schedule.in_flight = False
+            schedule.in_flight_forced = False
+            schedule.force_pending = False
+            self._push(email_address, schedule, now + (schedule.interval if delay is None else delay), priority)
+
+    def record_result(self, email_address: str, new_emails: int, success: bool = True) -> float:
+        """
+        Reschedule an account after a scan.
+
+        Args:
+            email_address: Account that was scanned
+            new_emails: Number of new (not previously processed) emails found
+            success: Whether the scan completed; failed scans keep their interval
+
+        Returns:
+            Seconds until the account is due again
+        """
+        now = self._clock()
+        with self._lock:
+            schedule = self._accounts.get(email_address)
+            if schedule is None:
+                return 0.0
+            schedule.in_flight = False
+            schedule.in_flight_forced = False
+
+            if success:
+                if schedule.last_scan_at is not None and now > schedule.last_scan_at:
+                    observed = new_emails / (now - schedule.last_scan_at)
+                    if schedule.arrival_rate is None:
+                        schedule.arrival_rate = observed
+                    else:
+                        schedule.arrival_rate = (
+                            self.smoothing * observed + (1 - self.smoothing) * schedule.arrival_rate
+                        )
+                schedule.last_scan_at = now
+                schedule.last_yield = new_emails
+                schedule.scans += 1
+
+                if new_emails == 0:
+                    # Quiet account: back off regardless of older history
+                    interval = schedule.interval * self.backoff_factor
+                elif schedule.arrival_rate:
+                    interval = self.target_emails_per_scan / schedule.arrival_rate
+                else:
+                    interval = schedule.interval
+                schedule.interval = self._clamp(interval)
+
+            if schedule.force_pending:
+                schedule.force_pending = False
+                self._push(email_address, schedule, now, PRIORITY_FORCED)
+                self._wakeup.set()
+            else:
+                self._push(email_address, schedule, now + schedule.interval, PRIORITY_SCHEDULED)
+            return schedule.next_due - now
+
+    def seconds_until_next_due(self) -> Optional[float]:
+        """Seconds until the earliest scheduled account is due (0 if overdue), or None if nothing is scheduled."""
+        with self._lock:
+            while self._heap and self._heap[0][-1] is None:
+                heapq.heappop(self._heap)
+            if not self._heap:
+                return None
+            return max(0.0, self._heap[0][0] - self._clock())
+
+    def wait(self, timeout: float) -> bool:
+        """
+        Sleep until timeout elapses or the schedule changes (e.g. a force request).
+
+        Returns:
+            True if woken early by a schedule change
+        """
+        woken = self._wakeup.wait(timeout)
+        self._wakeup.clear()
+        return woken
+
+    def wake(self) -> None:
+        """Wake up a thread blocked in wait()."""
+        self._wakeup.set()
+
+    def get_schedule(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Snapshot of every account's schedule.
+
+        Returns:
+            Dictionary keyed by email address with interval, next due time,
+            arrival rate (emails/hour), last yield, scan count and in-flight flag
+        """
+        now = self._clock()
+        with self._lock:
+            return {
+                email_address: {
+                    'interval_seconds': round(schedule.interval, 1),
+                    'next_due_in_seconds': None if schedule.in_flight else round(max(0.0, schedule.next_due - now), 1),
+                    'arrival_rate_per_hour': (
+                        round(schedule.arrival_rate * 3600, 2) if schedule.arrival_rate is not None else None
+                    ),
+                    'last_yield': schedule.last_yield,
+                    'scans': schedule.scans,
+                    'in_flight': schedule.in_flight,
+                    'force_pending': schedule.force_pending,
+                }
+                for email_address, schedule in self._accounts.items()
+            }
@@ -1,11 +1,18 @@
 import logging
 from utils.logger import get_logger
+import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
-from typing import Callable, Dict, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 from services.background_processor_interface import BackgroundProcessorInterface
 from services.interfaces.category_aggregator_interface import ICategoryAggregator
 from clients.account_category_client import AccountCategoryClient
+from services.token_bucket_rate_limiter import TokenBucketRateLimiter
+from services.adaptive_scan_scheduler import AdaptiveScanScheduler
+from services.account_lease_service import AccountLeaseService
+from services.outbox_dispatcher import EVENT_CATEGORY_TALLY, OutboxDispatcher, category_tally_handler
+from repositories.outbox_repository import NewOutboxEvent
 
 logger = get_logger(__name__)
 
@@ -19,7 +26,12 @@ class BackgroundProcessorService(BackgroundProcessorInterface):
         settings_service,
         scan_interval: int,
         background_enabled: bool,
-        category_aggregator: Optional[ICategoryAggregator] = None
+        category_aggregator: Optional[ICategoryAggregator] = None,
+        max_workers: int = 1,
+        account_rate_limiter: Optional[TokenBucketRateLimiter] = None,
+        scheduler: Optional[AdaptiveScanScheduler] = None,
+        lease_manager: Optional[AccountLeaseService] = None,
+        outbox: Optional[OutboxDispatcher] = None
     ):
         """
         Initialize the background processor service.
@@ -30,12 +42,31 @@ class BackgroundProcessorService(BackgroundProcessorInterface):
             scan_interval: Seconds to wait between processing cycles
             background_enabled: Whether background processing is enabled
             category_aggregator: Optional aggregator for category tallies
+            max_workers: Number of accounts processed concurrently
+            account_rate_limiter: Optional rate limiter pacing account starts (IMAP logins)
+            scheduler: Optional AdaptiveScanScheduler; when set, accounts are scanned when they
+                       fall due instead of all together every scan_interval
+            lease_manager: Optional AccountLeaseService; when set, an account is only scanned
+                           after claiming its database lease, so several instances can share
+                           the account list without scanning the same mailbox twice
+            outbox: Optional OutboxDispatcher; when set, category tallies are queued and
+                    recorded in the aggregator by the dispatcher instead of after each account
         """
         self.process_account_callback = process_account_callback
         self.settings_service = settings_service
         self.scan_interval = scan_interval
         self.background_enabled = background_enabled
         self.category_aggregator = category_aggregator
+        self.max_workers = max(1, max_workers)
+        self.account_rate_limiter = account_rate_limiter
+        self.scheduler = scheduler
+        self.lease_manager = lease_manager
+        self.outbox = outbox if category_aggregator else None
+        if self.outbox:
+            self.outbox.register(EVENT_CATEGORY_TALLY, category_tally_handler(category_aggregator))
+        self.last_cycle_duration_seconds: Optional[float] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
         self.running = True
         self.next_execution_time: Optional[datetime] = None
 
@@ -63,6 +94,20 @@ class BackgroundProcessorService(BackgroundProcessorInterface):
         Signal the processor to stop running.
         """
         self.running = False
+        if self.scheduler:
+            self.scheduler.wake()
+
+    def request_force_scan(self, email_address: str) -> bool:
+        """
+        Queue a prioritized scan of an account on the worker pool.
+
+        Returns:
+            True if the request was queued, False if no scheduler is running
+        """
+        if not self.scheduler or not self.running:
+            return False
+        self.scheduler.request_force(email_address)
+        return True
 
     def get_next_execution_time(self) -> Optional[datetime]:
         """
@@ -73,22 +118,266 @@ class BackgroundProcessorService(BackgroundProcessorInterface):
         """
         return self.next_execution_time
 
+    def _claim_accounts(self, email_addresses: List[str], force: bool = False) -> List[str]:
+        """Filter accounts down to those this instance holds a lease on (all of them without leasing)."""
+        if not self.lease_manager or not email_addresses:
+            return email_addresses
+        claimed = self.lease_manager.claim(email_addresses, force=force)
+        skipped = len(email_addresses) - len(claimed)
+        if skipped:
+            logger.info(f"🔒 Skipping {skipped} account(s) leased by another instance or not yet due")
+        return claimed
+
+    def _release_account(self, email_address: str, next_scan_in: Optional[float]) -> None:
+        if self.lease_manager:
+            self.lease_manager.release(email_address, next_scan_in=next_scan_in)
+
+    def _process_accounts(self, email_addresses: List[str]) -> Tuple[int, int]:
+        """
+        Process accounts on the worker pool and wait for all of them.
+
+        Each account's lease (if leasing is enabled) is released as soon as
+        it finishes, with the next scan due one scan interval later.
+
+        Returns:
+            Tuple of (total emails processed, number of failed accounts)
+        """
+        total_processed = 0
+        total_errors = 0
+        executor = self._get_executor()
+        futures = {
+            executor.submit(self._process_single_account, email_address): email_address
+            for email_address in email_addresses
+        }
+        for future in as_completed(futures):
+            result = future.result()
+            self._release_account(futures[future], self.scan_interval)
+            if result.get("success"):
+                total_processed += result.get("emails_processed", 0)
+            else:
+                total_errors += 1
+        return total_processed, total_errors
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="AccountWorker"
+                )
+            return self._executor
+
+    def _process_single_account(self, email_address: str) -> Dict:
+        """
+        Process one account in a worker thread.
+
+        Each call gets its own IMAP connection and DB sessions through the
+        process_account callback; any exception is contained here so one
+        failing mailbox cannot affect the others.
+        """
+        if not self.running:
+            return {"account": email_address, "success": False, "error": "Background processing stopped"}
+
+        if self.account_rate_limiter and not self.account_rate_limiter.acquire(should_continue=self.should_continue):
+            logger.info(f"🛑 Background processing stopped before starting {email_address}")
+            return {"account": email_address, "success": False, "error": "Background processing stopped"}
+
+        logger.info(f"🏃 Processing account: {email_address}")
+        try:
+            result = self.process_account_callback(email_address)
+        except Exception as e:
+            logger.exception(f"❌ Unhandled error processing account {email_address}")
+            return {"account": email_address, "success": False, "error": str(e)}
+        finally:
+            self._release_db_session()
+
+        if result.get("success"):
+            self._record_categories(email_address, result)
+        return result
+
+    def _release_db_session(self) -> None:
+        """Return this worker thread's DB session to the pool between accounts."""
+        repository = getattr(self.settings_service, "repository", None)
+        if repository is None or not hasattr(repository, "release_session"):
+            return
+        try:
+            repository.release_session()
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to release DB session: {e}")
+
+    def _record_categories(self, email_address: str, result: Dict) -> None:
+        # Record categories in aggregator if enabled
+        if self.category_aggregator:
+            try:
+                category_actions = result.get("category_counts") or {}
+                if not isinstance(category_actions, dict):
+                    logger.warning(
+                        "Skipping category aggregation for %s due to unexpected "
+                        "category_counts type: %s",
+                        email_address,
+                        type(category_actions),
+                    )
+                    category_actions = {}
+
+                # Extract totals from category_actions (Dict[str, Dict[str, int]])
+                # to category_counts (Dict[str, int]) for the aggregator
+                category_counts = {}
+                filtered_entries = []
+                for cat, stats in category_actions.items():
+                    if not isinstance(stats, dict):
+                        filtered_entries.append(f"{cat} (non-dict)")
+                        continue
+                    total = stats.get("total", 0)
+                    if not isinstance(total, int):
+                        filtered_entries.append(f"{cat} (total={type(total).__name__})")
+                        continue
+                    category_counts[cat] = total
+
+                if filtered_entries:
+                    logger.warning(
+                        "Filtered invalid category entries for %s: %s",
+                        email_address,
+                        ", ".join(filtered_entries),
+                    )
+                if category_counts and self.outbox:
+                    try:
+                        self.outbox.enqueue([NewOutboxEvent(
+                            event_type=EVENT_CATEGORY_TALLY,
+                            account_email=email_address,
+                            payload={
+                                'email_address': email_address,
+                                'category_counts': category_counts,
+                                'timestamp': datetime.now().isoformat(),
+                            }
+                        )])
+                        return
+                    except Exception as e:
+                        logger.error(f"Failed to queue category tally for {email_address}, recording it now: {e}")
+                if category_counts:
+                    self.category_aggregator.record_batch(
+                        email_address,
+                        category_counts,
+                        datetime.now()
+                    )
+                    logger.debug(
+                        f"Recorded category batch for {email_address}: "
+                        f"{category_counts}"
+                    )
+            except Exception as e:
+                logger.error(
+                    f"Failed to record categories for {email_address}: {e}"
+                )
+                # Continue processing - aggregation failure should not stop email processing
+
+        # Flush aggregator after each account, unless its own flusher does
+        flushes_in_background = getattr(self.category_aggregator, 'flushes_in_background', False) is True
+        if self.category_aggregator and not flushes_in_background:
+            try:
+                self.category_aggregator.flush()
+                logger.debug(f"Flushed aggregator after processing {email_address}")
+            except Exception as e:
+                logger.error(
+                    f"Failed to flush aggregator for {email_address}: {e}"
+                )
+                # Continue processing - flush failure should not stop email processing
+
+    def _sync_scheduled_accounts(self) -> None:
+        service = AccountCategoryClient(repository=self.repository)
+        accounts = service.get_all_accounts(active_only=True)
+        self.scheduler.sync_accounts([account.email_address for account in accounts])
+        # Never wait longer than half the fetch window, so no email ages out between scans
+        self.scheduler.cap_max_interval(self.settings_service.get_lookback_hours() * 3600 / 2)
+        if not accounts:
+            logger.info("📭 No Gmail accounts found in database to process")
+
+    def _reap_scheduled(self, in_flight: Dict[Future, str]) -> None:
+        for future in [future for future in in_flight if future.done()]:
+            email_address = in_flight.pop(future)
+            result = future.result()
+            next_in = self.scheduler.record_result(
+                email_address,
+                result.get("emails_processed", 0) or 0,
+                success=bool(result.get("success"))
+            )
+            self._release_account(email_address, next_in)
+            logger.info(f"🗓️ Next scan of {email_address} in {next_in:.0f}s")
+
+    def _claim_due(self, email_addresses: List[str]) -> List[str]:
+        """Claim leases on popped accounts; accounts another instance holds go back on the schedule."""
+        if not self.lease_manager or not email_addresses:
+            return email_addresses
+        forced = [email for email in email_addresses if self.scheduler.is_forced(email)]
+        regular = [email for email in email_addresses if email not in forced]
+        claimed = set(self._claim_accounts(forced, force=True)) | set(self._claim_accounts(regular))
+        for email_address in email_addresses:
+            if email_address not in claimed:
+                self.scheduler.defer(email_address)
+        return [email for email in email_addresses if email in claimed]
+
+    def _run_scheduled(self) -> None:
+        """Feed due accounts from the adaptive scheduler to the worker pool until stopped."""
+        in_flight: Dict[Future, str] = {}
+        last_sync: Optional[float] = None
+        executor = self._get_executor()
+
+        while self.running:
+            try:
+                # Refresh the account list once per scan interval
+                now = time.monotonic()
+                if last_sync is None or now - last_sync >= self.scan_interval:
+                    self._sync_scheduled_accounts()
+                    last_sync = now
+
+                self._reap_scheduled(in_flight)
+
+                free_workers = self.max_workers - len(in_flight)
+                if free_workers > 0:
+                    for email_address in self._claim_due(self.scheduler.pop_due(limit=free_workers)):
+                        future = executor.submit(self._process_single_account, email_address)
+                        in_flight[future] = email_address
+                        future.add_done_callback(lambda _: self.scheduler.wake())
+
+                wait_seconds = self.scheduler.seconds_until_next_due()
+                if wait_seconds is None or free_workers <= 0:
+                    wait_seconds = 10.0
+                # Wake at least every 10 seconds to notice shutdown
+                wait_seconds = min(wait_seconds, 10.0)
+                self.next_execution_time = datetime.now() + timedelta(seconds=wait_seconds)
+                self.scheduler.wait(wait_seconds)
+
+            except Exception as e:
+                logger.error(f"💥 Error in scheduled background processing: {str(e)}")
+                logger.info("⏸️  Background processor will retry in 30 seconds...")
+                self.scheduler.wait(30)
+
+        for future in in_flight:
+            future.cancel()
+
     def run(self) -> None:
         """
         Run the background processor loop.
 
         This method runs continuously until stopped,
-        processing Gmail accounts at configured intervals.
+        processing Gmail accounts at configured intervals, or when each
+        account falls due if an adaptive scheduler is configured.
         """
         logger.info("🚀 Background Gmail processor thread started")
         logger.info("⚙️  Configuration:")
         logger.info(f"   - Scan interval: {self.scan_interval} seconds")
         logger.info(f"   - Process emails from last: {self.settings_service.get_lookback_hours()} hours")
         logger.info(f"   - Background processing enabled: {self.background_enabled}")
+        logger.info(f"   - Account workers: {self.max_workers}")
+        logger.info(f"   - Adaptive scheduling: {self.scheduler is not None}")
+        logger.info(f"   - Account leases: {self.lease_manager.owner_id if self.lease_manager else 'disabled'}")
 
         cycle_count = 0
+        if self.lease_manager:
+            self.lease_manager.start_heartbeat()
 
-        while self.running:
+        if self.scheduler:
+            self._run_scheduled()
+
+        while self.running and not self.scheduler:
             try:
                 cycle_count += 1
                 logger.info(f"🔄 Starting background processing cycle #{cycle_count}")
@@ -105,90 +394,17 @@ class BackgroundProcessorService(BackgroundProcessorInterface):
                     else:
                         logger.info(f"👥 Found {len(accounts)} Gmail accounts to process")
 
-                        # Process each account
-                        total_processed = 0
-                        total_errors = 0
-
-                        for account in accounts:
-                            if not self.running:
-                                logger.info("🛑 Background processing stopped during account processing")
-                                break
-
-                            logger.info(f"🏃 Processing account: {account.email_address}")
-                            result = self.process_account_callback(account.email_address)
-
-                            if result["success"]:
-                                total_processed += result.get("emails_processed", 0)
-
-                                # Record categories in aggregator if enabled
-                                if self.category_aggregator:
-                                    try:
-                                        category_actions = result.get("category_counts") or {}
-                                        if not isinstance(category_actions, dict):
-                                            logger.warning(
-                                                "Skipping category aggregation for %s due to unexpected "
-                                                "category_counts type: %s",
-                                                account.email_address,
-                                                type(category_actions),
-                                            )
-                                            category_actions = {}
-
-                                        # Extract totals from category_actions (Dict[str, Dict[str, int]])
-                                        # to category_counts (Dict[str, int]) for the aggregator
-                                        category_counts = {}
-                                        filtered_entries = []
-                                        for cat, stats in category_actions.items():
-                                            if not isinstance(stats, dict):
-                                                filtered_entries.append(f"{cat} (non-dict)")
-                                                continue
-                                            total = stats.get("total", 0)
-                                            if not isinstance(total, int):
-                                                filtered_entries.append(f"{cat} (total={type(total).__name__})")
-                                                continue
-                                            category_counts[cat] = total
-
-                                        if filtered_entries:
-                                            logger.warning(
-                                                "Filtered invalid category entries for %s: %s",
-                                                account.email_address,
-                                                ", ".join(filtered_entries),
-                                            )
-                                        if category_counts:
-                                            self.category_aggregator.record_batch(
-                                                account.email_address,
-                                                category_counts,
-                                                datetime.now()
-                                            )
-                                            logger.debug(
-                                                f"Recorded category batch for {account.email_address}: "
-                                                f"{category_counts}"
-                                            )
-                                    except Exception as e:
-                                        logger.error(
-                                            f"Failed to record categories for {account.email_address}: {e}"
-                                        )
-                                        # Continue processing - aggregation failure should not stop email processing
-
-                                # Flush aggregator after each account
-                                if self.category_aggregator:
-                                    try:
-                                        self.category_aggregator.flush()
-                                        logger.debug(f"Flushed aggregator after processing {account.email_address}")
-                                    except Exception as e:
-                                        logger.error(
-                                            f"Failed to flush aggregator for {account.email_address}: {e}"
-                                        )
-                                        # Continue processing - flush failure should not stop email processing
-                            else:
-                                total_errors += 1
-
-                            # Small delay between accounts to prevent overwhelming Gmail API
-                            time.sleep(5)
+                        # Process accounts concurrently on the bounded worker pool
+                        cycle_started = time.monotonic()
+                        email_addresses = self._claim_accounts([account.email_address for account in accounts])
+                        total_processed, total_errors = self._process_accounts(email_addresses)
+                        self.last_cycle_duration_seconds = time.monotonic() - cycle_started
 
                         logger.info(f"📈 Cycle #{cycle_count} completed:")
-                        logger.info(f"   - Accounts processed: {len(accounts)}")
+                        logger.info(f"   - Accounts processed: {len(email_addresses)}")
                         logger.info(f"   - Total emails processed: {total_processed}")
                         logger.info(f"   - Errors: {total_errors}")
+                        logger.info(f"   - Cycle wall time: {self.last_cycle_duration_seconds:.1f}s with {self.max_workers} workers")
 
                 except Exception as e:
                     logger.error(f"❌ Error in background processing cycle: {str(e)}")
@@ -211,4 +427,11 @@ class BackgroundProcessorService(BackgroundProcessorInterface):
                 logger.info("⏸️  Background processor will retry in 30 seconds...")
                 time.sleep(30)
 
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
+        if self.lease_manager:
+            self.lease_manager.stop_heartbeat()
+
         logger.info("🏁 Background Gmail processor thread stopped")
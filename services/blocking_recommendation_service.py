@@ -68,15 +68,14 @@ class BlockingRecommendationService(IBlockingRecommendationService):
         Get blocking recommendations for an email account.
 
         Algorithm (per spec section 4.3):
-        1. Fetch tallies for the rolling window period
-        2. Aggregate counts by category
-        3. Calculate total emails and percentages
-        4. Filter out excluded categories
-        5. Filter out categories below minimum count
-        6. Filter out categories below percentage threshold
-        7. Assign strength levels (HIGH/MEDIUM/LOW)
-        8. Sort by email count descending
-        9. Fetch already blocked categories
+        1. Fetch category totals for the rolling window period
+        2. Calculate total emails and percentages
+        3. Filter out excluded categories
+        4. Filter out categories below minimum count
+        5. Filter out categories below percentage threshold
+        6. Assign strength levels (HIGH/MEDIUM/LOW)
+        7. Sort by email count descending
+        8. Fetch already blocked categories
 
         Args:
             email_address: Email account address to analyze
@@ -89,19 +88,13 @@ class BlockingRecommendationService(IBlockingRecommendationService):
         end_date = date.today()
         start_date = end_date - timedelta(days=days - 1)
 
-        # Fetch tallies for the period
-        tallies = self._repository.get_tallies_for_period(
+        # Aggregate counts by category for the period
+        category_totals: Dict[str, int] = self._repository.get_category_totals(
             email_address,
             start_date,
             end_date
         )
 
-        # Aggregate counts by category
-        category_totals: Dict[str, int] = {}
-        for tally in tallies:
-            for category, count in tally.category_counts.items():
-                category_totals[category] = category_totals.get(category, 0) + count
-
         # Calculate total emails
         total_emails = sum(category_totals.values())
 
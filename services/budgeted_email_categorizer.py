@@ -0,0 +1,106 @@
+"""
+Budget-enforcing decorator for EmailCategorizerInterface.
+
+Calls the wrapped (LLM) categorizer while the current account has budget
+left. Once the account's budget is exhausted it degrades through cheaper
+tiers instead:
+
+1. Cache: the category previously returned by the LLM for identical content
+2. Local classifier: an optional fallback categorizer (e.g. a local Ollama model)
+3. Defer: raise LLMBudgetExhaustedError so the email is left unprocessed and
+   picked up again next cycle
+
+Rule-based categorization (repeat offenders, blocked/allowed domains) runs
+in EmailProcessorService before the categorizer is consulted, so it keeps
+working regardless of budget.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from services.email_categorizer_interface import EmailCategorizerInterface
+from services.llm_budget_service import LLMBudgetExhaustedError, LLMBudgetTracker, budget_exempt
+from services.llm_metrics_collector import get_current_llm_account
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class BudgetedEmailCategorizer(EmailCategorizerInterface):
+    """Email categorizer that enforces per-account LLM budgets."""
+
+    def __init__(
+        self,
+        inner: EmailCategorizerInterface,
+        budget_tracker: LLMBudgetTracker,
+        fallback_categorizer: Optional[EmailCategorizerInterface] = None,
+        fallback_model: Optional[str] = None,
+        cache_size: int = 5000
+    ):
+        """
+        Initialize the budgeted categorizer.
+
+        Args:
+            inner: Categorizer used while budget remains
+            budget_tracker: Tracker holding per-account budget consumption
+            fallback_categorizer: Optional cheaper categorizer used once the budget is exhausted
+            fallback_model: Model passed to the fallback categorizer (defaults to the requested model)
+            cache_size: Maximum number of content hashes remembered for the cache tier
+        """
+        self.inner = inner
+        self.budget_tracker = budget_tracker
+        self.fallback_categorizer = fallback_categorizer
+        self.fallback_model = fallback_model
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def categorize(self, contents: str, model: str) -> str:
+        """
+        Categorize email content, degrading to cheaper tiers when over budget.
+
+        Raises:
+            LLMBudgetExhaustedError: If the budget is exhausted and no tier could categorize
+        """
+        content_key = hashlib.sha256(contents.encode("utf-8", errors="ignore")).hexdigest()
+        account = get_current_llm_account()
+        reason = self.budget_tracker.check(account) if account else None
+
+        if reason is None:
+            if account:
+                self.budget_tracker.charge_request(account)
+            category = self.inner.categorize(contents, model)
+            self._remember(content_key, category)
+            return category
+
+        with self._cache_lock:
+            cached = self._cache.get(content_key)
+            if cached is not None:
+                self._cache.move_to_end(content_key)
+        if cached is not None:
+            self.budget_tracker.record_fallback(account)
+            logger.info(f"💾 Over LLM budget, using cached category '{cached}' for {account}")
+            return cached
+
+        if self.fallback_categorizer is not None:
+            try:
+                with budget_exempt():
+                    category = self.fallback_categorizer.categorize(contents, self.fallback_model or model)
+                self.budget_tracker.record_fallback(account)
+                logger.info(f"🪫 Over LLM budget, used fallback categorizer for {account}: {category}")
+                return category
+            except Exception as e:
+                logger.warning(f"Fallback categorizer failed for {account}: {e}")
+
+        self.budget_tracker.record_deferred(account)
+        raise LLMBudgetExhaustedError(account, reason)
+
+    def _remember(self, content_key: str, category: str) -> None:
+        if self.cache_size <= 0:
+            return
+        with self._cache_lock:
+            self._cache[content_key] = category
+            self._cache.move_to_end(content_key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
@@ -7,13 +7,98 @@ and improve performance.
 
 Thread-safe implementation using threading.Lock for concurrent access
 from background processor and main application threads.
+
+The buffer can be flushed by a background flusher thread (start()) when it
+reaches its size limit or has waited flush_interval seconds, and can be
+backed by a local write-ahead journal so counts not yet flushed survive a
+restart.
 """
 from datetime import datetime, date
-from typing import Dict, Tuple
+from pathlib import Path
+from typing import Any, Dict, List, Optional, TextIO, Tuple
+import json
+import os
 import threading
+import time
 
 from services.interfaces.category_aggregator_interface import ICategoryAggregator
-from repositories.category_tally_repository_interface import ICategoryTallyRepository
+from repositories.category_tally_repository_interface import ICategoryTallyRepository, merge_daily_tallies
+from services.query_result_cache import TALLIES_FLUSHED, notify_data_changed
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class _TallyJournal:
+    """
+    Write-ahead journal of buffered counts, kept as numbered JSONL segments.
+
+    Sealing a segment before a flush lets counts recorded during the flush
+    go to the next segment; sealed segments are deleted once their counts
+    are stored. Counts are stored at least once: a crash between the
+    database commit and deleting the segments replays them on restart.
+    """
+
+    def __init__(self, directory: str, fsync: bool = True):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.fsync = fsync
+        existing = self._segments()
+        self._sequence = (existing[-1][0] + 1) if existing else 1
+        self._handle: Optional[TextIO] = None
+
+    def replay(self) -> List[Dict[str, Any]]:
+        """Records of all segments left by earlier runs, oldest first."""
+        records = []
+        for _, path in self._segments():
+            with open(path, "r", encoding="utf-8") as handle:
+                for line_number, line in enumerate(handle, 1):
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError as e:
+                        logger.warning(f"Skipping malformed tally journal entry at {path}:{line_number}: {e}")
+        return records
+
+    def append(self, record: Dict[str, Any]) -> None:
+        if self._handle is None:
+            self._handle = open(self._path(self._sequence), "a", encoding="utf-8")
+        self._handle.write(json.dumps(record) + "\n")
+        self._handle.flush()
+        if self.fsync:
+            os.fsync(self._handle.fileno())
+
+    def seal(self) -> int:
+        """Close the current segment; returns its number."""
+        self.close()
+        sealed = self._sequence
+        self._sequence += 1
+        return sealed
+
+    def discard(self, through: int) -> None:
+        """Delete the segments numbered up to through."""
+        for sequence, path in self._segments():
+            if sequence <= through:
+                path.unlink()
+
+    def close(self) -> None:
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+    def _path(self, sequence: int) -> Path:
+        return self.directory / f"tallies-{sequence:08d}.jsonl"
+
+    def _segments(self) -> List[Tuple[int, Path]]:
+        segments = []
+        for path in self.directory.glob("tallies-*.jsonl"):
+            try:
+                segments.append((int(path.stem.split("-", 1)[1]), path))
+            except ValueError:
+                continue
+        return sorted(segments)
 
 
 class CategoryAggregator(ICategoryAggregator):
@@ -41,10 +126,21 @@ class CategoryAggregator(ICategoryAggregator):
             }
         }
 
-    Total buffer size is the sum of ALL category counts across ALL buffer keys.
+    Total buffer size is the sum of ALL category counts across ALL buffer keys,
+    kept as a running counter.
+
+    Flushing swaps the buffer out and writes it without holding the buffer
+    lock, so recording is not blocked by the database; if the write fails
+    the counts are merged back into the buffer.
     """
 
-    def __init__(self, repository: ICategoryTallyRepository, buffer_size: int):
+    def __init__(
+        self,
+        repository: ICategoryTallyRepository,
+        buffer_size: int,
+        flush_interval: float = 30.0,
+        journal_dir: Optional[str] = None
+    ):
         """
         Initialize the category aggregator.
 
@@ -52,11 +148,48 @@ class CategoryAggregator(ICategoryAggregator):
             repository: Repository for persisting category tallies
             buffer_size: Maximum total count across all buffered entries
                         before auto-flush triggers
+            flush_interval: Longest time (seconds) buffered counts wait for the
+                            background flusher started with start()
+            journal_dir: Optional directory for a write-ahead journal of
+                         buffered counts, replayed into the buffer on start
         """
         self._repository = repository
         self._buffer_size = buffer_size
+        self._flush_interval = flush_interval
         self._buffer: Dict[Tuple[str, date], Dict[str, int]] = {}
+        self._buffered_total = 0
         self._lock = threading.Lock()  # Thread synchronization for buffer operations
+        self._flush_lock = threading.Lock()  # One flush writes at a time
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._metrics: Dict[str, Any] = {
+            'recorded': 0,
+            'replayed': 0,
+            'flushes': 0,
+            'flush_failures': 0,
+            'flushed_counts': 0,
+            'flush_seconds_total': 0.0,
+            'last_flush_seconds': None,
+            'max_flush_seconds': 0.0,
+            'last_flush_at': None,
+        }
+
+        self._journal = _TallyJournal(journal_dir) if journal_dir else None
+        if self._journal:
+            for record in self._journal.replay():
+                self._add_to_buffer(
+                    record['email_address'],
+                    date.fromisoformat(record['tally_date']),
+                    record['category_counts']
+                )
+                self._metrics['replayed'] += sum(record['category_counts'].values())
+            if self._buffered_total:
+                logger.info(f"📒 Replayed {self._buffered_total} unflushed category counts from {journal_dir}")
+
+    @property
+    def flushes_in_background(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
 
     def record_category(
         self,
@@ -74,20 +207,7 @@ class CategoryAggregator(ICategoryAggregator):
             category: Category name for the email
             timestamp: When the email was categorized
         """
-        with self._lock:
-            tally_date = timestamp.date()
-            key = (email_address, tally_date)
-
-            # Initialize buffer entry if it doesn't exist
-            if key not in self._buffer:
-                self._buffer[key] = {}
-
-            # Increment category count
-            self._buffer[key][category] = self._buffer[key].get(category, 0) + 1
-
-            # Check if we need to auto-flush
-            if self._get_total_buffer_size() >= self._buffer_size:
-                self._flush_internal()
+        self._record(email_address, timestamp.date(), {category: 1})
 
     def record_batch(
         self,
@@ -105,21 +225,33 @@ class CategoryAggregator(ICategoryAggregator):
             category_counts: Dictionary of category names to counts
             timestamp: When these emails were categorized
         """
-        with self._lock:
-            tally_date = timestamp.date()
-            key = (email_address, tally_date)
+        self._record(email_address, timestamp.date(), category_counts)
 
-            # Initialize buffer entry if it doesn't exist
-            if key not in self._buffer:
-                self._buffer[key] = {}
-
-            # Merge category counts
-            for category, count in category_counts.items():
-                self._buffer[key][category] = self._buffer[key].get(category, 0) + count
+    def _record(self, email_address: str, tally_date: date, category_counts: Dict[str, int]) -> None:
+        with self._lock:
+            if self._journal:
+                self._journal.append({
+                    'email_address': email_address,
+                    'tally_date': tally_date.isoformat(),
+                    'category_counts': category_counts
+                })
+            self._add_to_buffer(email_address, tally_date, category_counts)
+            self._metrics['recorded'] += sum(category_counts.values())
+            full = self._buffered_total >= self._buffer_size
+
+        # Check if we need to auto-flush
+        if full:
+            if self.flushes_in_background:
+                self._wake.set()
+            else:
+                self.flush()
 
-            # Check if we need to auto-flush
-            if self._get_total_buffer_size() >= self._buffer_size:
-                self._flush_internal()
+    def _add_to_buffer(self, email_address: str, tally_date: date, category_counts: Dict[str, int]) -> None:
+        # Must be called while self._lock is held (or before the aggregator is shared)
+        counts = self._buffer.setdefault((email_address, tally_date), {})
+        for category, count in category_counts.items():
+            counts[category] = counts.get(category, 0) + count
+            self._buffered_total += count
 
     def flush(self) -> None:
         """
@@ -127,68 +259,99 @@ class CategoryAggregator(ICategoryAggregator):
 
         Thread-safe: Acquires lock before flushing.
 
-        For each buffered entry:
-        1. Retrieve existing tally from repository to calculate correct total_emails
-        2. Pass buffered counts to repository (repository will merge them)
-        3. Pass total_emails calculated from what the final merged result will be
-        4. Clear the buffer
-
-        Note: The repository's save_daily_tally implements incremental merge semantics
-        for category_counts but expects total_emails as the final absolute value.
-        """
-        with self._lock:
-            self._flush_internal()
-
-    def _flush_internal(self) -> None:
+        All buffered (account, date, category) counts are added to the stored
+        tallies with the repository's add_to_daily_tallies, in one transaction,
+        and the buffer is cleared. If the write fails, the counts go back into
+        the buffer and the error is raised.
         """
-        Internal flush implementation (called while lock is held).
-
-        Must only be called when self._lock is already acquired.
-        """
-        # Empty flush is a no-op
-        if not self._buffer:
+        with self._flush_lock:
+            with self._lock:
+                # Empty flush is a no-op
+                if not self._buffer:
+                    return
+                buffer, buffered_total = self._buffer, self._buffered_total
+                self._buffer, self._buffered_total = {}, 0
+                sealed = self._journal.seal() if self._journal else None
+
+            started = time.monotonic()
+            try:
+                add_to_daily_tallies = getattr(self._repository, 'add_to_daily_tallies', None)
+                if add_to_daily_tallies is not None:
+                    add_to_daily_tallies(buffer)
+                else:
+                    # Repositories without the bulk method are merged tally by tally
+                    merge_daily_tallies(self._repository, buffer)
+            except Exception:
+                with self._lock:
+                    self._metrics['flush_failures'] += 1
+                    for (email_address, tally_date), category_counts in buffer.items():
+                        self._add_to_buffer(email_address, tally_date, category_counts)
+                raise
+            elapsed = time.monotonic() - started
+
+            if self._journal:
+                try:
+                    self._journal.discard(sealed)
+                except OSError as e:
+                    logger.error(f"Failed to remove flushed category tally journal segments: {e}")
+            with self._lock:
+                self._metrics['flushes'] += 1
+                self._metrics['flushed_counts'] += buffered_total
+                self._metrics['flush_seconds_total'] += elapsed
+                self._metrics['last_flush_seconds'] = elapsed
+                self._metrics['max_flush_seconds'] = max(self._metrics['max_flush_seconds'], elapsed)
+                self._metrics['last_flush_at'] = datetime.now().isoformat()
+            accounts = {email_address for email_address, _ in buffer}
+            notify_data_changed(TALLIES_FLUSHED, accounts.pop() if len(accounts) == 1 else None)
+            logger.debug(f"Flushed {buffered_total} category counts for {len(buffer)} tallies in {elapsed:.3f}s")
+
+    def start(self) -> None:
+        """Flush from a background thread when the buffer is full or flush_interval has passed."""
+        if self.flushes_in_background:
             return
-
-        # Process each buffered entry
-        for (email_address, tally_date), category_counts in self._buffer.items():
-            # Get existing tally to calculate what total_emails will be after merge
-            existing_tally = self._repository.get_tally(email_address, tally_date)
-
-            if existing_tally:
-                # Calculate what the merged counts will be
-                merged_counts = existing_tally.category_counts.copy()
-                for category, count in category_counts.items():
-                    merged_counts[category] = merged_counts.get(category, 0) + count
-                # Total emails is the sum of the merged result
-                total_emails = sum(merged_counts.values())
-            else:
-                # No existing tally, total will just be the buffered counts
-                total_emails = sum(category_counts.values())
-
-            # Pass buffered counts (repository will merge) and calculated total
-            self._repository.save_daily_tally(
-                email_address,
-                tally_date,
-                category_counts,
-                total_emails
-            )
-
-        # Clear buffer after successful flush
-        self._buffer.clear()
-
-    def _get_total_buffer_size(self) -> int:
-        """
-        Calculate total buffer size as sum of all category counts.
-
-        MUST be called while self._lock is held (internal helper).
-
-        Returns:
-            Total count across all buffered entries
-        """
-        total = 0
-        for category_counts in self._buffer.values():
-            total += sum(category_counts.values())
-        return total
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="CategoryAggregatorFlusher", daemon=True)
+        self._thread.start()
+        logger.info(f"🧮 Category aggregator flusher started (every {self._flush_interval}s or {self._buffer_size} counts)")
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stop the background flusher and flush what is buffered."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+        try:
+            self.flush()
+        finally:
+            if self._journal:
+                self._journal.close()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self._flush_interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"💥 Category aggregator flush failed, counts stay buffered: {e}")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Buffer size and flush counters since start."""
+        with self._lock:
+            metrics = dict(self._metrics)
+            metrics['buffered'] = self._buffered_total
+            metrics['buffered_tallies'] = len(self._buffer)
+        metrics['buffer_size'] = self._buffer_size
+        metrics['flush_interval'] = self._flush_interval
+        metrics['background'] = self.flushes_in_background
+        metrics['journal'] = str(self._journal.directory) if self._journal else None
+        metrics['avg_flush_seconds'] = (
+            metrics['flush_seconds_total'] / metrics['flushes'] if metrics['flushes'] else None
+        )
+        return metrics
 
     # Helper methods for testing
 
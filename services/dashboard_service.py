@@ -69,6 +69,16 @@ class DashboardService:
         self.db_service = db_service or DatabaseService()
         logger.info("Dashboard service initialized")
     
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """
+        Hit rate and counts of the query cache the dashboard reads through.
+        
+        All dashboard data comes from DatabaseService queries, which are
+        cached until a processing run completes or tallies are flushed.
+        """
+        query_cache = getattr(self.db_service, 'query_cache', None)
+        return query_cache.get_stats() if query_cache is not None else {}
+    
     def _get_display_name(self, category_name: str) -> str:
         """Convert category name to user-friendly display name"""
         try:
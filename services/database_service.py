@@ -4,7 +4,7 @@ Database service for managing email summary persistence
 import os
 import logging
 from utils.logger import get_logger
-from datetime import datetime, timedelta
+from datetime import datetime, time, timedelta
 from typing import List, Dict, Optional, Tuple
 from uuid import uuid4
 from sqlalchemy import create_engine, func, and_
@@ -17,20 +17,34 @@ from models.database import (
 )
 from repositories.database_repository_interface import DatabaseRepositoryInterface
 from repositories.mysql_repository import MySQLRepository
+from repositories.rollup_repository import RollupRepository
+from services.query_result_cache import QueryResultCache, RUN_COMPLETED, load_ttl_from_env, notify_data_changed
 
 logger = get_logger(__name__)
 
+# A period ending at or after this time of day includes the whole day
+WHOLE_DAY_END = time(23, 59, 59)
+
 
 class DatabaseService:
     """Service for managing database operations"""
     
-    def __init__(self, repository: Optional[DatabaseRepositoryInterface] = None, db_path: Optional[str] = None):
+    query_cache: Optional[QueryResultCache] = None
+    
+    def __init__(
+        self,
+        repository: Optional[DatabaseRepositoryInterface] = None,
+        db_path: Optional[str] = None,
+        query_cache: Optional[QueryResultCache] = None
+    ):
         """
         Initialize database service with dependency injection.
 
         Args:
             repository: Optional repository implementation. If not provided, creates MySQLRepository
             db_path: Optional database path (legacy parameter, not used with MySQL by default)
+            query_cache: Optional cache of summary, trend and run queries. If not provided,
+                         one with the TTL from QUERY_CACHE_TTL_SECONDS is created
 
         Raises:
             ValueError: If repository is not connected and connection fails
@@ -68,6 +82,7 @@ class DatabaseService:
         self.db_path = getattr(self.repository, 'db_path', None)
         self.engine = getattr(self.repository, 'engine', None)
         self.Session = getattr(self.repository, 'SessionFactory', None)
+        self.query_cache = query_cache or QueryResultCache(ttl=load_ttl_from_env())
 
         logger.info(f"Database service initialized with repository: {type(self.repository).__name__}")
     
@@ -79,10 +94,54 @@ class DatabaseService:
                                success: bool = True, error_message: Optional[str] = None):
         """Complete a processing run with final metrics"""
         self.repository.complete_processing_run(run_id, metrics, success, error_message)
+        notify_data_changed(RUN_COMPLETED)
+    
+    def save_processing_run_llm_usage(self, run_id: str, usage: List[Dict]) -> None:
+        """Persist the per-model LLM usage summary of a processing run"""
+        self.repository.save_processing_run_llm_usage(run_id, usage)
+    
+    def get_processing_run_llm_usage(self, run_id: str) -> List[Dict]:
+        """Get the per-model LLM usage recorded for a processing run"""
+        return [
+            {
+                'model': row.model,
+                'calls': row.calls,
+                'successes': row.successes,
+                'parse_failures': row.parse_failures,
+                'failures': row.failures,
+                'retries': row.retries,
+                'prompt_tokens': row.prompt_tokens,
+                'completion_tokens': row.completion_tokens,
+                'avg_latency_ms': row.avg_latency_ms,
+                'p50_latency_ms': row.p50_latency_ms,
+                'p95_latency_ms': row.p95_latency_ms,
+                'max_latency_ms': row.max_latency_ms,
+                'estimated_cost_usd': row.estimated_cost_usd
+            } for row in self.repository.get_processing_run_llm_usage(run_id)
+        ]
+    
+    def save_processing_run_budget_hit(self, run_id: str, budget_hit: Dict) -> None:
+        """Record that a processing run stopped at its per-account budget (marks it partial)"""
+        self.repository.save_processing_run_budget_hit(run_id, budget_hit)
+    
+    def get_processing_run_budget_hits(self, run_id: str) -> List[Dict]:
+        """Get the budget hits recorded for a processing run"""
+        return [
+            {
+                'reason': row.reason,
+                'messages_processed': row.messages_processed,
+                'elapsed_seconds': row.elapsed_seconds,
+                'max_seconds': row.max_seconds,
+                'max_messages': row.max_messages,
+                'continuation_cursor': row.continuation_cursor,
+                'created_at': row.created_at.isoformat() if row.created_at else None
+            } for row in self.repository.get_processing_run_budget_hits(run_id)
+        ]
     
     def save_email_summary(self, summary_data: Dict, account_id: Optional[int] = None):
         """Save email summary to database"""
         summary = self.repository.save_email_summary(summary_data, account_id)
+        notify_data_changed(RUN_COMPLETED)
         return summary.id if summary else None
     
     def _legacy_save_email_summary(self, summary_data: Dict, account_id: Optional[int] = None):
@@ -137,67 +196,36 @@ class DatabaseService:
             
             return summary.id
     
+    def _cached(self, query: str, period, compute):
+        """Read a query result through the query cache (computed directly if there is none)"""
+        if self.query_cache is None:
+            return compute()
+        return self.query_cache.get_or_compute(query, None, period, compute)
+    
     def get_summary_by_period(self, start_date: datetime, end_date: datetime) -> Dict:
-        """Get aggregated summary for a time period"""
+        """
+        Get aggregated summary for a time period.
+
+        Periods of whole days (as requested by the daily, weekly and monthly
+        summaries) are read from the summary rollups; other periods are
+        aggregated from the individual summaries.
+
+        Results are cached until a processing run completes (or for the
+        query cache's TTL).
+        """
+        return self._cached(
+            'summary_by_period', (start_date, end_date),
+            lambda: self._get_summary_by_period(start_date, end_date)
+        )
+
+    def _get_summary_by_period(self, start_date: datetime, end_date: datetime) -> Dict:
         with self.Session() as session:
-            # Get main metrics
-            summaries = session.query(
-                func.sum(EmailSummary.total_emails_processed).label('total_processed'),
-                func.sum(EmailSummary.total_emails_deleted).label('total_deleted'),
-                func.sum(EmailSummary.total_emails_archived).label('total_archived'),
-                func.sum(EmailSummary.total_emails_skipped).label('total_skipped'),
-                func.avg(EmailSummary.processing_duration_seconds).label('avg_duration'),
-                func.count(EmailSummary.id).label('summary_count')
-            ).filter(
-                and_(
-                    EmailSummary.date >= start_date,
-                    EmailSummary.date <= end_date
-                )
-            ).first()
-            
-            # Get top categories
-            categories = session.query(
-                CategorySummary.category_name,
-                func.sum(CategorySummary.email_count).label('total_count'),
-                func.sum(CategorySummary.deleted_count).label('total_deleted')
-            ).join(EmailSummary).filter(
-                and_(
-                    EmailSummary.date >= start_date,
-                    EmailSummary.date <= end_date
+            if start_date.time() == time.min and end_date.time() >= WHOLE_DAY_END:
+                summaries, categories, domains, senders = RollupRepository(session).get_summary(
+                    start_date.date(), end_date.date()
                 )
-            ).group_by(CategorySummary.category_name).order_by(
-                func.sum(CategorySummary.email_count).desc()
-            ).limit(10).all()
-            
-            # Get top domains
-            domains = session.query(
-                DomainSummary.domain,
-                func.sum(DomainSummary.email_count).label('total_count'),
-                func.sum(DomainSummary.deleted_count).label('total_deleted'),
-                DomainSummary.is_blocked
-            ).join(EmailSummary).filter(
-                and_(
-                    EmailSummary.date >= start_date,
-                    EmailSummary.date <= end_date
-                )
-            ).group_by(DomainSummary.domain, DomainSummary.is_blocked).order_by(
-                func.sum(DomainSummary.email_count).desc()
-            ).limit(10).all()
-            
-            # Get top senders
-            senders = session.query(
-                SenderSummary.sender_email,
-                SenderSummary.sender_name,
-                func.sum(SenderSummary.email_count).label('total_count'),
-                func.sum(SenderSummary.deleted_count).label('total_deleted')
-            ).join(EmailSummary).filter(
-                and_(
-                    EmailSummary.date >= start_date,
-                    EmailSummary.date <= end_date
-                )
-            ).group_by(SenderSummary.sender_email, SenderSummary.sender_name).order_by(
-                func.sum(SenderSummary.email_count).desc()
-            ).limit(10).all()
+            else:
+                summaries, categories, domains, senders = self._aggregate_summaries(session, start_date, end_date)
             
             return {
                 'period': {
@@ -237,6 +265,69 @@ class DatabaseService:
                 ]
             }
     
+    def _aggregate_summaries(self, session: Session, start_date: datetime, end_date: datetime):
+        """Aggregate the summaries saved between start_date and end_date"""
+        # Get main metrics
+        summaries = session.query(
+            func.sum(EmailSummary.total_emails_processed).label('total_processed'),
+            func.sum(EmailSummary.total_emails_deleted).label('total_deleted'),
+            func.sum(EmailSummary.total_emails_archived).label('total_archived'),
+            func.sum(EmailSummary.total_emails_skipped).label('total_skipped'),
+            func.avg(EmailSummary.processing_duration_seconds).label('avg_duration'),
+            func.count(EmailSummary.id).label('summary_count')
+        ).filter(
+            and_(
+                EmailSummary.date >= start_date,
+                EmailSummary.date <= end_date
+            )
+        ).first()
+        
+        # Get top categories
+        categories = session.query(
+            CategorySummary.category_name,
+            func.sum(CategorySummary.email_count).label('total_count'),
+            func.sum(CategorySummary.deleted_count).label('total_deleted')
+        ).join(EmailSummary).filter(
+            and_(
+                EmailSummary.date >= start_date,
+                EmailSummary.date <= end_date
+            )
+        ).group_by(CategorySummary.category_name).order_by(
+            func.sum(CategorySummary.email_count).desc()
+        ).limit(10).all()
+        
+        # Get top domains
+        domains = session.query(
+            DomainSummary.domain,
+            func.sum(DomainSummary.email_count).label('total_count'),
+            func.sum(DomainSummary.deleted_count).label('total_deleted'),
+            DomainSummary.is_blocked
+        ).join(EmailSummary).filter(
+            and_(
+                EmailSummary.date >= start_date,
+                EmailSummary.date <= end_date
+            )
+        ).group_by(DomainSummary.domain, DomainSummary.is_blocked).order_by(
+            func.sum(DomainSummary.email_count).desc()
+        ).limit(10).all()
+        
+        # Get top senders
+        senders = session.query(
+            SenderSummary.sender_email,
+            SenderSummary.sender_name,
+            func.sum(SenderSummary.email_count).label('total_count'),
+            func.sum(SenderSummary.deleted_count).label('total_deleted')
+        ).join(EmailSummary).filter(
+            and_(
+                EmailSummary.date >= start_date,
+                EmailSummary.date <= end_date
+            )
+        ).group_by(SenderSummary.sender_email, SenderSummary.sender_name).order_by(
+            func.sum(SenderSummary.email_count).desc()
+        ).limit(10).all()
+        
+        return summaries, categories, domains, senders
+    
     def get_daily_summary(self, date: Optional[datetime] = None) -> Dict:
         """Get summary for a specific day"""
         if not date:
@@ -285,7 +376,10 @@ class DatabaseService:
         return self.get_summary_by_period(start, end)
     
     def get_processing_runs(self, limit: int = 100) -> List[Dict]:
-        """Get recent processing runs"""
+        """Get recent processing runs (cached until a run completes)"""
+        return self._cached('processing_runs', limit, lambda: self._get_processing_runs(limit))
+
+    def _get_processing_runs(self, limit: int) -> List[Dict]:
         with self.Session() as session:
             runs = session.query(ProcessingRun).order_by(
                 ProcessingRun.start_time.desc()
@@ -309,7 +403,10 @@ class DatabaseService:
             ]
     
     def get_category_trends(self, days: int = 30) -> Dict[str, List[Tuple[datetime, int]]]:
-        """Get category trends over time"""
+        """Get category trends over time (cached until a run completes)"""
+        return self._cached('category_trends', days, lambda: self._get_category_trends(days))
+
+    def _get_category_trends(self, days: int) -> Dict[str, List[Tuple[datetime, int]]]:
         start_date = datetime.utcnow() - timedelta(days=days)
         
         with self.Session() as session:
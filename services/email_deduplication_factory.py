@@ -1,16 +1,28 @@
 """
 Factory for creating Gmail deduplication clients.
 """
+from typing import Optional
+
 from services.email_deduplication_factory_interface import EmailDeduplicationFactoryInterface
 from clients.email_deduplication_client_interface import EmailDeduplicationClientInterface
 from clients.gmail_deduplication_client import GmailDeduplicationClient
 from models.database import init_database, get_session
 from repositories.sqlalchemy_repository import SQLAlchemyRepository
+from services.processed_message_filter import ProcessedMessageFilter
 
 
 class EmailDeduplicationFactory(EmailDeduplicationFactoryInterface):
     """Factory for creating Gmail deduplication clients."""
 
+    def __init__(self, message_filter: Optional[ProcessedMessageFilter] = None):
+        """
+        Initialize the factory.
+
+        Args:
+            message_filter: Optional Bloom filters shared by the clients this factory creates
+        """
+        self.message_filter = message_filter
+
     def create_deduplication_client(self, email_address: str) -> EmailDeduplicationClientInterface:
         """
         Create a Gmail deduplication client for the specified email address.
@@ -24,4 +36,4 @@ class EmailDeduplicationFactory(EmailDeduplicationFactoryInterface):
         engine = init_database()
         session = get_session(engine)
         repository = SQLAlchemyRepository(session)
-        return GmailDeduplicationClient(repository, email_address, session)
+        return GmailDeduplicationClient(repository, email_address, session, message_filter=self.message_filter)
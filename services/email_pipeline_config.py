@@ -0,0 +1,71 @@
+"""
+Stage sizing for the per-account email processing pipeline.
+
+The pipeline runs fetch → parse → pre-filter → classify → IMAP action →
+persist. Only parse and classify can use more than one worker: the fetch and
+IMAP action stages share the account's single IMAP connection, and the
+pre-filter and persist stages write to per-account state that is not
+thread-safe.
+
+Configuration (environment, all optional):
+    EMAIL_PIPELINE_QUEUE_SIZE         Capacity of each inter-stage queue (default 32)
+    EMAIL_PIPELINE_PARSE_WORKERS      Parse stage workers (default 1)
+    EMAIL_PIPELINE_CLASSIFY_WORKERS   Classify (LLM) stage workers (default 4)
+    EMAIL_PIPELINE_CHECKPOINT_BATCH   Finished emails marked as processed per checkpoint (default 20)
+    EMAIL_PIPELINE_DEDUP_BATCH        Fetched emails checked against the dedup log per query (default 50)
+    EMAIL_PIPELINE_CHECKPOINT_SECONDS Longest a finished email waits for its checkpoint (default 5)
+    EMAIL_PIPELINE_MAX_RESUME_HOURS   Furthest back a resumed run will fetch (default 24)
+    ACCOUNT_RUN_TIME_BUDGET_SECONDS   Wall-clock budget per account run, 0 for none (default 0)
+    ACCOUNT_RUN_MESSAGE_BUDGET        New emails processed per account run, 0 for none (default 0)
+"""
+import os
+from dataclasses import dataclass
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class EmailPipelineConfig:
+    """Queue capacity and worker counts for the email processing pipeline."""
+    queue_size: int = 32
+    parse_workers: int = 1
+    classify_workers: int = 4
+    checkpoint_batch_size: int = 20
+    dedup_batch_size: int = 50
+    checkpoint_interval_seconds: int = 5
+    max_resume_hours: int = 24
+    account_time_budget_seconds: int = 0
+    account_message_budget: int = 0
+
+    @classmethod
+    def from_env(cls, env=os.environ) -> "EmailPipelineConfig":
+        defaults = cls()
+
+        def _positive(name: str, default: int) -> int:
+            raw = env.get(name, "").strip()
+            if not raw:
+                return default
+            try:
+                value = int(raw)
+            except ValueError:
+                logger.warning(f"Ignoring invalid {name}={raw!r}")
+                return default
+            return value if value > 0 else default
+
+        return cls(
+            queue_size=_positive("EMAIL_PIPELINE_QUEUE_SIZE", defaults.queue_size),
+            parse_workers=_positive("EMAIL_PIPELINE_PARSE_WORKERS", defaults.parse_workers),
+            classify_workers=_positive("EMAIL_PIPELINE_CLASSIFY_WORKERS", defaults.classify_workers),
+            checkpoint_batch_size=_positive("EMAIL_PIPELINE_CHECKPOINT_BATCH", defaults.checkpoint_batch_size),
+            dedup_batch_size=_positive("EMAIL_PIPELINE_DEDUP_BATCH", defaults.dedup_batch_size),
+            checkpoint_interval_seconds=_positive(
+                "EMAIL_PIPELINE_CHECKPOINT_SECONDS", defaults.checkpoint_interval_seconds
+            ),
+            max_resume_hours=_positive("EMAIL_PIPELINE_MAX_RESUME_HOURS", defaults.max_resume_hours),
+            account_time_budget_seconds=_positive(
+                "ACCOUNT_RUN_TIME_BUDGET_SECONDS", defaults.account_time_budget_seconds
+            ),
+            account_message_budget=_positive("ACCOUNT_RUN_MESSAGE_BUDGET", defaults.account_message_budget),
+        )
@@ -1,23 +1,51 @@
 from __future__ import annotations
 
 import ssl
+import threading
+from dataclasses import dataclass
 from email.message import Message
 from typing import Dict, List, Optional
 
 from utils.logger import get_logger
 from services.categorize_emails_interface import SimpleEmailCategory
 from services.email_categorizer_interface import EmailCategorizerInterface
+from services.llm_budget_service import LLMBudgetExhaustedError
 from services.interfaces.email_extractor_interface import EmailExtractorInterface
 from services.gmail_fetcher_service import GmailFetcher as ServiceGmailFetcher
 
 logger = get_logger(__name__)
 
 
+@dataclass
+class EmailWorkItem:
+    """State of one email as it moves through the processing stages."""
+    msg: Message
+    from_header: str = ""
+    subject: str = ""
+    message_id: str = ""
+    body: str = ""
+    sender_email: Optional[str] = None
+    sender_domain: str = ""
+    category: Optional[str] = None
+    pre_categorized: bool = False
+    deletion_candidate: bool = False
+    action_taken: Optional[str] = None
+    log_msg: str = ""
+    # Set once a stage decides the email needs no further work
+    finished: bool = False
+
+
 class EmailProcessorService:
     """Encapsulates the logic for processing a single Gmail message.
 
     This class owns the heavy email processing logic previously in gmail_fetcher.py.
     It mutates the provided fetcher.stats and tracks category actions and processed IDs.
+
+    process_email runs every step for one message. The individual steps
+    (parse, prefilter, classify, apply_actions, persist) are also exposed so
+    they can run as separate pipeline stages; classify is safe to call from
+    several threads, the IMAP and tracking steps expect a single worker each.
+    Call flush_repeat_offender_outcomes once all messages are processed.
     """
 
     def __init__(
@@ -46,35 +74,78 @@ class EmailProcessorService:
         # Aggregated results for the whole batch
         self.category_actions: Dict[str, Dict[str, int]] = {}
         self.processed_message_ids: List[str] = []
+        # Emails left for the next cycle because the account ran out of LLM budget
+        self.deferred_message_ids: List[str] = []
+        self._deferred_lock = threading.Lock()
+        # Repeat offender outcomes are written in batches (see flush_repeat_offender_outcomes)
+        self._repeat_offender_outcomes = None
+        self._repeat_offender_session = None
+
+    def _get_repeat_offender_outcomes(self):
+        if self._repeat_offender_outcomes is None:
+            from services.repeat_offender_outcome_buffer import RepeatOffenderOutcomeBuffer
+            from services.repeat_offender_service import RepeatOffenderService
+            self._repeat_offender_session = self.fetcher.summary_service.db_service.Session()  # type: ignore[attr-defined]
+            self._repeat_offender_outcomes = RepeatOffenderOutcomeBuffer(
+                RepeatOffenderService(self._repeat_offender_session, self.email_address)
+            )
+        return self._repeat_offender_outcomes
+
+    def flush_repeat_offender_outcomes(self) -> None:
+        """Write repeat offender outcomes still buffered; call once the batch is done."""
+        if self._repeat_offender_outcomes is None:
+            return
+        try:
+            self._repeat_offender_outcomes.flush()
+        except Exception as e:
+            logger.warning(f"Failed to record repeat offender patterns: {e}")
+        finally:
+            self._repeat_offender_session.close()
+            self._repeat_offender_outcomes = None
+            self._repeat_offender_session = None
 
     def process_email(self, msg: Message) -> Optional[str]:
         """Process a single email message. Returns the resolved category or None if skipped."""
+        item = self.parse(msg)
+        for step in (self.prefilter, self.classify, self.apply_actions, self.persist):
+            item = step(item)
+            if item.finished:
+                break
+        return item.category if item.action_taken else None
+
+    def parse(self, msg: Message) -> EmailWorkItem:
+        """Extract headers, sender and body from a message."""
+        from_header = str(msg.get("From", ""))
+        return EmailWorkItem(
+            msg=msg,
+            from_header=from_header,
+            subject=msg.get("Subject", ""),
+            message_id=msg.get("Message-ID", ""),
+            body=self.fetcher.get_email_body(msg),
+            # Extract sender details using injected service
+            sender_email=self.email_extractor.extract_sender_email(from_header),
+            sender_domain=self.fetcher._extract_domain(from_header) if from_header else "",
+        )
+
+    def prefilter(self, item: EmailWorkItem) -> EmailWorkItem:
+        """Resolve the category without the LLM where possible (duplicates, repeat offenders, domain lists)."""
+        if item.finished:
+            return item
+
         # Access database service through summary service
         db_svc = getattr(self.fetcher.summary_service, "db_service", None)
-
-        # Early extract identifiers and prevent duplicate processing before any LLM calls
-        from_header = str(msg.get("From", ""))
-        subject = msg.get("Subject", "")
-        message_id = msg.get("Message-ID", "")
+        message_id = item.message_id
 
         # Safeguard duplicate check (pre-filter should have removed these already)
         if db_svc and message_id:
             try:
                 if db_svc.is_message_processed(self.email_address, message_id):
                     logger.info(f"Skipping already-processed message (safeguard): {message_id}")
-                    return None
+                    item.finished = True
+                    return item
             except Exception as e:
                 logger.warning(f"Duplicate check failed for message {message_id}: {e}. Proceeding without skip.")
 
-        # Get the email body
-        body = self.fetcher.get_email_body(msg)
-        pre_categorized = False
-        deletion_candidate = False
-
-        # Extract sender details using injected service
-        sender_email = self.email_extractor.extract_sender_email(from_header)
-        sender_domain = self.fetcher._extract_domain(from_header) if from_header else ""
-
         # Check repeat offender patterns first (skip expensive LLM)
         repeat_offender_category: Optional[str] = None
         if hasattr(self.fetcher, "summary_service") and self.fetcher.summary_service and self.fetcher.summary_service.db_service:
@@ -83,84 +154,99 @@ class EmailProcessorService:
                 with self.fetcher.summary_service.db_service.Session() as session:  # type: ignore[attr-defined]
                     repeat_offender_service = RepeatOffenderService(session, self.email_address)
                     repeat_offender_category = repeat_offender_service.check_repeat_offender(
-                        sender_email, sender_domain, subject
+                        item.sender_email, item.sender_domain, item.subject
                     )
             except Exception as e:
                 logger.warning(f"Failed to check repeat offender patterns: {e}")
                 repeat_offender_category = None
 
         if repeat_offender_category:
-            category = repeat_offender_category
-            pre_categorized = True
-            deletion_candidate = True
-            logger.info(f"Repeat offender detected: {sender_email or sender_domain} -> {category}")
-        else:
-            # Check domain lists
-            if self.fetcher._is_domain_blocked(from_header):
-                category = "Blocked_Domain"
-                pre_categorized = True
-                deletion_candidate = True
-                logger.info(f"Email from blocked domain: {sender_domain}")
-            elif self.fetcher._is_domain_allowed(from_header):
-                category = "Allowed_Domain"
-                pre_categorized = True
-                deletion_candidate = False
-                logger.info(f"Email from allowed domain: {sender_domain}")
-            else:
-                category = "Other"  # placeholder, will be overwritten if not pre_categorized
-
-        # Categorize the email if not pre-categorized
-        if not pre_categorized:
-            contents_without_links = self.fetcher.remove_http_links(f"{subject}. {body}")
-            contents_without_images = self.fetcher.remove_images_from_email(contents_without_links)
-            contents_without_encoded = self.fetcher.remove_encoded_content(contents_without_images)
-            contents_cleaned = contents_without_encoded
-
-            # Use injected categorizer for categorization
+            item.category = repeat_offender_category
+            item.pre_categorized = True
+            item.deletion_candidate = True
+            logger.info(f"Repeat offender detected: {item.sender_email or item.sender_domain} -> {item.category}")
+        # Check domain lists
+        elif self.fetcher._is_domain_blocked(item.from_header):
+            item.category = "Blocked_Domain"
+            item.pre_categorized = True
+            item.deletion_candidate = True
+            logger.info(f"Email from blocked domain: {item.sender_domain}")
+        elif self.fetcher._is_domain_allowed(item.from_header):
+            item.category = "Allowed_Domain"
+            item.pre_categorized = True
+            item.deletion_candidate = False
+            logger.info(f"Email from allowed domain: {item.sender_domain}")
+        return item
+
+    def classify(self, item: EmailWorkItem) -> EmailWorkItem:
+        """Categorize the email with the LLM unless it was pre-categorized."""
+        if item.finished or item.pre_categorized:
+            return item
+
+        contents_without_links = self.fetcher.remove_http_links(f"{item.subject}. {item.body}")
+        contents_without_images = self.fetcher.remove_images_from_email(contents_without_links)
+        contents_without_encoded = self.fetcher.remove_encoded_content(contents_without_images)
+        contents_cleaned = contents_without_encoded
+
+        # Use injected categorizer for categorization
+        try:
             category = self.email_categorizer.categorize(contents_cleaned, self.model)
+        except LLMBudgetExhaustedError as e:
+            # Not marked as processed, so the next cycle picks it up again
+            logger.info(f"⏭️ Deferring {item.message_id or 'email'} to next cycle: {e}")
+            with self._deferred_lock:
+                self.deferred_message_ids.append(item.message_id)
+            item.finished = True
+            return item
+
+        # Clean up the category response
+        category = (
+            category.replace('"', "")
+            .replace("'", "")
+            .replace("*", "")
+            .replace("=", "")
+            .replace("+", "")
+            .replace("-", "")
+            .replace("_", "")
+            .strip()
+        )
+
+        # Validate category response
+        valid_categories = {c.value for c in SimpleEmailCategory}
+        if len(category) > 30 or category not in valid_categories:
+            logger.warning(f"Invalid category response: '{category}', defaulting to 'Other'")
+            category = "Other"
+
+        # Check if category is blocked
+        is_blocked = self.fetcher._is_category_blocked(category)
+        if is_blocked:
+            item.deletion_candidate = True
+            logger.info(f"🗑️ Category '{category}' is blocked - marking for deletion")
+        else:
+            item.deletion_candidate = False
+            logger.info(f"📥 Category '{category}' is not blocked - keeping email")
+        item.category = category
+        return item
 
-            # Clean up the category response
-            category = (
-                category.replace('"', "")
-                .replace("'", "")
-                .replace("*", "")
-                .replace("=", "")
-                .replace("+", "")
-                .replace("-", "")
-                .replace("_", "")
-                .strip()
-            )
-
-            # Validate category response
-            valid_categories = {c.value for c in SimpleEmailCategory}
-            if len(category) > 30 or category not in valid_categories:
-                logger.warning(f"Invalid category response: '{category}', defaulting to 'Other'")
-                category = "Other"
-
-            # Check if category is blocked
-            is_blocked = self.fetcher._is_category_blocked(category)
-            if is_blocked:
-                deletion_candidate = True
-                logger.info(f"🗑️ Category '{category}' is blocked - marking for deletion")
-            else:
-                deletion_candidate = False
-                logger.info(f"📥 Category '{category}' is not blocked - keeping email")
+    def apply_actions(self, item: EmailWorkItem) -> EmailWorkItem:
+        """Apply the Gmail label and delete the email if it is a deletion candidate."""
+        if item.finished:
+            return item
 
-        # Apply label, take action, and track
+        category = item.category
         try:
             # Re-pull headers in case objects changed (kept for parity with original code)
-            from_header = msg.get("From", "")
-            subject = msg.get("Subject", "")
-            message_id = msg.get("Message-ID", "")
+            msg = item.msg
+            item.from_header = msg.get("From", "")
+            item.subject = msg.get("Subject", "")
+            item.message_id = msg.get("Message-ID", "")
+            message_id = item.message_id
 
             # Build log message (will complete after action is taken)
-            log_msg = f'From: "{from_header}" | Subject: {subject}'
+            log_msg = f'From: "{item.from_header}" | Subject: {item.subject}'
             if len(category) < 20:
                 log_msg += f" | Category: {category}"
-            log_msg += f" | Deletion Candidate: {deletion_candidate}"
-
-            # Extract sender domain for tracking
-            sender_domain = self.fetcher._extract_domain(from_header) if from_header else None
+            log_msg += f" | Deletion Candidate: {item.deletion_candidate}"
 
             try:
                 self.fetcher.add_label(message_id, category)
@@ -169,16 +255,18 @@ class EmailProcessorService:
             except ssl.SSLError as ssl_err:
                 logger.error(f"SSL Error while adding label: {ssl_err}")
                 print("Skipping label addition due to SSL error")
-                return None
+                item.finished = True
+                return item
             except Exception as e:
                 logger.error(f"Error adding label: {e}")
                 print("Skipping label addition due to error")
-                return None
+                item.finished = True
+                return item
 
             # Track kept/deleted emails
             action_taken = "kept"  # Default action
 
-            if deletion_candidate:
+            if item.deletion_candidate:
                 try:
                     if self.fetcher.delete_email(message_id):
                         log_msg += " | Email deleted successfully"
@@ -192,23 +280,44 @@ class EmailProcessorService:
                     log_msg += " | Skipping email deletion due to SSL error"
                     print(log_msg)
                     self.fetcher.stats["kept"] += 1
-                    return None
+                    item.finished = True
+                    return item
             else:
                 log_msg += " | Email left in inbox"
                 self.fetcher.stats["kept"] += 1
 
+            item.action_taken = action_taken
+            item.log_msg = log_msg
+        except Exception as e:
+            logger.error(f"Error processing email: {e}")
+            print(f"Skipping email due to error: {e}")
+            item.finished = True
+        return item
+
+    def persist(self, item: EmailWorkItem) -> EmailWorkItem:
+        """Record the outcome: summary tracking, repeat offender patterns, category stats and processed IDs."""
+        if item.finished:
+            return item
+
+        category = item.category
+        action_taken = item.action_taken
+        message_id = item.message_id
+        try:
             # Print the complete log message
-            print(log_msg)
+            print(item.log_msg)
+
+            # Extract sender domain for tracking
+            sender_domain = self.fetcher._extract_domain(item.from_header) if item.from_header else None
 
             # Track email in summary service
             self.fetcher.summary_service.track_email(
                 message_id=message_id,
-                sender=from_header,
-                subject=subject,
+                sender=item.from_header,
+                subject=item.subject,
                 category=category,
                 action=action_taken,
                 sender_domain=sender_domain,
-                was_pre_categorized=pre_categorized,
+                was_pre_categorized=item.pre_categorized,
             )
 
             # Record email outcome for repeat offender tracking
@@ -219,16 +328,13 @@ class EmailProcessorService:
                 and self.fetcher.summary_service.db_service
             ):
                 try:
-                    from services.repeat_offender_service import RepeatOffenderService
-                    with self.fetcher.summary_service.db_service.Session() as session:  # type: ignore[attr-defined]
-                        repeat_offender_service = RepeatOffenderService(session, self.email_address)
-                        repeat_offender_service.record_email_outcome(
-                            sender_email=sender_email,
-                            sender_domain=sender_domain,
-                            subject=subject,
-                            category=category,
-                            was_deleted=(action_taken == "deleted"),
-                        )
+                    self._get_repeat_offender_outcomes().record(
+                        sender_email=item.sender_email,
+                        sender_domain=sender_domain,
+                        subject=item.subject,
+                        category=category,
+                        was_deleted=(action_taken == "deleted"),
+                    )
                 except Exception as e:
                     logger.warning(f"Failed to record repeat offender pattern: {e}")
 
@@ -253,6 +359,6 @@ class EmailProcessorService:
         except Exception as e:
             logger.error(f"Error processing email: {e}")
             print(f"Skipping email due to error: {e}")
-            return None
-
-        return category
\ No newline at end of file
+            item.action_taken = None
+            item.finished = True
+        return item
@@ -1,7 +1,6 @@
 """
 Service for tracking and summarizing email processing activities.
 """
-import json
 import os
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Any
@@ -19,6 +18,7 @@ from models.email_summary import (
     EmailAction
 )
 from services.database_service import DatabaseService
+from services.tracking_journal import TrackingJournal, read_tracking_file
 from clients.account_category_client import AccountCategoryClient
 
 
@@ -41,10 +41,12 @@ class EmailSummaryService:
             repository: MySQLRepository instance for dependency injection (optional, creates new if not provided)
         """
         self.data_dir = Path(data_dir)
-        self.data_dir.mkdir(exist_ok=True)
-        self.current_file = self.data_dir / "current_tracking.json"
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        self.journal_file = self.data_dir / "tracking_journal.jsonl"
+        self.tracking_journal = TrackingJournal(self.journal_file)
         self.archive_dir = self.data_dir / "archives"
         self.archive_dir.mkdir(exist_ok=True)
+        self._import_legacy_tracking_file()
 
         # Store gmail account email for account tracking
         self.gmail_email = gmail_email
@@ -156,14 +158,20 @@ class EmailSummaryService:
             self.current_run_id = self.db_service.start_processing_run(email_address)
             logger.info(f"Started processing run: {self.current_run_id}")
     
-    def complete_processing_run(self, success: bool = True, error_message: Optional[str] = None) -> None:
-        """Complete the current processing run."""
+    def complete_processing_run(
+        self,
+        success: bool = True,
+        error_message: Optional[str] = None,
+        budget_hit: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """Complete the current processing run; a budget_hit marks it partial."""
         # Finalize performance metrics
         self.performance_metrics['end_time'] = datetime.now()
         self.performance_metrics['total_emails'] = self.run_metrics['processed']
 
         status = "completed" if success else "failed"
         logger.info(f"Processing run {status} for {self.gmail_email or 'unknown'}")
+        self.tracking_journal.flush()
 
         if self.db_service and self.use_database and self.current_run_id:
             self.db_service.complete_processing_run(
@@ -172,9 +180,24 @@ class EmailSummaryService:
                 success=success,
                 error_message=error_message
             )
+            if budget_hit:
+                try:
+                    self.db_service.save_processing_run_budget_hit(self.current_run_id, budget_hit)
+                except Exception as e:
+                    logger.error(f"Failed to record budget hit for {self.current_run_id}: {str(e)}")
             logger.info(f"Completed processing run: {self.current_run_id}")
             self.current_run_id = None
         
+    def record_llm_usage(self, usage: List[Dict[str, Any]]) -> None:
+        """Persist the LLM usage summary for the current processing run."""
+        if not usage or not (self.db_service and self.use_database and self.current_run_id):
+            return
+        try:
+            self.db_service.save_processing_run_llm_usage(self.current_run_id, usage)
+            logger.info(f"Recorded LLM usage for {self.current_run_id}: {len(usage)} model(s)")
+        except Exception as e:
+            logger.error(f"Failed to record LLM usage for {self.current_run_id}: {str(e)}")
+
     def track_email(self, 
                    message_id: str,
                    sender: str,
@@ -215,12 +238,7 @@ class EmailSummaryService:
                 was_pre_categorized=was_pre_categorized
             )
             
-            # Load existing data
-            existing_data = self._load_current_data()
-            existing_data.append(email_record.model_dump())
-            
-            # Save updated data
-            self._save_current_data(existing_data)
+            self.tracking_journal.append(email_record.model_dump())
             logger.debug(f"Tracked email: {message_id}")
 
             # Update statistics for database
@@ -441,19 +459,10 @@ class EmailSummaryService:
                 except Exception as e:
                     logger.error(f"Failed to save summary to database: {str(e)}")
             
-            # Archive current data first
-            if self.current_file.exists():
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                archive_file = self.archive_dir / f"tracked_{timestamp}.json"
-                
-                # Move to archive
-                data = self._load_current_data()
-                if data:
-                    with open(archive_file, 'w') as f:
-                        json.dump(data, f, indent=2, default=str)
-                
-                # Clear current file
-                self._save_current_data([])
+            # Move the journal's entries to an archive and empty it
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            archive_file = self.archive_dir / f"tracked_{timestamp}.jsonl"
+            if self.tracking_journal.compact(archive_file):
                 logger.info("Cleared tracked data after archiving")
             
             # Reset statistics
@@ -522,24 +531,31 @@ class EmailSummaryService:
     
     def _load_current_data(self) -> List[Dict]:
         """Load current tracking data."""
-        if not self.current_file.exists():
-            return []
-        
         try:
-            with open(self.current_file, 'r') as f:
-                data = json.load(f)
-                return data if isinstance(data, list) else []
+            return self.tracking_journal.read()
         except Exception as e:
             logger.error(f"Failed to load tracking data: {str(e)}")
             return []
     
-    def _save_current_data(self, data: List[Dict]) -> None:
-        """Save tracking data."""
+    def replace_tracked_data(self, data: List[Dict]) -> None:
+        """Replace the tracked emails (discarding the current ones) with the given records."""
+        self.tracking_journal.compact()
+        self.tracking_journal.append_many(data)
+        self.tracking_journal.flush()
+    
+    def _import_legacy_tracking_file(self) -> None:
+        """Move entries left in current_tracking.json (the pre-journal format) into the journal."""
+        legacy_file = self.data_dir / "current_tracking.json"
+        if not legacy_file.exists():
+            return
         try:
-            with open(self.current_file, 'w') as f:
-                json.dump(data, f, indent=2, default=str)
+            records = read_tracking_file(legacy_file)
+            self.tracking_journal.append_many(records)
+            self.tracking_journal.flush()
+            legacy_file.unlink()
+            logger.info(f"Imported {len(records)} tracked emails from {legacy_file} into the tracking journal")
         except Exception as e:
-            logger.error(f"Failed to save tracking data: {str(e)}")
+            logger.error(f"Failed to import legacy tracking data: {str(e)}")
     
     def get_stats_since(self, hours: int = 24) -> Dict[str, any]:
         """
@@ -638,6 +654,11 @@ class EmailSummaryService:
         If a repository was injected via the constructor, it's the caller's responsibility
         to manage its lifecycle.
         """
+        try:
+            self.tracking_journal.close()
+        except Exception as e:
+            logger.error(f"Failed to close tracking journal: {str(e)}")
+
         if self._owns_repository and self._repository is not None:
             try:
                 self._repository.disconnect()
@@ -1,6 +1,9 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
 import imaplib
+from typing import Callable, Optional
+
+from services.resource_governor import IMAP, ResourceGovernor, ResourceSlot, get_resource_governor
 
 
 class GmailConnectionInterface(ABC):
@@ -15,3 +18,27 @@ class GmailConnectionInterface(ABC):
             imaplib.IMAP4: An authenticated IMAP4/IMAP4_SSL connection object.
         """
         raise NotImplementedError
+
+    def release(self) -> None:
+        """Give back the IMAP slot taken by connect(); call once the connection is logged out."""
+        slot: Optional[ResourceSlot] = getattr(self, "_imap_slot", None)
+        if slot is not None:
+            self._imap_slot = None
+            slot.release()
+
+    def _governed_connect(
+        self,
+        account: str,
+        open_connection: Callable[[], imaplib.IMAP4],
+        governor: Optional[ResourceGovernor] = None
+    ) -> imaplib.IMAP4:
+        """Open a connection while holding an IMAP slot for the account; the slot is freed if opening fails."""
+        self.release()
+        slot = (governor or get_resource_governor()).acquire(IMAP, key=account)
+        try:
+            conn = open_connection()
+        except BaseException:
+            slot.release()
+            raise
+        self._imap_slot = slot
+        return conn
@@ -1,21 +1,33 @@
 from __future__ import annotations
 import imaplib
 import logging
+from typing import Optional
 from utils.logger import get_logger
 
 from services.gmail_connection_interface import GmailConnectionInterface
+from services.resource_governor import ResourceGovernor
 
 logger = get_logger(__name__)
 
 
 class GmailConnectionService(GmailConnectionInterface):
-    def __init__(self, email_address: str, password: str, imap_server: str = "imap.gmail.com"):
+    def __init__(
+        self,
+        email_address: str,
+        password: str,
+        imap_server: str = "imap.gmail.com",
+        governor: Optional[ResourceGovernor] = None
+    ):
         self.email_address = email_address
         self.password = password
         self.imap_server = imap_server
+        self.governor = governor
 
     def connect(self) -> imaplib.IMAP4:
         """Establish connection to Gmail IMAP server and return the authenticated connection."""
+        return self._governed_connect(self.email_address, self._connect, self.governor)
+
+    def _connect(self) -> imaplib.IMAP4:
         try:
             # Prepare credentials (normalize email display; keep raw password, but we may try a sanitized retry)
             email = (self.email_address or "").replace("\u00a0", " ").strip()
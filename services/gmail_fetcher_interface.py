@@ -1,6 +1,6 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
-from typing import List, Set
+from typing import Iterator, List, Set
 from email import message_from_bytes
 
 
@@ -22,6 +22,14 @@ class GmailFetcherInterface(ABC):
         """Fetch emails from the last specified hours."""
         raise NotImplementedError
 
+    def iter_recent_emails(self, hours: int = 2) -> Iterator[message_from_bytes]:
+        """Yield emails from the last specified hours as they are fetched.
+
+        Implementations that fetch message by message should override this so
+        downstream processing can start before the whole mailbox is read.
+        """
+        yield from self.get_recent_emails(hours)
+
     @abstractmethod
     def get_email_body(self, email_message) -> str:
         """Extract and return the plaintext body of an email message."""
@@ -12,7 +12,7 @@ from collections import Counter
 from datetime import datetime, timedelta, timezone
 from email import message_from_bytes
 from email.utils import parsedate_to_datetime, parseaddr
-from typing import List, Optional, Set
+from typing import Iterator, List, Optional, Set
 
 from bs4 import BeautifulSoup
 
@@ -34,7 +34,8 @@ class GmailFetcher(GmailFetcherInterface):
         email_address: str,
         app_password: str,
         api_token: str | None = None,
-        connection_service: Optional['GmailConnectionService'] = None
+        connection_service: Optional['GmailConnectionService'] = None,
+        summary_data_dir: Optional[str] = None
     ):
         """
         Initialize Gmail connection using IMAP.
@@ -45,6 +46,8 @@ class GmailFetcher(GmailFetcherInterface):
             api_token: API token for the control API
             connection_service: Optional pre-configured connection service (e.g., for OAuth).
                               If not provided, creates a standard IMAP connection service.
+            summary_data_dir: Optional directory for the summary service's tracking journal
+                              (defaults to the summary service's shared directory)
         """
         self.email_address = email_address
         self.password = app_password
@@ -68,7 +71,8 @@ class GmailFetcher(GmailFetcherInterface):
         self.http_link_remover = HttpLinkRemoverService()
 
         # Initialize summary service for tracking with account integration
-        self.summary_service = EmailSummaryService(gmail_email=self.email_address)
+        summary_options = {'data_dir': summary_data_dir} if summary_data_dir else {}
+        self.summary_service = EmailSummaryService(gmail_email=self.email_address, **summary_options)
 
         # Initialize account category service for tracking account-specific statistics
         self.account_service = None
@@ -190,6 +194,10 @@ class GmailFetcher(GmailFetcherInterface):
             except Exception as e:
                 logger.error(f"Error during disconnect: {str(e)}")
 
+        release = getattr(self.connection_service, 'release', None)
+        if callable(release):
+            release()
+
     def _create_email_message(self, msg_data) -> Optional[message_from_bytes]:
         """Convert raw message data into an email message object."""
         if not msg_data or not msg_data[0]:
@@ -346,6 +354,12 @@ class GmailFetcher(GmailFetcherInterface):
         """
         Fetch emails from the last specified hours.
         """
+        return list(self.iter_recent_emails(hours))
+
+    def iter_recent_emails(self, hours: int = 2) -> Iterator[message_from_bytes]:
+        """
+        Yield emails from the last specified hours, one IMAP fetch at a time.
+        """
         logger.info(f"Starting to fetch emails from last {hours} hours")
 
         if not self.conn:
@@ -373,7 +387,7 @@ class GmailFetcher(GmailFetcherInterface):
         total_messages = len(message_numbers[0].split())
         logger.info(f"Found {total_messages} messages matching date criteria")
 
-        emails = []
+        yielded = 0
         processed = 0
         for num in message_numbers[0].split():
             processed += 1
@@ -388,17 +402,18 @@ class GmailFetcher(GmailFetcherInterface):
                     logger.warning(f"Could not create email message for ID {num}")
                     continue
 
-                if self._is_email_within_threshold(email_message, date_threshold):
-                    logger.debug(f"Message {num} is within time threshold, adding to results")
-                    emails.append(email_message)
-                else:
+                if not self._is_email_within_threshold(email_message, date_threshold):
                     logger.debug(f"Message {num} is outside time threshold, skipping")
+                    continue
             except Exception as e:
                 logger.error(f"Error processing message {num}: {str(e)}")
                 continue
 
-        logger.info(f"Completed fetch: {len(emails)} emails within time threshold")
-        return emails
+            logger.debug(f"Message {num} is within time threshold, adding to results")
+            yielded += 1
+            yield email_message
+
+        logger.info(f"Completed fetch: {yielded} emails within time threshold")
 
     def delete_email(self, message_id: str) -> bool:
         """
@@ -18,6 +18,7 @@ from urllib.parse import urlparse
 
 from utils.logger import get_logger
 from services.gmail_connection_interface import GmailConnectionInterface
+from services.resource_governor import ResourceGovernor
 
 logger = get_logger(__name__)
 
@@ -54,6 +55,7 @@ class GmailOAuthConnectionService(GmailConnectionInterface):
         refresh_token: Optional[str] = None,
         credentials_file: Optional[str] = None,
         token_file: Optional[str] = None,
+        governor: Optional[ResourceGovernor] = None,
     ):
         """
         Initialize OAuth connection service.
@@ -65,6 +67,7 @@ class GmailOAuthConnectionService(GmailConnectionInterface):
             refresh_token: OAuth refresh token (or use env var GMAIL_OAUTH_REFRESH_TOKEN)
             credentials_file: Path to credentials.json from Google Cloud Console
             token_file: Path to token.json with stored refresh token
+            governor: Resource governor bounding IMAP connections (defaults to the process-wide one)
         """
         self.email_address = email_address
         self.client_id = client_id or os.getenv("GMAIL_OAUTH_CLIENT_ID")
@@ -73,6 +76,7 @@ class GmailOAuthConnectionService(GmailConnectionInterface):
         self.credentials_file = credentials_file or os.getenv("GMAIL_OAUTH_CREDENTIALS_FILE")
         self.token_file = token_file or os.getenv("GMAIL_OAUTH_TOKEN_FILE")
         self._access_token: Optional[str] = None
+        self.governor = governor
 
         self._load_credentials()
 
@@ -242,6 +246,9 @@ class GmailOAuthConnectionService(GmailConnectionInterface):
         Returns:
             imaplib.IMAP4: An authenticated IMAP4_SSL connection object.
         """
+        return self._governed_connect(self.email_address, self._connect, self.governor)
+
+    def _connect(self) -> imaplib.IMAP4:
         access_token = self._refresh_access_token()
 
         logger.info(f"Connecting to Gmail IMAP via OAuth for {self.email_address}")
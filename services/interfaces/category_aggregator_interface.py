@@ -20,6 +20,11 @@ class ICategoryAggregator(ABC):
     - Flushing buffered data to the repository
     """
 
+    @property
+    def flushes_in_background(self) -> bool:
+        """Whether a background flusher persists the buffer, so callers need not flush."""
+        return False
+
     @abstractmethod
     def record_category(
         self,
@@ -0,0 +1,214 @@
+"""
+Per-account LLM request and token budgets.
+
+Budgets are tracked per processing cycle (one process_account run) and per
+calendar day. Requests are charged by BudgetedEmailCategorizer before each
+LLM categorization; tokens are charged from the usage reported to the
+LLMMetricsCollector once the call completes, so a single call can overshoot
+a token budget but the next one will be refused.
+
+Configuration (environment, all optional, 0/unset means unlimited):
+    LLM_BUDGET_REQUESTS_PER_CYCLE
+    LLM_BUDGET_TOKENS_PER_CYCLE
+    LLM_BUDGET_REQUESTS_PER_DAY
+    LLM_BUDGET_TOKENS_PER_DAY
+"""
+import os
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from services.llm_metrics_collector import LLMCallRecord
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Set while a fallback tier runs so its LLM calls are not charged to the budget
+_budget_exempt: ContextVar[bool] = ContextVar("llm_budget_exempt", default=False)
+
+
+class LLMBudgetExhaustedError(RuntimeError):
+    """Raised when an account has no LLM budget left and no fallback tier could categorize."""
+
+    def __init__(self, account: str, reason: str):
+        super().__init__(f"LLM budget exhausted for {account}: {reason}")
+        self.account = account
+        self.reason = reason
+
+
+@dataclass
+class LLMBudgetConfig:
+    """Budget limits applied to every account; None means unlimited."""
+    requests_per_cycle: Optional[int] = None
+    tokens_per_cycle: Optional[int] = None
+    requests_per_day: Optional[int] = None
+    tokens_per_day: Optional[int] = None
+
+    @property
+    def enabled(self) -> bool:
+        return any(
+            limit is not None
+            for limit in (self.requests_per_cycle, self.tokens_per_cycle, self.requests_per_day, self.tokens_per_day)
+        )
+
+    @classmethod
+    def from_env(cls, env=os.environ) -> "LLMBudgetConfig":
+        def _limit(name: str) -> Optional[int]:
+            raw = env.get(name, "").strip()
+            if not raw:
+                return None
+            try:
+                value = int(raw)
+            except ValueError:
+                logger.warning(f"Ignoring invalid {name}={raw!r}")
+                return None
+            return value if value > 0 else None
+
+        return cls(
+            requests_per_cycle=_limit("LLM_BUDGET_REQUESTS_PER_CYCLE"),
+            tokens_per_cycle=_limit("LLM_BUDGET_TOKENS_PER_CYCLE"),
+            requests_per_day=_limit("LLM_BUDGET_REQUESTS_PER_DAY"),
+            tokens_per_day=_limit("LLM_BUDGET_TOKENS_PER_DAY"),
+        )
+
+
+@dataclass
+class _AccountUsage:
+    day: date
+    cycle_requests: int = 0
+    cycle_tokens: int = 0
+    day_requests: int = 0
+    day_tokens: int = 0
+    fallbacks: int = 0
+    deferred: int = 0
+    exhausted_reason: Optional[str] = None
+
+
+class LLMBudgetTracker:
+    """Thread-safe per-account budget accounting."""
+
+    def __init__(self, config: Optional[LLMBudgetConfig] = None, today: Callable[[], date] = date.today):
+        """
+        Initialize the tracker.
+
+        Args:
+            config: Budget limits (defaults to LLMBudgetConfig.from_env())
+            today: Callable returning the current date (injectable for tests)
+        """
+        self.config = config if config is not None else LLMBudgetConfig.from_env()
+        self._today = today
+        self._lock = threading.Lock()
+        self._usage: Dict[str, _AccountUsage] = {}
+
+    def _get_usage(self, account: str) -> _AccountUsage:
+        # Caller holds the lock
+        today = self._today()
+        usage = self._usage.get(account)
+        if usage is None:
+            usage = _AccountUsage(day=today)
+            self._usage[account] = usage
+        elif usage.day != today:
+            usage.day = today
+            usage.day_requests = 0
+            usage.day_tokens = 0
+            usage.exhausted_reason = None
+        return usage
+
+    def begin_cycle(self, account: str) -> None:
+        """Reset the per-cycle counters for an account (daily counters carry over)."""
+        with self._lock:
+            usage = self._get_usage(account)
+            usage.cycle_requests = 0
+            usage.cycle_tokens = 0
+            usage.fallbacks = 0
+            usage.deferred = 0
+            usage.exhausted_reason = None
+
+    def check(self, account: str) -> Optional[str]:
+        """
+        Check whether the account may make another LLM request.
+
+        Returns:
+            None if budget remains, otherwise the name of the exhausted limit
+        """
+        config = self.config
+        with self._lock:
+            usage = self._get_usage(account)
+            reason = None
+            if config.requests_per_cycle is not None and usage.cycle_requests >= config.requests_per_cycle:
+                reason = "requests_per_cycle"
+            elif config.tokens_per_cycle is not None and usage.cycle_tokens >= config.tokens_per_cycle:
+                reason = "tokens_per_cycle"
+            elif config.requests_per_day is not None and usage.day_requests >= config.requests_per_day:
+                reason = "requests_per_day"
+            elif config.tokens_per_day is not None and usage.day_tokens >= config.tokens_per_day:
+                reason = "tokens_per_day"
+            if reason and usage.exhausted_reason is None:
+                usage.exhausted_reason = reason
+                logger.warning(f"💸 LLM budget exhausted for {account} ({reason})")
+            return reason
+
+    def charge_request(self, account: str) -> None:
+        with self._lock:
+            usage = self._get_usage(account)
+            usage.cycle_requests += 1
+            usage.day_requests += 1
+
+    def charge_tokens(self, account: str, tokens: int) -> None:
+        if tokens <= 0:
+            return
+        with self._lock:
+            usage = self._get_usage(account)
+            usage.cycle_tokens += tokens
+            usage.day_tokens += tokens
+
+    def record_fallback(self, account: str) -> None:
+        with self._lock:
+            self._get_usage(account).fallbacks += 1
+
+    def record_deferred(self, account: str) -> None:
+        with self._lock:
+            self._get_usage(account).deferred += 1
+
+    def on_llm_call(self, record: LLMCallRecord) -> None:
+        """LLMMetricsCollector listener charging completed calls' tokens to their account."""
+        if record.account and not _budget_exempt.get():
+            self.charge_tokens(record.account, record.prompt_tokens + record.completion_tokens)
+
+    def get_usage(self, account: str) -> Dict[str, Any]:
+        """Return the account's budget consumption and limits."""
+        config = self.config
+        with self._lock:
+            usage = self._get_usage(account)
+            return {
+                "cycle": {
+                    "requests": usage.cycle_requests,
+                    "tokens": usage.cycle_tokens,
+                    "max_requests": config.requests_per_cycle,
+                    "max_tokens": config.tokens_per_cycle,
+                },
+                "day": {
+                    "date": usage.day.isoformat(),
+                    "requests": usage.day_requests,
+                    "tokens": usage.day_tokens,
+                    "max_requests": config.requests_per_day,
+                    "max_tokens": config.tokens_per_day,
+                },
+                "exhausted": usage.exhausted_reason is not None,
+                "exhausted_reason": usage.exhausted_reason,
+                "fallback_categorizations": usage.fallbacks,
+                "deferred_emails": usage.deferred,
+            }
+
+
+@contextmanager
+def budget_exempt() -> Iterator[None]:
+    """Mark LLM calls made inside the block as not charged to any budget."""
+    token = _budget_exempt.set(True)
+    try:
+        yield
+    finally:
+        _budget_exempt.reset(token)
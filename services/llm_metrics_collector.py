@@ -0,0 +1,278 @@
+"""
+In-process instrumentation for LLM calls.
+
+Every call made through OpenAILLMService is reported here with its latency,
+token usage, retry count and outcome. Calls are aggregated into latency
+histograms per model and per account, and into per-run buckets so that a
+processing run can persist a summary of the LLM work it caused.
+"""
+import json
+import os
+import threading
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Latency histogram bucket upper bounds in milliseconds (last bucket is +inf)
+DEFAULT_LATENCY_BUCKETS_MS: Tuple[float, ...] = (
+    50, 100, 250, 500, 1000, 2000, 4000, 8000, 15000, 30000, 60000
+)
+
+OUTCOME_SUCCESS = "success"
+OUTCOME_PARSE_ERROR = "parse_error"
+OUTCOME_ERROR = "error"
+
+# Account whose work is currently being processed in this thread/context
+_current_account: ContextVar[Optional[str]] = ContextVar("llm_metrics_account", default=None)
+
+
+def get_current_llm_account() -> Optional[str]:
+    """Return the account that LLM calls in the current context are attributed to."""
+    return _current_account.get()
+
+
+@dataclass
+class LLMCallRecord:
+    """A single observed LLM call."""
+    model: str
+    provider: str
+    latency_seconds: float
+    outcome: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    retries: int = 0
+    account: Optional[str] = None
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with exact count/sum/min/max."""
+
+    def __init__(self, buckets_ms: Tuple[float, ...] = DEFAULT_LATENCY_BUCKETS_MS):
+        self.buckets_ms = tuple(buckets_ms)
+        self.bucket_counts = [0] * (len(self.buckets_ms) + 1)
+        self.count = 0
+        self.sum_ms = 0.0
+        self.min_ms: Optional[float] = None
+        self.max_ms: Optional[float] = None
+
+    def observe(self, value_ms: float) -> None:
+        index = len(self.buckets_ms)
+        for i, bound in enumerate(self.buckets_ms):
+            if value_ms <= bound:
+                index = i
+                break
+        self.bucket_counts[index] += 1
+        self.count += 1
+        self.sum_ms += value_ms
+        self.min_ms = value_ms if self.min_ms is None else min(self.min_ms, value_ms)
+        self.max_ms = value_ms if self.max_ms is None else max(self.max_ms, value_ms)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """
+        Estimate a percentile from the buckets.
+
+        Returns the upper bound of the bucket holding the requested rank,
+        clamped to the observed maximum.
+        """
+        if self.count == 0:
+            return None
+        rank = max(1, int(round(pct / 100.0 * self.count)))
+        seen = 0
+        for i, bucket_count in enumerate(self.bucket_counts):
+            seen += bucket_count
+            if seen >= rank:
+                if i < len(self.buckets_ms):
+                    return min(float(self.buckets_ms[i]), self.max_ms)
+                return self.max_ms
+        return self.max_ms
+
+    def to_dict(self) -> Dict:
+        buckets = {f"le_{int(bound)}": self.bucket_counts[i] for i, bound in enumerate(self.buckets_ms)}
+        buckets["le_inf"] = self.bucket_counts[-1]
+        return {
+            "count": self.count,
+            "avg_ms": round(self.sum_ms / self.count, 2) if self.count else None,
+            "min_ms": round(self.min_ms, 2) if self.min_ms is not None else None,
+            "max_ms": round(self.max_ms, 2) if self.max_ms is not None else None,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "buckets": buckets,
+        }
+
+
+class LLMCallStats:
+    """Running aggregate for a group of LLM calls."""
+
+    def __init__(self):
+        self.calls = 0
+        self.successes = 0
+        self.parse_failures = 0
+        self.failures = 0
+        self.retries = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.estimated_cost_usd = 0.0
+        self.latency = LatencyHistogram()
+
+    def add(self, record: LLMCallRecord, cost_usd: float = 0.0) -> None:
+        self.calls += 1
+        if record.outcome == OUTCOME_SUCCESS:
+            self.successes += 1
+        elif record.outcome == OUTCOME_PARSE_ERROR:
+            self.parse_failures += 1
+        else:
+            self.failures += 1
+        self.retries += record.retries
+        self.prompt_tokens += record.prompt_tokens
+        self.completion_tokens += record.completion_tokens
+        self.estimated_cost_usd += cost_usd
+        self.latency.observe(record.latency_seconds * 1000.0)
+
+    def to_dict(self) -> Dict:
+        return {
+            "calls": self.calls,
+            "successes": self.successes,
+            "parse_failures": self.parse_failures,
+            "failures": self.failures,
+            "retries": self.retries,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.prompt_tokens + self.completion_tokens,
+            "estimated_cost_usd": round(self.estimated_cost_usd, 6),
+            "latency": self.latency.to_dict(),
+        }
+
+
+class LLMMetricsCollector:
+    """
+    Thread-safe aggregator for LLM call metrics.
+
+    Calls are grouped by model, by account and model, and by the active
+    processing run of an account (see begin_run/end_run).
+    """
+
+    def __init__(self, pricing: Optional[Dict[str, Tuple[float, float]]] = None):
+        """
+        Initialize the collector.
+
+        Args:
+            pricing: Optional mapping of model name to (prompt, completion)
+                     USD price per million tokens, used for cost estimates
+        """
+        self.pricing = dict(pricing or {})
+        self._lock = threading.Lock()
+        self._by_model: Dict[str, LLMCallStats] = {}
+        self._by_account: Dict[str, Dict[str, LLMCallStats]] = {}
+        self._active_runs: Dict[str, Dict[str, LLMCallStats]] = {}
+        self._listeners: List[Callable[[LLMCallRecord], None]] = []
+
+    def estimate_cost(self, model: str, prompt_tokens: int, completion_tokens: int) -> float:
+        """Estimate the USD cost of a call from the configured pricing table."""
+        prices = self.pricing.get(model)
+        if not prices:
+            return 0.0
+        prompt_price, completion_price = prices
+        return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+    def record_call(self, record: LLMCallRecord) -> None:
+        """Record one LLM call, attributing it to the current account if none is given."""
+        account = record.account or get_current_llm_account()
+        record.account = account
+        cost = self.estimate_cost(record.model, record.prompt_tokens, record.completion_tokens)
+
+        with self._lock:
+            self._by_model.setdefault(record.model, LLMCallStats()).add(record, cost)
+            if account:
+                account_models = self._by_account.setdefault(account, {})
+                account_models.setdefault(record.model, LLMCallStats()).add(record, cost)
+                run_models = self._active_runs.get(account)
+                if run_models is not None:
+                    run_models.setdefault(record.model, LLMCallStats()).add(record, cost)
+            listeners = list(self._listeners)
+
+        for listener in listeners:
+            try:
+                listener(record)
+            except Exception as e:
+                logger.warning(f"LLM call listener failed: {e}")
+
+    def add_listener(self, listener: Callable[[LLMCallRecord], None]) -> None:
+        """Register a callback invoked (in the calling thread) after each recorded call."""
+        with self._lock:
+            if listener not in self._listeners:
+                self._listeners.append(listener)
+
+    def begin_run(self, account: str) -> None:
+        """
+        Start collecting a per-run summary for an account.
+
+        Also attributes LLM calls made from the current thread to the account.
+        """
+        _current_account.set(account)
+        with self._lock:
+            self._active_runs[account] = {}
+
+    def end_run(self, account: str) -> List[Dict]:
+        """
+        Finish the account's run and return its per-model summary.
+
+        Returns:
+            List of summary dicts, one per model used during the run
+        """
+        if _current_account.get() == account:
+            _current_account.set(None)
+        with self._lock:
+            run_models = self._active_runs.pop(account, None) or {}
+            return [
+                {"model": model, **stats.to_dict()}
+                for model, stats in sorted(run_models.items())
+            ]
+
+    def get_snapshot(self) -> Dict:
+        """Return aggregated metrics per model and per account."""
+        with self._lock:
+            return {
+                "models": {model: stats.to_dict() for model, stats in self._by_model.items()},
+                "accounts": {
+                    account: {model: stats.to_dict() for model, stats in models.items()}
+                    for account, models in self._by_account.items()
+                },
+                "active_runs": sorted(self._active_runs.keys()),
+            }
+
+    def reset(self) -> None:
+        """Clear all aggregated metrics (active runs are kept)."""
+        with self._lock:
+            self._by_model.clear()
+            self._by_account.clear()
+
+
+def _load_pricing_from_env() -> Dict[str, Tuple[float, float]]:
+    """Parse LLM_TOKEN_PRICING ({"model": [prompt_usd_per_1m, completion_usd_per_1m]})."""
+    raw = os.getenv("LLM_TOKEN_PRICING", "").strip()
+    if not raw:
+        return {}
+    try:
+        data = json.loads(raw)
+        return {model: (float(prices[0]), float(prices[1])) for model, prices in data.items()}
+    except (ValueError, TypeError, IndexError, AttributeError) as e:
+        logger.warning(f"Ignoring invalid LLM_TOKEN_PRICING value: {e}")
+        return {}
+
+
+_default_collector: Optional[LLMMetricsCollector] = None
+_default_collector_lock = threading.Lock()
+
+
+def get_llm_metrics_collector() -> LLMMetricsCollector:
+    """Return the process-wide LLM metrics collector."""
+    global _default_collector
+    with _default_collector_lock:
+        if _default_collector is None:
+            _default_collector = LLMMetricsCollector(pricing=_load_pricing_from_env())
+        return _default_collector
@@ -0,0 +1,118 @@
+"""
+Local file store for recorded LLM interactions.
+
+Recordings are kept as JSON lines, one interaction per line, keyed by a
+fingerprint of the request. They are written by RecordingLLMService and
+served back by ReplayLLMService.
+"""
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def fingerprint_request(
+    method: str,
+    model: str,
+    prompt: str,
+    system_prompt: Optional[str],
+    temperature: float,
+    response_model: Optional[str] = None,
+    **kwargs: Any
+) -> str:
+    """
+    Build a stable fingerprint for an LLM request.
+
+    Args:
+        method: Interface method name ('call' or 'call_structured')
+        model: Model name the request targets
+        prompt: User prompt
+        system_prompt: Optional system prompt
+        temperature: Sampling temperature
+        response_model: Name of the structured response model, if any
+        **kwargs: Extra provider parameters that affect the answer
+
+    Returns:
+        str: Hex SHA-256 digest of the canonicalized request
+    """
+    payload = {
+        "method": method,
+        "model": model,
+        "prompt": prompt,
+        "system_prompt": system_prompt,
+        "temperature": temperature,
+        "response_model": response_model,
+        "kwargs": kwargs,
+    }
+    canonical = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class LLMRecordingStore:
+    """Append-only JSONL store of (fingerprint -> response, latency) records."""
+
+    def __init__(self, path: str):
+        """
+        Initialize the store.
+
+        Args:
+            path: Path of the JSONL recording file (created on first append)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._records: Dict[str, Dict[str, Any]] = {}
+        self._load()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as handle:
+            for line_number, line in enumerate(handle, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                    self._records[record["fingerprint"]] = record
+                except (ValueError, KeyError) as e:
+                    logger.warning(f"Skipping malformed recording at {self.path}:{line_number}: {e}")
+        logger.info(f"Loaded {len(self._records)} LLM recordings from {self.path}")
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """Persist a record; later records for the same fingerprint win."""
+        record.setdefault("recorded_at", datetime.utcnow().isoformat())
+        line = json.dumps(record, sort_keys=True, default=str)
+        with self._lock:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as handle:
+                handle.write(line + "\n")
+            self._records[record["fingerprint"]] = record
+
+    def get(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """Return the record for a fingerprint, if any."""
+        with self._lock:
+            return self._records.get(fingerprint)
+
+    def latencies(self) -> List[float]:
+        """Return all recorded latencies in seconds, in a stable order."""
+        with self._lock:
+            return [
+                float(record.get("latency_seconds", 0.0))
+                for _, record in sorted(self._records.items())
+            ]
+
+    def models(self) -> List[str]:
+        """Return the distinct model names present in the recording."""
+        with self._lock:
+            return sorted({record.get("model", "") for record in self._records.values()})
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._records)
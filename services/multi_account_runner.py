@@ -0,0 +1,258 @@
+"""
+Parallel runner for processing many Gmail accounts from the command line.
+
+Used by gmail_fetcher.py for ad-hoc backfills: accounts are read from the
+database or a file, processed on a pool of worker threads, aggregate
+progress and throughput are logged while the run is going, and a JSON
+summary is written per account plus one for the whole run.
+"""
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class AccountJob:
+    """An account to process and the credential to connect with."""
+    email_address: str
+    secret: Optional[str] = None  # App password, or OAuth refresh token when auth_method is 'oauth'
+    auth_method: str = 'imap'
+
+
+@dataclass
+class AccountRunResult:
+    """Outcome of processing one account."""
+    email_address: str
+    success: bool
+    emails_found: int = 0
+    emails_processed: int = 0
+    duration_seconds: float = 0.0
+    error: Optional[str] = None
+    details: Dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class RunProgress:
+    """Thread-safe aggregate progress of a multi-account run."""
+
+    def __init__(self, accounts_total: int, clock: Callable[[], float] = time.monotonic):
+        self.accounts_total = accounts_total
+        self._clock = clock
+        self._started = clock()
+        self._lock = threading.Lock()
+        self._running: Dict[str, float] = {}
+        self.accounts_done = 0
+        self.accounts_failed = 0
+        self.emails_processed = 0
+
+    def account_started(self, email_address: str) -> None:
+        with self._lock:
+            self._running[email_address] = self._clock()
+
+    def email_processed(self, count: int = 1) -> None:
+        """Called by workers as each email finishes."""
+        with self._lock:
+            self.emails_processed += count
+
+    def account_finished(self, email_address: str, success: bool) -> None:
+        with self._lock:
+            self._running.pop(email_address, None)
+            self.accounts_done += 1
+            if not success:
+                self.accounts_failed += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            elapsed = self._clock() - self._started
+            return {
+                'accounts_total': self.accounts_total,
+                'accounts_done': self.accounts_done,
+                'accounts_failed': self.accounts_failed,
+                'accounts_running': len(self._running),
+                'emails_processed': self.emails_processed,
+                'elapsed_seconds': round(elapsed, 1),
+                'emails_per_second': round(self.emails_processed / elapsed, 2) if elapsed > 0 else 0.0,
+            }
+
+    def format(self) -> str:
+        s = self.snapshot()
+        return (
+            f"📊 {s['accounts_done']}/{s['accounts_total']} accounts done "
+            f"({s['accounts_running']} running, {s['accounts_failed']} failed), "
+            f"{s['emails_processed']} emails in {s['elapsed_seconds']:.0f}s ({s['emails_per_second']:.2f}/s)"
+        )
+
+
+class MultiAccountRunner:
+    """Processes accounts in parallel and collects their results."""
+
+    def __init__(
+        self,
+        process_account: Callable[[AccountJob, RunProgress], Dict[str, Any]],
+        max_workers: int = 4,
+        results_dir: Optional[str] = None,
+        report_interval: float = 15.0
+    ):
+        """
+        Initialize the runner.
+
+        Args:
+            process_account: Processes one account and returns a result dict
+                             (emails_found, emails_processed, ...); it should call
+                             progress.email_processed() as emails finish. Exceptions
+                             mark the account as failed without stopping the others.
+            max_workers: Accounts processed at once
+            results_dir: Directory for per-account and run summaries (None to skip writing)
+            report_interval: Seconds between aggregate progress log lines
+        """
+        self.process_account = process_account
+        self.max_workers = max(1, max_workers)
+        self.results_dir = results_dir
+        self.report_interval = report_interval
+
+    def run(self, jobs: List[AccountJob]) -> List[AccountRunResult]:
+        """
+        Process all jobs and return their results in job order.
+        """
+        progress = RunProgress(len(jobs))
+        results: Dict[str, AccountRunResult] = {}
+        stop_reporting = threading.Event()
+        reporter = threading.Thread(
+            target=self._report, args=(progress, stop_reporting), name="BackfillProgress", daemon=True
+        )
+        logger.info(f"🚀 Processing {len(jobs)} accounts with {self.max_workers} workers")
+        reporter.start()
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="BackfillWorker") as executor:
+                futures = {executor.submit(self._run_one, job, progress): job for job in jobs}
+                for future in as_completed(futures):
+                    result = future.result()
+                    results[result.email_address] = result
+                    self._write_account_result(result)
+                    logger.info(
+                        f"{'✅' if result.success else '❌'} {result.email_address}: "
+                        f"{result.emails_processed} emails in {result.duration_seconds:.1f}s"
+                        + (f" ({result.error})" if result.error else "")
+                    )
+        finally:
+            stop_reporting.set()
+            reporter.join(timeout=1)
+
+        ordered = [results[job.email_address] for job in jobs if job.email_address in results]
+        self._write_run_summary(ordered, progress.snapshot())
+        logger.info(progress.format())
+        return ordered
+
+    def _run_one(self, job: AccountJob, progress: RunProgress) -> AccountRunResult:
+        progress.account_started(job.email_address)
+        started = time.monotonic()
+        try:
+            details = self.process_account(job, progress) or {}
+            result = AccountRunResult(
+                email_address=job.email_address,
+                success=bool(details.get('success', True)),
+                emails_found=details.get('emails_found', 0),
+                emails_processed=details.get('emails_processed', 0),
+                error=details.get('error'),
+                details=details,
+            )
+        except Exception as e:
+            logger.exception(f"Processing {job.email_address} failed")
+            result = AccountRunResult(email_address=job.email_address, success=False, error=str(e))
+        result.duration_seconds = round(time.monotonic() - started, 2)
+        progress.account_finished(job.email_address, result.success)
+        return result
+
+    def _report(self, progress: RunProgress, stop: threading.Event) -> None:
+        while not stop.wait(self.report_interval):
+            logger.info(progress.format())
+
+    def _write_account_result(self, result: AccountRunResult) -> None:
+        if not self.results_dir:
+            return
+        os.makedirs(self.results_dir, exist_ok=True)
+        with open(os.path.join(self.results_dir, f"{account_file_name(result.email_address)}.json"), 'w') as f:
+            json.dump(result.to_dict(), f, indent=2, default=str)
+
+    def _write_run_summary(self, results: List[AccountRunResult], progress: Dict[str, Any]) -> None:
+        if not self.results_dir:
+            return
+        os.makedirs(self.results_dir, exist_ok=True)
+        summary = {
+            'completed_at': datetime.now().isoformat(),
+            'workers': self.max_workers,
+            **progress,
+            'accounts': [
+                {k: v for k, v in r.to_dict().items() if k != 'details'}
+                for r in results
+            ],
+        }
+        with open(os.path.join(self.results_dir, "summary.json"), 'w') as f:
+            json.dump(summary, f, indent=2, default=str)
+
+
+def account_file_name(email_address: str) -> str:
+    """The account's address with any characters unsafe in a file name replaced."""
+    return re.sub(r'[^A-Za-z0-9@._-]', '_', email_address)
+
+
+def load_accounts_from_db(account_client) -> List[AccountJob]:
+    """
+    Active accounts with a usable credential from the database.
+
+    Args:
+        account_client: AccountCategoryClientInterface
+    """
+    jobs = []
+    for account in account_client.get_all_accounts(active_only=True):
+        auth_method = getattr(account, 'auth_method', 'imap') or 'imap'
+        secret = getattr(account, 'oauth_refresh_token', None) if auth_method == 'oauth' else account.app_password
+        if not secret:
+            logger.warning(f"Skipping {account.email_address}: no {'OAuth token' if auth_method == 'oauth' else 'app password'}")
+            continue
+        jobs.append(AccountJob(account.email_address, secret, auth_method))
+    return jobs
+
+
+def load_accounts_from_file(path: str, account_client=None) -> List[AccountJob]:
+    """
+    Accounts listed in a text file, one per line.
+
+    Each line is an email address, optionally followed by a comma or
+    whitespace and its app password. Blank lines and lines starting with #
+    are ignored. Accounts without a password take their credential from the
+    database when account_client is given.
+    """
+    jobs = []
+    db_jobs = None
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            parts = re.split(r'[,\s]+', line, maxsplit=1)
+            email_address = parts[0]
+            password = parts[1].strip() if len(parts) > 1 else None
+            if password:
+                jobs.append(AccountJob(email_address, password))
+                continue
+            if db_jobs is None:
+                db_jobs = {job.email_address.lower(): job for job in load_accounts_from_db(account_client)} if account_client else {}
+            job = db_jobs.get(email_address.lower())
+            if job is None:
+                logger.warning(f"Skipping {email_address}: no password in file or database")
+                continue
+            jobs.append(job)
+    return list({job.email_address.lower(): job for job in jobs}.values())
@@ -6,18 +6,45 @@ Ollama, RequestYAI, etc.
 """
 
 import logging
+import time
 from utils.logger import get_logger
 from typing import Optional, Any, Type, TypeVar
+from urllib.parse import urlparse
 
+import openai
 from openai import OpenAI
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
 
 from services.llm_service_interface import LLMServiceInterface
+from services.llm_metrics_collector import (
+    LLMCallRecord,
+    LLMMetricsCollector,
+    OUTCOME_ERROR,
+    OUTCOME_PARSE_ERROR,
+    OUTCOME_SUCCESS,
+    get_llm_metrics_collector,
+)
+from services.resource_governor import LLM, ResourceGovernor, get_resource_governor
 
 T = TypeVar('T', bound=BaseModel)
 
 logger = get_logger(__name__)
 
+# Transient errors that are retried by this service (the SDK's own retries are disabled
+# so that every attempt is visible to the metrics collector)
+RETRYABLE_ERRORS = tuple(
+    getattr(openai, name) for name in
+    ("APIConnectionError", "APITimeoutError", "RateLimitError", "InternalServerError")
+    if hasattr(openai, name)
+)
+
+# Errors meaning the model answered but the answer could not be parsed
+PARSE_ERRORS = (ValidationError,) + tuple(
+    getattr(openai, name) for name in
+    ("LengthFinishReasonError", "ContentFilterFinishReasonError")
+    if hasattr(openai, name)
+)
+
 
 class OpenAILLMService(LLMServiceInterface):
     """
@@ -35,7 +62,11 @@ class OpenAILLMService(LLMServiceInterface):
         model: str,
         api_key: str,
         base_url: Optional[str] = None,
-        provider_name: str = "openai"
+        provider_name: str = "openai",
+        max_retries: int = 2,
+        retry_backoff_seconds: float = 0.5,
+        metrics_collector: Optional[LLMMetricsCollector] = None,
+        governor: Optional[ResourceGovernor] = None
     ):
         """
         Initialize the OpenAI LLM service.
@@ -45,12 +76,22 @@ class OpenAILLMService(LLMServiceInterface):
             api_key: API key for authentication
             base_url: Optional base URL for OpenAI-compatible endpoints
             provider_name: Name of the provider for logging
+            max_retries: Retries for transient API errors (connection, timeout, 429, 5xx)
+            retry_backoff_seconds: Initial backoff between retries (doubled per retry)
+            metrics_collector: Collector for per-call metrics (defaults to the process-wide one)
+            governor: Resource governor bounding concurrent requests (defaults to the process-wide one)
         """
         self.model = model
         self.provider_name = provider_name
         self.base_url = base_url
-
-        client_kwargs = {"api_key": api_key}
+        self.max_retries = max(0, max_retries)
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.metrics_collector = metrics_collector or get_llm_metrics_collector()
+        self.governor = governor or get_resource_governor()
+        # Requests are limited per API host so that a slow local Ollama does not starve a hosted provider
+        self.governor_key = urlparse(base_url).netloc if base_url else provider_name
+
+        client_kwargs = {"api_key": api_key, "max_retries": 0}
         if base_url:
             client_kwargs["base_url"] = base_url.rstrip("/")
 
@@ -102,13 +143,65 @@ class OpenAILLMService(LLMServiceInterface):
         # Merge in any additional kwargs
         call_kwargs.update(kwargs)
 
+        started = time.monotonic()
+        response = None
+        retry_state = {"retries": 0}
+        outcome = OUTCOME_ERROR
         try:
-            response = self.client.chat.completions.create(**call_kwargs)
+            response = self._with_retries(
+                lambda: self.client.chat.completions.create(**call_kwargs),
+                retry_state
+            )
             content = (response.choices[0].message.content or "").strip()
+            outcome = OUTCOME_SUCCESS
             return content
         except Exception as e:
             logger.error(f"OpenAI-compatible API call failed: {e}")
             raise
+        finally:
+            self._record_call(started, response, retry_state["retries"], outcome)
+
+    def _with_retries(self, request, retry_state: dict):
+        """
+        Run a request, retrying transient API errors with exponential backoff.
+
+        Each attempt holds an LLM slot of the resource governor; backoff sleeps do not.
+
+        Args:
+            request: Zero-argument callable performing the API request
+            retry_state: Dict whose 'retries' entry is updated with the retries performed
+        """
+        while True:
+            try:
+                with self.governor.slot(LLM, key=self.governor_key):
+                    return request()
+            except RETRYABLE_ERRORS as e:
+                retries = retry_state["retries"]
+                if retries >= self.max_retries:
+                    raise
+                delay = min(self.retry_backoff_seconds * (2 ** retries), 8.0)
+                retry_state["retries"] = retries + 1
+                logger.warning(
+                    f"Transient {self.provider_name} error ({type(e).__name__}), "
+                    f"retry {retries + 1}/{self.max_retries} in {delay:.1f}s"
+                )
+                time.sleep(delay)
+
+    def _record_call(self, started: float, response: Any, retries: int, outcome: str) -> None:
+        """Report a finished call to the metrics collector."""
+        usage = getattr(response, "usage", None)
+        try:
+            self.metrics_collector.record_call(LLMCallRecord(
+                model=self.model,
+                provider=self.provider_name,
+                latency_seconds=time.monotonic() - started,
+                outcome=outcome,
+                prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+                completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+                retries=retries,
+            ))
+        except Exception:
+            logger.exception("Failed to record LLM call metrics")
 
     def is_available(self) -> bool:
         """
@@ -165,20 +258,33 @@ class OpenAILLMService(LLMServiceInterface):
             messages.append({"role": "system", "content": system_prompt})
         messages.append({"role": "user", "content": prompt})
 
+        started = time.monotonic()
+        response = None
+        retry_state = {"retries": 0}
+        outcome = OUTCOME_ERROR
         try:
-            response = self.client.beta.chat.completions.parse(
-                model=self.model,
-                messages=messages,
-                response_format=response_model,
-                temperature=temperature,
-                **kwargs
+            response = self._with_retries(
+                lambda: self.client.beta.chat.completions.parse(
+                    model=self.model,
+                    messages=messages,
+                    response_format=response_model,
+                    temperature=temperature,
+                    **kwargs
+                ),
+                retry_state
             )
 
             parsed = response.choices[0].message.parsed
             if parsed is None:
+                outcome = OUTCOME_PARSE_ERROR
                 raise ValueError("LLM returned null parsed response")
 
+            outcome = OUTCOME_SUCCESS
             return parsed
         except Exception as e:
+            if isinstance(e, PARSE_ERRORS):
+                outcome = OUTCOME_PARSE_ERROR
             logger.error(f"OpenAI structured output call failed: {e}")
-            raise
\ No newline at end of file
+            raise
+        finally:
+            self._record_call(started, response, retry_state["retries"], outcome)
\ No newline at end of file
@@ -0,0 +1,317 @@
+"""
+Background delivery of queued processing side effects.
+
+process_account used to send the recommendation email and write category
+statistics inline, so a slow SMTP server or a failing stats write stalled
+or failed the run, and a failure lost the side effect. Runs now queue these
+side effects in the outbox and this dispatcher delivers them in batches,
+retrying failures with exponential backoff.
+
+Handlers receive every claimed event of their type at once so they can
+batch the work (e.g. one aggregator flush for many tallies). A handler that
+fails part way through a batch raises PartialDeliveryError with the events
+it did deliver; those are marked delivered and only the rest are retried,
+one at a time, so a single bad event does not hold back the others and a
+sent email is not sent again.
+"""
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from models.domain_recommendation_models import DomainRecommendation
+from repositories.outbox_repository import NewOutboxEvent, OutboxMessage, OutboxRepository
+from services.account_lease_service import default_owner_id
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+EVENT_RECOMMENDATION_EMAIL = 'recommendation_email'
+EVENT_CATEGORY_STATS = 'category_stats'
+EVENT_CATEGORY_TALLY = 'category_tally'
+
+OutboxHandler = Callable[[List[OutboxMessage]], None]
+
+
+class PartialDeliveryError(Exception):
+    """A handler failed after delivering some of the events of its batch."""
+
+    def __init__(self, delivered: List[OutboxMessage], cause: Exception):
+        super().__init__(str(cause))
+        self.delivered = delivered
+        self.cause = cause
+
+
+def deliver_each(messages: List[OutboxMessage], deliver: Callable[[OutboxMessage], None]) -> None:
+    """
+    Deliver messages in order, reporting the ones already delivered if one fails.
+
+    Raises:
+        PartialDeliveryError: If a message after the first failed
+        Exception: The first message's error, if it failed
+    """
+    for index, message in enumerate(messages):
+        try:
+            deliver(message)
+        except Exception as e:
+            if index == 0:
+                raise
+            raise PartialDeliveryError(messages[:index], e) from e
+
+
+class OutboxDispatcher:
+    """Delivers outbox events to registered handlers from a background thread."""
+
+    def __init__(
+        self,
+        repository: OutboxRepository,
+        owner_id: Optional[str] = None,
+        batch_size: int = 50,
+        poll_interval: float = 2.0,
+        max_attempts: int = 8,
+        retry_backoff_seconds: float = 5.0,
+        max_backoff_seconds: float = 600.0,
+        lock_seconds: float = 300.0,
+        retention_hours: float = 24.0
+    ):
+        """
+        Initialize the dispatcher.
+
+        Args:
+            repository: OutboxRepository holding queued events
+            owner_id: Identity used to lock claimed events (defaults to host/pid based)
+            batch_size: Events claimed per round
+            poll_interval: Seconds between rounds when the outbox is empty
+            max_attempts: Delivery attempts before an event is marked dead
+            retry_backoff_seconds: Delay before the first retry (doubled per attempt)
+            max_backoff_seconds: Longest delay between retries
+            lock_seconds: How long a claimed event is hidden from other dispatchers
+            retention_hours: Delivered events older than this are purged
+        """
+        self.repository = repository
+        self.owner_id = owner_id or default_owner_id()
+        self.batch_size = max(1, batch_size)
+        self.poll_interval = poll_interval
+        self.max_attempts = max(1, max_attempts)
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.lock_seconds = lock_seconds
+        self.retention_hours = retention_hours
+        self._handlers: Dict[str, OutboxHandler] = {}
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_purge = 0.0
+        self._metrics_lock = threading.Lock()
+        self._metrics = {'enqueued': 0, 'delivered': 0, 'retried': 0, 'dead': 0, 'batches': 0}
+
+    def register(self, event_type: str, handler: OutboxHandler) -> None:
+        """Deliver events of event_type with handler (replacing any previous handler)."""
+        self._handlers[event_type] = handler
+
+    def has_handler(self, event_type: str) -> bool:
+        return event_type in self._handlers
+
+    def enqueue(self, events: List[NewOutboxEvent]) -> List[int]:
+        """
+        Queue side effects in one transaction and wake the dispatcher.
+
+        Raises:
+            Exception: If the events could not be stored; nothing was queued
+        """
+        ids = self.repository.enqueue(events)
+        self._count('enqueued', len(ids))
+        self._wake.set()
+        return ids
+
+    def deliver_inline(self, events: List[NewOutboxEvent]) -> None:
+        """Run the handlers for events directly, for when they could not be queued."""
+        for event in events:
+            handler = self._handlers.get(event.event_type)
+            if handler is None:
+                logger.error(f"No handler registered for {event.event_type}; dropping it")
+                continue
+            try:
+                handler([OutboxMessage(
+                    id=0,
+                    event_type=event.event_type,
+                    account_email=event.account_email,
+                    processing_run_id=event.processing_run_id,
+                    payload=event.payload,
+                    attempts=0,
+                )])
+            except Exception as e:
+                logger.error(f"❌ Inline delivery of {event.event_type} for {event.account_email} failed: {e}")
+
+    def dispatch_once(self) -> int:
+        """
+        Claim and deliver one batch of due events.
+
+        Returns:
+            Number of events delivered
+        """
+        messages = self.repository.claim_due(self.owner_id, self.batch_size, self.lock_seconds)
+        if not messages:
+            return 0
+        self._count('batches')
+
+        by_type: Dict[str, List[OutboxMessage]] = {}
+        for message in messages:
+            by_type.setdefault(message.event_type, []).append(message)
+
+        delivered = 0
+        for event_type, batch in by_type.items():
+            handler = self._handlers.get(event_type)
+            if handler is None:
+                for message in batch:
+                    self._fail(message, f"No handler registered for {event_type}")
+                continue
+            try:
+                handler(batch)
+            except Exception as e:
+                if isinstance(e, PartialDeliveryError):
+                    done = {message.id for message in e.delivered}
+                    self.repository.mark_delivered(sorted(done))
+                    delivered += len(done)
+                    batch = [message for message in batch if message.id not in done]
+                if len(batch) == 1:
+                    self._fail(batch[0], str(e))
+                    continue
+                logger.warning(f"📮 Batch of {len(batch)} {event_type} events failed ({e}); retrying one at a time")
+                for message in batch:
+                    try:
+                        handler([message])
+                    except Exception as single_error:
+                        self._fail(message, str(single_error))
+                    else:
+                        self.repository.mark_delivered([message.id])
+                        delivered += 1
+            else:
+                self.repository.mark_delivered([message.id for message in batch])
+                delivered += len(batch)
+
+        self._count('delivered', delivered)
+        return delivered
+
+    def _fail(self, message: OutboxMessage, error: str) -> None:
+        attempts = message.attempts + 1
+        if attempts >= self.max_attempts:
+            logger.error(
+                f"💀 Giving up on {message.event_type} event {message.id} for {message.account_email} "
+                f"after {attempts} attempts: {error}"
+            )
+            self.repository.mark_failed(message.id, error, retry_in=None)
+            self._count('dead')
+            return
+        delay = min(self.retry_backoff_seconds * (2 ** (attempts - 1)), self.max_backoff_seconds)
+        logger.warning(
+            f"📮 Delivery of {message.event_type} event {message.id} failed (attempt {attempts}/{self.max_attempts}), "
+            f"retrying in {delay:.0f}s: {error}"
+        )
+        self.repository.mark_failed(message.id, error, retry_in=delay)
+        self._count('retried')
+
+    def _count(self, key: str, amount: int = 1) -> None:
+        with self._metrics_lock:
+            self._metrics[key] += amount
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.clear()
+            try:
+                delivered = self.dispatch_once()
+                if time.monotonic() - self._last_purge >= 3600:
+                    self._last_purge = time.monotonic()
+                    self.repository.purge_delivered(timedelta(hours=self.retention_hours))
+            except Exception as e:
+                logger.error(f"💥 Outbox dispatch failed: {e}")
+                delivered = 0
+            # Keep draining while there is a backlog, otherwise wait for new events
+            if delivered < self.batch_size:
+                self._wake.wait(self.poll_interval)
+
+    def start(self) -> None:
+        """Start delivering events in a background thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="OutboxDispatcher", daemon=True)
+        self._thread.start()
+        logger.info(f"📮 Outbox dispatcher started ({', '.join(sorted(self._handlers)) or 'no handlers'})")
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stop the background thread after delivering what is already due."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+        try:
+            while self.dispatch_once():
+                pass
+        except Exception as e:
+            logger.error(f"❌ Final outbox dispatch failed: {e}")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Dispatcher counters since start plus the outbox's current backlog."""
+        with self._metrics_lock:
+            metrics = dict(self._metrics)
+        try:
+            metrics.update(self.repository.get_stats())
+        except Exception as e:
+            logger.warning(f"Failed to read outbox stats: {e}")
+        return metrics
+
+
+def recommendation_email_handler(notifier) -> OutboxHandler:
+    """Send queued recommendation emails; a notifier reporting failure is retried."""
+    def send(message: OutboxMessage) -> None:
+        recommendations = [DomainRecommendation(**r) for r in message.payload['recommendations']]
+        result = notifier.send_recommendations(message.payload['recipient'], recommendations)
+        if result is not None and not result.success:
+            raise RuntimeError(result.error_message or "Recommendation email was not sent")
+
+    def handle(messages: List[OutboxMessage]) -> None:
+        deliver_each(messages, send)
+    return handle
+
+
+def category_stats_handler(account_client) -> OutboxHandler:
+    """Write queued daily category statistics through an AccountCategoryClientInterface."""
+    def record(message: OutboxMessage) -> None:
+        account_client.record_category_stats(
+            email_address=message.payload['email_address'],
+            stats_date=date.fromisoformat(message.payload['stats_date']),
+            category_stats=message.payload['category_stats']
+        )
+
+    def handle(messages: List[OutboxMessage]) -> None:
+        deliver_each(messages, record)
+    return handle
+
+
+def category_tally_handler(aggregator) -> OutboxHandler:
+    """
+    Record queued category counts in the aggregator and flush once for the whole batch
+    (left to the aggregator when it flushes in the background).
+
+    Tallies are additive, so an event counts as delivered once it is in the
+    aggregator's buffer; a failed flush keeps the buffer for the next flush
+    rather than having the outbox record the counts a second time.
+    """
+    def record(message: OutboxMessage) -> None:
+        aggregator.record_batch(
+            message.payload['email_address'],
+            message.payload['category_counts'],
+            datetime.fromisoformat(message.payload['timestamp'])
+        )
+
+    def handle(messages: List[OutboxMessage]) -> None:
+        deliver_each(messages, record)
+        if getattr(aggregator, 'flushes_in_background', False) is True:
+            return
+        try:
+            aggregator.flush()
+        except Exception as e:
+            logger.error(f"Failed to flush aggregator, counts stay buffered for the next flush: {e}")
+    return handle
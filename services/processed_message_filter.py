@@ -0,0 +1,346 @@
+"""
+In-memory Bloom filters in front of processed-email lookups.
+
+In steady state most fetched emails were already processed by an earlier
+run, and every one of them used to cost a processed_email_log lookup. Each
+account gets a Bloom filter of its processed message IDs: an ID the filter
+has never seen is definitely new and skips the database, and only possible
+hits are confirmed there.
+
+Filters are built from processed_email_log on first use, caught up with
+rows written since (by id) at the start of every run, and updated as emails
+are marked processed. Snapshots are written to disk so a restart only has
+to read the rows added since the snapshot. Bloom filters cannot delete, so
+when records are cleaned up the account's filter is dropped and rebuilt;
+until then the stale entries only cost extra database checks.
+"""
+import hashlib
+import json
+import math
+import os
+import struct
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_SNAPSHOT_MAGIC = b"CEBLOOM1"
+
+
+def normalize_message_id(message_id: str) -> str:
+    # MySQL compares message IDs case-insensitively, so the filter must too
+    return message_id.strip().lower()
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        """
+        Initialize an empty filter.
+
+        Args:
+            capacity: Items the filter holds before exceeding error_rate
+            error_rate: Target false-positive probability at capacity
+        """
+        self.capacity = max(1, capacity)
+        self.error_rate = min(max(error_rate, 1e-9), 0.5)
+        self.num_bits = max(8, int(math.ceil(-self.capacity * math.log(self.error_rate) / (math.log(2) ** 2))))
+        self.num_hashes = max(1, int(round(self.num_bits / self.capacity * math.log(2))))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str) -> Iterable[int]:
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1, h2 = struct.unpack("<QQ", digest)
+        h2 |= 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, item: str) -> None:
+        changed = False
+        for position in self._positions(item):
+            mask = 1 << (position & 7)
+            if not self.bits[position >> 3] & mask:
+                self.bits[position >> 3] |= mask
+                changed = True
+        # Items already present (re-recorded IDs) must not inflate count and trigger early rebuilds
+        if changed:
+            self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def estimated_false_positive_rate(self) -> float:
+        """False-positive probability for the number of items added so far."""
+        return (1 - math.exp(-self.num_hashes * self.count / self.num_bits)) ** self.num_hashes
+
+    def to_bytes(self, **header: Any) -> bytes:
+        meta = dict(header, capacity=self.capacity, error_rate=self.error_rate, count=self.count)
+        encoded = json.dumps(meta).encode("utf-8")
+        return _SNAPSHOT_MAGIC + struct.pack("<I", len(encoded)) + encoded + bytes(self.bits)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "tuple[BloomFilter, Dict[str, Any]]":
+        """
+        Restore a filter written by to_bytes.
+
+        Returns:
+            (filter, header dict)
+
+        Raises:
+            ValueError: If data is not a valid snapshot
+        """
+        if not data.startswith(_SNAPSHOT_MAGIC):
+            raise ValueError("Not a Bloom filter snapshot")
+        offset = len(_SNAPSHOT_MAGIC)
+        (length,) = struct.unpack_from("<I", data, offset)
+        offset += 4
+        meta = json.loads(data[offset:offset + length].decode("utf-8"))
+        bloom = cls(meta["capacity"], meta["error_rate"])
+        bits = data[offset + length:]
+        if len(bits) != len(bloom.bits):
+            raise ValueError("Bloom filter snapshot is truncated")
+        bloom.bits = bytearray(bits)
+        bloom.count = meta["count"]
+        return bloom, meta
+
+
+class _AccountFilter:
+    def __init__(self, bloom: BloomFilter, last_id: int):
+        self.bloom = bloom
+        self.last_id = last_id
+        self.dirty = False
+        self.lookups = 0
+        self.definitely_new = 0
+        self.possible_hits = 0
+        self.false_positives = 0
+
+
+class ProcessedMessageFilter:
+    """Per-account Bloom filters of processed message IDs."""
+
+    def __init__(
+        self,
+        snapshot_dir: Optional[str] = None,
+        error_rate: float = 0.01,
+        min_capacity: int = 10000,
+        page_size: int = 10000
+    ):
+        """
+        Initialize the filters.
+
+        Args:
+            snapshot_dir: Directory for filter snapshots (None keeps filters in memory only)
+            error_rate: Target false-positive rate of each filter
+            min_capacity: Smallest capacity a filter is built with
+            page_size: processed_email_log rows read per query while building
+        """
+        self.snapshot_dir = snapshot_dir
+        self.error_rate = error_rate
+        self.min_capacity = max(1, min_capacity)
+        self.page_size = max(1, page_size)
+        self._filters: Dict[str, _AccountFilter] = {}
+        self._lock = threading.RLock()
+        self.builds = 0
+        self.snapshot_loads = 0
+
+    def sync(self, account_email: str, repository) -> None:
+        """
+        Load or build the account's filter and catch up with rows added since.
+
+        Called once per run, so a run sees every email processed before it
+        started, including by other instances sharing the database.
+
+        Args:
+            account_email: Email account
+            repository: DatabaseRepositoryInterface to read processed_email_log from
+        """
+        key = account_email.lower()
+        with self._lock:
+            state = self._filters.get(key)
+            if state is not None:
+                added = self._catch_up(account_email, state, repository)
+                if state.bloom.count <= state.bloom.capacity:
+                    state.dirty = state.dirty or added > 0
+                    return
+                # Outgrew its capacity: rebuild below with room to spare
+                self._filters.pop(key)
+                state = None
+
+        # Building can read many rows, so it happens outside the lock; the
+        # filter only becomes visible to lookups once it is complete
+        state = self._load_snapshot(key)
+        if state is not None:
+            self._catch_up(account_email, state, repository)
+        while state is None or state.bloom.count > state.bloom.capacity:
+            capacity = max(self.min_capacity, 2 * (state.bloom.count if state else 0))
+            logger.info(f"🌸 Building processed-message filter for {account_email} (capacity {capacity})")
+            state = _AccountFilter(BloomFilter(capacity, self.error_rate), last_id=0)
+            self._catch_up(account_email, state, repository)
+            self.builds += 1
+        state.dirty = True
+        with self._lock:
+            self._filters[key] = state
+        self.save_snapshots()
+
+    def _catch_up(self, account_email: str, state: _AccountFilter, repository) -> int:
+        added = 0
+        while True:
+            rows = repository.list_processed_message_ids(account_email, after_id=state.last_id, limit=self.page_size)
+            for row_id, message_id in rows:
+                state.bloom.add(normalize_message_id(message_id))
+                state.last_id = max(state.last_id, row_id)
+            added += len(rows)
+            if len(rows) < self.page_size:
+                return added
+
+    def is_ready(self, account_email: str) -> bool:
+        with self._lock:
+            return account_email.lower() in self._filters
+
+    def might_contain(self, account_email: str, message_id: str) -> bool:
+        """
+        False only if message_id is definitely not processed.
+
+        Accounts without a synced filter always answer True.
+        """
+        with self._lock:
+            state = self._filters.get(account_email.lower())
+            if state is None:
+                return True
+            state.lookups += 1
+            if normalize_message_id(message_id) in state.bloom:
+                state.possible_hits += 1
+                return True
+            state.definitely_new += 1
+            return False
+
+    def record_false_positives(self, account_email: str, count: int = 1) -> None:
+        """Possible hits that the database showed were not processed."""
+        with self._lock:
+            state = self._filters.get(account_email.lower())
+            if state is not None:
+                state.false_positives += count
+
+    def add(self, account_email: str, message_ids: Iterable[str]) -> None:
+        """Record newly processed message IDs."""
+        with self._lock:
+            state = self._filters.get(account_email.lower())
+            if state is None:
+                return
+            for message_id in message_ids:
+                if message_id and message_id.strip():
+                    state.bloom.add(normalize_message_id(message_id))
+                    state.dirty = True
+
+    def invalidate(self, account_email: str) -> None:
+        """Drop the account's filter and snapshot after records were deleted; the next sync rebuilds it."""
+        key = account_email.lower()
+        with self._lock:
+            self._filters.pop(key, None)
+            path = self._snapshot_path(key)
+            if path and os.path.exists(path):
+                try:
+                    os.remove(path)
+                except OSError as e:
+                    logger.warning(f"Failed to remove filter snapshot {path}: {e}")
+
+    # ==================== Snapshots ====================
+
+    def _snapshot_path(self, key: str) -> Optional[str]:
+        if not self.snapshot_dir:
+            return None
+        return os.path.join(self.snapshot_dir, hashlib.sha256(key.encode("utf-8")).hexdigest()[:24] + ".bloom")
+
+    def _load_snapshot(self, key: str) -> Optional[_AccountFilter]:
+        path = self._snapshot_path(key)
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with open(path, "rb") as f:
+                bloom, meta = BloomFilter.from_bytes(f.read())
+            if meta.get("account") != key:
+                raise ValueError("snapshot belongs to another account")
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable filter snapshot {path}: {e}")
+            return None
+        self.snapshot_loads += 1
+        logger.info(f"🌸 Loaded processed-message filter for {key} from snapshot ({bloom.count} entries)")
+        return _AccountFilter(bloom, last_id=meta.get("last_id", 0))
+
+    def save_snapshots(self) -> int:
+        """
+        Write snapshots of filters that changed since they were last saved.
+
+        Returns:
+            Number of snapshots written
+        """
+        if not self.snapshot_dir:
+            return 0
+        written = 0
+        with self._lock:
+            os.makedirs(self.snapshot_dir, exist_ok=True)
+            for key, state in self._filters.items():
+                if not state.dirty:
+                    continue
+                path = self._snapshot_path(key)
+                data = state.bloom.to_bytes(account=key, last_id=state.last_id, saved_at=datetime.utcnow().isoformat())
+                try:
+                    with open(path + ".tmp", "wb") as f:
+                        f.write(data)
+                    os.replace(path + ".tmp", path)
+                except OSError as e:
+                    logger.error(f"❌ Failed to write filter snapshot for {key}: {e}")
+                    continue
+                state.dirty = False
+                written += 1
+        if written:
+            logger.info(f"🌸 Saved {written} processed-message filter snapshots")
+        return written
+
+    # ==================== Metrics ====================
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Lookup counts and false-positive rates, overall and per account.
+
+        observed_false_positive_rate is the share of new emails the filter
+        could not rule out (they cost a database lookup anyway).
+        """
+        with self._lock:
+            accounts = {}
+            totals = {'lookups': 0, 'definitely_new': 0, 'possible_hits': 0, 'false_positives': 0}
+            for key, state in self._filters.items():
+                counts = {
+                    'lookups': state.lookups,
+                    'definitely_new': state.definitely_new,
+                    'possible_hits': state.possible_hits,
+                    'false_positives': state.false_positives,
+                }
+                for name, value in counts.items():
+                    totals[name] += value
+                accounts[key] = {
+                    **counts,
+                    'entries': state.bloom.count,
+                    'capacity': state.bloom.capacity,
+                    'size_bytes': len(state.bloom.bits),
+                    'observed_false_positive_rate': _rate(state.false_positives, state.definitely_new),
+                    'estimated_false_positive_rate': round(state.bloom.estimated_false_positive_rate(), 6),
+                }
+            return {
+                **totals,
+                'observed_false_positive_rate': _rate(totals['false_positives'], totals['definitely_new']),
+                'target_false_positive_rate': self.error_rate,
+                'builds': self.builds,
+                'snapshot_loads': self.snapshot_loads,
+                'accounts': accounts,
+            }
+
+
+def _rate(false_positives: int, definitely_new: int) -> float:
+    new_emails = false_positives + definitely_new
+    return round(false_positives / new_emails, 6) if new_emails else 0.0
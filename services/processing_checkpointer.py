@@ -0,0 +1,145 @@
+"""
+Incremental checkpoints of per-message outcomes during an account run.
+
+Emails that finish the persist stage are marked as processed in small
+batches while the run is still going, instead of all at once at the end.
+If the process dies mid-run, the next run's pre-filter drops everything
+already checkpointed, so those emails are not classified (and paid for)
+again.
+
+The pre-filter's dedup checks are resolved ahead of it: lookup() wraps the
+pipeline source and checks each batch of fetched emails with one set-based
+query (filter_new_emails), so is_processed rarely touches the database.
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class ProcessingCheckpointer:
+    """Batches dedup marks for one account run and flushes them by size or age."""
+
+    def __init__(
+        self,
+        deduplication_client,
+        batch_size: int = 20,
+        flush_interval: float = 5.0,
+        on_flush: Optional[Callable[[int], None]] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Initialize the checkpointer.
+
+        Args:
+            deduplication_client: EmailDeduplicationClientInterface for the account
+            batch_size: Pending outcomes that trigger a flush
+            flush_interval: Seconds after which pending outcomes are flushed regardless of count
+            on_flush: Optional callback with the number of outcomes persisted by each flush
+            clock: Monotonic clock in seconds (injectable for tests)
+        """
+        self.deduplication_client = deduplication_client
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.on_flush = on_flush
+        self._clock = clock
+        # The dedup client's session is not thread-safe; pre-filter lookups share this lock
+        self.lock = threading.RLock()
+        self._pending: List[str] = []
+        # Dedup status of fetched emails not yet seen by the pre-filter, by Message-ID
+        self._resolved: Dict[str, bool] = {}
+        self._last_flush = clock()
+        self.checkpointed = 0
+        self.flushes = 0
+        self.errors = 0
+
+    def lookup(self, emails: Iterable[Any], batch_size: int = 50) -> Iterator[Any]:
+        """
+        Pass emails through unchanged, resolving their dedup status one batch at a time.
+
+        Args:
+            emails: Fetched email messages (anything with .get('Message-ID'))
+            batch_size: Emails checked per filter_new_emails query
+
+        Yields:
+            The same emails, each after its batch was checked
+        """
+        batch: List[Any] = []
+        for email in emails:
+            batch.append(email)
+            if len(batch) >= batch_size:
+                self._resolve(batch)
+                yield from batch
+                batch = []
+        if batch:
+            self._resolve(batch)
+            yield from batch
+
+    def is_processed(self, message_id: str) -> bool:
+        """Thread-safe dedup lookup for the pre-filter stage."""
+        with self.lock:
+            resolved = self._resolved.pop(message_id.strip(), None)
+            if resolved is not None:
+                return resolved
+            return self.deduplication_client.is_email_processed(message_id)
+
+    def _resolve(self, batch: List[Any]) -> None:
+        with self.lock:
+            try:
+                new_emails = {id(email) for email in self.deduplication_client.filter_new_emails(batch)}
+            except Exception as e:
+                # is_processed falls back to one lookup per email
+                logger.warning(f"⚠️ Batch dedup lookup of {len(batch)} emails failed: {e}")
+                return
+            for email in batch:
+                message_id = str(email.get('Message-ID') or '').strip()
+                if message_id:
+                    self._resolved[message_id] = id(email) not in new_emails
+
+    def record(self, message_id: str) -> None:
+        """Queue a finished email and flush if the batch is full or old enough."""
+        with self.lock:
+            self._pending.append(message_id)
+            if len(self._pending) >= self.batch_size or self._clock() - self._last_flush >= self.flush_interval:
+                self.flush()
+
+    def flush(self) -> int:
+        """
+        Persist all pending outcomes.
+
+        Returns:
+            Number of outcomes marked as processed
+        """
+        with self.lock:
+            self._last_flush = self._clock()
+            if not self._pending:
+                return 0
+            batch, self._pending = self._pending, []
+            try:
+                successful, errors = self.deduplication_client.bulk_mark_as_processed(batch)
+            except Exception as e:
+                logger.error(f"❌ Checkpoint of {len(batch)} emails failed: {e}")
+                self.errors += len(batch)
+                return 0
+            self.checkpointed += successful
+            self.errors += errors
+            self.flushes += 1
+        logger.debug(f"💾 Checkpointed {successful} emails ({errors} errors)")
+        if self.on_flush and successful:
+            try:
+                self.on_flush(successful)
+            except Exception as e:
+                logger.warning(f"Failed to record checkpoint progress: {e}")
+        return successful
+
+    def get_stats(self) -> Dict[str, int]:
+        with self.lock:
+            return {
+                'checkpointed': self.checkpointed,
+                'pending': len(self._pending),
+                'flushes': self.flushes,
+                'errors': self.errors,
+            }
@@ -31,10 +31,15 @@ Example usage in Cat-Emails project:
     current_status = status_manager.get_current_status()
     recent_runs = status_manager.get_recent_runs(limit=10)
     stats = status_manager.get_statistics()
+
+Several accounts can be processed concurrently (up to max_concurrent_sessions).
+Calls without an email_address apply to the session started by the calling
+thread, or to the only active session when there is just one.
 """
 import logging
 from utils.logger import get_logger
 import threading
+import zlib
 from datetime import datetime, timezone
 from enum import Enum, auto
 from dataclasses import dataclass, asdict
@@ -71,6 +76,8 @@ class AccountStatus:
     emails_deleted: int = 0
     emails_categorized: int = 0
     emails_skipped: int = 0
+    llm_budget: Optional[Dict[str, Any]] = None
+    run_budget: Optional[Dict[str, Any]] = None
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary representation"""
@@ -92,23 +99,74 @@ class ProcessingStatusManager:
     This class provides centralized status tracking for email processing operations,
     ensuring thread-safe access to processing state information and maintaining
     a history of recent processing runs.
+
+    Sessions are keyed by account, so different accounts can be processed
+    concurrently. Per-session updates are guarded by sharded locks; the
+    registry lock is only taken to start or complete a session.
     """
+
+    DEFAULT_MAX_CONCURRENT_SESSIONS = 4
+    LOCK_SHARDS = 16
     
-    def __init__(self, max_history: int = 50):
+    def __init__(self, max_history: int = 50, max_concurrent_sessions: int = DEFAULT_MAX_CONCURRENT_SESSIONS):
         """
         Initialize the processing status manager.
 
         Args:
             max_history: Maximum number of recent runs to keep in history
+            max_concurrent_sessions: Maximum number of accounts processed at the same time
         """
         self._lock = threading.RLock()
-        self._current_status: Optional[AccountStatus] = None
+        self._shard_locks = [threading.Lock() for _ in range(self.LOCK_SHARDS)]
+        self._sessions: Dict[str, AccountStatus] = {}
+        self._trackers: Dict[str, StateTransitionTracker] = {}
+        self._thread_binding = threading.local()
         self._recent_runs: deque = deque(maxlen=max_history)
         self._max_history = max_history
-        self._transition_tracker = StateTransitionTracker()
+        self.max_concurrent_sessions = max(1, max_concurrent_sessions)
         self.logger = get_logger(__name__)
 
-        self.logger.info(f"ProcessingStatusManager initialized with max_history={max_history}")
+        self.logger.info(
+            f"ProcessingStatusManager initialized with max_history={max_history}, "
+            f"max_concurrent_sessions={self.max_concurrent_sessions}"
+        )
+
+    @staticmethod
+    def _key(email_address: str) -> str:
+        return email_address.lower()
+
+    def _shard_lock(self, key: str) -> threading.Lock:
+        return self._shard_locks[zlib.crc32(key.encode("utf-8")) % self.LOCK_SHARDS]
+
+    def _resolve_key(self, email_address: Optional[str] = None) -> Optional[str]:
+        """
+        Find the session a call applies to.
+
+        Explicit account first, then the session started by this thread,
+        then the only active session if there is exactly one.
+        """
+        sessions = self._sessions
+        if email_address:
+            key = self._key(email_address)
+            return key if key in sessions else None
+        bound = getattr(self._thread_binding, "key", None)
+        if bound is not None and bound in sessions:
+            return bound
+        if len(sessions) == 1:
+            return next(iter(sessions), None)
+        return None
+
+    def _most_recent_key(self) -> Optional[str]:
+        sessions = list(self._sessions.items())
+        if not sessions:
+            return None
+        return max(sessions, key=lambda item: item[1].last_updated or datetime.min.replace(tzinfo=timezone.utc))[0]
+
+    @property
+    def transition_tracker(self) -> Optional[StateTransitionTracker]:
+        """State transition tracker of the session the calling thread works on, if any."""
+        key = self._resolve_key()
+        return self._trackers.get(key) if key else None
     
     def start_processing(self, email_address: str) -> None:
         """
@@ -118,104 +176,132 @@ class ProcessingStatusManager:
             email_address: The email address being processed
 
         Raises:
-            ValueError: If processing is already active for another account
+            ValueError: If the account is already being processed or the
+                        concurrent session limit has been reached
         """
+        key = self._key(email_address)
         with self._lock:
-            if self._current_status is not None:
+            existing = self._sessions.get(key)
+            if existing is not None:
                 raise ValueError(
-                    f"Processing already active for {self._current_status.email_address}. "
-                    f"Current state: {self._current_status.state.name}"
+                    f"Processing already active for {existing.email_address}. "
+                    f"Current state: {existing.state.name}"
+                )
+            if len(self._sessions) >= self.max_concurrent_sessions:
+                active = ", ".join(status.email_address for status in self._sessions.values())
+                raise ValueError(
+                    f"Maximum concurrent processing sessions ({self.max_concurrent_sessions}) reached. "
+                    f"Processing already active for: {active}"
                 )
 
             now = datetime.now(timezone.utc)
-            self._current_status = AccountStatus(
-                email_address=email_address,
-                state=ProcessingState.IDLE,
-                current_step="Initializing processing",
-                start_time=now,
-                last_updated=now
-            )
-
-            # Clear and initialize transition tracker
-            self._transition_tracker.clear()
-            self._transition_tracker.record_transition("IDLE", "Initializing processing", now)
+            tracker = StateTransitionTracker()
+            tracker.record_transition("IDLE", "Initializing processing", now)
+            with self._shard_lock(key):
+                self._trackers[key] = tracker
+                self._sessions[key] = AccountStatus(
+                    email_address=email_address,
+                    state=ProcessingState.IDLE,
+                    current_step="Initializing processing",
+                    start_time=now,
+                    last_updated=now
+                )
+            self._thread_binding.key = key
 
-            self.logger.info(f"Started processing for account: {email_address}")
+            self.logger.info(f"Started processing for account: {email_address} ({len(self._sessions)} active)")
     
     def update_status(
         self,
         state: ProcessingState,
         step: str,
         progress: Optional[Dict[str, Any]] = None,
-        error_message: Optional[str] = None
+        error_message: Optional[str] = None,
+        email_address: Optional[str] = None
     ) -> None:
         """
-        Update the current processing status.
+        Update the status of a processing session.
 
         Args:
             state: New processing state
             step: Description of the current processing step
             progress: Optional progress information (e.g., {'current': 5, 'total': 10})
             error_message: Optional error message if state is ERROR
+            email_address: Account to update (defaults to the calling thread's session)
 
         Raises:
-            RuntimeError: If no processing session is active
+            RuntimeError: If no matching processing session is active
         """
-        with self._lock:
-            if not self._current_status:
+        key = self._resolve_key(email_address)
+        if key is None:
+            raise RuntimeError("No active processing session to update")
+
+        with self._shard_lock(key):
+            current_status = self._sessions.get(key)
+            if current_status is None:
                 raise RuntimeError("No active processing session to update")
 
             now = datetime.now(timezone.utc)
 
-            self._current_status.state = state
-            self._current_status.current_step = step
-            self._current_status.progress = progress
-            self._current_status.error_message = error_message
-            self._current_status.last_updated = now
+            current_status.state = state
+            current_status.current_step = step
+            current_status.progress = progress
+            current_status.error_message = error_message
+            current_status.last_updated = now
 
             # Record state transition - handle both ProcessingState enum and string
             state_name = state.name if isinstance(state, ProcessingState) else str(state)
-            self._transition_tracker.record_transition(state_name, step, now)
+            self._trackers[key].record_transition(state_name, step, now)
 
-            # Log status updates
-            progress_str = ""
-            if progress and 'current' in progress and 'total' in progress:
-                progress_str = f" ({progress['current']}/{progress['total']})"
+        # Log status updates
+        progress_str = ""
+        if progress and 'current' in progress and 'total' in progress:
+            progress_str = f" ({progress['current']}/{progress['total']})"
 
-            if state == ProcessingState.ERROR:
-                self.logger.error(
-                    f"Processing error for {self._current_status.email_address}: {step}{progress_str} - {error_message}"
-                )
-            else:
-                self.logger.info(
-                    f"Processing update for {self._current_status.email_address}: {state_name} - {step}{progress_str}"
-                )
+        if state == ProcessingState.ERROR:
+            self.logger.error(
+                f"Processing error for {current_status.email_address}: {step}{progress_str} - {error_message}"
+            )
+        else:
+            self.logger.info(
+                f"Processing update for {current_status.email_address}: {state_name} - {step}{progress_str}"
+            )
     
-    def complete_processing(self) -> None:
+    def complete_processing(self, email_address: Optional[str] = None) -> None:
         """
-        Complete the current processing session and archive it to history.
+        Complete a processing session and archive it to history.
+
+        Args:
+            email_address: Account to complete (defaults to the calling thread's session)
 
-        The current status is moved to the recent runs history and reset.
+        The session is moved to the recent runs history and removed.
         """
         with self._lock:
-            if not self._current_status:
+            key = self._resolve_key(email_address)
+            if key is None:
                 self.logger.warning("Attempted to complete processing, but no session is active")
                 return
 
+            with self._shard_lock(key):
+                current_status = self._sessions.pop(key)
+                tracker = self._trackers.pop(key)
+
+            if getattr(self._thread_binding, "key", None) == key:
+                self._thread_binding.key = None
+
             # Calculate duration
             duration_seconds = None
-            if self._current_status.start_time and self._current_status.last_updated:
-                duration = self._current_status.last_updated - self._current_status.start_time
+            if current_status.start_time and current_status.last_updated:
+                duration = current_status.last_updated - current_status.start_time
                 duration_seconds = duration.total_seconds()
 
             # Mark as completed if not already in error state
-            if self._current_status.state != ProcessingState.ERROR:
-                self._current_status.state = ProcessingState.COMPLETED
-                self._current_status.current_step = "Processing completed"
-                self._current_status.last_updated = datetime.now(timezone.utc)
+            if current_status.state != ProcessingState.ERROR:
+                current_status.state = ProcessingState.COMPLETED
+                current_status.current_step = "Processing completed"
+                current_status.last_updated = datetime.now(timezone.utc)
 
             # Finalize transitions with duration calculations
-            transitions = self._transition_tracker.finalize()
+            transitions = tracker.finalize()
 
             # Generate Gantt chart text if we have transitions
             gantt_chart_text = None
@@ -223,25 +309,27 @@ class ProcessingStatusManager:
                 generator = GanttChartGenerator()
                 gantt_chart_text = generator.generate(
                     transitions=transitions,
-                    title=self._current_status.email_address,
+                    title=current_status.email_address,
                     include_zero_duration=False
                 )
 
             # Create archived run record
             archived_run = {
-                'email_address': self._current_status.email_address,
-                'start_time': self._current_status.start_time.isoformat() if self._current_status.start_time else None,
-                'end_time': self._current_status.last_updated.isoformat() if self._current_status.last_updated else None,
+                'email_address': current_status.email_address,
+                'start_time': current_status.start_time.isoformat() if current_status.start_time else None,
+                'end_time': current_status.last_updated.isoformat() if current_status.last_updated else None,
                 'duration_seconds': duration_seconds,
-                'final_state': self._current_status.state.name,
-                'final_step': self._current_status.current_step,
-                'error_message': self._current_status.error_message,
-                'final_progress': self._current_status.progress,
-                'emails_reviewed': self._current_status.emails_reviewed,
-                'emails_tagged': self._current_status.emails_tagged,
-                'emails_deleted': self._current_status.emails_deleted,
-                'emails_categorized': self._current_status.emails_categorized,
-                'emails_skipped': self._current_status.emails_skipped,
+                'final_state': current_status.state.name,
+                'final_step': current_status.current_step,
+                'error_message': current_status.error_message,
+                'final_progress': current_status.progress,
+                'emails_reviewed': current_status.emails_reviewed,
+                'emails_tagged': current_status.emails_tagged,
+                'emails_deleted': current_status.emails_deleted,
+                'emails_categorized': current_status.emails_categorized,
+                'emails_skipped': current_status.emails_skipped,
+                'llm_budget': current_status.llm_budget,
+                'run_budget': current_status.run_budget,
                 'state_transitions': [t.to_dict() for t in transitions],
                 'gantt_chart_text': gantt_chart_text
             }
@@ -250,118 +338,183 @@ class ProcessingStatusManager:
             self._recent_runs.append(archived_run)
 
             self.logger.info(
-                f"Completed processing for {self._current_status.email_address} "
+                f"Completed processing for {current_status.email_address} "
                 f"in {duration_seconds:.2f} seconds" if duration_seconds else "Completed processing"
             )
 
-            # Clear transition tracker for next run
-            self._transition_tracker.clear()
-
-            # Reset current status
-            self._current_status = None
-
-    def increment_reviewed(self, count: int = 1) -> None:
+    def _increment(self, field_name: str, count: int, email_address: Optional[str]) -> None:
+        key = self._resolve_key(email_address)
+        if key is None:
+            # Silently ignore if no active session
+            return
+        with self._shard_lock(key):
+            current_status = self._sessions.get(key)
+            if current_status is not None:
+                setattr(current_status, field_name, getattr(current_status, field_name) + count)
+
+    def increment_reviewed(self, count: int = 1, email_address: Optional[str] = None) -> None:
         """
         Increment the count of emails reviewed during processing.
 
         Args:
             count: Number of emails to add to the reviewed count (default: 1)
+            email_address: Account to update (defaults to the calling thread's session)
 
         Note:
             This is a no-op if no processing session is active.
-            Thread-safe operation using internal lock.
+            Thread-safe operation using the session's lock shard.
         """
-        with self._lock:
-            if not self._current_status:
-                # Silently ignore if no active session
-                return
+        self._increment('emails_reviewed', count, email_address)
 
-            self._current_status.emails_reviewed += count
-
-    def increment_tagged(self, count: int = 1) -> None:
+    def increment_tagged(self, count: int = 1, email_address: Optional[str] = None) -> None:
         """
         Increment the count of emails tagged during processing.
 
         Args:
             count: Number of emails to add to the tagged count (default: 1)
+            email_address: Account to update (defaults to the calling thread's session)
 
         Note:
             This is a no-op if no processing session is active.
-            Thread-safe operation using internal lock.
+            Thread-safe operation using the session's lock shard.
         """
-        with self._lock:
-            if not self._current_status:
-                # Silently ignore if no active session
-                return
-
-            self._current_status.emails_tagged += count
+        self._increment('emails_tagged', count, email_address)
 
-    def increment_deleted(self, count: int = 1) -> None:
+    def increment_deleted(self, count: int = 1, email_address: Optional[str] = None) -> None:
         """
         Increment the count of emails deleted during processing.
 
         Args:
             count: Number of emails to add to the deleted count (default: 1)
+            email_address: Account to update (defaults to the calling thread's session)
 
         Note:
             This is a no-op if no processing session is active.
-            Thread-safe operation using internal lock.
+            Thread-safe operation using the session's lock shard.
         """
-        with self._lock:
-            if not self._current_status:
-                # Silently ignore if no active session
-                return
-
-            self._current_status.emails_deleted += count
+        self._increment('emails_deleted', count, email_address)
 
-    def increment_categorized(self, count: int = 1) -> None:
+    def increment_categorized(self, count: int = 1, email_address: Optional[str] = None) -> None:
         """
         Increment the count of emails categorized during processing.
 
         Args:
             count: Number of emails to add to the categorized count (default: 1)
+            email_address: Account to update (defaults to the calling thread's session)
 
         Note:
             This is a no-op if no processing session is active.
-            Thread-safe operation using internal lock.
+            Thread-safe operation using the session's lock shard.
         """
-        with self._lock:
-            if not self._current_status:
-                # Silently ignore if no active session
-                return
-
-            self._current_status.emails_categorized += count
+        self._increment('emails_categorized', count, email_address)
 
-    def increment_skipped(self, count: int = 1) -> None:
+    def increment_skipped(self, count: int = 1, email_address: Optional[str] = None) -> None:
         """
         Increment the count of emails skipped during processing.
 
         Args:
             count: Number of emails to add to the skipped count (default: 1)
+            email_address: Account to update (defaults to the calling thread's session)
 
         Note:
             This is a no-op if no processing session is active.
-            Thread-safe operation using internal lock.
+            Thread-safe operation using the session's lock shard.
         """
-        with self._lock:
-            if not self._current_status:
-                # Silently ignore if no active session
-                return
+        self._increment('emails_skipped', count, email_address)
 
-            self._current_status.emails_skipped += count
+    def update_llm_budget(self, llm_budget: Dict[str, Any], email_address: Optional[str] = None) -> None:
+        """
+        Record an account's LLM budget consumption.
 
-    def get_current_status(self) -> Optional[Dict[str, Any]]:
+        Args:
+            llm_budget: Budget usage as returned by LLMBudgetTracker.get_usage
+            email_address: Account to update (defaults to the calling thread's session)
+
+        Note:
+            This is a no-op if no processing session is active.
+            Thread-safe operation using the session's lock shard.
         """
-        Get the current processing status.
-        
+        key = self._resolve_key(email_address)
+        if key is None:
+            # Silently ignore if no active session
+            return
+        with self._shard_lock(key):
+            current_status = self._sessions.get(key)
+            if current_status is not None:
+                current_status.llm_budget = llm_budget
+
+    def update_run_budget(self, run_budget: Dict[str, Any], email_address: Optional[str] = None) -> None:
+        """
+        Record an account's time/message budget usage for the current run.
+
+        Args:
+            run_budget: Budget usage as returned by AccountRunBudget.to_dict
+            email_address: Account to update (defaults to the calling thread's session)
+
+        Note:
+            This is a no-op if no processing session is active.
+        """
+        key = self._resolve_key(email_address)
+        if key is None:
+            return
+        with self._shard_lock(key):
+            current_status = self._sessions.get(key)
+            if current_status is not None:
+                current_status.run_budget = run_budget
+
+    def _session_dict(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._shard_lock(key):
+            current_status = self._sessions.get(key)
+            return current_status.to_dict() if current_status else None
+
+    def get_current_status(self, email_address: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Get the status of a processing session.
+
+        Args:
+            email_address: Account to report (defaults to the calling thread's
+                           session, else the most recently updated session)
+
         Returns:
-            Dictionary representation of current status, or None if no processing is active
+            Dictionary representation of the session status, or None if no processing is active
         """
-        with self._lock:
-            if not self._current_status:
-                return None
-            
-            return self._current_status.to_dict()
+        key = self._resolve_key(email_address)
+        if key is None and email_address is None:
+            key = self._most_recent_key()
+        return self._session_dict(key) if key else None
+
+    def get_active_sessions(self) -> List[Dict[str, Any]]:
+        """
+        Get the status of every active session, oldest first.
+
+        Returns:
+            List of session status dictionaries
+        """
+        sessions = [self._session_dict(key) for key in list(self._sessions.keys())]
+        sessions = [session for session in sessions if session]
+        sessions.sort(key=lambda session: session.get('start_time') or '')
+        return sessions
+
+    def get_aggregate_status(self) -> Dict[str, Any]:
+        """
+        Get an aggregated view over all active sessions.
+
+        Returns:
+            Dictionary with active count, concurrency limit, per-session
+            statuses and summed email counters
+        """
+        sessions = self.get_active_sessions()
+        totals = {
+            field: sum(session.get(field, 0) for session in sessions)
+            for field in ('emails_reviewed', 'emails_tagged', 'emails_deleted', 'emails_categorized', 'emails_skipped')
+        }
+        return {
+            'active_count': len(sessions),
+            'max_concurrent_sessions': self.max_concurrent_sessions,
+            'accounts': [session['email_address'] for session in sessions],
+            'sessions': sessions,
+            'totals': totals,
+        }
     
     def get_recent_runs(self, limit: int = 10) -> List[Dict[str, Any]]:
         """
@@ -386,25 +539,42 @@ class ProcessingStatusManager:
     
     def is_processing(self) -> bool:
         """
-        Check if processing is currently active.
+        Check if any processing is currently active.
         
         Returns:
-            True if processing is active, False otherwise
+            True if at least one session is active, False otherwise
         """
-        with self._lock:
-            return self._current_status is not None
+        return bool(self._sessions)
+
+    def has_capacity(self) -> bool:
+        """
+        Check whether another session can be started without exceeding the concurrency limit.
+
+        Returns:
+            True if fewer than max_concurrent_sessions sessions are active
+        """
+        return len(self._sessions) < self.max_concurrent_sessions
+
+    def get_active_accounts(self) -> List[str]:
+        """
+        Get the email addresses currently being processed.
+
+        Returns:
+            List of email addresses with an active session
+        """
+        return [status.email_address for status in list(self._sessions.values())]
     
     def get_processing_email(self) -> Optional[str]:
         """
         Get the email address currently being processed.
 
         Returns:
-            Email address if processing is active, None otherwise
+            Email address of the calling thread's session (else the most
+            recently updated session) if processing is active, None otherwise
         """
-        with self._lock:
-            if self._current_status:
-                return self._current_status.email_address
-            return None
+        key = self._resolve_key() or self._most_recent_key()
+        current_status = self._sessions.get(key) if key else None
+        return current_status.email_address if current_status else None
 
     def is_processing_account(self, email_address: str) -> bool:
         """
@@ -416,10 +586,7 @@ class ProcessingStatusManager:
         Returns:
             True if the specified account is currently being processed, False otherwise
         """
-        with self._lock:
-            if self._current_status:
-                return self._current_status.email_address.lower() == email_address.lower()
-            return False
+        return self._key(email_address) in self._sessions
     
     def clear_history(self) -> None:
         """Clear the processing history."""
@@ -463,12 +630,15 @@ class ProcessingStatusManager:
     
     def __str__(self) -> str:
         """String representation of the processing status manager."""
-        with self._lock:
-            if self._current_status:
-                return f"ProcessingStatusManager(active: {self._current_status.email_address}, state: {self._current_status.state.name})"
-            else:
-                return f"ProcessingStatusManager(idle, history: {len(self._recent_runs)} runs)"
+        accounts = self.get_active_accounts()
+        if len(accounts) == 1:
+            current_status = self._sessions.get(self._key(accounts[0]))
+            state = current_status.state.name if current_status else "UNKNOWN"
+            return f"ProcessingStatusManager(active: {accounts[0]}, state: {state})"
+        if accounts:
+            return f"ProcessingStatusManager(active: {', '.join(accounts)})"
+        return f"ProcessingStatusManager(idle, history: {len(self._recent_runs)} runs)"
     
     def __repr__(self) -> str:
         """Detailed representation of the processing status manager."""
-        return self.__str__()
\ No newline at end of file
+        return self.__str__()
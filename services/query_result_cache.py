@@ -0,0 +1,223 @@
+"""
+Read-through cache of dashboard query results.
+
+Every dashboard load re-ran the same aggregate queries, although their
+results only change when a processing run completes or category tallies
+are flushed. DatabaseService and DashboardService now read their
+aggregates through a QueryResultCache, keyed by (query, account, period):
+
+    cache.get_or_compute('summary_by_period', None, (start, end), compute)
+
+Entries expire after ttl seconds, and the processing path drops them
+explicitly by calling notify_data_changed, which invalidates every cache in
+the process. The TTL bounds staleness for readers in another process (the
+standalone web dashboard) that do not see those notifications.
+
+Concurrent misses for the same key are coalesced: the first caller
+computes the result and the others wait for it, so a burst of dashboard
+loads runs each query once. Results are copied in and out of the cache so
+callers may modify what they receive.
+"""
+import copy
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Reasons passed to notify_data_changed
+RUN_COMPLETED = 'run_completed'
+TALLIES_FLUSHED = 'tallies_flushed'
+
+DEFAULT_TTL_SECONDS = 60.0
+DEFAULT_MAX_ENTRIES = 512
+
+CacheKey = Tuple[str, Optional[str], Hashable]
+
+# Every cache in the process, so a data change reaches all of them
+_caches: "weakref.WeakSet[QueryResultCache]" = weakref.WeakSet()
+_caches_lock = threading.Lock()
+
+
+class _Computation:
+    """A result being computed for one key, shared with concurrent callers."""
+
+    def __init__(self, generation: int):
+        self.generation = generation
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class QueryResultCache:
+    """TTL cache of query results with explicit invalidation and coalesced misses."""
+
+    def __init__(
+        self,
+        ttl: float = DEFAULT_TTL_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl: Seconds a result is served before it is computed again (0 disables caching)
+            max_entries: Results kept; the least recently used are evicted beyond this
+            clock: Monotonic clock in seconds (injectable for tests)
+        """
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[CacheKey, Tuple[float, Any]]" = OrderedDict()
+        self._computing: Dict[CacheKey, _Computation] = {}
+        # Bumped by every invalidation; results computed across one are not stored
+        self._generation = 0
+        self._stats = {'hits': 0, 'misses': 0, 'coalesced': 0, 'computations': 0,
+                       'errors': 0, 'invalidations': 0, 'evictions': 0}
+        with _caches_lock:
+            _caches.add(self)
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def get_or_compute(
+        self,
+        query: str,
+        account: Optional[str],
+        period: Hashable,
+        compute: Callable[[], Any]
+    ) -> Any:
+        """
+        The cached result for (query, account, period), computing it on a miss.
+
+        Args:
+            query: Name of the query
+            account: Account the result belongs to, or None for all accounts
+            period: The query's remaining parameters (any hashable value)
+            compute: Computes the result; called by one caller per miss
+
+        Returns:
+            A copy of the result
+        """
+        if not self.enabled:
+            return compute()
+
+        key = (query, account, period)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._clock() < entry[0]:
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                return copy.deepcopy(entry[1])
+            computation = self._computing.get(key)
+            if computation is not None:
+                self._stats['coalesced'] += 1
+                owner = False
+            else:
+                self._stats['misses'] += 1
+                computation = self._computing[key] = _Computation(self._generation)
+                owner = True
+
+        if not owner:
+            computation.done.wait()
+            if computation.error is not None:
+                raise computation.error
+            return copy.deepcopy(computation.result)
+
+        try:
+            result = compute()
+        except BaseException as e:
+            with self._lock:
+                self._stats['errors'] += 1
+                if self._computing.get(key) is computation:
+                    del self._computing[key]
+            computation.error = e
+            computation.done.set()
+            raise
+
+        stored = copy.deepcopy(result)
+        with self._lock:
+            self._stats['computations'] += 1
+            if self._computing.get(key) is computation:
+                del self._computing[key]
+            if computation.generation == self._generation:
+                self._entries[key] = (self._clock() + self.ttl, stored)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self._stats['evictions'] += 1
+        computation.result = stored
+        computation.done.set()
+        return result
+
+    def invalidate(self, account: Optional[str] = None) -> int:
+        """
+        Drop cached results after the underlying data changed.
+
+        Args:
+            account: Drop the results of this account and those across all
+                     accounts; None drops every result
+
+        Returns:
+            Number of results dropped
+        """
+        with self._lock:
+            self._generation += 1
+            self._stats['invalidations'] += 1
+            # Later callers must not wait for results computed from the old data
+            for key in [key for key in self._computing if account is None or key[1] in (None, account)]:
+                del self._computing[key]
+            if account is None:
+                dropped = len(self._entries)
+                self._entries.clear()
+                return dropped
+            keys = [key for key in self._entries if key[1] is None or key[1] == account]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit, miss and invalidation counts, and the hit rate of lookups so far."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+        lookups = stats['hits'] + stats['coalesced'] + stats['misses']
+        stats['hit_rate'] = (stats['hits'] + stats['coalesced']) / lookups if lookups else 0.0
+        stats['ttl'] = self.ttl
+        return stats
+
+
+def notify_data_changed(reason: str, account: Optional[str] = None) -> None:
+    """
+    Invalidate the query results of every cache in the process.
+
+    Called by the processing path when a run completes or tallies are flushed.
+
+    Args:
+        reason: Why the data changed (RUN_COMPLETED or TALLIES_FLUSHED)
+        account: Account whose data changed, or None if unknown
+    """
+    with _caches_lock:
+        caches = list(_caches)
+    dropped = sum(cache.invalidate(account) for cache in caches)
+    logger.debug(f"Invalidated {dropped} cached query results ({reason}, account: {account or 'all'})")
+
+
+def load_ttl_from_env() -> float:
+    """TTL of dashboard query results from QUERY_CACHE_TTL_SECONDS (0 disables caching)."""
+    raw = os.getenv("QUERY_CACHE_TTL_SECONDS")
+    if raw is None or not raw.strip():
+        return DEFAULT_TTL_SECONDS
+    try:
+        return max(0.0, float(raw))
+    except ValueError:
+        logger.warning(f"Ignoring invalid QUERY_CACHE_TTL_SECONDS value: {raw!r}")
+        return DEFAULT_TTL_SECONDS
@@ -0,0 +1,128 @@
+"""
+Recording LLM Service - decorator that captures LLM interactions to a local file
+
+Wraps any LLMServiceInterface implementation, forwards every call to it and
+stores (request fingerprint -> response, observed latency) in an
+LLMRecordingStore so the run can later be replayed offline with
+ReplayLLMService.
+"""
+import time
+from typing import Optional, Any, Type, TypeVar
+
+from pydantic import BaseModel
+
+from services.llm_recording_store import LLMRecordingStore, fingerprint_request
+from services.llm_service_factory_interface import LLMServiceFactoryInterface
+from services.llm_service_interface import LLMServiceInterface
+from utils.logger import get_logger
+
+T = TypeVar('T', bound=BaseModel)
+
+logger = get_logger(__name__)
+
+
+class RecordingLLMService(LLMServiceInterface):
+    """LLM service decorator that records every successful call."""
+
+    def __init__(self, inner: LLMServiceInterface, store: LLMRecordingStore):
+        """
+        Initialize the recording decorator.
+
+        Args:
+            inner: The real LLM service to forward calls to
+            store: Store the interactions are written to
+        """
+        self.inner = inner
+        self.store = store
+
+    def call(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.0,
+        max_tokens: Optional[int] = None,
+        **kwargs: Any
+    ) -> str:
+        started = time.monotonic()
+        response = self.inner.call(
+            prompt,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            **kwargs
+        )
+        latency = time.monotonic() - started
+
+        fingerprint = fingerprint_request(
+            "call", self.get_model_name(), prompt, system_prompt, temperature,
+            max_tokens=max_tokens, **kwargs
+        )
+        self._save(fingerprint, "call", None, response, latency)
+        return response
+
+    def call_structured(
+        self,
+        prompt: str,
+        response_model: Type[T],
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.0,
+        **kwargs: Any
+    ) -> T:
+        started = time.monotonic()
+        response = self.inner.call_structured(
+            prompt,
+            response_model,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            **kwargs
+        )
+        latency = time.monotonic() - started
+
+        fingerprint = fingerprint_request(
+            "call_structured", self.get_model_name(), prompt, system_prompt, temperature,
+            response_model=response_model.__name__, **kwargs
+        )
+        self._save(fingerprint, "call_structured", response_model.__name__, response.model_dump(), latency)
+        return response
+
+    def _save(self, fingerprint: str, method: str, response_model: Optional[str], response: Any, latency: float) -> None:
+        try:
+            self.store.append({
+                "fingerprint": fingerprint,
+                "method": method,
+                "model": self.get_model_name(),
+                "provider": self.inner.get_provider_name(),
+                "response_model": response_model,
+                "response": response,
+                "latency_seconds": round(latency, 6),
+            })
+        except OSError as e:
+            # Recording must never break the real call path
+            logger.error(f"Failed to record LLM interaction: {e}")
+
+    def is_available(self) -> bool:
+        return self.inner.is_available()
+
+    def get_model_name(self) -> str:
+        return self.inner.get_model_name()
+
+    def get_provider_name(self) -> str:
+        return self.inner.get_provider_name()
+
+
+class RecordingLLMServiceFactory(LLMServiceFactoryInterface):
+    """Factory that wraps every created service in a RecordingLLMService."""
+
+    def __init__(self, inner_factory: LLMServiceFactoryInterface, store: LLMRecordingStore):
+        """
+        Initialize the factory.
+
+        Args:
+            inner_factory: Factory creating the real LLM services
+            store: Shared store all created services record into
+        """
+        self.inner_factory = inner_factory
+        self.store = store
+
+    def create_service(self, model: str) -> LLMServiceInterface:
+        return RecordingLLMService(self.inner_factory.create_service(model), self.store)
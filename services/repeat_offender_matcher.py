@@ -0,0 +1,246 @@
+"""
+Compiled, cached matchers for repeat offender patterns.
+
+check_repeat_offender used to load every active pattern of the account from
+the database and try each subject pattern with re.search, for every email.
+A matcher holds an account's active patterns in memory instead: exact
+sender and domain patterns in dicts, and all subject patterns combined into
+one compiled regex that rules out a non-matching subject in a single pass.
+
+Matchers are cached per database and account and rebuilt when the
+account's version stamp (repeat_offender_pattern_versions) changes. The
+stamp is read at most every check_interval seconds, and writes from this
+process invalidate the cache immediately, so checking an email normally
+needs no database query.
+"""
+import re
+import threading
+import time
+import weakref
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_
+from sqlalchemy.orm import Session
+
+from models.database import RepeatOffenderPattern, RepeatOffenderPatternVersion
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_LEADING_FLAGS = re.compile(r'^\(\?([aiLmsux]+)\)')
+_BACKREFERENCE = re.compile(r'\\[1-9]|\(\?P=')
+
+
+def _scoped(pattern: str) -> str:
+    # Global inline flags such as a leading (?i) are only allowed at the start
+    # of the whole expression, so scope them to the pattern's own group
+    match = _LEADING_FLAGS.match(pattern)
+    if match:
+        return f"(?{match.group(1)}:{pattern[match.end():]})"
+    return f"(?:{pattern})"
+
+
+class RepeatOffenderMatcher:
+    """An account's active repeat offender patterns, ready for matching."""
+
+    def __init__(self, patterns: Iterable[RepeatOffenderPattern], expires_at: Optional[datetime] = None):
+        """
+        Build the matcher.
+
+        Args:
+            patterns: Active patterns in priority order (sender, then domain,
+                      then subject patterns, each by descending confidence)
+            expires_at: When the oldest pattern drops out of the lookback window
+        """
+        self.expires_at = expires_at
+        self._by_sender: Dict[str, str] = {}
+        self._by_domain: Dict[str, str] = {}
+        self._subjects: List[Tuple[re.Pattern, str]] = []
+        combinable: List[str] = []
+        self._uncombined = False
+
+        for pattern in patterns:
+            category = f"{pattern.category}-RepeatOffender"
+            if pattern.sender_email:
+                self._by_sender.setdefault(pattern.sender_email, category)
+            elif pattern.sender_domain:
+                self._by_domain.setdefault(pattern.sender_domain, category)
+            elif pattern.subject_pattern:
+                try:
+                    compiled = re.compile(pattern.subject_pattern, re.IGNORECASE)
+                except re.error as e:
+                    logger.warning(f"Ignoring invalid repeat offender subject pattern {pattern.subject_pattern!r}: {e}")
+                    continue
+                self._subjects.append((compiled, category))
+                if _BACKREFERENCE.search(pattern.subject_pattern):
+                    self._uncombined = True  # Group numbers shift when combined
+                else:
+                    combinable.append(_scoped(pattern.subject_pattern))
+
+        self._any_subject: Optional[re.Pattern] = None
+        if combinable and not self._uncombined:
+            try:
+                self._any_subject = re.compile("|".join(combinable), re.IGNORECASE)
+            except re.error:
+                self._uncombined = True
+
+    @property
+    def pattern_count(self) -> int:
+        return len(self._by_sender) + len(self._by_domain) + len(self._subjects)
+
+    def match(self, sender_email: Optional[str], sender_domain: Optional[str], subject: Optional[str]) -> Optional[str]:
+        """
+        Category with a -RepeatOffender suffix for the first matching pattern, or None.
+        """
+        if sender_email and sender_email in self._by_sender:
+            return self._by_sender[sender_email]
+        if sender_domain and sender_domain in self._by_domain:
+            return self._by_domain[sender_domain]
+        if not self._subjects:
+            return None
+        subject = subject or ""
+        if self._any_subject is not None and not self._any_subject.search(subject):
+            return None
+        # Some pattern matches; find the highest-priority one
+        for compiled, category in self._subjects:
+            if compiled.search(subject):
+                return category
+        return None
+
+
+class _CachedMatcher:
+    def __init__(self, matcher: RepeatOffenderMatcher, version: int, built_at: float):
+        self.matcher = matcher
+        self.version = version
+        self.built_at = built_at
+        self.checked_at = built_at
+
+
+class RepeatOffenderMatcherCache:
+    """Per-database, per-account cache of RepeatOffenderMatchers."""
+
+    def __init__(
+        self,
+        check_interval: float = 30.0,
+        max_age: float = 600.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            check_interval: Seconds between reads of an account's version stamp
+            max_age: Seconds after which a matcher is rebuilt even if its stamp is
+                     unchanged (covers patterns edited without bumping the stamp)
+            clock: Monotonic clock in seconds (injectable for tests)
+        """
+        self.check_interval = check_interval
+        self.max_age = max_age
+        self._clock = clock
+        self._lock = threading.Lock()
+        # Keyed by engine so separate databases (and test databases) never share matchers
+        self._entries: "weakref.WeakKeyDictionary[Any, Dict[str, _CachedMatcher]]" = weakref.WeakKeyDictionary()
+        self._stats = {'hits': 0, 'version_checks': 0, 'builds': 0, 'invalidations': 0}
+
+    def get(self, session: Session, account_name: str, lookback_days: int) -> RepeatOffenderMatcher:
+        """
+        The account's matcher, rebuilt from the database if it is stale.
+
+        Args:
+            session: Session bound to the database holding the patterns
+            account_name: Account the patterns belong to
+            lookback_days: Patterns not seen for this long are ignored
+        """
+        engine = session.get_bind()
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(engine, {}).get(account_name)
+            if entry and not self._expired(entry, now) and now - entry.checked_at < self.check_interval:
+                self._stats['hits'] += 1
+                return entry.matcher
+
+        version = read_pattern_version(session, account_name)
+        with self._lock:
+            self._stats['version_checks'] += 1
+            if entry and entry.version == version and not self._expired(entry, now):
+                entry.checked_at = now
+                return entry.matcher
+
+        matcher = self._build(session, account_name, lookback_days)
+        with self._lock:
+            self._stats['builds'] += 1
+            self._entries.setdefault(engine, {})[account_name] = _CachedMatcher(matcher, version, now)
+        logger.debug(f"Built repeat offender matcher for {account_name} ({matcher.pattern_count} patterns, version {version})")
+        return matcher
+
+    def invalidate(self, session: Session, account_name: str) -> None:
+        """Drop the account's matcher after this process changed its patterns."""
+        with self._lock:
+            if self._entries.get(session.get_bind(), {}).pop(account_name, None):
+                self._stats['invalidations'] += 1
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+    def _expired(self, entry: _CachedMatcher, now: float) -> bool:
+        if now - entry.built_at >= self.max_age:
+            return True
+        expires_at = entry.matcher.expires_at
+        return expires_at is not None and datetime.now() >= expires_at
+
+    @staticmethod
+    def _build(session: Session, account_name: str, lookback_days: int) -> RepeatOffenderMatcher:
+        cutoff_date = datetime.now() - timedelta(days=lookback_days)
+        patterns = session.query(RepeatOffenderPattern).filter(
+            and_(
+                RepeatOffenderPattern.account_name == account_name,
+                RepeatOffenderPattern.is_active == True,
+                RepeatOffenderPattern.marked_as_repeat_offender.isnot(None),
+                RepeatOffenderPattern.last_seen >= cutoff_date
+            )
+        ).order_by(
+            # Prioritize specific patterns over general ones
+            RepeatOffenderPattern.sender_email.desc(),  # email patterns first
+            RepeatOffenderPattern.sender_domain.desc(),  # then domain patterns
+            RepeatOffenderPattern.confidence_score.desc()  # then by confidence
+        ).all()
+        expires_at = min((p.last_seen for p in patterns), default=None)
+        return RepeatOffenderMatcher(
+            patterns,
+            expires_at=expires_at + timedelta(days=lookback_days) if expires_at else None
+        )
+
+
+def read_pattern_version(session: Session, account_name: str) -> int:
+    # A column query, so a stamp already loaded into the session is not reused
+    version = session.query(RepeatOffenderPatternVersion.version).filter(
+        RepeatOffenderPatternVersion.account_name == account_name
+    ).scalar()
+    return version or 0
+
+
+def bump_pattern_version(session: Session, account_name: str) -> None:
+    """Increment the account's version stamp as part of the session's pending changes."""
+    row = session.get(RepeatOffenderPatternVersion, account_name)
+    if row is None:
+        row = RepeatOffenderPatternVersion(account_name=account_name, version=0)
+        session.add(row)
+    row.version = (row.version or 0) + 1
+    row.updated_at = datetime.utcnow()
+
+
+# Process-wide cache shared by all RepeatOffenderService instances
+_matcher_cache: Optional[RepeatOffenderMatcherCache] = None
+_matcher_cache_lock = threading.Lock()
+
+
+def get_repeat_offender_matcher_cache() -> RepeatOffenderMatcherCache:
+    """Get the process-wide matcher cache."""
+    global _matcher_cache
+    if _matcher_cache is None:
+        with _matcher_cache_lock:
+            if _matcher_cache is None:
+                _matcher_cache = RepeatOffenderMatcherCache()
+    return _matcher_cache
@@ -0,0 +1,95 @@
+"""
+Write-behind buffer for repeat offender outcomes.
+
+Recording each processed email's outcome used to cost up to three
+get-or-create queries and a commit. During a run, outcomes are kept in
+memory per pattern and applied in one transaction every flush_every
+emails and at the end of the run.
+
+Flagging stays as it was: the buffer tracks each pattern's counts (loaded
+once per run) and flushes straight away when an outcome marks a pattern as
+a repeat offender or updates one that already is (its confidence orders the
+matches), so later emails of the same run are matched exactly as when every
+outcome was written immediately.
+"""
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from services.repeat_offender_service import PatternKey, PatternState, RepeatOffenderService
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class RepeatOffenderOutcomeBuffer:
+    """Accumulates one account's repeat offender outcomes and applies them in batches."""
+
+    def __init__(self, service: RepeatOffenderService, flush_every: int = 50):
+        """
+        Initialize the buffer.
+
+        Args:
+            service: RepeatOffenderService for the account (its session is used for the whole run)
+            flush_every: Buffered emails that trigger a flush
+        """
+        self.service = service
+        self.flush_every = max(1, flush_every)
+        self._lock = threading.Lock()
+        self._pending: Dict[PatternKey, List[Tuple[bool, datetime]]] = {}
+        self._pending_emails = 0
+        self._states: Optional[Dict[PatternKey, PatternState]] = None
+        self.recorded = 0
+        self.flushes = 0
+
+    def record(self, sender_email: str, sender_domain: str, subject: str, category: str, was_deleted: bool) -> None:
+        """Buffer an email's outcome; flushes when the batch is full or a repeat offender pattern changes."""
+        keys = self.service.pattern_keys(sender_email, sender_domain, subject, category)
+        if not keys:
+            return
+        now = datetime.now()
+        with self._lock:
+            if self._states is None:
+                self._states = self.service.load_pattern_states()
+            flush_now = False
+            for key in keys:
+                self._pending.setdefault(key, []).append((was_deleted, now))
+                total, deletions, marked = self._states.get(key, PatternState(0, 0, False))
+                total += 1
+                deletions += int(was_deleted)
+                if not marked:
+                    marked = self.service.should_mark(total, deletions)
+                flush_now = flush_now or marked
+                self._states[key] = PatternState(total, deletions, marked)
+            self._pending_emails += 1
+            self.recorded += 1
+            if flush_now or self._pending_emails >= self.flush_every:
+                self._flush_locked()
+
+    def flush(self) -> int:
+        """
+        Apply all buffered outcomes.
+
+        Returns:
+            Number of patterns written
+        """
+        with self._lock:
+            return self._flush_locked()
+
+    def _flush_locked(self) -> int:
+        if not self._pending:
+            return 0
+        pending, self._pending = self._pending, {}
+        self._pending_emails = 0
+        try:
+            states = self.service.apply_outcomes(pending)
+        except Exception:
+            self.service.session.rollback()
+            # Counts are reloaded on the next record so they match what was stored
+            self._states = None
+            raise
+        self.flushes += 1
+        if self._states is not None:
+            self._states.update(states)
+        logger.debug(f"Recorded repeat offender outcomes for {len(states)} patterns of {self.service.account_name}")
+        return len(states)
@@ -2,12 +2,44 @@
 
 import re
 from datetime import datetime, timedelta
-from typing import Optional, Tuple
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, or_
 
 from models.database import RepeatOffenderPattern
 from services.categorize_emails_interface import SimpleEmailCategory
+from services.repeat_offender_matcher import (
+    RepeatOffenderMatcherCache,
+    bump_pattern_version,
+    get_repeat_offender_matcher_cache,
+)
+
+
+@dataclass(frozen=True)
+class PatternKey:
+    """Identifies a pattern: which field it matches on, the value, and the category."""
+    kind: str  # 'sender_email', 'sender_domain' or 'subject_pattern'
+    value: str
+    category: str
+
+
+class PatternState(NamedTuple):
+    total_occurrences: int
+    deletion_count: int
+    marked: bool
+
+
+def _row_key(sender_email: Optional[str], sender_domain: Optional[str],
+             subject_pattern: Optional[str], category: str) -> Optional[PatternKey]:
+    # Patterns have exactly one identifier set
+    if sender_email and not sender_domain and not subject_pattern:
+        return PatternKey('sender_email', sender_email, category)
+    if sender_domain and not sender_email and not subject_pattern:
+        return PatternKey('sender_domain', sender_domain, category)
+    if subject_pattern and not sender_email and not sender_domain:
+        return PatternKey('subject_pattern', subject_pattern, category)
+    return None
 
 
 class RepeatOffenderService:
@@ -16,9 +48,10 @@ class RepeatOffenderService:
     and can skip expensive LLM categorization.
     """
     
-    def __init__(self, session: Session, account_name: str):
+    def __init__(self, session: Session, account_name: str, matcher_cache: Optional[RepeatOffenderMatcherCache] = None):
         self.session = session
         self.account_name = account_name
+        self.matcher_cache = matcher_cache or get_repeat_offender_matcher_cache()
         
         # Thresholds for marking as repeat offender
         self.min_occurrences = 3  # Minimum emails needed to establish pattern
@@ -32,150 +65,159 @@ class RepeatOffenderService:
         Returns:
             Category with -RepeatOffender suffix if match found, None otherwise
         """
-        cutoff_date = datetime.now() - timedelta(days=self.lookback_days)
-        
-        patterns = self.session.query(RepeatOffenderPattern).filter(
-            and_(
-                RepeatOffenderPattern.account_name == self.account_name,
-                RepeatOffenderPattern.is_active == True,
-                RepeatOffenderPattern.marked_as_repeat_offender.isnot(None),
-                RepeatOffenderPattern.last_seen >= cutoff_date
-            )
-        ).order_by(
-            # Prioritize specific patterns over general ones
-            RepeatOffenderPattern.sender_email.desc(),  # email patterns first
-            RepeatOffenderPattern.sender_domain.desc(),  # then domain patterns
-            RepeatOffenderPattern.confidence_score.desc()  # then by confidence
-        ).all()
-        
-        for pattern in patterns:
-            if self._matches_pattern(pattern, sender_email, sender_domain, subject):
-                return f"{pattern.category}-RepeatOffender"
-        
-        return None
+        matcher = self.matcher_cache.get(self.session, self.account_name, self.lookback_days)
+        return matcher.match(sender_email, sender_domain, subject)
     
     def record_email_outcome(self, sender_email: str, sender_domain: str, subject: str, 
                            category: str, was_deleted: bool) -> None:
         """
         Record the outcome of an email to track patterns and potentially mark as repeat offender.
         """
+        keys = self.pattern_keys(sender_email, sender_domain, subject, category)
+        if keys:
+            now = datetime.now()
+            self.apply_outcomes({key: [(was_deleted, now)] for key in keys})
+    
+    def pattern_keys(self, sender_email: str, sender_domain: str, subject: str,
+                     category: str) -> List[PatternKey]:
+        """
+        Patterns an email's outcome counts towards (none if its category is not tracked).
+        """
         # Skip if already a repeat offender category
         if category.endswith("-RepeatOffender"):
-            return
+            return []
         
         # Only track categories that could be deletion candidates
         deletion_categories = {"Advertising", "Marketing", "Wants-Money", "WantsMoney", "Blocked_Domain"}
         if category not in deletion_categories:
-            return
-            
-        now = datetime.now()
+            return []
         
-        # Find existing patterns or create new ones
-        patterns_to_update = []
-        
-        # Check for sender email pattern
+        keys = []
         if sender_email:
-            pattern = self._get_or_create_pattern(
-                sender_email=sender_email, 
-                category=category
-            )
-            patterns_to_update.append(pattern)
-        
-        # Check for sender domain pattern
+            keys.append(PatternKey('sender_email', sender_email, category))
         if sender_domain and sender_domain != sender_email:
-            pattern = self._get_or_create_pattern(
-                sender_domain=sender_domain,
-                category=category
-            )
-            patterns_to_update.append(pattern)
-        
+            keys.append(PatternKey('sender_domain', sender_domain, category))
         # Check for subject pattern (extract common patterns)
         subject_pattern = self._extract_subject_pattern(subject)
         if subject_pattern:
-            pattern = self._get_or_create_pattern(
-                subject_pattern=subject_pattern,
-                category=category
-            )
-            patterns_to_update.append(pattern)
-        
-        # Update patterns
-        for pattern in patterns_to_update:
-            pattern.total_occurrences += 1
-            if was_deleted:
-                pattern.deletion_count += 1
-            
-            pattern.confidence_score = pattern.deletion_count / pattern.total_occurrences
-            pattern.last_seen = now
-            
-            # Check if this pattern should be marked as repeat offender
-            if (pattern.total_occurrences >= self.min_occurrences and 
-                pattern.confidence_score >= self.confidence_threshold and
-                pattern.marked_as_repeat_offender is None):
-                
-                pattern.marked_as_repeat_offender = now
+            keys.append(PatternKey('subject_pattern', subject_pattern, category))
+        return keys
+    
+    def should_mark(self, total_occurrences: int, deletion_count: int) -> bool:
+        """Whether counts this high make a pattern a repeat offender."""
+        return (total_occurrences >= self.min_occurrences and
+                deletion_count / total_occurrences >= self.confidence_threshold)
+    
+    def load_pattern_states(self) -> Dict[PatternKey, PatternState]:
+        """Counts of every pattern of the account, in one query."""
+        rows = self.session.query(
+            RepeatOffenderPattern.sender_email,
+            RepeatOffenderPattern.sender_domain,
+            RepeatOffenderPattern.subject_pattern,
+            RepeatOffenderPattern.category,
+            RepeatOffenderPattern.total_occurrences,
+            RepeatOffenderPattern.deletion_count,
+            RepeatOffenderPattern.marked_as_repeat_offender,
+        ).filter(
+            RepeatOffenderPattern.account_name == self.account_name
+        ).order_by(RepeatOffenderPattern.id).all()
         
-        self.session.commit()
+        states = {}
+        for sender_email, sender_domain, subject_pattern, category, total, deletions, marked in rows:
+            key = _row_key(sender_email, sender_domain, subject_pattern, category)
+            if key and key not in states:
+                states[key] = PatternState(total or 0, deletions or 0, marked is not None)
+        return states
     
-    def _get_or_create_pattern(self, sender_email: Optional[str] = None, 
-                              sender_domain: Optional[str] = None,
-                              subject_pattern: Optional[str] = None,
-                              category: str = "") -> RepeatOffenderPattern:
-        """Get existing pattern or create new one."""
+    def apply_outcomes(self, outcomes: Dict[PatternKey, List[Tuple[bool, datetime]]]) -> Dict[PatternKey, PatternState]:
+        """
+        Apply recorded outcomes to their patterns in one transaction.
         
-        # Build query conditions
-        conditions = [RepeatOffenderPattern.account_name == self.account_name]
+        Existing patterns are read with one query, then updated and new ones
+        inserted in a single flush. Each pattern's outcomes are replayed in
+        order, so it is marked as a repeat offender at the same outcome (and
+        timestamp) as when outcomes were recorded one by one.
         
-        if sender_email:
-            conditions.append(RepeatOffenderPattern.sender_email == sender_email)
-            conditions.append(RepeatOffenderPattern.sender_domain.is_(None))
-            conditions.append(RepeatOffenderPattern.subject_pattern.is_(None))
-        elif sender_domain:
-            conditions.append(RepeatOffenderPattern.sender_domain == sender_domain)
-            conditions.append(RepeatOffenderPattern.sender_email.is_(None))
-            conditions.append(RepeatOffenderPattern.subject_pattern.is_(None))
-        elif subject_pattern:
-            conditions.append(RepeatOffenderPattern.subject_pattern == subject_pattern)
-            conditions.append(RepeatOffenderPattern.sender_email.is_(None))
-            conditions.append(RepeatOffenderPattern.sender_domain.is_(None))
-        
-        conditions.append(RepeatOffenderPattern.category == category)
-        
-        # Try to find existing pattern
-        pattern = self.session.query(RepeatOffenderPattern).filter(and_(*conditions)).first()
-        
-        if not pattern:
-            now = datetime.now()
-            pattern = RepeatOffenderPattern(
-                account_name=self.account_name,
-                sender_email=sender_email,
-                sender_domain=sender_domain,
-                subject_pattern=subject_pattern,
-                category=category,
-                total_occurrences=0,
-                deletion_count=0,
-                confidence_score=0.0,
-                first_seen=now,
-                last_seen=now,
-                is_active=True
+        Args:
+            outcomes: Per pattern, (was_deleted, seen_at) tuples in the order they happened
+            
+        Returns:
+            The resulting counts of each pattern
+        """
+        if not outcomes:
+            return {}
+        
+        patterns = self._load_patterns(outcomes.keys())
+        states = {}
+        active_patterns_changed = False
+        for key, events in outcomes.items():
+            pattern = patterns.get(key)
+            if pattern is None:
+                pattern = RepeatOffenderPattern(
+                    account_name=self.account_name,
+                    sender_email=key.value if key.kind == 'sender_email' else None,
+                    sender_domain=key.value if key.kind == 'sender_domain' else None,
+                    subject_pattern=key.value if key.kind == 'subject_pattern' else None,
+                    category=key.category,
+                    total_occurrences=0,
+                    deletion_count=0,
+                    confidence_score=0.0,
+                    first_seen=events[0][1],
+                    last_seen=events[0][1],
+                    is_active=True
+                )
+                self.session.add(pattern)
+            
+            for was_deleted, seen_at in events:
+                pattern.total_occurrences = (pattern.total_occurrences or 0) + 1
+                if was_deleted:
+                    pattern.deletion_count = (pattern.deletion_count or 0) + 1
+                
+                pattern.confidence_score = pattern.deletion_count / pattern.total_occurrences
+                pattern.last_seen = seen_at
+                
+                # Check if this pattern should be marked as repeat offender
+                if (pattern.marked_as_repeat_offender is None and
+                        self.should_mark(pattern.total_occurrences, pattern.deletion_count)):
+                    pattern.marked_as_repeat_offender = seen_at
+            
+            if pattern.marked_as_repeat_offender is not None:
+                active_patterns_changed = True
+            states[key] = PatternState(
+                pattern.total_occurrences, pattern.deletion_count, pattern.marked_as_repeat_offender is not None
             )
-            self.session.add(pattern)
         
-        return pattern
+        if active_patterns_changed:
+            bump_pattern_version(self.session, self.account_name)
+        self.session.commit()
+        if active_patterns_changed:
+            self.matcher_cache.invalidate(self.session, self.account_name)
+        return states
     
-    def _matches_pattern(self, pattern: RepeatOffenderPattern, sender_email: str, 
-                        sender_domain: str, subject: str) -> bool:
-        """Check if email matches the given pattern."""
+    def _load_patterns(self, keys: Iterable[PatternKey]) -> Dict[PatternKey, RepeatOffenderPattern]:
+        by_kind: Dict[str, set] = {}
+        categories = set()
+        for key in keys:
+            by_kind.setdefault(key.kind, set()).add(key.value)
+            categories.add(key.category)
         
-        if pattern.sender_email:
-            return pattern.sender_email == sender_email
-        
-        if pattern.sender_domain:
-            return pattern.sender_domain == sender_domain
-        
-        if pattern.subject_pattern:
-            return bool(re.search(pattern.subject_pattern, subject, re.IGNORECASE))
+        column_for = {
+            'sender_email': RepeatOffenderPattern.sender_email,
+            'sender_domain': RepeatOffenderPattern.sender_domain,
+            'subject_pattern': RepeatOffenderPattern.subject_pattern,
+        }
+        rows = self.session.query(RepeatOffenderPattern).filter(
+            RepeatOffenderPattern.account_name == self.account_name,
+            RepeatOffenderPattern.category.in_(categories),
+            or_(*(column_for[kind].in_(values) for kind, values in by_kind.items()))
+        ).order_by(RepeatOffenderPattern.id).all()
         
-        return False
+        patterns = {}
+        for row in rows:
+            key = _row_key(row.sender_email, row.sender_domain, row.subject_pattern, row.category)
+            if key and key not in patterns:
+                patterns[key] = row
+        return patterns
     
     def _extract_subject_pattern(self, subject: str) -> Optional[str]:
         """
@@ -0,0 +1,193 @@
+"""
+Replay LLM Service - serves recorded LLM responses without network access
+
+Looks requests up by fingerprint in an LLMRecordingStore produced by
+RecordingLLMService. Latency can optionally be emulated so offline
+benchmarks of the processing pipeline behave like the real provider:
+
+- "none": return immediately
+- "recorded": sleep for the latency observed when the response was recorded
+- "fixed": sleep for a constant number of seconds
+- "sampled": sleep for a latency drawn (seeded) from all recorded latencies
+"""
+import random
+import threading
+import time
+from typing import Optional, Any, Callable, Dict, Type, TypeVar
+
+from pydantic import BaseModel
+
+from services.llm_recording_store import LLMRecordingStore, fingerprint_request
+from services.llm_service_factory_interface import LLMServiceFactoryInterface
+from services.llm_service_interface import LLMServiceInterface
+from utils.logger import get_logger
+
+T = TypeVar('T', bound=BaseModel)
+
+logger = get_logger(__name__)
+
+LATENCY_NONE = "none"
+LATENCY_RECORDED = "recorded"
+LATENCY_FIXED = "fixed"
+LATENCY_SAMPLED = "sampled"
+LATENCY_MODES = (LATENCY_NONE, LATENCY_RECORDED, LATENCY_FIXED, LATENCY_SAMPLED)
+
+
+class LLMReplayMissError(LookupError):
+    """Raised when a request has no recording and no fallback service is configured."""
+
+
+class ReplayLLMService(LLMServiceInterface):
+    """LLM service that answers from a recording."""
+
+    def __init__(
+        self,
+        store: LLMRecordingStore,
+        model: str,
+        provider_name: str = "replay",
+        latency_mode: str = LATENCY_NONE,
+        fixed_latency_seconds: float = 0.0,
+        latency_scale: float = 1.0,
+        seed: Optional[int] = 0,
+        fallback: Optional[LLMServiceInterface] = None,
+        sleep: Callable[[float], None] = time.sleep
+    ):
+        """
+        Initialize the replay service.
+
+        Args:
+            store: Recording to serve responses from
+            model: Model name used to compute request fingerprints
+            provider_name: Provider name reported by get_provider_name
+            latency_mode: One of "none", "recorded", "fixed", "sampled"
+            fixed_latency_seconds: Latency used by the "fixed" mode
+            latency_scale: Multiplier applied to emulated latencies
+            seed: Seed for the "sampled" mode so runs are repeatable
+            fallback: Optional live service used on recording misses
+            sleep: Sleep function (injectable for tests)
+
+        Raises:
+            ValueError: If latency_mode is not supported
+        """
+        if latency_mode not in LATENCY_MODES:
+            raise ValueError(f"Unsupported latency mode '{latency_mode}', expected one of {LATENCY_MODES}")
+        self.store = store
+        self.model = model
+        self.provider_name = provider_name
+        self.latency_mode = latency_mode
+        self.fixed_latency_seconds = fixed_latency_seconds
+        self.latency_scale = latency_scale
+        self.fallback = fallback
+        self._sleep = sleep
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self._sample_pool = store.latencies()
+        self.hits = 0
+        self.misses = 0
+
+    def call(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.0,
+        max_tokens: Optional[int] = None,
+        **kwargs: Any
+    ) -> str:
+        fingerprint = fingerprint_request(
+            "call", self.model, prompt, system_prompt, temperature,
+            max_tokens=max_tokens, **kwargs
+        )
+        record = self.store.get(fingerprint)
+        if record is None:
+            self._on_miss(fingerprint)
+            return self.fallback.call(
+                prompt, system_prompt=system_prompt, temperature=temperature, max_tokens=max_tokens, **kwargs
+            )
+
+        self._emulate_latency(record)
+        return record["response"]
+
+    def call_structured(
+        self,
+        prompt: str,
+        response_model: Type[T],
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.0,
+        **kwargs: Any
+    ) -> T:
+        fingerprint = fingerprint_request(
+            "call_structured", self.model, prompt, system_prompt, temperature,
+            response_model=response_model.__name__, **kwargs
+        )
+        record = self.store.get(fingerprint)
+        if record is None:
+            self._on_miss(fingerprint)
+            return self.fallback.call_structured(
+                prompt, response_model, system_prompt=system_prompt, temperature=temperature, **kwargs
+            )
+
+        self._emulate_latency(record)
+        return response_model.model_validate(record["response"])
+
+    def _on_miss(self, fingerprint: str) -> None:
+        self.misses += 1
+        if self.fallback is None:
+            raise LLMReplayMissError(f"No recorded response for request {fingerprint[:12]} (model {self.model})")
+        logger.debug(f"Replay miss for {fingerprint[:12]}, using fallback service")
+
+    def _emulate_latency(self, record: dict) -> None:
+        self.hits += 1
+        if self.latency_mode == LATENCY_RECORDED:
+            delay = float(record.get("latency_seconds", 0.0))
+        elif self.latency_mode == LATENCY_FIXED:
+            delay = self.fixed_latency_seconds
+        elif self.latency_mode == LATENCY_SAMPLED and self._sample_pool:
+            with self._random_lock:
+                delay = self._random.choice(self._sample_pool)
+        else:
+            return
+        delay *= self.latency_scale
+        if delay > 0:
+            self._sleep(delay)
+
+    def is_available(self) -> bool:
+        return len(self.store) > 0 or (self.fallback is not None and self.fallback.is_available())
+
+    def get_model_name(self) -> str:
+        return self.model
+
+    def get_provider_name(self) -> str:
+        return self.provider_name
+
+
+class ReplayLLMServiceFactory(LLMServiceFactoryInterface):
+    """
+    Factory creating ReplayLLMService instances over one shared recording.
+
+    One service is kept per model so hit/miss counters and the sampling
+    sequence persist across the per-email create_service calls.
+    """
+
+    def __init__(self, store: LLMRecordingStore, fallback_factory: Optional[LLMServiceFactoryInterface] = None, **replay_options: Any):
+        """
+        Initialize the factory.
+
+        Args:
+            store: Recording to serve responses from
+            fallback_factory: Optional factory for live services used on misses
+            **replay_options: Options forwarded to ReplayLLMService (latency_mode, seed, ...)
+        """
+        self.store = store
+        self.fallback_factory = fallback_factory
+        self.replay_options = replay_options
+        self._services: Dict[str, ReplayLLMService] = {}
+        self._lock = threading.Lock()
+
+    def create_service(self, model: str) -> LLMServiceInterface:
+        with self._lock:
+            service = self._services.get(model)
+            if service is None:
+                fallback = self.fallback_factory.create_service(model) if self.fallback_factory else None
+                service = ReplayLLMService(self.store, model, fallback=fallback, **self.replay_options)
+                self._services[model] = service
+            return service
@@ -0,0 +1,266 @@
+"""
+Process-wide concurrency governor for shared external resources.
+
+Force-process requests, the background worker pool and the Kafka consumer
+can all run at once, and each opens IMAP connections, calls the LLM and uses
+database connections. The governor is the one place that bounds them:
+
+- every resource has a named, configurable global limit
+- a resource can also have a per-key sub-limit (per account for IMAP, since
+  Gmail rejects more than about 15 simultaneous connections per user; per
+  host for the LLM and the database)
+- callers block until a slot is free (or a timeout elapses) and the time
+  spent waiting is recorded per resource
+
+A limit of 0 means unlimited; unconfigured resources are unlimited but still
+report metrics.
+
+Configuration (environment, all optional):
+    GOVERNOR_IMAP_LIMIT               Simultaneous IMAP connections (default 20)
+    GOVERNOR_IMAP_PER_ACCOUNT_LIMIT   Simultaneous IMAP connections per account (default 5)
+    GOVERNOR_LLM_LIMIT                Simultaneous LLM requests (default 16)
+    GOVERNOR_LLM_PER_HOST_LIMIT       Simultaneous LLM requests per API host (default 0)
+    GOVERNOR_DB_LIMIT                 Checked-out DB connections (default 0)
+    GOVERNOR_DB_PER_HOST_LIMIT        Checked-out DB connections per DB host (default 0)
+    GOVERNOR_ACQUIRE_TIMEOUT_SECONDS  Longest wait for a slot before failing (default 300)
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, Optional
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+IMAP = 'imap'
+LLM = 'llm'
+DB = 'db'
+
+
+class ResourceTimeoutError(TimeoutError):
+    """Raised when no slot of a resource became free within the timeout."""
+
+
+@dataclass
+class _ResourceState:
+    limit: int = 0
+    per_key_limit: int = 0
+    in_use: int = 0
+    per_key: Dict[str, int] = field(default_factory=dict)
+    waiting: int = 0
+    peak_in_use: int = 0
+    acquired: int = 0
+    waited: int = 0
+    timeouts: int = 0
+    total_wait_seconds: float = 0.0
+    max_wait_seconds: float = 0.0
+
+    def has_room(self, key: Optional[str]) -> bool:
+        if self.limit and self.in_use >= self.limit:
+            return False
+        if key is not None and self.per_key_limit and self.per_key.get(key, 0) >= self.per_key_limit:
+            return False
+        return True
+
+
+class ResourceSlot:
+    """A held slot of a governed resource; release() is idempotent."""
+
+    def __init__(self, governor: "ResourceGovernor", name: str, key: Optional[str]):
+        self.governor = governor
+        self.name = name
+        self.key = key
+        self._released = False
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self.governor._release(self.name, self.key)
+
+    def __enter__(self) -> "ResourceSlot":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
+
+
+class ResourceGovernor:
+    """Named counting semaphores with optional per-key sub-limits and wait metrics."""
+
+    def __init__(self, default_timeout: Optional[float] = None):
+        """
+        Initialize the governor.
+
+        Args:
+            default_timeout: Seconds acquire() waits when no timeout is given (None waits forever)
+        """
+        self.default_timeout = default_timeout
+        self._resources: Dict[str, _ResourceState] = {}
+        self._condition = threading.Condition()
+
+    def configure(self, name: str, limit: int = 0, per_key_limit: int = 0) -> None:
+        """
+        Set a resource's limits; takes effect for the next acquire.
+
+        Args:
+            name: Resource name (e.g. IMAP, LLM, DB)
+            limit: Maximum concurrent holders (0 for unlimited)
+            per_key_limit: Maximum concurrent holders per key (0 for unlimited)
+        """
+        with self._condition:
+            state = self._resources.setdefault(name, _ResourceState())
+            state.limit = max(0, limit)
+            state.per_key_limit = max(0, per_key_limit)
+            self._condition.notify_all()
+
+    def acquire(self, name: str, key: Optional[str] = None, timeout: Optional[float] = None) -> ResourceSlot:
+        """
+        Block until a slot of the resource (and of its key) is free and take it.
+
+        Args:
+            name: Resource name
+            key: Optional sub-limit key, e.g. account email or host
+            timeout: Seconds to wait (defaults to the governor's default_timeout)
+
+        Returns:
+            ResourceSlot to release when done
+
+        Raises:
+            ResourceTimeoutError: If no slot became free in time
+        """
+        timeout = self.default_timeout if timeout is None else timeout
+        key = key.lower() if isinstance(key, str) else key
+        started = time.monotonic()
+        with self._condition:
+            state = self._resources.setdefault(name, _ResourceState())
+            if not state.has_room(key):
+                state.waiting += 1
+                try:
+                    while not state.has_room(key):
+                        remaining = None if timeout is None else timeout - (time.monotonic() - started)
+                        if remaining is not None and remaining <= 0:
+                            state.timeouts += 1
+                            raise ResourceTimeoutError(
+                                f"No {name} slot free{f' for {key}' if key else ''} after {timeout:.0f}s "
+                                f"({state.in_use}/{state.limit or '∞'} in use)"
+                            )
+                        self._condition.wait(remaining)
+                finally:
+                    state.waiting -= 1
+                state.waited += 1
+
+            waited = time.monotonic() - started
+            state.in_use += 1
+            if key is not None:
+                state.per_key[key] = state.per_key.get(key, 0) + 1
+            state.peak_in_use = max(state.peak_in_use, state.in_use)
+            state.acquired += 1
+            state.total_wait_seconds += waited
+            state.max_wait_seconds = max(state.max_wait_seconds, waited)
+
+        if waited >= 1.0:
+            logger.info(f"⏳ Waited {waited:.1f}s for a {name} slot{f' ({key})' if key else ''}")
+        return ResourceSlot(self, name, key)
+
+    @contextmanager
+    def slot(self, name: str, key: Optional[str] = None, timeout: Optional[float] = None) -> Iterator[ResourceSlot]:
+        """Context manager holding one slot of a resource."""
+        held = self.acquire(name, key=key, timeout=timeout)
+        try:
+            yield held
+        finally:
+            held.release()
+
+    def _release(self, name: str, key: Optional[str]) -> None:
+        with self._condition:
+            state = self._resources[name]
+            state.in_use = max(0, state.in_use - 1)
+            if key is not None:
+                remaining = state.per_key.get(key, 0) - 1
+                if remaining > 0:
+                    state.per_key[key] = remaining
+                else:
+                    state.per_key.pop(key, None)
+            self._condition.notify_all()
+
+    def instrument_engine(self, engine, name: str = DB) -> None:
+        """
+        Hold a slot of resource `name` for every connection checked out of engine's pool.
+
+        The key is the database host, so several databases can have their own sub-limits.
+        """
+        from sqlalchemy import event
+
+        key = getattr(engine.url, 'host', None) or engine.url.get_backend_name()
+
+        @event.listens_for(engine, "checkout")
+        def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+            connection_record.info['governor_slot'] = self.acquire(name, key=key)
+
+        @event.listens_for(engine, "checkin")
+        def _on_checkin(dbapi_connection, connection_record):
+            held = connection_record.info.pop('governor_slot', None)
+            if held is not None:
+                held.release()
+
+    def get_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Snapshot of every resource's limits, usage and wait times.
+
+        Returns:
+            Dictionary keyed by resource name
+        """
+        with self._condition:
+            return {
+                name: {
+                    'limit': state.limit,
+                    'per_key_limit': state.per_key_limit,
+                    'in_use': state.in_use,
+                    'in_use_by_key': dict(state.per_key),
+                    'waiting': state.waiting,
+                    'peak_in_use': state.peak_in_use,
+                    'acquired': state.acquired,
+                    'waited': state.waited,
+                    'timeouts': state.timeouts,
+                    'avg_wait_ms': round(state.total_wait_seconds * 1000 / state.acquired, 2) if state.acquired else 0.0,
+                    'max_wait_ms': round(state.max_wait_seconds * 1000, 2),
+                }
+                for name, state in self._resources.items()
+            }
+
+
+def _int_env(name: str, default: int) -> int:
+    raw = os.getenv(name, "").strip()
+    if not raw:
+        return default
+    try:
+        return max(0, int(raw))
+    except ValueError:
+        logger.warning(f"Ignoring invalid {name}={raw!r}")
+        return default
+
+
+def create_resource_governor_from_env() -> ResourceGovernor:
+    """Build a governor with IMAP, LLM and DB limits from the environment."""
+    timeout = _int_env("GOVERNOR_ACQUIRE_TIMEOUT_SECONDS", 300)
+    governor = ResourceGovernor(default_timeout=timeout or None)
+    governor.configure(IMAP, _int_env("GOVERNOR_IMAP_LIMIT", 20), _int_env("GOVERNOR_IMAP_PER_ACCOUNT_LIMIT", 5))
+    governor.configure(LLM, _int_env("GOVERNOR_LLM_LIMIT", 16), _int_env("GOVERNOR_LLM_PER_HOST_LIMIT", 0))
+    governor.configure(DB, _int_env("GOVERNOR_DB_LIMIT", 0), _int_env("GOVERNOR_DB_PER_HOST_LIMIT", 0))
+    return governor
+
+
+_default_governor: Optional[ResourceGovernor] = None
+_default_governor_lock = threading.Lock()
+
+
+def get_resource_governor() -> ResourceGovernor:
+    """Return the process-wide resource governor."""
+    global _default_governor
+    with _default_governor_lock:
+        if _default_governor is None:
+            _default_governor = create_resource_governor_from_env()
+        return _default_governor
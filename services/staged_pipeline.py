@@ -0,0 +1,288 @@
+"""
+Staged pipeline with bounded queues between stages.
+
+Each stage runs its own pool of worker threads and reads from a bounded
+queue, so a slow stage applies backpressure to the stages before it instead
+of letting work pile up in memory. Items flow from a source iterable (read by
+a dedicated thread) through the stages and are yielded back to the caller as
+they complete, which lets network I/O in one stage (e.g. IMAP) overlap with
+network I/O in another (e.g. LLM calls).
+
+Example:
+    pipeline = StagedPipeline([
+        PipelineStage("parse", parse_email),
+        PipelineStage("classify", classify_email, workers=4),
+    ], name="user@example.com")
+
+    for result in pipeline.run(fetch_emails(), source_name="fetch"):
+        handle(result)
+
+    metrics = pipeline.get_metrics()
+"""
+import contextvars
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Marks the end of a stage's input
+_END = object()
+
+DEFAULT_QUEUE_SIZE = 32
+_POLL_SECONDS = 0.1
+
+
+@dataclass
+class PipelineStage:
+    """
+    A pipeline stage.
+
+    Attributes:
+        name: Stage name used in logs and metrics
+        func: Called with each item; returns the item for the next stage, or None to drop it
+        workers: Number of worker threads running this stage
+        queue_size: Capacity of the stage's input queue
+    """
+    name: str
+    func: Callable[[Any], Any]
+    workers: int = 1
+    queue_size: int = DEFAULT_QUEUE_SIZE
+
+
+class StageMetrics:
+    """Throughput and queue depth counters for one stage."""
+
+    def __init__(self, name: str, workers: int, queue_size: int):
+        self.name = name
+        self.workers = workers
+        self.queue_size = queue_size
+        self.processed = 0
+        self.emitted = 0
+        self.dropped = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.max_queue_depth = 0
+        self._lock = threading.Lock()
+
+    def record(self, busy_seconds: float, emitted: bool, error: bool = False) -> None:
+        with self._lock:
+            self.processed += 1
+            self.busy_seconds += busy_seconds
+            if error:
+                self.errors += 1
+            elif emitted:
+                self.emitted += 1
+            else:
+                self.dropped += 1
+
+    def observe_queue_depth(self, depth: int) -> None:
+        if depth > self.max_queue_depth:
+            self.max_queue_depth = depth
+
+    def to_dict(self, elapsed_seconds: float, queue_depth: int) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'queue_size': self.queue_size,
+                'queue_depth': queue_depth,
+                'max_queue_depth': self.max_queue_depth,
+                'processed': self.processed,
+                'emitted': self.emitted,
+                'dropped': self.dropped,
+                'errors': self.errors,
+                'busy_seconds': round(self.busy_seconds, 4),
+                'throughput_per_second': round(self.processed / elapsed_seconds, 2) if elapsed_seconds > 0 else 0.0,
+            }
+
+
+class StagedPipeline:
+    """
+    Runs items through a sequence of stages connected by bounded queues.
+
+    An exception raised by the source or by any stage aborts the whole run
+    and is re-raised from run(), matching a sequential loop's behaviour.
+    Stage workers run in a copy of the caller's context, so context variables
+    (such as the account that LLM usage is attributed to) carry over.
+    """
+
+    def __init__(self, stages: List[PipelineStage], name: str = "pipeline"):
+        """
+        Initialize the pipeline.
+
+        Args:
+            stages: Stages in processing order
+            name: Name used in thread names and logs
+
+        Raises:
+            ValueError: If no stages are given or a stage has no workers
+        """
+        if not stages:
+            raise ValueError("A pipeline needs at least one stage")
+        for stage in stages:
+            if stage.workers < 1 or stage.queue_size < 1:
+                raise ValueError(f"Stage '{stage.name}' needs at least one worker and a positive queue size")
+        self.stages = stages
+        self.name = name
+        self._queues: List[queue.Queue] = []
+        self._stage_metrics: List[StageMetrics] = []
+        self._source_metrics: Optional[StageMetrics] = None
+        self._started_at: Optional[float] = None
+        self._finished_at: Optional[float] = None
+
+    def _put(self, target: queue.Queue, item: Any, abort: threading.Event, metrics: Optional[StageMetrics]) -> bool:
+        """Put an item, blocking while the queue is full (backpressure). Returns False if aborted."""
+        while not abort.is_set():
+            try:
+                target.put(item, timeout=_POLL_SECONDS)
+                if metrics is not None:
+                    metrics.observe_queue_depth(target.qsize())
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, source: queue.Queue, abort: threading.Event) -> Any:
+        while not abort.is_set():
+            try:
+                return source.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                continue
+        return _END
+
+    def run(self, source: Iterable[Any], source_name: str = "source") -> Iterator[Any]:
+        """
+        Feed items from source through the stages.
+
+        Args:
+            source: Iterable producing the pipeline's input; consumed in its own thread
+            source_name: Name of the source in metrics
+
+        Yields:
+            Items that made it through every stage, in completion order
+
+        Raises:
+            Exception: The first exception raised by the source or a stage
+        """
+        self._queues = [queue.Queue(maxsize=stage.queue_size) for stage in self.stages]
+        output: queue.Queue = queue.Queue(maxsize=self.stages[-1].queue_size)
+        self._stage_metrics = [StageMetrics(stage.name, stage.workers, stage.queue_size) for stage in self.stages]
+        self._source_metrics = StageMetrics(source_name, 1, 0)
+        self._started_at = time.monotonic()
+        self._finished_at = None
+
+        abort = threading.Event()
+        errors: List[BaseException] = []
+        remaining = [stage.workers for stage in self.stages]
+        remaining_lock = threading.Lock()
+        threads: List[threading.Thread] = []
+
+        def fail(exc: BaseException) -> None:
+            errors.append(exc)
+            abort.set()
+
+        def feed() -> None:
+            metrics = self._source_metrics
+            first_queue, first_metrics = self._queues[0], self._stage_metrics[0]
+            iterator = iter(source)
+            try:
+                while not abort.is_set():
+                    started = time.monotonic()
+                    item = next(iterator, _END)
+                    if item is _END:
+                        break
+                    metrics.record(time.monotonic() - started, emitted=True)
+                    if not self._put(first_queue, item, abort, first_metrics):
+                        return
+            except Exception as e:
+                logger.error(f"❌ Pipeline {self.name}: {source_name} failed: {e}")
+                metrics.record(0.0, emitted=False, error=True)
+                fail(e)
+                return
+            for _ in range(self.stages[0].workers):
+                if not self._put(first_queue, _END, abort, None):
+                    return
+
+        def work(index: int) -> None:
+            stage = self.stages[index]
+            metrics = self._stage_metrics[index]
+            inbox = self._queues[index]
+            last = index == len(self.stages) - 1
+            outbox = output if last else self._queues[index + 1]
+            outbox_metrics = None if last else self._stage_metrics[index + 1]
+
+            while True:
+                item = self._get(inbox, abort)
+                if item is _END:
+                    break
+                started = time.monotonic()
+                try:
+                    result = stage.func(item)
+                except Exception as e:
+                    metrics.record(time.monotonic() - started, emitted=False, error=True)
+                    logger.error(f"❌ Pipeline {self.name}: stage '{stage.name}' failed: {e}")
+                    fail(e)
+                    return
+                metrics.record(time.monotonic() - started, emitted=result is not None)
+                if result is not None and not self._put(outbox, result, abort, outbox_metrics):
+                    return
+
+            # The last worker out closes the next stage's input
+            with remaining_lock:
+                remaining[index] -= 1
+                closing = remaining[index] == 0
+            if closing:
+                next_workers = 1 if last else self.stages[index + 1].workers
+                for _ in range(next_workers):
+                    if not self._put(outbox, _END, abort, None):
+                        return
+
+        def start(target: Callable[..., None], thread_name: str, *args: Any) -> None:
+            context = contextvars.copy_context()
+            thread = threading.Thread(
+                target=context.run, args=(target, *args), name=thread_name, daemon=True
+            )
+            threads.append(thread)
+            thread.start()
+
+        for index, stage in enumerate(self.stages):
+            for worker in range(stage.workers):
+                start(work, f"{self.name}-{stage.name}-{worker}", index)
+        start(feed, f"{self.name}-{source_name}")
+
+        try:
+            while True:
+                item = self._get(output, abort)
+                if item is _END:
+                    break
+                yield item
+        finally:
+            # Also reached when the caller stops iterating early; stops any workers still running
+            abort.set()
+            for thread in threads:
+                thread.join()
+            self._finished_at = time.monotonic()
+
+        if errors:
+            raise errors[0]
+
+    def get_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Per-stage metrics of the current or last run.
+
+        Returns:
+            Dictionary keyed by stage name (source first) with worker count,
+            queue depth/high-water mark, processed/emitted/dropped/error counts,
+            busy time and throughput in items per second of wall time
+        """
+        if self._started_at is None:
+            return {}
+        elapsed = (self._finished_at or time.monotonic()) - self._started_at
+        metrics = {self._source_metrics.name: self._source_metrics.to_dict(elapsed, 0)}
+        for stage_metrics, stage_queue in zip(self._stage_metrics, self._queues):
+            metrics[stage_metrics.name] = stage_metrics.to_dict(elapsed, stage_queue.qsize())
+        return metrics
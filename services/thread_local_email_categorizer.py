@@ -0,0 +1,67 @@
+import threading
+from typing import Dict
+
+from utils.logger import get_logger
+from services.email_categorizer_interface import EmailCategorizerInterface
+from services.categorize_emails_llm import LLMCategorizeEmails
+from services.categorize_emails_interface import SimpleEmailCategory
+
+logger = get_logger(__name__)
+
+
+class ThreadLocalEmailCategorizer(EmailCategorizerInterface):
+    """
+    Email categorizer that builds one LLM client per worker thread and model.
+
+    EmailCategorizerService creates a new LLM service (and HTTP connection
+    pool) for every email. When many accounts are processed in parallel,
+    each worker instead keeps its own client for the whole run, so
+    connections are reused without sharing a client between threads.
+    """
+
+    def __init__(self, llm_service_factory):
+        """
+        Initialize the categorizer.
+
+        Args:
+            llm_service_factory: Factory to create LLM service instances
+        """
+        self.llm_service_factory = llm_service_factory
+        self._local = threading.local()
+        self._created = 0
+        self._created_lock = threading.Lock()
+
+    def _get_categorizer(self, model: str) -> LLMCategorizeEmails:
+        categorizers: Dict[str, LLMCategorizeEmails] = getattr(self._local, "categorizers", None)
+        if categorizers is None:
+            categorizers = self._local.categorizers = {}
+        categorizer = categorizers.get(model)
+        if categorizer is None:
+            categorizer = LLMCategorizeEmails(llm_service=self.llm_service_factory.create_service(model))
+            categorizers[model] = categorizer
+            with self._created_lock:
+                self._created += 1
+            logger.debug(f"Created LLM client for {model} in {threading.current_thread().name}")
+        return categorizer
+
+    @property
+    def clients_created(self) -> int:
+        """Number of LLM clients built so far (one per worker thread and model)."""
+        with self._created_lock:
+            return self._created
+
+    def categorize(self, contents: str, model: str) -> str:
+        """
+        Categorize email contents with this thread's client for the model.
+
+        Raises:
+            RuntimeError: If LLM categorization fails (same fail-fast behaviour as EmailCategorizerService)
+        """
+        result = self._get_categorizer(model).category(contents)
+
+        if isinstance(result, SimpleEmailCategory):
+            return result.value
+
+        error_detail = getattr(result, 'detail', str(result))
+        error_type = getattr(result, 'error', 'UnknownError')
+        raise RuntimeError(f"LLM categorization failed: {error_type} - {error_detail}")
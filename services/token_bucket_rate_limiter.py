@@ -0,0 +1,99 @@
+"""
+Blocking token-bucket rate limiter.
+
+Used to pace work that hits external services (e.g. IMAP logins when many
+accounts are processed concurrently) without a fixed sleep between items:
+bursts up to `burst` are allowed immediately, after which acquisitions are
+spaced at `rate_per_second`.
+"""
+import threading
+import time
+from typing import Callable, Optional
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class TokenBucketRateLimiter:
+    """Thread-safe token bucket whose acquire() blocks until a token is available."""
+
+    def __init__(
+        self,
+        rate_per_second: float,
+        burst: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep
+    ):
+        """
+        Initialize the rate limiter.
+
+        Args:
+            rate_per_second: Sustained number of acquisitions allowed per second
+            burst: Maximum number of tokens that can accumulate
+            clock: Monotonic clock (injectable for tests)
+            sleep: Sleep function (injectable for tests)
+
+        Raises:
+            ValueError: If rate_per_second or burst is not positive
+        """
+        if rate_per_second <= 0:
+            raise ValueError("rate_per_second must be positive")
+        if burst < 1:
+            raise ValueError("burst must be at least 1")
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._last_refill = clock()
+        self.total_wait_seconds = 0.0
+
+    def _refill(self) -> None:
+        # Caller holds the lock
+        now = self._clock()
+        elapsed = now - self._last_refill
+        if elapsed > 0:
+            self._tokens = min(self.burst, self._tokens + elapsed * self.rate_per_second)
+            self._last_refill = now
+
+    def try_acquire(self) -> bool:
+        """Take a token if one is available, without blocking."""
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    def acquire(self, timeout: Optional[float] = None, should_continue: Optional[Callable[[], bool]] = None) -> bool:
+        """
+        Block until a token is available.
+
+        Args:
+            timeout: Maximum seconds to wait, or None to wait indefinitely
+            should_continue: Optional callable checked while waiting; returning False aborts the wait
+
+        Returns:
+            True if a token was acquired, False on timeout or abort
+        """
+        started = self._clock()
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    self.total_wait_seconds += self._clock() - started
+                    return True
+                wait = (1 - self._tokens) / self.rate_per_second
+
+            if should_continue is not None and not should_continue():
+                return False
+            if timeout is not None:
+                remaining = timeout - (self._clock() - started)
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            # Wake up at least once a second so aborts are noticed promptly
+            self._sleep(min(wait, 1.0))
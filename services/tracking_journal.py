@@ -0,0 +1,194 @@
+"""
+Append-only journal of tracked emails.
+
+EmailSummaryService used to load and rewrite the whole current_tracking.json
+for every tracked email. The journal appends one JSON line per email
+instead, so tracking an email costs a single write; lines are fsynced in
+batches. The file is read in full only when a summary is generated, and
+compacted into an archive when the tracked data is cleared.
+
+Each line is written with one write() on a file opened with O_APPEND, so
+lines from concurrent writers never interleave. Where fcntl is available,
+appends take a shared lock and compaction an exclusive one, so no line is
+lost between reading the journal and truncating it.
+"""
+import json
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from utils.logger import get_logger
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+logger = get_logger(__name__)
+
+
+def read_tracking_file(path: Union[str, Path]) -> List[Dict[str, Any]]:
+    """
+    Read tracked emails from a journal (.jsonl) or a legacy JSON list file.
+
+    A line that cannot be parsed (e.g. cut short by a crash) is skipped.
+    """
+    path = Path(path)
+    if not path.exists():
+        return []
+    with open(path, "r", encoding="utf-8") as handle:
+        if path.suffix == ".json":
+            data = json.load(handle)
+            return data if isinstance(data, list) else []
+        records = []
+        for line_number, line in enumerate(handle, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError as e:
+                logger.warning(f"Skipping malformed tracking entry at {path}:{line_number}: {e}")
+        return records
+
+
+class TrackingJournal:
+    """JSONL journal of tracked emails with batched fsync and running counts."""
+
+    def __init__(self, path: Union[str, Path], sync_every: int = 50, sync_interval: float = 5.0):
+        """
+        Initialize the journal.
+
+        Args:
+            path: Path of the JSONL journal (created on first append)
+            sync_every: Appends after which the journal is fsynced
+            sync_interval: Seconds after which pending appends are fsynced
+        """
+        self.path = Path(path)
+        self.sync_every = max(1, sync_every)
+        self.sync_interval = sync_interval
+        self._lock = threading.Lock()
+        self._fd: Optional[int] = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._compactions = 0
+        self._entries = 0
+        self._actions: Counter = Counter()
+        self._categories: Counter = Counter()
+        for record in read_tracking_file(self.path):
+            self._count(record)
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """Append one tracked email."""
+        self.append_many([record])
+
+    def append_many(self, records: Iterable[Dict[str, Any]]) -> None:
+        """Append tracked emails with a single write."""
+        records = list(records)
+        if not records:
+            return
+        data = "".join(json.dumps(record, default=str) + "\n" for record in records).encode("utf-8")
+        with self._lock:
+            fd = self._open()
+            with self._file_lock(fd, exclusive=False):
+                os.write(fd, data)
+            for record in records:
+                self._count(record)
+            self._unsynced += len(records)
+            if self._unsynced >= self.sync_every or time.monotonic() - self._last_sync >= self.sync_interval:
+                self._sync_locked()
+
+    def flush(self) -> None:
+        """Fsync appends that are not yet on disk."""
+        with self._lock:
+            self._sync_locked()
+
+    def read(self) -> List[Dict[str, Any]]:
+        """All tracked emails currently in the journal, oldest first."""
+        return read_tracking_file(self.path)
+
+    def compact(self, archive_path: Optional[Union[str, Path]] = None) -> int:
+        """
+        Move the journal's entries to an archive file and empty the journal.
+
+        Args:
+            archive_path: Where to write the entries (as JSONL); they are
+                          discarded when None
+
+        Returns:
+            Number of entries moved
+        """
+        with self._lock:
+            fd = self._open()
+            with self._file_lock(fd, exclusive=True):
+                os.fsync(fd)
+                records = read_tracking_file(self.path)
+                if records and archive_path is not None:
+                    archive_path = Path(archive_path)
+                    tmp_path = archive_path.with_suffix(archive_path.suffix + ".tmp")
+                    with open(tmp_path, "w", encoding="utf-8") as handle:
+                        handle.writelines(json.dumps(record, default=str) + "\n" for record in records)
+                        handle.flush()
+                        os.fsync(handle.fileno())
+                    os.replace(tmp_path, archive_path)
+                os.ftruncate(fd, 0)
+            self._entries = 0
+            self._actions.clear()
+            self._categories.clear()
+            self._unsynced = 0
+            self._last_sync = time.monotonic()
+            self._compactions += 1
+        logger.info(f"Compacted tracking journal {self.path}: {len(records)} entries")
+        return len(records)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Running counts of the entries appended since the last compaction."""
+        with self._lock:
+            return {
+                'entries': self._entries,
+                'actions': dict(self._actions),
+                'categories': dict(self._categories),
+                'unsynced': self._unsynced,
+                'compactions': self._compactions,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fd is not None:
+                self._sync_locked()
+                os.close(self._fd)
+                self._fd = None
+
+    def _count(self, record: Dict[str, Any]) -> None:
+        self._entries += 1
+        action = record.get('action', '')
+        self._actions[str(getattr(action, 'value', action))] += 1
+        self._categories[str(record.get('category', ''))] += 1
+
+    def _open(self) -> int:
+        if self._fd is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        return self._fd
+
+    def _sync_locked(self) -> None:
+        if self._fd is not None and self._unsynced:
+            os.fsync(self._fd)
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    @staticmethod
+    @contextmanager
+    def _file_lock(fd: int, exclusive: bool):
+        if fcntl is None:
+            yield
+            return
+        fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
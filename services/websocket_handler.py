@@ -200,6 +200,7 @@ class StatusWebSocketManager:
         try:
             # Get current status and statistics
             current_status = self.status_manager.get_current_status()
+            aggregate_status = self.status_manager.get_aggregate_status()
             recent_runs = self.status_manager.get_recent_runs(limit=5)
             statistics = self.status_manager.get_statistics()
             
@@ -208,6 +209,7 @@ class StatusWebSocketManager:
                 "type": "status_update",
                 "data": {
                     "current_processing": current_status,
+                    "active_sessions": aggregate_status,
                     "recent_runs": recent_runs,
                     "statistics": statistics,
                     "client_count": len(self.clients)
@@ -292,10 +294,12 @@ class StatusWebSocketManager:
                 
             elif message_type == "get_current_status":
                 # Send current processing status
-                current_status = self.status_manager.get_current_status()
+                account = message.get("email_address")
+                current_status = self.status_manager.get_current_status(email_address=account)
                 response = {
                     "type": "current_status",
                     "data": current_status,
+                    "active_sessions": self.status_manager.get_aggregate_status(),
                     "timestamp": datetime.now(timezone.utc).isoformat()
                 }
                 await self.send_to_client(websocket, response)
@@ -342,6 +346,7 @@ class StatusWebSocketManager:
                     "type": "status_update",
                     "data": {
                         "current_processing": current_status,
+                        "active_sessions": self.status_manager.get_aggregate_status(),
                         "recent_runs": self.status_manager.get_recent_runs(limit=3),
                         "statistics": self.status_manager.get_statistics()
                     },
@@ -0,0 +1,23 @@
+-- V12__add_processing_run_llm_usage.sql
+-- Per-model LLM usage summary recorded for each processing run
+
+CREATE TABLE IF NOT EXISTS processing_run_llm_usage (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    processing_run_id INT NOT NULL,
+    model VARCHAR(255) NOT NULL,
+    calls INT NOT NULL DEFAULT 0,
+    successes INT NOT NULL DEFAULT 0,
+    parse_failures INT NOT NULL DEFAULT 0,
+    failures INT NOT NULL DEFAULT 0,
+    retries INT NOT NULL DEFAULT 0,
+    prompt_tokens INT NOT NULL DEFAULT 0,
+    completion_tokens INT NOT NULL DEFAULT 0,
+    avg_latency_ms DOUBLE,
+    p50_latency_ms DOUBLE,
+    p95_latency_ms DOUBLE,
+    max_latency_ms DOUBLE,
+    estimated_cost_usd DOUBLE DEFAULT 0,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_run_llm_usage_run (processing_run_id),
+    FOREIGN KEY (processing_run_id) REFERENCES processing_runs(id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
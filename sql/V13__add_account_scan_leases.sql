@@ -0,0 +1,15 @@
+-- V13__add_account_scan_leases.sql
+-- Expiring, heartbeat-renewed leases so several processor instances can share
+-- one database without scanning the same account concurrently
+
+CREATE TABLE IF NOT EXISTS account_scan_leases (
+    account_email VARCHAR(255) NOT NULL PRIMARY KEY,
+    owner_id VARCHAR(255),
+    lease_version INT NOT NULL DEFAULT 0,
+    lease_expires_at DATETIME(6),
+    heartbeat_at DATETIME(6),
+    next_scan_at DATETIME(6),
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    INDEX idx_scan_leases_expires (lease_expires_at),
+    INDEX idx_scan_leases_next_scan (next_scan_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
@@ -0,0 +1,13 @@
+-- V14__add_account_run_checkpoints.sql
+-- Per-account progress of in-flight processing runs. A row that is still
+-- present when the next run starts marks an interrupted run to resume.
+
+CREATE TABLE IF NOT EXISTS account_run_checkpoints (
+    account_email VARCHAR(255) NOT NULL PRIMARY KEY,
+    run_id VARCHAR(64),
+    window_start DATETIME(6) NOT NULL,
+    started_at DATETIME(6) NOT NULL,
+    resumed_runs INT NOT NULL DEFAULT 0,
+    messages_checkpointed INT NOT NULL DEFAULT 0,
+    last_checkpoint_at DATETIME(6)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
@@ -0,0 +1,17 @@
+-- V15__add_processing_run_budget_hits.sql
+-- Per-account time/message budget hits; runs that stop at their budget are
+-- marked 'partial' and record where the next run continues
+
+CREATE TABLE IF NOT EXISTS processing_run_budget_hits (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    processing_run_id INT NOT NULL,
+    reason VARCHAR(32) NOT NULL,
+    messages_processed INT NOT NULL DEFAULT 0,
+    elapsed_seconds DOUBLE,
+    max_seconds INT,
+    max_messages INT,
+    continuation_cursor TEXT,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_run_budget_hits_run (processing_run_id),
+    FOREIGN KEY (processing_run_id) REFERENCES processing_runs(id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
@@ -0,0 +1,21 @@
+-- V16__add_outbox_events.sql
+-- Transactional outbox: side effects of processing runs (recommendation
+-- emails, category statistics and tallies) are queued here and delivered
+-- by a background dispatcher with retries
+
+CREATE TABLE IF NOT EXISTS outbox_events (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    event_type VARCHAR(64) NOT NULL,
+    account_email VARCHAR(255),
+    processing_run_id VARCHAR(64),
+    payload TEXT NOT NULL,
+    status VARCHAR(16) NOT NULL DEFAULT 'pending',
+    attempts INT NOT NULL DEFAULT 0,
+    available_at DATETIME(6) NOT NULL,
+    locked_by VARCHAR(128),
+    locked_until DATETIME(6),
+    last_error TEXT,
+    created_at DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+    delivered_at DATETIME(6),
+    INDEX idx_outbox_status_available (status, available_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
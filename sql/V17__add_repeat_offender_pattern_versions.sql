@@ -0,0 +1,9 @@
+-- V17__add_repeat_offender_pattern_versions.sql
+-- Per-account version stamps for repeat offender patterns; processes cache
+-- a compiled matcher per account and rebuild it when the stamp changes
+
+CREATE TABLE IF NOT EXISTS repeat_offender_pattern_versions (
+    account_name VARCHAR(255) PRIMARY KEY,
+    version INT NOT NULL DEFAULT 0,
+    updated_at DATETIME NOT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
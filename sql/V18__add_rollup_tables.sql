@@ -0,0 +1,37 @@
+-- V18__add_rollup_tables.sql
+-- Day/week/month rollups of email summaries and week/month rollups of
+-- category tallies, kept up to date as summaries and tallies are written;
+-- existing history is rolled up by the application on first use
+
+CREATE TABLE IF NOT EXISTS summary_rollups (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    period VARCHAR(8) NOT NULL,
+    period_start DATE NOT NULL,
+    account_id INT NOT NULL DEFAULT 0,
+    dimension VARCHAR(16) NOT NULL,
+    `key` VARCHAR(255) NOT NULL DEFAULT '',
+    sender_name VARCHAR(255) NOT NULL DEFAULT '',
+    is_blocked BOOLEAN NOT NULL DEFAULT FALSE,
+    email_count INT NOT NULL DEFAULT 0,
+    deleted_count INT NOT NULL DEFAULT 0,
+    archived_count INT NOT NULL DEFAULT 0,
+    skipped_count INT NOT NULL DEFAULT 0,
+    duration_seconds DOUBLE NOT NULL DEFAULT 0,
+    duration_count INT NOT NULL DEFAULT 0,
+    summary_count INT NOT NULL DEFAULT 0,
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY uq_summary_rollup (period, period_start, account_id, dimension, `key`, sender_name, is_blocked),
+    INDEX idx_summary_rollup_period (period, period_start, dimension)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE IF NOT EXISTS category_tally_rollups (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    email_address VARCHAR(255) NOT NULL,
+    period VARCHAR(8) NOT NULL,
+    period_start DATE NOT NULL,
+    category VARCHAR(100) NOT NULL,
+    count INT NOT NULL DEFAULT 0,
+    days_with_data INT NOT NULL DEFAULT 0,
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY uq_tally_rollup (email_address, period, period_start, category)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
@@ -0,0 +1,8 @@
+-- V19__add_rollup_backfills.sql
+-- Marker row claimed by the first process that checks the rollup tables for
+-- history to backfill, so instances sharing the database backfill only once
+
+CREATE TABLE IF NOT EXISTS rollup_backfills (
+    name VARCHAR(64) NOT NULL PRIMARY KEY,
+    completed_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
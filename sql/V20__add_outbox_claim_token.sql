@@ -0,0 +1,27 @@
+-- V20__add_outbox_claim_token.sql
+-- Token written by the dispatcher claim that locked an outbox event. Claimed
+-- events are read back by this token instead of by locked_until, whose
+-- stored precision may differ from the value written.
+-- Uses idempotent pattern to safely handle cases where the column already exists
+
+DELIMITER //
+
+CREATE PROCEDURE add_outbox_claim_token_v20()
+BEGIN
+    IF NOT EXISTS (
+        SELECT * FROM INFORMATION_SCHEMA.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE()
+        AND TABLE_NAME = 'outbox_events'
+        AND COLUMN_NAME = 'claim_token'
+    ) THEN
+        ALTER TABLE outbox_events ADD COLUMN claim_token VARCHAR(32) AFTER locked_until;
+    END IF;
+END //
+
+DELIMITER ;
+
+-- Execute the procedure
+CALL add_outbox_claim_token_v20();
+
+-- Clean up the procedure
+DROP PROCEDURE IF EXISTS add_outbox_claim_token_v20;
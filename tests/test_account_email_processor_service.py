@@ -235,6 +235,23 @@ class TestAccountEmailProcessorService(unittest.TestCase):
 
         self.assertIsNotNone(error_call, "Status manager should have been updated with ERROR state")
         self.mock_processing_status_manager.complete_processing.assert_called()
+        self.current_fetcher.disconnect.assert_called_once()
+
+    def test_process_account_disconnects_when_run_fails_after_connecting(self):
+        """A failure after connecting still disconnects, freeing the account's IMAP slot."""
+        account = self.account_category_client.get_or_create_account(self.test_email, None, None, None, None)
+        account.app_password = self.test_password
+        self.mock_settings_service.get_lookback_hours.return_value = 2
+
+        self.current_fetcher = Mock()
+        self.current_fetcher.get_recent_emails.side_effect = Exception("Connection reset by peer")
+        self.current_fetcher.summary_service = Mock()
+
+        result = self.service.process_account(self.test_email)
+
+        self.assertFalse(result['success'])
+        self.current_fetcher.connect.assert_called_once()
+        self.current_fetcher.disconnect.assert_called_once()
 
     def test_process_account_no_new_emails(self):
         """Test process_account when no new emails are found."""
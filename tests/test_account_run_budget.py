@@ -0,0 +1,132 @@
+"""
+Tests for per-account time and message budgets on processing runs.
+"""
+import os
+import tempfile
+import unittest
+from collections import Counter
+from unittest.mock import Mock
+
+from repositories.sqlalchemy_repository import SQLAlchemyRepository
+from services.account_email_processor_service import AccountEmailProcessorService
+from services.account_run_budget import BUDGET_MESSAGES, BUDGET_TIME, AccountRunBudget
+from services.database_service import DatabaseService
+from services.email_pipeline_config import EmailPipelineConfig
+from services.fake_email_categorizer import FakeEmailCategorizer
+from services.fake_email_deduplication_client import FakeEmailDeduplicationClient
+from services.processing_status_manager import ProcessingStatusManager
+from tests.fake_account_category_client import FakeAccountCategoryClient
+from tests.fake_gmail_fetcher import FakeGmailFetcher
+
+ACCOUNT = "user@example.com"
+
+
+class TestAccountRunBudget(unittest.TestCase):
+
+    def test_message_budget_is_only_exhausted_when_more_emails_wait(self):
+        budget = AccountRunBudget(max_messages=2)
+        self.assertTrue(budget.admit())
+        self.assertTrue(budget.admit())
+        self.assertIsNone(budget.exhausted)
+
+        self.assertFalse(budget.admit())
+        self.assertEqual(budget.exhausted, BUDGET_MESSAGES)
+        self.assertEqual(budget.messages, 2)
+
+    def test_time_budget_stops_the_source(self):
+        now = [0.0]
+        budget = AccountRunBudget(max_seconds=10, clock=lambda: now[0])
+
+        pulled = []
+        for item in budget.limit(range(100)):
+            pulled.append(item)
+            now[0] += 4
+
+        self.assertEqual(pulled, [0, 1, 2])
+        self.assertEqual(budget.exhausted, BUDGET_TIME)
+        self.assertFalse(budget.admit())
+
+    def test_zero_limits_disable_the_budget(self):
+        budget = AccountRunBudget()
+        self.assertFalse(budget.enabled)
+        self.assertTrue(all(budget.admit() for _ in range(1000)))
+
+
+class TestProcessAccountBudget(unittest.TestCase):
+
+    def setUp(self):
+        self.account_client = FakeAccountCategoryClient()
+        account = self.account_client.get_or_create_account(ACCOUNT, None, None, None, None)
+        account.app_password = "app-password"
+
+        self.fetcher = FakeGmailFetcher()
+        self.fetcher.summary_service = Mock()
+        self.fetcher.summary_service.run_metrics = {'fetched': 0}
+        self.fetcher.summary_service.db_service = None
+        self.fetcher.account_service = self.account_client
+        self.fetcher.stats = {'deleted': 0, 'kept': 0, 'categories': Counter()}
+        for i in range(12):
+            self.fetcher.add_test_email(subject=f"Sale {i}", body="buy now", sender="news@shop.com")
+
+        dedup_factory = Mock()
+        dedup_factory.create_deduplication_client.return_value = FakeEmailDeduplicationClient(ACCOUNT)
+        settings = Mock()
+        settings.get_lookback_hours.return_value = 2
+        self.status_manager = ProcessingStatusManager()
+        self.service = AccountEmailProcessorService(
+            processing_status_manager=self.status_manager,
+            settings_service=settings,
+            email_categorizer=FakeEmailCategorizer(default_category="Marketing"),
+            api_token="token",
+            llm_model="test-model",
+            account_category_client=self.account_client,
+            deduplication_factory=dedup_factory,
+            create_gmail_fetcher=lambda email, pwd, token: self.fetcher,
+            pipeline_config=EmailPipelineConfig(account_message_budget=5),
+        )
+
+    def test_backlog_is_spread_over_partial_runs(self):
+        results = [self.service.process_account(ACCOUNT) for _ in range(3)]
+
+        self.assertEqual([r["emails_processed"] for r in results], [5, 5, 2])
+        self.assertEqual([r["budget_exhausted"] for r in results], [BUDGET_MESSAGES, BUDGET_MESSAGES, None])
+        self.assertIsNotNone(results[0]["continuation_cursor"])
+        self.assertIsNone(results[2]["continuation_cursor"])
+
+        budget_hit = self.fetcher.summary_service.complete_processing_run.call_args_list[0].kwargs["budget_hit"]
+        self.assertEqual((budget_hit["exhausted"], budget_hit["messages"]), (BUDGET_MESSAGES, 5))
+
+        history = self.status_manager.get_recent_runs(limit=3)
+        self.assertEqual(
+            sorted(run["run_budget"]["exhausted"] or "none" for run in history),
+            ["messages", "messages", "none"]
+        )
+
+
+class TestBudgetHitPersistence(unittest.TestCase):
+
+    def setUp(self):
+        handle, self.db_path = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+        self.repository = SQLAlchemyRepository(self.db_path)
+
+    def tearDown(self):
+        self.repository.disconnect()
+        os.unlink(self.db_path)
+
+    def test_budget_hit_marks_run_partial(self):
+        run_id = self.repository.create_processing_run(ACCOUNT)
+        self.repository.complete_processing_run(run_id, {'processed': 5})
+        self.repository.save_processing_run_budget_hit(run_id, {
+            'exhausted': BUDGET_TIME, 'messages': 5, 'elapsed_seconds': 61.2,
+            'max_seconds': 60, 'max_messages': 0, 'continuation_cursor': '2026-01-01T10:00:00',
+        })
+
+        self.assertEqual(self.repository.get_processing_run(run_id).state, 'partial')
+        [hit] = DatabaseService(repository=self.repository).get_processing_run_budget_hits(run_id)
+        self.assertEqual((hit['reason'], hit['messages_processed'], hit['max_messages']), (BUDGET_TIME, 5, None))
+        self.assertEqual(hit['continuation_cursor'], '2026-01-01T10:00:00')
+
+
+if __name__ == "__main__":
+    unittest.main()
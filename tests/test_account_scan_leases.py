@@ -0,0 +1,129 @@
+"""
+Tests for database-leased account scanning shared by several processor instances.
+"""
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import Mock
+
+from models.database import init_database
+from repositories.account_lease_repository import AccountLeaseRepository
+from services.account_lease_service import AccountLeaseService
+from services.adaptive_scan_scheduler import AdaptiveScanScheduler
+from services.background_processor_service import BackgroundProcessorService
+
+ACCOUNTS = ["a@example.com", "b@example.com", "c@example.com"]
+
+
+class _Clock:
+    def __init__(self):
+        self.now = datetime(2026, 1, 1, 12, 0, 0)
+
+    def __call__(self):
+        return self.now
+
+
+class TestAccountLeaseRepository(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.engine = init_database(os.path.join(self.temp_dir.name, "leases.db"))
+        self.clock = _Clock()
+        self.repository = AccountLeaseRepository(self.engine, clock=self.clock)
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.temp_dir.cleanup()
+
+    def test_two_owners_never_claim_the_same_account(self):
+        first = self.repository.claim("worker-1", ACCOUNTS, ttl_seconds=60, limit=2)
+        second = self.repository.claim("worker-2", ACCOUNTS, ttl_seconds=60)
+
+        first_emails = {lease.account_email for lease in first}
+        second_emails = {lease.account_email for lease in second}
+        self.assertEqual(len(first_emails), 2)
+        self.assertFalse(first_emails & second_emails)
+        self.assertEqual(first_emails | second_emails, set(ACCOUNTS))
+
+    def test_expired_lease_is_reclaimed_and_fences_out_old_owner(self):
+        [stale] = self.repository.claim("worker-1", ACCOUNTS[:1], ttl_seconds=60)
+
+        self.clock.now += timedelta(seconds=61)
+        [fresh] = self.repository.claim("worker-2", ACCOUNTS[:1], ttl_seconds=60)
+
+        self.assertGreater(fresh.version, stale.version)
+        self.assertEqual(self.repository.renew([stale], 60), {ACCOUNTS[0]})
+        self.assertFalse(self.repository.release(stale))
+        self.assertEqual(self.repository.get_leases()[ACCOUNTS[0]]["owner_id"], "worker-2")
+        self.assertEqual(self.repository.renew([fresh], 60), set())
+
+    def test_next_scan_time_blocks_claims_unless_forced(self):
+        [lease] = self.repository.claim("worker-1", ACCOUNTS[:1], ttl_seconds=60)
+        self.assertTrue(self.repository.release(lease, next_scan_at=self.clock.now + timedelta(minutes=5)))
+
+        self.assertEqual(self.repository.claim("worker-2", ACCOUNTS[:1], ttl_seconds=60), [])
+        self.assertEqual(len(self.repository.claim("worker-2", ACCOUNTS[:1], ttl_seconds=60, ignore_next_scan=True)), 1)
+
+
+class TestBackgroundProcessorLeases(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.engine = init_database(os.path.join(self.temp_dir.name, "leases.db"))
+        self.repository = AccountLeaseRepository(self.engine)
+        self.settings = Mock()
+        self.settings.repository.is_connected.return_value = True
+        self.settings.get_lookback_hours.return_value = 2
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.temp_dir.cleanup()
+
+    def _processor(self, owner_id, processed, scheduler=None):
+        def process(email_address):
+            processed.append(email_address)
+            return {"success": True, "emails_processed": 0}
+
+        return BackgroundProcessorService(
+            process_account_callback=process,
+            settings_service=self.settings,
+            scan_interval=300,
+            background_enabled=True,
+            max_workers=2,
+            scheduler=scheduler,
+            lease_manager=AccountLeaseService(self.repository, owner_id=owner_id, ttl_seconds=60),
+        )
+
+    def test_accounts_held_by_another_instance_are_skipped(self):
+        other = AccountLeaseService(self.repository, owner_id="other", ttl_seconds=60)
+        self.assertEqual(other.claim(ACCOUNTS[:1]), ACCOUNTS[:1])
+
+        processed = []
+        processor = self._processor("mine", processed)
+        processor._process_accounts(processor._claim_accounts(ACCOUNTS))
+
+        self.assertEqual(sorted(processed), ACCOUNTS[1:])
+        self.assertEqual(processor.lease_manager.held_accounts(), [])
+        # Released accounts are not due again for another instance until the next interval
+        self.assertEqual(AccountLeaseService(self.repository, owner_id="third").claim(ACCOUNTS), [])
+
+    def test_scheduler_defers_unclaimed_accounts_and_forces_through_next_scan_time(self):
+        scheduler = AdaptiveScanScheduler(base_interval=300, min_interval=60, max_interval=600)
+        scheduler.sync_accounts(ACCOUNTS[:2])
+        processor = self._processor("mine", [], scheduler=scheduler)
+        other = AccountLeaseService(self.repository, owner_id="other", ttl_seconds=60)
+        other.claim(ACCOUNTS[:1])
+
+        claimed = processor._claim_due(scheduler.pop_due())
+
+        self.assertEqual(claimed, ACCOUNTS[1:2])
+        self.assertFalse(scheduler.get_schedule()[ACCOUNTS[0]]["in_flight"])
+        processor.lease_manager.release(ACCOUNTS[1], next_scan_in=scheduler.record_result(ACCOUNTS[1], 0))
+
+        scheduler.request_force(ACCOUNTS[1])
+        self.assertEqual(processor._claim_due(scheduler.pop_due()), ACCOUNTS[1:2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+"""
+Tests for adaptive per-account scan scheduling.
+"""
+import threading
+import time
+import unittest
+from unittest.mock import Mock
+
+from services.adaptive_scan_scheduler import AdaptiveScanScheduler
+from services.background_processor_service import BackgroundProcessorService
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestAdaptiveScanScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = _Clock()
+        self.scheduler = AdaptiveScanScheduler(
+            base_interval=300, min_interval=60, max_interval=1800,
+            target_emails_per_scan=5, backoff_factor=2, smoothing=1.0, clock=self.clock
+        )
+        self.scheduler.sync_accounts(["busy@example.com", "quiet@example.com"])
+
+    def _scan(self, email_address, new_emails):
+        self.assertIn(email_address, self.scheduler.pop_due())
+        return self.scheduler.record_result(email_address, new_emails)
+
+    def test_new_accounts_are_due_immediately_and_not_popped_twice(self):
+        self.assertEqual(sorted(self.scheduler.pop_due()), ["busy@example.com", "quiet@example.com"])
+        self.assertEqual(self.scheduler.pop_due(), [])
+
+    def test_quiet_accounts_back_off_and_busy_accounts_speed_up(self):
+        self.scheduler.pop_due()
+        self.scheduler.record_result("busy@example.com", 5)
+        self.scheduler.record_result("quiet@example.com", 0)
+
+        self.clock.now += 300
+        self.assertEqual(self._scan("busy@example.com", 20), 75.0)  # 5 / (20 / 300s)
+        self.clock.now += 600
+        for _ in range(5):
+            next_in = self._scan("quiet@example.com", 0)
+            self.clock.now += next_in
+        self.assertEqual(next_in, 1800)  # backed off to max_interval
+
+        self.clock.now += 1000
+        self.scheduler.pop_due()
+        self.assertEqual(self.scheduler.record_result("busy@example.com", 5000), 60)  # clamped to min_interval
+
+    def test_interval_cap_keeps_scans_inside_lookback_window(self):
+        self.scheduler.cap_max_interval(900)
+        self.scheduler.pop_due()
+        self.assertEqual(self.scheduler.record_result("quiet@example.com", 0), 600)
+        self.clock.now += 600
+        self.scheduler.pop_due()
+        self.assertEqual(self.scheduler.record_result("quiet@example.com", 0), 900)
+
+    def test_forced_accounts_pop_first_and_in_flight_force_is_deferred(self):
+        self.scheduler.pop_due()
+        self.scheduler.record_result("busy@example.com", 0)
+        self.scheduler.record_result("quiet@example.com", 0)
+        self.clock.now += 10000
+
+        self.scheduler.request_force("quiet@example.com")
+        self.assertEqual(self.scheduler.pop_due(limit=1), ["quiet@example.com"])
+
+        self.scheduler.request_force("quiet@example.com")
+        self.assertEqual(self.scheduler.pop_due(), ["busy@example.com"])
+        self.assertEqual(self.scheduler.record_result("quiet@example.com", 1), 0.0)
+        self.assertEqual(self.scheduler.pop_due(), ["quiet@example.com"])
+
+    def test_removed_accounts_are_dropped(self):
+        self.scheduler.sync_accounts(["busy@example.com"])
+        self.assertEqual(self.scheduler.pop_due(), ["busy@example.com"])
+        self.assertEqual(list(self.scheduler.get_schedule()), ["busy@example.com"])
+
+
+class TestBackgroundProcessorScheduledMode(unittest.TestCase):
+
+    def test_due_accounts_are_fed_to_worker_pool_and_rescheduled(self):
+        processed = []
+        done = threading.Event()
+
+        def process(email_address):
+            processed.append(email_address)
+            if len(processed) >= 2:
+                done.set()
+            return {"success": True, "emails_processed": 3}
+
+        settings_service = Mock()
+        settings_service.repository.is_connected.return_value = True
+        settings_service.get_lookback_hours.return_value = 2
+        settings_service.repository.get_all_accounts.return_value = []
+        scheduler = AdaptiveScanScheduler(base_interval=300, min_interval=60, max_interval=1800)
+        service = BackgroundProcessorService(
+            process_account_callback=process,
+            settings_service=settings_service,
+            scan_interval=300,
+            background_enabled=True,
+            max_workers=2,
+            scheduler=scheduler,
+        )
+        service._sync_scheduled_accounts = lambda: scheduler.sync_accounts(["a@example.com", "b@example.com"])
+
+        worker = threading.Thread(target=service.run)
+        worker.start()
+        try:
+            self.assertTrue(done.wait(5))
+            deadline = time.monotonic() + 5
+            while time.monotonic() < deadline and any(s["scans"] == 0 for s in scheduler.get_schedule().values()):
+                time.sleep(0.01)
+            self.assertTrue(service.request_force_scan("a@example.com"))
+        finally:
+            service.stop()
+            worker.join(5)
+
+        self.assertFalse(worker.is_alive())
+        self.assertEqual(sorted(processed[:2]), ["a@example.com", "b@example.com"])
+        schedule = scheduler.get_schedule()
+        self.assertEqual(schedule["b@example.com"]["scans"], 1)
+        self.assertEqual(schedule["b@example.com"]["last_yield"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+"""
+Tests for concurrent account processing in BackgroundProcessorService.
+"""
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import Mock
+
+from repositories.sqlalchemy_repository import SQLAlchemyRepository
+from services.background_processor_service import BackgroundProcessorService
+from services.token_bucket_rate_limiter import TokenBucketRateLimiter
+
+
+def _make_service(callback, max_workers=1, rate_limiter=None, aggregator=None):
+    settings_service = Mock()
+    settings_service.repository.is_connected.return_value = True
+    return BackgroundProcessorService(
+        process_account_callback=callback,
+        settings_service=settings_service,
+        scan_interval=60,
+        background_enabled=True,
+        category_aggregator=aggregator,
+        max_workers=max_workers,
+        account_rate_limiter=rate_limiter,
+    )
+
+
+class TestBackgroundWorkerPool(unittest.TestCase):
+
+    def test_cycle_time_scales_with_slowest_account(self):
+        def process(email_address):
+            time.sleep(0.3)
+            return {"success": True, "emails_processed": 2}
+
+        service = _make_service(process, max_workers=4)
+        started = time.monotonic()
+        processed, errors = service._process_accounts([f"user{i}@example.com" for i in range(4)])
+        elapsed = time.monotonic() - started
+
+        self.assertEqual((processed, errors), (8, 0))
+        self.assertLess(elapsed, 0.9)
+
+    def test_failing_account_is_isolated(self):
+        def process(email_address):
+            if email_address == "bad@example.com":
+                raise RuntimeError("IMAP exploded")
+            return {"success": True, "emails_processed": 1, "category_counts": {"Marketing": {"total": 1}}}
+
+        aggregator = Mock()
+        service = _make_service(process, max_workers=2, aggregator=aggregator)
+        processed, errors = service._process_accounts(["a@example.com", "bad@example.com", "b@example.com"])
+
+        self.assertEqual((processed, errors), (2, 1))
+        self.assertEqual(aggregator.record_batch.call_count, 2)
+
+    def test_stopped_service_does_not_start_accounts(self):
+        callback = Mock(return_value={"success": True})
+        service = _make_service(callback, max_workers=2)
+        service.stop()
+
+        self.assertEqual(service._process_accounts(["a@example.com"]), (0, 1))
+        callback.assert_not_called()
+
+
+class TestTokenBucketRateLimiter(unittest.TestCase):
+
+    def test_burst_then_paced_acquisitions(self):
+        now = [0.0]
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            now[0] += seconds
+
+        limiter = TokenBucketRateLimiter(rate_per_second=0.5, burst=2, clock=lambda: now[0], sleep=sleep)
+        self.assertTrue(limiter.acquire())
+        self.assertTrue(limiter.acquire())
+        self.assertFalse(limiter.try_acquire())
+
+        self.assertTrue(limiter.acquire())
+        self.assertAlmostEqual(sum(sleeps), 2.0)
+
+    def test_acquire_aborts_when_told_to_stop(self):
+        limiter = TokenBucketRateLimiter(rate_per_second=0.01, burst=1, sleep=lambda s: None)
+        limiter.acquire()
+        self.assertFalse(limiter.acquire(should_continue=lambda: False))
+
+
+class TestRepositoryThreadSessions(unittest.TestCase):
+
+    def test_each_thread_gets_its_own_session(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            repository = SQLAlchemyRepository(os.path.join(temp_dir, "test.db"))
+            sessions = []
+            worker = threading.Thread(target=lambda: sessions.append(repository._get_session()))
+            worker.start()
+            worker.join()
+
+            main_session = repository._get_session()
+            self.assertIs(main_session, repository._get_session())
+            self.assertIsNot(main_session, sessions[0])
+            repository.disconnect()
+
+    def test_sessions_return_their_connections_when_threads_finish(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            repository = SQLAlchemyRepository(os.path.join(temp_dir, "test.db"))
+            workers = [threading.Thread(target=repository.get_all_accounts, args=(True,)) for _ in range(8)]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+
+            self.assertEqual(repository.engine.pool.checkedout(), 0)
+            repository.disconnect()
+
+    def test_released_session_returns_its_connection(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            repository = SQLAlchemyRepository(os.path.join(temp_dir, "test.db"))
+            session = repository._get_session()
+            repository.get_all_accounts(True)
+            self.assertEqual(repository.engine.pool.checkedout(), 1)
+
+            repository.release_session()
+            self.assertEqual(repository.engine.pool.checkedout(), 0)
+            self.assertIsNot(repository._get_session(), session)
+            repository.disconnect()
+
+
+if __name__ == "__main__":
+    unittest.main()
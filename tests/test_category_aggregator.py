@@ -61,16 +61,12 @@ class FakeCategoryTallyRepository:
         # Get existing tally if any
         existing = self._tallies.get(key)
         if existing:
-            # Merge category counts
-            merged_counts = existing.category_counts.copy()
-            for cat, count in category_counts.items():
-                merged_counts[cat] = merged_counts.get(cat, 0) + count
-
+            # Replace category counts, like the real repository
             tally = DailyCategoryTally(
                 id=existing.id,
                 email_address=email_address,
                 tally_date=tally_date,
-                category_counts=merged_counts,
+                category_counts=category_counts.copy(),
                 total_emails=total_emails,
                 created_at=existing.created_at,
                 updated_at=now
@@ -0,0 +1,119 @@
+"""
+Tests for the category aggregator's background flusher and write-ahead journal.
+"""
+import tempfile
+import threading
+import time
+import unittest
+from datetime import date, datetime
+from pathlib import Path
+
+from services.category_aggregator_service import CategoryAggregator
+
+DAY = datetime(2025, 11, 28, 10)
+
+
+class RecordingTallyRepository:
+    """Adds counts in memory and remembers which thread wrote them."""
+
+    def __init__(self):
+        self.tallies = {}
+        self.writer_threads = []
+        self.fail = False
+
+    def add_to_daily_tallies(self, increments):
+        if self.fail:
+            raise RuntimeError("database unavailable")
+        self.writer_threads.append(threading.current_thread().name)
+        for key, counts in increments.items():
+            stored = self.tallies.setdefault(key, {})
+            for category, count in counts.items():
+                stored[category] = stored.get(category, 0) + count
+        return sum(len(counts) for counts in increments.values())
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TestCategoryAggregatorJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.journal_dir = str(Path(self.temp_dir.name) / "journal")
+        self.repository = RecordingTallyRepository()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_unflushed_counts_are_replayed_after_a_restart(self):
+        aggregator = CategoryAggregator(self.repository, buffer_size=100, journal_dir=self.journal_dir)
+        aggregator.record_batch("a@gmail.com", {"Marketing": 3, "Personal": 1}, DAY)
+        aggregator.record_category("a@gmail.com", "Marketing", DAY)
+        # The process dies without flushing
+
+        restarted = CategoryAggregator(self.repository, buffer_size=100, journal_dir=self.journal_dir)
+        self.assertEqual(restarted.get_buffer_contents(), {("a@gmail.com", date(2025, 11, 28)): {"Marketing": 4, "Personal": 1}})
+        self.assertEqual(restarted.get_metrics()["replayed"], 5)
+
+        restarted.stop()
+        self.assertEqual(self.repository.tallies, {("a@gmail.com", date(2025, 11, 28)): {"Marketing": 4, "Personal": 1}})
+        self.assertEqual(list(Path(self.journal_dir).iterdir()), [])
+        self.assertEqual(CategoryAggregator(self.repository, 100, journal_dir=self.journal_dir).get_buffer_contents(), {})
+
+    def test_failed_flush_keeps_counts_buffered_and_journaled(self):
+        aggregator = CategoryAggregator(self.repository, buffer_size=100, journal_dir=self.journal_dir)
+        aggregator.record_batch("a@gmail.com", {"Marketing": 2}, DAY)
+        self.repository.fail = True
+        with self.assertRaises(RuntimeError):
+            aggregator.flush()
+        aggregator.record_batch("a@gmail.com", {"Marketing": 1}, DAY)
+
+        self.assertEqual(aggregator.get_buffer_total_for_account_date("a@gmail.com", date(2025, 11, 28)), 3)
+        self.assertEqual(CategoryAggregator(self.repository, 100, journal_dir=self.journal_dir).get_buffer_count_for_account("a@gmail.com"), 3)
+
+        self.repository.fail = False
+        aggregator.flush()
+        metrics = aggregator.get_metrics()
+        self.assertEqual((metrics["flushes"], metrics["flush_failures"], metrics["flushed_counts"]), (1, 1, 3))
+        self.assertEqual((metrics["buffered"], metrics["buffered_tallies"]), (0, 0))
+        self.assertEqual(list(Path(self.journal_dir).iterdir()), [])
+
+
+class TestCategoryAggregatorBackgroundFlusher(unittest.TestCase):
+
+    def setUp(self):
+        self.repository = RecordingTallyRepository()
+
+    def test_full_buffer_is_flushed_by_the_flusher_thread(self):
+        aggregator = CategoryAggregator(self.repository, buffer_size=5, flush_interval=60)
+        aggregator.start()
+        try:
+            self.assertTrue(aggregator.flushes_in_background)
+            aggregator.record_batch("a@gmail.com", {"Marketing": 5}, DAY)
+            self.assertTrue(wait_for(lambda: aggregator.get_metrics()["flushes"] == 1))
+        finally:
+            aggregator.stop()
+
+        self.assertEqual(self.repository.writer_threads, ["CategoryAggregatorFlusher"])
+        self.assertFalse(aggregator.flushes_in_background)
+        self.assertIsNotNone(aggregator.get_metrics()["last_flush_seconds"])
+
+    def test_buffered_counts_are_flushed_after_the_interval(self):
+        aggregator = CategoryAggregator(self.repository, buffer_size=1000, flush_interval=0.05)
+        aggregator.start()
+        try:
+            aggregator.record_category("a@gmail.com", "Personal", DAY)
+            self.assertTrue(wait_for(lambda: self.repository.tallies))
+        finally:
+            aggregator.stop()
+        self.assertEqual(self.repository.tallies, {("a@gmail.com", date(2025, 11, 28)): {"Personal": 1}})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+"""
+Tests for Category Tally Repository - bulk additive upserts.
+
+Scenario: Flushing buffered counts for several accounts and days
+    Given tallies already exist for some accounts, dates and categories
+    When the aggregator flushes counts for many (account, date, category) keys
+    Then existing counts are incremented, new ones inserted
+    And total_emails is the sum of each tally's counts
+    And the week and month rollups are updated with them
+    And the flush runs as a handful of statements in one transaction
+"""
+import os
+import tempfile
+import unittest
+from datetime import date, datetime
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from models.database import Base
+from repositories.category_tally_repository import BULK_UPSERT_CHUNK_SIZE, CategoryTallyRepository
+from repositories.category_tally_repository_interface import merge_daily_tallies
+from repositories.rollup_repository import ROLLUP_UPSERT_CHUNK_SIZE
+from services.category_aggregator_service import CategoryAggregator
+
+
+class TestAddToDailyTallies(unittest.TestCase):
+
+    def setUp(self):
+        """Set up test fixtures with a temporary database."""
+        self.temp_db = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+        self.temp_db_path = self.temp_db.name
+        self.temp_db.close()
+
+        self.engine = create_engine(f'sqlite:///{self.temp_db_path}')
+        Base.metadata.create_all(self.engine)
+        self.session = sessionmaker(bind=self.engine)()
+        self.repository = CategoryTallyRepository(self.session)
+
+        self.day = date(2025, 11, 28)
+        self.repository.save_daily_tally("a@gmail.com", self.day, {"Marketing": 20, "Personal": 5}, 25)
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        self.session.close()
+        self.engine.dispose()
+        os.unlink(self.temp_db_path)
+
+    def test_counts_are_added_and_totals_recomputed(self):
+        written = self.repository.add_to_daily_tallies({
+            ("a@gmail.com", self.day): {"Marketing": 10, "Advertising": 15},
+            ("b@gmail.com", self.day): {"Personal": 3},
+        })
+
+        self.assertEqual(written, 3)
+        tally = self.repository.get_tally("a@gmail.com", self.day)
+        self.assertEqual(tally.category_counts, {"Marketing": 30, "Personal": 5, "Advertising": 15})
+        self.assertEqual(tally.total_emails, 50)
+        other = self.repository.get_tally("b@gmail.com", self.day)
+        self.assertEqual((other.category_counts, other.total_emails), ({"Personal": 3}, 3))
+
+        # save_daily_tally still replaces counts
+        self.repository.save_daily_tally("a@gmail.com", self.day, {"Marketing": 1}, 21)
+        self.assertEqual(self.repository.get_tally("a@gmail.com", self.day).category_counts["Marketing"], 1)
+
+    def test_default_merge_adds_counts_through_save_daily_tally(self):
+        written = merge_daily_tallies(self.repository, {
+            ("a@gmail.com", self.day): {"Marketing": 10, "Advertising": 15},
+            ("b@gmail.com", self.day): {"Personal": 3},
+        })
+
+        self.assertEqual(written, 3)
+        tally = self.repository.get_tally("a@gmail.com", self.day)
+        self.assertEqual(tally.category_counts, {"Marketing": 30, "Personal": 5, "Advertising": 15})
+        self.assertEqual(tally.total_emails, 50)
+        other = self.repository.get_tally("b@gmail.com", self.day)
+        self.assertEqual((other.category_counts, other.total_emails), ({"Personal": 3}, 3))
+
+    def test_aggregator_flush_is_one_transaction_of_chunked_upserts(self):
+        aggregator = CategoryAggregator(self.repository, buffer_size=100000)
+        accounts = [f"user{i}@gmail.com" for i in range(30)] + ["a@gmail.com"]
+        for account in accounts:
+            aggregator.record_batch(account, {f"Category{c}": c + 1 for c in range(5)}, datetime(2025, 11, 28, 9))
+            aggregator.record_batch(account, {"Marketing": 2}, datetime(2025, 11, 29, 9))
+
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(self.engine, "before_cursor_execute", listener)
+        try:
+            aggregator.flush()
+        finally:
+            event.remove(self.engine, "before_cursor_execute", listener)
+
+        rows = len(accounts) * 6
+        inserts = [s for s in statements if s.startswith("INSERT INTO category_daily_tallies")]
+        self.assertEqual(len(inserts), -(-rows // BULK_UPSERT_CHUNK_SIZE))
+        self.assertTrue(all("ON CONFLICT" in s for s in inserts))
+        # Six categories and the total, for the week and the month of each account
+        rollup_rows = len(accounts) * 7 * 2
+        rollup_inserts = [s for s in statements if s.startswith("INSERT INTO category_tally_rollups")]
+        self.assertEqual(len(rollup_inserts), -(-rollup_rows // ROLLUP_UPSERT_CHUNK_SIZE))
+        # plus the SELECT of existing days, the grouped SELECT and one executemany UPDATE
+        self.assertEqual(len(statements), len(inserts) + len(rollup_inserts) + 3)
+
+        tally = self.repository.get_tally("a@gmail.com", self.day)
+        self.assertEqual(tally.category_counts["Marketing"], 20)
+        self.assertEqual(tally.total_emails, 25 + 15)
+        self.assertEqual(self.repository.get_tally("user7@gmail.com", date(2025, 11, 29)).total_emails, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+"""
+Tests for the batch mode of email_scanner_consumer.py.
+"""
+import importlib
+import sys
+import threading
+import unittest
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from email.message import EmailMessage
+from unittest.mock import MagicMock, patch
+
+
+def _load_consumer_module():
+    # The module parses CLI arguments at import time
+    with patch.object(sys, "argv", ["email_scanner_consumer.py"]):
+        return importlib.import_module("email_scanner_consumer")
+
+
+consumer = _load_consumer_module()
+
+
+def _raw_email(subject: str) -> bytes:
+    msg = EmailMessage()
+    msg["From"] = "sender@example.com"
+    msg["Subject"] = subject
+    msg.set_content("body text")
+    return msg.as_bytes()
+
+
+class TestEmailScannerConsumerBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.executor = ThreadPoolExecutor(max_workers=4)
+
+    def tearDown(self):
+        self.executor.shutdown(wait=True)
+
+    def _cascade(self, for_me, marketing, generic, calls=None, gate=None):
+        def prompt(name, answer):
+            def run(contents):
+                if gate is not None and name != "for_me":
+                    gate.wait(1)
+                if calls is not None:
+                    calls.append(name)
+                return answer
+            return run
+        return (
+            (prompt("for_me", for_me), consumer._decide_for_me),
+            (prompt("marketing", marketing), consumer._decide_marketing),
+            (prompt("generic", generic), consumer._decide_generic),
+        )
+
+    def test_cascade_keeps_sequential_precedence(self):
+        cases = [
+            (("Personal", "Advertising", "Seeks Money"), ("Personal", consumer.ACTION_KEEP_UNREAD)),
+            (("Other", "Advertising", "Seeks Money"), ("Advertising", consumer.ACTION_DELETE)),
+            (("Other", "Other", "Seeks Money"), ("Seeks Money", consumer.ACTION_DELETE)),
+            (("Other", "Other", "n/a"), ("n/a", consumer.ACTION_SKIP)),
+        ]
+        for answers, expected in cases:
+            cascade = self._cascade(*answers)
+            futures = consumer.submit_cascade(self.executor, "contents", cascade)
+            self.assertEqual(consumer.resolve_cascade(futures, cascade), expected, answers)
+
+    def test_decisive_answer_cancels_queued_prompts(self):
+        single = ThreadPoolExecutor(max_workers=1)
+        gate = threading.Event()
+        calls = []
+        cascade = self._cascade("Personal", "Advertising", "Seeks Money", calls=calls, gate=gate)
+        try:
+            futures = consumer.submit_cascade(single, "contents", cascade)
+            self.assertEqual(consumer.resolve_cascade(futures, cascade)[1], consumer.ACTION_KEEP_UNREAD)
+            gate.set()
+        finally:
+            single.shutdown(wait=True)
+        self.assertEqual(calls, ["for_me"])
+
+    def test_batch_uses_one_fetch_and_one_expunge(self):
+        client = MagicMock()
+        client.fetch.return_value = {
+            1: {b"RFC822": _raw_email("Sale"), b"X-GM-LABELS": ()},
+            2: {b"RFC822": _raw_email("Sale again"), b"X-GM-LABELS": ()},
+            3: {b"RFC822": _raw_email("Hi mom"), b"X-GM-LABELS": ()},
+            4: {b"RFC822": _raw_email("Old"), b"X-GM-LABELS": (b"Marketing",)},
+        }
+
+        def for_me(contents):
+            return "personal" if "mom" in contents else "Other"
+
+        with patch.object(consumer, "categorize_email_ell_for_me", side_effect=for_me), \
+                patch.object(consumer, "categorize_email_ell_marketing", return_value="Advertising"), \
+                patch.object(consumer, "categorize_email_ell_generic", return_value="Other"):
+            counter = Counter()
+            result = consumer.process_email_batch(client, [1, 2, 3, 4], self.executor, counter)
+
+        self.assertEqual(result, {1: "Advertising", 2: "Advertising", 3: "personal"})
+        client.fetch.assert_called_once()
+        client.delete_messages.assert_called_once_with([1, 2])
+        client.expunge.assert_called_once()
+        client.remove_flags.assert_called_once_with([3], [b"\\Seen"])
+        client.add_gmail_labels.assert_any_call([1, 2], ["Advertising"])
+        self.assertEqual(counter["Advertising"], 2)
+
+    def test_action_failure_propagates_so_offsets_are_not_committed(self):
+        client = MagicMock()
+        client.delete_messages.side_effect = RuntimeError("IMAP down")
+        with self.assertRaises(RuntimeError):
+            consumer.apply_batch_actions(client, {1: ("Advertising", consumer.ACTION_DELETE)})
+        client.expunge.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -191,12 +191,15 @@ class TestForceProcessEndpoint(unittest.TestCase):
         mock_rate_limiter,
         mock_status_manager
     ):
-        """Test force processing when different account is being processed"""
+        """Test force processing when other accounts fill every session slot"""
         # Mock rate limiter to allow request
         mock_rate_limiter.check_rate_limit.return_value = (True, None)
 
-        # Mock status manager to show processing active for different account
+        # Mock status manager to show processing active for different account at capacity
         mock_status_manager.is_processing.return_value = True
+        mock_status_manager.is_processing_account.return_value = False
+        mock_status_manager.has_capacity.return_value = False
+        mock_status_manager.get_active_accounts.return_value = ["other@example.com"]
         mock_status_manager.get_processing_email.return_value = "other@example.com"
         mock_status_manager.get_current_status.return_value = {
             'state': 'PROCESSING',
@@ -215,7 +218,39 @@ class TestForceProcessEndpoint(unittest.TestCase):
         # The detail is a dict (ForceProcessResponse) for 409 errors
         detail = response_data['detail']
         self.assertIsInstance(detail, dict)
-        self.assertIn('another account', detail['message'].lower())
+        self.assertIn('other accounts', detail['message'].lower())
+        self.assertIn('other@example.com', detail['message'])
+
+    @patch('api_service.processing_status_manager')
+    @patch('api_service.account_email_processor_service')
+    @patch('api_service.force_process_rate_limiter')
+    def test_force_process_runs_alongside_different_account(
+        self,
+        mock_rate_limiter,
+        mock_processor_service,
+        mock_status_manager
+    ):
+        """Test force processing is accepted while another account is processed below the limit"""
+        mock_rate_limiter.check_rate_limit.return_value = (True, None)
+
+        mock_status_manager.is_processing.return_value = True
+        mock_status_manager.is_processing_account.return_value = False
+        mock_status_manager.has_capacity.return_value = True
+
+        mock_account = Mock()
+        mock_account.email_address = self.test_email
+        mock_account.app_password = "test_password"
+        mock_service = Mock()
+        mock_service.get_account_by_email.return_value = mock_account
+        self.app.dependency_overrides[self.get_account_service] = lambda: mock_service
+
+        response = self.client.post(
+            f"/api/accounts/{self.test_email}/process",
+            headers=self._get_headers()
+        )
+
+        self.assertEqual(response.status_code, 202)
+        mock_status_manager.is_processing_account.assert_called_with(self.test_email)
 
     @patch('api_service.force_process_rate_limiter')
     def test_force_process_rate_limit_exceeded(self, mock_rate_limiter):
@@ -0,0 +1,91 @@
+"""
+Tests for publishing email content embedded in Kafka records.
+"""
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from email.message import EmailMessage
+from unittest.mock import MagicMock, patch
+
+import send_email_to_kafka as producer_module
+from tests.test_email_scanner_consumer_batch import consumer
+
+ACCOUNT = "user@example.com"
+
+
+def _raw_email(subject: str, body: str) -> bytes:
+    msg = EmailMessage()
+    msg["From"] = "Shop <news@shop.com>"
+    msg["Subject"] = subject
+    msg["Date"] = "Mon, 05 Jan 2026 10:00:00 +0000"
+    msg.set_content(body)
+    return msg.as_bytes()
+
+
+class TestEmbeddedPayloadProducer(unittest.TestCase):
+
+    def test_payload_embeds_headers_and_truncated_body(self):
+        payload = producer_module.build_email_payload(
+            7, _raw_email("Sale", "x" * 50), ACCOUNT, labels=(b"\\Important",), max_body_chars=10
+        )
+
+        self.assertEqual(payload["format"], producer_module.EMBEDDED_PAYLOAD_FORMAT)
+        self.assertEqual(payload["msg_id"], 7)
+        self.assertEqual(payload["account"], ACCOUNT)
+        self.assertEqual(payload["subject"], "Sale")
+        self.assertEqual(payload["from"], "Shop <news@shop.com>")
+        self.assertEqual(payload["labels"], ["\\Important"])
+        self.assertEqual(payload["body"], "x" * 10)
+        self.assertTrue(payload["body_truncated"])
+
+    def test_payloads_are_fetched_with_one_fetch_per_chunk(self):
+        client = MagicMock()
+        client.fetch.side_effect = lambda ids, items: {
+            msg_id: {b"BODY[]<0>": _raw_email(f"Subject {msg_id}", "body"), b"X-GM-LABELS": ()}
+            for msg_id in ids
+        }
+
+        payloads = producer_module.fetch_email_payloads(client, [1, 2, 3, 4, 5], ACCOUNT, chunk_size=2)
+
+        self.assertEqual([p["msg_id"] for p in payloads], [1, 2, 3, 4, 5])
+        self.assertEqual(client.fetch.call_count, 3)
+        self.assertEqual(client.fetch.call_args[0][1][0], f"BODY.PEEK[]<0.{producer_module.DEFAULT_FETCH_BYTES}>")
+
+    def test_publish_keys_records_by_account_and_flushes_once(self):
+        producer = MagicMock()
+        payloads = [{"msg_id": 1, "account": ACCOUNT}, {"msg_id": 2, "account": ACCOUNT}]
+
+        published = producer_module.publish_email_payloads(producer, payloads, kafka_topic="topic")
+
+        self.assertEqual(published, 2)
+        producer.send.assert_any_call("topic", key=ACCOUNT, value=payloads[0])
+        producer.flush.assert_called_once()
+
+    def test_publish_raises_when_a_record_fails(self):
+        producer = MagicMock()
+        producer.send.return_value.get.side_effect = RuntimeError("broker down")
+        with self.assertRaises(Exception):
+            producer_module.publish_email_payloads(producer, [{"msg_id": 1, "account": ACCOUNT}])
+
+
+class TestConsumerUsesEmbeddedPayloads(unittest.TestCase):
+
+    def test_embedded_records_are_classified_without_imap_fetch(self):
+        client = MagicMock()
+        payloads = {
+            1: producer_module.build_email_payload(1, _raw_email("Big sale", "buy now"), ACCOUNT),
+            2: producer_module.build_email_payload(2, _raw_email("Labelled", "body"), ACCOUNT, labels=(b"Marketing",)),
+        }
+
+        with ThreadPoolExecutor(max_workers=2) as executor, \
+                patch.object(consumer, "categorize_email_ell_for_me", return_value="Other"), \
+                patch.object(consumer, "categorize_email_ell_marketing", return_value="Advertising"), \
+                patch.object(consumer, "categorize_email_ell_generic", return_value="Other"):
+            result = consumer.process_email_batch(client, [1, 2], executor, payloads=payloads)
+
+        self.assertEqual(result, {1: "Advertising"})
+        client.fetch.assert_not_called()
+        client.delete_messages.assert_called_once_with([1])
+
+
+if __name__ == "__main__":
+    unittest.main()
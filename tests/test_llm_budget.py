@@ -0,0 +1,155 @@
+"""
+Tests for per-account LLM budgets and graceful degradation.
+"""
+import unittest
+from datetime import date
+from email.message import EmailMessage
+from unittest.mock import Mock
+
+from services.budgeted_email_categorizer import BudgetedEmailCategorizer
+from services.email_processor_service import EmailProcessorService
+from services.fake_email_categorizer import FakeEmailCategorizer
+from services.llm_budget_service import (
+    LLMBudgetConfig,
+    LLMBudgetExhaustedError,
+    LLMBudgetTracker,
+    budget_exempt,
+)
+from services.llm_metrics_collector import LLMCallRecord, LLMMetricsCollector
+from services.processing_status_manager import ProcessingStatusManager
+
+ACCOUNT = "user@example.com"
+
+
+class TestLLMBudgetTracker(unittest.TestCase):
+
+    def test_config_from_env_treats_zero_and_invalid_as_unlimited(self):
+        config = LLMBudgetConfig.from_env({
+            "LLM_BUDGET_REQUESTS_PER_CYCLE": "10",
+            "LLM_BUDGET_TOKENS_PER_CYCLE": "0",
+            "LLM_BUDGET_REQUESTS_PER_DAY": "abc",
+        })
+        self.assertEqual(config.requests_per_cycle, 10)
+        self.assertIsNone(config.tokens_per_cycle)
+        self.assertIsNone(config.requests_per_day)
+        self.assertTrue(config.enabled)
+        self.assertFalse(LLMBudgetConfig.from_env({}).enabled)
+
+    def test_cycle_budget_resets_but_daily_budget_carries_over(self):
+        tracker = LLMBudgetTracker(LLMBudgetConfig(requests_per_cycle=2, requests_per_day=3))
+        tracker.charge_request(ACCOUNT)
+        tracker.charge_request(ACCOUNT)
+        self.assertEqual(tracker.check(ACCOUNT), "requests_per_cycle")
+
+        tracker.begin_cycle(ACCOUNT)
+        self.assertIsNone(tracker.check(ACCOUNT))
+        tracker.charge_request(ACCOUNT)
+        self.assertEqual(tracker.check(ACCOUNT), "requests_per_day")
+
+    def test_daily_budget_resets_on_new_day(self):
+        current = [date(2026, 1, 1)]
+        tracker = LLMBudgetTracker(LLMBudgetConfig(tokens_per_day=100), today=lambda: current[0])
+        tracker.charge_tokens(ACCOUNT, 150)
+        self.assertEqual(tracker.check(ACCOUNT), "tokens_per_day")
+
+        current[0] = date(2026, 1, 2)
+        self.assertIsNone(tracker.check(ACCOUNT))
+        self.assertEqual(tracker.get_usage(ACCOUNT)["day"]["tokens"], 0)
+
+    def test_collector_listener_charges_tokens_unless_exempt(self):
+        tracker = LLMBudgetTracker(LLMBudgetConfig(tokens_per_cycle=1000))
+        collector = LLMMetricsCollector()
+        collector.add_listener(tracker.on_llm_call)
+
+        collector.record_call(LLMCallRecord("m", "p", 0.1, "success", 100, 20, account=ACCOUNT))
+        with budget_exempt():
+            collector.record_call(LLMCallRecord("m", "p", 0.1, "success", 500, 50, account=ACCOUNT))
+
+        self.assertEqual(tracker.get_usage(ACCOUNT)["cycle"]["tokens"], 120)
+
+
+class TestBudgetedEmailCategorizer(unittest.TestCase):
+
+    def setUp(self):
+        self.collector = LLMMetricsCollector()
+        self.collector.begin_run(ACCOUNT)
+        self.tracker = LLMBudgetTracker(LLMBudgetConfig(requests_per_cycle=1))
+        self.llm = FakeEmailCategorizer(default_category="Marketing")
+
+    def tearDown(self):
+        self.collector.end_run(ACCOUNT)
+
+    def test_within_budget_uses_llm(self):
+        categorizer = BudgetedEmailCategorizer(self.llm, self.tracker)
+        self.assertEqual(categorizer.categorize("sale", "model"), "Marketing")
+        self.assertEqual(self.tracker.get_usage(ACCOUNT)["cycle"]["requests"], 1)
+
+    def test_exhausted_budget_uses_cache_then_fallback_then_defers(self):
+        fallback = FakeEmailCategorizer(default_category="Advertising")
+        categorizer = BudgetedEmailCategorizer(self.llm, self.tracker, fallback_categorizer=fallback,
+                                               fallback_model="local-model")
+        categorizer.categorize("sale", "model")
+
+        self.assertEqual(categorizer.categorize("sale", "model"), "Marketing")  # cache
+        self.assertEqual(categorizer.categorize("other", "model"), "Advertising")  # local classifier
+        self.assertEqual(fallback.categorization_calls, [("other", "local-model")])
+        self.assertEqual(self.llm.get_categorization_count(), 1)
+
+        categorizer.fallback_categorizer = None
+        with self.assertRaises(LLMBudgetExhaustedError):
+            categorizer.categorize("third", "model")
+
+        usage = self.tracker.get_usage(ACCOUNT)
+        self.assertEqual(usage["fallback_categorizations"], 2)
+        self.assertEqual(usage["deferred_emails"], 1)
+        self.assertEqual(usage["exhausted_reason"], "requests_per_cycle")
+
+    def test_calls_without_an_account_are_not_budgeted(self):
+        self.collector.end_run(ACCOUNT)
+        categorizer = BudgetedEmailCategorizer(self.llm, self.tracker)
+        categorizer.categorize("a", "model")
+        categorizer.categorize("b", "model")
+        self.assertEqual(self.llm.get_categorization_count(), 2)
+
+
+class TestBudgetDeferral(unittest.TestCase):
+
+    def test_processor_defers_email_without_marking_it_processed(self):
+        fetcher = Mock()
+        fetcher.summary_service.db_service = None
+        fetcher.get_email_body.return_value = "body"
+        fetcher._is_domain_blocked.return_value = False
+        fetcher._is_domain_allowed.return_value = False
+        fetcher.remove_http_links.side_effect = lambda text: text
+        fetcher.remove_images_from_email.side_effect = lambda text: text
+        fetcher.remove_encoded_content.side_effect = lambda text: text
+
+        categorizer = Mock()
+        categorizer.categorize.side_effect = LLMBudgetExhaustedError(ACCOUNT, "requests_per_cycle")
+        extractor = Mock()
+        extractor.extract_sender_email.return_value = "news@shop.com"
+        processor = EmailProcessorService(fetcher, ACCOUNT, "model", categorizer, extractor)
+
+        msg = EmailMessage()
+        msg["From"] = "news@shop.com"
+        msg["Subject"] = "Sale"
+        msg["Message-ID"] = "<m1@shop.com>"
+
+        self.assertIsNone(processor.process_email(msg))
+        self.assertEqual(processor.deferred_message_ids, ["<m1@shop.com>"])
+        self.assertEqual(processor.processed_message_ids, [])
+        fetcher.add_label.assert_not_called()
+
+    def test_budget_usage_is_reported_in_status_and_history(self):
+        manager = ProcessingStatusManager()
+        manager.start_processing(ACCOUNT)
+        budget = {"cycle": {"requests": 3}, "exhausted": True}
+        manager.update_llm_budget(budget)
+
+        self.assertEqual(manager.get_current_status()["llm_budget"], budget)
+        manager.complete_processing()
+        self.assertEqual(manager.get_recent_runs(limit=1)[0]["llm_budget"], budget)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,237 @@
+"""
+Tests for LLM call instrumentation.
+
+Covers the LLMMetricsCollector aggregation (per model, per account, per run),
+the OpenAILLMService hooks that report latency/tokens/retries/outcome, and
+persistence of per-run usage summaries next to ProcessingRun.
+"""
+import os
+import tempfile
+import threading
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import httpx
+import openai
+from pydantic import BaseModel
+
+from repositories.sqlalchemy_repository import SQLAlchemyRepository
+from services.llm_metrics_collector import (
+    LatencyHistogram,
+    LLMCallRecord,
+    LLMMetricsCollector,
+    OUTCOME_ERROR,
+    OUTCOME_PARSE_ERROR,
+    OUTCOME_SUCCESS,
+    get_current_llm_account,
+)
+from services.openai_llm_service import OpenAILLMService
+
+
+class _Answer(BaseModel):
+    category: str
+
+
+def _parse_response(parsed, prompt_tokens=120, completion_tokens=7):
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(parsed=parsed))],
+        usage=SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens),
+    )
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    """Bucket counting and percentile estimation."""
+
+    def test_observations_fall_into_buckets(self):
+        histogram = LatencyHistogram(buckets_ms=(100, 1000))
+        for value in (10, 99, 500, 5000):
+            histogram.observe(value)
+
+        data = histogram.to_dict()
+        self.assertEqual(data["count"], 4)
+        self.assertEqual(data["buckets"], {"le_100": 2, "le_1000": 1, "le_inf": 1})
+        self.assertEqual(data["min_ms"], 10)
+        self.assertEqual(data["max_ms"], 5000)
+
+    def test_percentiles_are_clamped_to_max(self):
+        histogram = LatencyHistogram(buckets_ms=(100, 1000))
+        for _ in range(10):
+            histogram.observe(40)
+
+        self.assertEqual(histogram.percentile(50), 40)
+        self.assertEqual(histogram.percentile(95), 40)
+
+    def test_empty_histogram_has_no_percentiles(self):
+        self.assertIsNone(LatencyHistogram().percentile(95))
+
+
+class TestLLMMetricsCollector(unittest.TestCase):
+    """Aggregation per model, per account and per run."""
+
+    def setUp(self):
+        self.collector = LLMMetricsCollector(pricing={"model-a": (1.0, 2.0)})
+
+    def _record(self, model="model-a", outcome=OUTCOME_SUCCESS, account=None, retries=0):
+        self.collector.record_call(LLMCallRecord(
+            model=model,
+            provider="test",
+            latency_seconds=0.2,
+            outcome=outcome,
+            prompt_tokens=1000,
+            completion_tokens=10,
+            retries=retries,
+            account=account,
+        ))
+
+    def test_aggregates_by_model_and_outcome(self):
+        self._record()
+        self._record(outcome=OUTCOME_PARSE_ERROR, retries=2)
+        self._record(model="model-b", outcome=OUTCOME_ERROR)
+
+        models = self.collector.get_snapshot()["models"]
+        self.assertEqual(models["model-a"]["calls"], 2)
+        self.assertEqual(models["model-a"]["successes"], 1)
+        self.assertEqual(models["model-a"]["parse_failures"], 1)
+        self.assertEqual(models["model-a"]["retries"], 2)
+        self.assertEqual(models["model-a"]["prompt_tokens"], 2000)
+        self.assertEqual(models["model-b"]["failures"], 1)
+
+    def test_cost_uses_pricing_table(self):
+        self._record()
+        models = self.collector.get_snapshot()["models"]
+        # 1000 prompt tokens at $1/M + 10 completion tokens at $2/M
+        self.assertAlmostEqual(models["model-a"]["estimated_cost_usd"], 0.00102)
+
+    def test_run_summary_only_contains_calls_during_run(self):
+        self._record(account="user@example.com")
+        self.collector.begin_run("user@example.com")
+        self.assertEqual(get_current_llm_account(), "user@example.com")
+
+        self._record()  # attributed through the current account context
+        self._record(model="model-b")
+        summary = self.collector.end_run("user@example.com")
+
+        self.assertIsNone(get_current_llm_account())
+        self.assertEqual([entry["model"] for entry in summary], ["model-a", "model-b"])
+        self.assertEqual(summary[0]["calls"], 1)
+        accounts = self.collector.get_snapshot()["accounts"]
+        self.assertEqual(accounts["user@example.com"]["model-a"]["calls"], 2)
+
+    def test_end_run_without_begin_returns_empty(self):
+        self.assertEqual(self.collector.end_run("nobody@example.com"), [])
+
+    def test_account_context_is_per_thread(self):
+        self.collector.begin_run("main@example.com")
+        seen = []
+        worker = threading.Thread(target=lambda: seen.append(get_current_llm_account()))
+        worker.start()
+        worker.join()
+        self.collector.end_run("main@example.com")
+
+        self.assertEqual(seen, [None])
+
+
+class TestOpenAILLMServiceInstrumentation(unittest.TestCase):
+    """OpenAILLMService reports every call to its collector."""
+
+    def setUp(self):
+        self.collector = LLMMetricsCollector()
+        self.service = OpenAILLMService(
+            model="test-model",
+            api_key="test-key",
+            base_url="http://localhost:1/v1",
+            retry_backoff_seconds=0,
+            metrics_collector=self.collector,
+        )
+        self.parse = MagicMock()
+        self.service.client = MagicMock()
+        self.service.client.beta.chat.completions.parse = self.parse
+
+    def _model_stats(self):
+        return self.collector.get_snapshot()["models"]["test-model"]
+
+    def test_successful_call_records_tokens_and_latency(self):
+        self.parse.return_value = _parse_response(_Answer(category="Marketing"))
+
+        result = self.service.call_structured("prompt", _Answer)
+
+        self.assertEqual(result.category, "Marketing")
+        stats = self._model_stats()
+        self.assertEqual(stats["successes"], 1)
+        self.assertEqual(stats["prompt_tokens"], 120)
+        self.assertEqual(stats["completion_tokens"], 7)
+        self.assertEqual(stats["latency"]["count"], 1)
+
+    def test_null_parse_is_recorded_as_parse_failure(self):
+        self.parse.return_value = _parse_response(None)
+
+        with self.assertRaises(ValueError):
+            self.service.call_structured("prompt", _Answer)
+
+        self.assertEqual(self._model_stats()["parse_failures"], 1)
+
+    def test_transient_errors_are_retried_and_counted(self):
+        request = httpx.Request("POST", "http://localhost:1/v1/chat/completions")
+        self.parse.side_effect = [
+            openai.APIConnectionError(request=request),
+            _parse_response(_Answer(category="Advertising")),
+        ]
+
+        with patch("services.openai_llm_service.time.sleep"):
+            result = self.service.call_structured("prompt", _Answer)
+
+        self.assertEqual(result.category, "Advertising")
+        self.assertEqual(self.parse.call_count, 2)
+        stats = self._model_stats()
+        self.assertEqual(stats["retries"], 1)
+        self.assertEqual(stats["successes"], 1)
+
+    def test_exhausted_retries_record_error(self):
+        request = httpx.Request("POST", "http://localhost:1/v1/chat/completions")
+        self.parse.side_effect = openai.APIConnectionError(request=request)
+
+        with patch("services.openai_llm_service.time.sleep"):
+            with self.assertRaises(openai.APIConnectionError):
+                self.service.call_structured("prompt", _Answer)
+
+        self.assertEqual(self.parse.call_count, 3)
+        stats = self._model_stats()
+        self.assertEqual(stats["failures"], 1)
+        self.assertEqual(stats["retries"], 2)
+
+
+class TestProcessingRunLLMUsagePersistence(unittest.TestCase):
+    """Per-run summaries are stored next to ProcessingRun."""
+
+    def setUp(self):
+        handle, self.db_path = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+        self.repository = SQLAlchemyRepository(self.db_path)
+
+    def tearDown(self):
+        self.repository.disconnect()
+        os.unlink(self.db_path)
+
+    def test_round_trip(self):
+        collector = LLMMetricsCollector()
+        collector.begin_run("user@example.com")
+        collector.record_call(LLMCallRecord(
+            model="test-model", provider="test", latency_seconds=0.3,
+            outcome=OUTCOME_SUCCESS, prompt_tokens=50, completion_tokens=5,
+        ))
+        usage = collector.end_run("user@example.com")
+
+        run_id = self.repository.create_processing_run("user@example.com")
+        self.repository.save_processing_run_llm_usage(run_id, usage)
+        rows = self.repository.get_processing_run_llm_usage(run_id)
+
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0].model, "test-model")
+        self.assertEqual(rows[0].calls, 1)
+        self.assertEqual(rows[0].prompt_tokens, 50)
+        self.assertAlmostEqual(rows[0].max_latency_ms, 300, delta=1)
+
+
+if __name__ == "__main__":
+    unittest.main()
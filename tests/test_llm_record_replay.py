@@ -0,0 +1,153 @@
+"""
+Tests for the LLM record/replay harness.
+
+A RecordingLLMService wraps a live service and writes each interaction to a
+JSONL store; ReplayLLMService serves the same requests back from that store
+with optional latency emulation.
+"""
+import os
+import tempfile
+import unittest
+from typing import Any, Optional, Type
+
+from pydantic import BaseModel
+
+from services.categorize_emails_llm import EmailCategoryResponse
+from services.email_categorizer_service import EmailCategorizerService
+from services.llm_recording_store import LLMRecordingStore, fingerprint_request
+from services.llm_service_factory_interface import LLMServiceFactoryInterface
+from services.llm_service_interface import LLMServiceInterface
+from services.recording_llm_service import RecordingLLMService, RecordingLLMServiceFactory
+from services.replay_llm_service import (
+    LLMReplayMissError,
+    ReplayLLMService,
+    ReplayLLMServiceFactory,
+)
+
+
+class _ScriptedLLMService(LLMServiceInterface):
+    """Live-service stand-in returning a fixed category and counting calls."""
+
+    def __init__(self, model: str = "test-model", category: str = "Marketing"):
+        self.model = model
+        self.category = category
+        self.calls = 0
+
+    def call(self, prompt: str, system_prompt: Optional[str] = None, temperature: float = 0.0,
+             max_tokens: Optional[int] = None, **kwargs: Any) -> str:
+        self.calls += 1
+        return f"echo:{prompt}"
+
+    def call_structured(self, prompt: str, response_model: Type[BaseModel], system_prompt: Optional[str] = None,
+                        temperature: float = 0.0, **kwargs: Any):
+        self.calls += 1
+        return response_model(category=self.category)
+
+    def is_available(self) -> bool:
+        return True
+
+    def get_model_name(self) -> str:
+        return self.model
+
+    def get_provider_name(self) -> str:
+        return "scripted"
+
+
+class _ScriptedFactory(LLMServiceFactoryInterface):
+    def __init__(self):
+        self.service = _ScriptedLLMService()
+
+    def create_service(self, model: str) -> LLMServiceInterface:
+        return self.service
+
+
+class TestLLMRecordReplay(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "recording.jsonl")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _record(self, prompts):
+        live = _ScriptedLLMService()
+        recorder = RecordingLLMService(live, LLMRecordingStore(self.path))
+        for prompt in prompts:
+            recorder.call_structured(prompt, EmailCategoryResponse, system_prompt="sys", temperature=0)
+        return live
+
+    def test_fingerprint_depends_on_request_fields(self):
+        base = fingerprint_request("call", "m", "p", "s", 0.0)
+        self.assertEqual(base, fingerprint_request("call", "m", "p", "s", 0.0))
+        self.assertNotEqual(base, fingerprint_request("call", "m", "p2", "s", 0.0))
+        self.assertNotEqual(base, fingerprint_request("call", "other", "p", "s", 0.0))
+
+    def test_recorded_responses_replay_from_a_new_store(self):
+        live = self._record(["email one", "email two"])
+        self.assertEqual(live.calls, 2)
+
+        replay = ReplayLLMService(LLMRecordingStore(self.path), "test-model")
+        result = replay.call_structured("email one", EmailCategoryResponse, system_prompt="sys", temperature=0)
+
+        self.assertIsInstance(result, EmailCategoryResponse)
+        self.assertEqual(result.category, "Marketing")
+        self.assertEqual(replay.hits, 1)
+
+    def test_plain_calls_round_trip(self):
+        recorder = RecordingLLMService(_ScriptedLLMService(), LLMRecordingStore(self.path))
+        recorder.call("hello", max_tokens=5)
+
+        replay = ReplayLLMService(LLMRecordingStore(self.path), "test-model")
+        self.assertEqual(replay.call("hello", max_tokens=5), "echo:hello")
+
+    def test_miss_without_fallback_raises(self):
+        self._record(["email one"])
+        replay = ReplayLLMService(LLMRecordingStore(self.path), "test-model")
+
+        with self.assertRaises(LLMReplayMissError):
+            replay.call_structured("never recorded", EmailCategoryResponse, system_prompt="sys")
+        self.assertEqual(replay.misses, 1)
+
+    def test_miss_uses_fallback_when_configured(self):
+        fallback = _ScriptedLLMService(category="Advertising")
+        replay = ReplayLLMService(LLMRecordingStore(self.path), "test-model", fallback=fallback)
+
+        result = replay.call_structured("never recorded", EmailCategoryResponse)
+
+        self.assertEqual(result.category, "Advertising")
+        self.assertEqual(fallback.calls, 1)
+
+    def test_latency_modes(self):
+        store = LLMRecordingStore(self.path)
+        fingerprint = fingerprint_request("call", "test-model", "hi", None, 0.0, max_tokens=None)
+        store.append({"fingerprint": fingerprint, "method": "call", "model": "test-model",
+                      "response": "ok", "latency_seconds": 0.25})
+
+        for mode, expected in (("recorded", [0.25]), ("fixed", [1.5]), ("sampled", [0.25]), ("none", [])):
+            sleeps = []
+            replay = ReplayLLMService(store, "test-model", latency_mode=mode,
+                                      fixed_latency_seconds=1.5, sleep=sleeps.append)
+            replay.call("hi")
+            self.assertEqual(sleeps, expected, mode)
+
+    def test_invalid_latency_mode_is_rejected(self):
+        with self.assertRaises(ValueError):
+            ReplayLLMService(LLMRecordingStore(self.path), "test-model", latency_mode="bogus")
+
+    def test_categorizer_runs_end_to_end_on_replay(self):
+        """Record through EmailCategorizerService, then replay with no live service at all."""
+        live_factory = _ScriptedFactory()
+        store = LLMRecordingStore(self.path)
+        EmailCategorizerService(RecordingLLMServiceFactory(live_factory, store)).categorize("Big sale!", "test-model")
+
+        replay_factory = ReplayLLMServiceFactory(LLMRecordingStore(self.path))
+        category = EmailCategorizerService(replay_factory).categorize("Big sale!", "test-model")
+
+        self.assertEqual(category, "Marketing")
+        self.assertEqual(live_factory.service.calls, 1)
+        self.assertIs(replay_factory.create_service("test-model"), replay_factory.create_service("test-model"))
+
+
+if __name__ == "__main__":
+    unittest.main()
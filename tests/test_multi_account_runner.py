@@ -0,0 +1,104 @@
+"""
+Tests for the parallel multi-account runner used by gmail_fetcher.py.
+"""
+import json
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import Mock
+
+from services.categorize_emails_interface import SimpleEmailCategory
+from services.email_summary_service import EmailSummaryService
+from services.multi_account_runner import AccountJob, MultiAccountRunner, account_file_name, load_accounts_from_file
+from services.thread_local_email_categorizer import ThreadLocalEmailCategorizer
+from tests.fake_account_category_client import FakeAccountCategoryClient
+
+
+class TestMultiAccountRunner(unittest.TestCase):
+
+    def test_accounts_run_in_parallel_and_failures_are_isolated(self):
+        barrier = threading.Barrier(3, timeout=5)
+
+        def process(job, progress):
+            barrier.wait()  # Only passes if three accounts run at once
+            if job.email_address == "bad@example.com":
+                raise RuntimeError("IMAP login failed")
+            progress.email_processed(4)
+            return {"emails_found": 5, "emails_processed": 4}
+
+        jobs = [AccountJob(f"{name}@example.com", "pw") for name in ("a", "bad", "c")]
+        with tempfile.TemporaryDirectory() as results_dir:
+            results = MultiAccountRunner(process, max_workers=3, results_dir=results_dir).run(jobs)
+
+            self.assertEqual([r.email_address for r in results], [job.email_address for job in jobs])
+            self.assertEqual([r.success for r in results], [True, False, True])
+            self.assertEqual(results[1].error, "IMAP login failed")
+
+            with open(os.path.join(results_dir, "summary.json")) as f:
+                summary = json.load(f)
+            self.assertEqual((summary["accounts_done"], summary["accounts_failed"], summary["emails_processed"]), (3, 1, 8))
+            with open(os.path.join(results_dir, "a@example.com.json")) as f:
+                self.assertEqual(json.load(f)["emails_found"], 5)
+
+    def test_accounts_file_falls_back_to_database_credentials(self):
+        account_client = FakeAccountCategoryClient()
+        account_client.get_or_create_account("db@example.com", None, "db-password", "imap", None)
+
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as f:
+            f.write("# backfill list\nfile@example.com, file-password\n\ndb@example.com\nmissing@example.com\n")
+        try:
+            jobs = load_accounts_from_file(f.name, account_client)
+        finally:
+            os.unlink(f.name)
+
+        self.assertEqual(
+            [(job.email_address, job.secret) for job in jobs],
+            [("file@example.com", "file-password"), ("db@example.com", "db-password")]
+        )
+
+
+class TestThreadLocalEmailCategorizer(unittest.TestCase):
+
+    def test_clearing_one_accounts_tracking_keeps_the_others(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            services = {
+                email: EmailSummaryService(data_dir=os.path.join(temp_dir, "accounts", account_file_name(email)),
+                                           use_database=False, gmail_email=email)
+                for email in ("a@example.com", "b/c@example.com")
+            }
+            for email, service in services.items():
+                service.track_email(f"<{email}>", "news@shop.com", "Sale", "Marketing", "deleted")
+
+            services["a@example.com"].clear_tracked_data()
+
+            self.assertEqual(services["a@example.com"]._load_current_data(), [])
+            self.assertEqual([r["message_id"] for r in services["b/c@example.com"]._load_current_data()],
+                             ["<b/c@example.com>"])
+            self.assertTrue(os.path.isdir(os.path.join(temp_dir, "accounts", "b_c@example.com")))
+            for service in services.values():
+                service.close()
+
+    def test_one_llm_client_per_worker_and_model(self):
+        factory = Mock()
+        factory.create_service.return_value.get_model_name.return_value = "model"
+        categorizer = ThreadLocalEmailCategorizer(factory)
+
+        def categorize_many():
+            for _ in range(5):
+                llm = categorizer._get_categorizer("model-a")
+                llm.category = Mock(return_value=SimpleEmailCategory.MARKETING)
+                self.assertEqual(categorizer.categorize("buy now", "model-a"), SimpleEmailCategory.MARKETING.value)
+
+        workers = [threading.Thread(target=categorize_many) for _ in range(3)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(categorizer.clients_created, 3)
+        self.assertEqual(factory.create_service.call_count, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,192 @@
+"""
+Tests for the transactional outbox of processing side effects.
+"""
+import os
+import tempfile
+import unittest
+from collections import Counter
+from datetime import datetime, timedelta
+from unittest.mock import Mock
+
+from models.database import init_database
+from models.domain_recommendation_models import NotificationResult
+from repositories.outbox_repository import NewOutboxEvent, OutboxRepository
+from services.account_email_processor_service import AccountEmailProcessorService
+from services.blocking_recommendation_collector import BlockingRecommendationCollector
+from services.fake_email_categorizer import FakeEmailCategorizer
+from services.fake_email_deduplication_client import FakeEmailDeduplicationClient
+from services.outbox_dispatcher import (
+    EVENT_CATEGORY_STATS, EVENT_RECOMMENDATION_EMAIL, OutboxDispatcher, recommendation_email_handler
+)
+from services.processing_status_manager import ProcessingStatusManager
+from tests.fake_account_category_client import FakeAccountCategoryClient
+from tests.fake_gmail_fetcher import FakeGmailFetcher
+
+ACCOUNT = "user@example.com"
+
+
+class _Clock:
+    def __init__(self):
+        self.now = datetime(2026, 1, 1, 12, 0)
+
+    def __call__(self):
+        return self.now
+
+
+class TestOutboxDispatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.engine = init_database(os.path.join(self.temp_dir.name, "outbox.db"))
+        self.clock = _Clock()
+        self.repository = OutboxRepository(self.engine, clock=self.clock)
+        self.dispatcher = OutboxDispatcher(self.repository, batch_size=10, max_attempts=2, retry_backoff_seconds=30)
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.temp_dir.cleanup()
+
+    def test_failing_event_is_retried_with_backoff_without_holding_back_the_batch(self):
+        handled = []
+        batches = []
+
+        def handler(messages):
+            batches.append(len(messages))
+            if any(m.payload["n"] == 2 for m in messages):
+                raise RuntimeError("SMTP unavailable")
+            handled.extend(m.payload["n"] for m in messages)
+
+        self.dispatcher.register("test", handler)
+        self.dispatcher.enqueue([NewOutboxEvent("test", {"n": n}, ACCOUNT) for n in (1, 2, 3)])
+
+        self.assertEqual(self.dispatcher.dispatch_once(), 2)
+        self.assertEqual(handled, [1, 3])
+        self.assertEqual(batches, [3, 1, 1, 1])
+        self.assertEqual(self.repository.get_stats()["pending"], 1)
+
+        # Not retried before its backoff has elapsed
+        self.assertEqual(self.dispatcher.dispatch_once(), 0)
+        self.clock.now += timedelta(seconds=31)
+        self.assertEqual(self.dispatcher.dispatch_once(), 0)
+
+        stats = self.dispatcher.get_metrics()
+        self.assertEqual((stats["delivered"], stats["dead"], stats["pending"]), (2, 1, 0))
+
+    def test_emails_sent_before_a_failure_in_the_batch_are_not_sent_again(self):
+        sent = []
+
+        class Notifier:
+            def send_recommendations(self, recipient_email, recommendations):
+                if recipient_email == "b@example.com":
+                    return NotificationResult(False, recipient_email, 0, "Mailbox unavailable")
+                sent.append(recipient_email)
+                return NotificationResult(True, recipient_email, 0, None)
+
+        self.dispatcher.register(EVENT_RECOMMENDATION_EMAIL, recommendation_email_handler(Notifier()))
+        self.dispatcher.enqueue([
+            NewOutboxEvent(EVENT_RECOMMENDATION_EMAIL, {"recipient": recipient, "recommendations": []}, recipient)
+            for recipient in ("a@example.com", "b@example.com", "c@example.com")
+        ])
+
+        self.assertEqual(self.dispatcher.dispatch_once(), 2)
+        self.assertEqual(sent, ["a@example.com", "c@example.com"])
+        self.assertEqual(self.repository.get_stats()["pending"], 1)
+
+    def test_claimed_events_are_hidden_from_other_dispatchers_until_their_lock_expires(self):
+        self.repository.enqueue([NewOutboxEvent("test", {"n": 1})])
+
+        self.assertEqual(len(self.repository.claim_due("a", 10, lock_seconds=60)), 1)
+        self.assertEqual(self.repository.claim_due("b", 10, lock_seconds=60), [])
+
+        self.clock.now += timedelta(seconds=61)
+        self.assertEqual([m.payload for m in self.repository.claim_due("b", 10, lock_seconds=60)], [{"n": 1}])
+
+    def test_claim_does_not_depend_on_the_stored_precision_of_locked_until(self):
+        # Store locked_until to the second, like a DATETIME column without fractional seconds
+        with self.engine.begin() as connection:
+            connection.exec_driver_sql(
+                "CREATE TRIGGER truncate_locked_until AFTER UPDATE OF locked_until ON outbox_events "
+                "WHEN NEW.locked_until IS NOT NULL BEGIN "
+                "UPDATE outbox_events SET locked_until = substr(NEW.locked_until, 1, 19) WHERE id = NEW.id; END"
+            )
+        self.clock.now = datetime(2026, 1, 1, 12, 0, 0, 123456)
+        self.repository.enqueue([NewOutboxEvent("test", {"n": n}) for n in (1, 2)])
+
+        self.assertEqual([m.payload for m in self.repository.claim_due("a", 10, lock_seconds=60)],
+                         [{"n": 1}, {"n": 2}])
+        self.assertEqual(self.repository.claim_due("a", 10, lock_seconds=60), [])
+
+
+class _RecordingNotifier:
+    def __init__(self):
+        self.sent = []
+
+    def send_recommendations(self, recipient_email, recommendations):
+        self.sent.append((recipient_email, recommendations))
+        return NotificationResult(True, recipient_email, len(recommendations), None)
+
+
+class TestProcessAccountOutbox(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.engine = init_database(os.path.join(self.temp_dir.name, "outbox.db"))
+        self.dispatcher = OutboxDispatcher(OutboxRepository(self.engine))
+
+        self.account_client = FakeAccountCategoryClient()
+        account = self.account_client.get_or_create_account(ACCOUNT, None, None, None, None)
+        account.app_password = "app-password"
+
+        self.fetcher = FakeGmailFetcher()
+        self.fetcher.summary_service = Mock()
+        self.fetcher.summary_service.run_metrics = {'fetched': 0}
+        self.fetcher.summary_service.db_service = None
+        self.fetcher.account_service = self.account_client
+        self.fetcher.stats = {'deleted': 0, 'kept': 0, 'categories': Counter()}
+        for i in range(3):
+            self.fetcher.add_test_email(subject=f"Sale {i}", body="buy now", sender="news@shop.com")
+
+        dedup_factory = Mock()
+        dedup_factory.create_deduplication_client.return_value = FakeEmailDeduplicationClient(ACCOUNT)
+        settings = Mock()
+        settings.get_lookback_hours.return_value = 2
+        self.notifier = _RecordingNotifier()
+        self.service = AccountEmailProcessorService(
+            processing_status_manager=ProcessingStatusManager(),
+            settings_service=settings,
+            email_categorizer=FakeEmailCategorizer(default_category="Marketing"),
+            api_token="token",
+            llm_model="test-model",
+            account_category_client=self.account_client,
+            deduplication_factory=dedup_factory,
+            create_gmail_fetcher=lambda email, pwd, token: self.fetcher,
+            blocking_recommendation_collector=BlockingRecommendationCollector(),
+            recommendation_email_notifier=self.notifier,
+            outbox=self.dispatcher,
+        )
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.temp_dir.cleanup()
+
+    def test_side_effects_are_queued_and_delivered_after_the_run(self):
+        result = self.service.process_account(ACCOUNT)
+
+        self.assertTrue(result["success"], result.get("error"))
+        self.assertEqual(result["side_effects_queued"], 2)
+        self.assertTrue(result["notification_queued"])
+        self.assertEqual(self.notifier.sent, [])
+        self.assertNotIn(ACCOUNT, self.account_client.category_stats)
+
+        self.assertEqual(self.dispatcher.dispatch_once(), 2)
+
+        [(recipient, recommendations)] = self.notifier.sent
+        self.assertEqual((recipient, recommendations[0].domain, recommendations[0].count), (ACCOUNT, "shop.com", 3))
+        [stats] = self.account_client.category_stats[ACCOUNT]
+        self.assertEqual(stats["stats"]["Marketing"]["total"], 3)
+        self.assertTrue(self.dispatcher.has_handler(EVENT_CATEGORY_STATS))
+        self.assertTrue(self.dispatcher.has_handler(EVENT_RECOMMENDATION_EMAIL))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+"""
+Tests for the Bloom filters in front of processed-email lookups.
+"""
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from clients.gmail_deduplication_client import GmailDeduplicationClient
+from repositories.sqlalchemy_repository import SQLAlchemyRepository
+from services.processed_message_filter import BloomFilter, ProcessedMessageFilter
+
+ACCOUNT = "user@example.com"
+
+
+class TestBloomFilter(unittest.TestCase):
+
+    def test_no_false_negatives_and_false_positives_near_target(self):
+        bloom = BloomFilter(capacity=5000, error_rate=0.01)
+        for i in range(5000):
+            bloom.add(f"<{i}@mail>")
+
+        self.assertTrue(all(f"<{i}@mail>" in bloom for i in range(5000)))
+        false_positives = sum(f"<new-{i}@mail>" in bloom for i in range(10000))
+        self.assertLess(false_positives / 10000, 0.02)
+
+        restored, meta = BloomFilter.from_bytes(bloom.to_bytes(account=ACCOUNT, last_id=7))
+        self.assertEqual((meta["account"], meta["last_id"], restored.count), (ACCOUNT, 7, bloom.count))
+        # Items whose bits were all set already (false positives) are not counted
+        self.assertGreater(bloom.count, 4900)
+        self.assertEqual(restored.bits, bloom.bits)
+
+    def test_adding_a_present_item_does_not_increase_count(self):
+        bloom = BloomFilter(capacity=100)
+        bloom.add("<a@mail>")
+        bits = bytes(bloom.bits)
+
+        bloom.add("<a@mail>")
+        self.assertEqual((bloom.count, bytes(bloom.bits)), (1, bits))
+        bloom.add("<b@mail>")
+        self.assertEqual(bloom.count, 2)
+
+
+class TestFilteredDeduplication(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.repository = SQLAlchemyRepository(os.path.join(self.temp_dir.name, "dedup.db"))
+        self.snapshot_dir = os.path.join(self.temp_dir.name, "filters")
+        for i in range(100):
+            self.repository.mark_email_processed(ACCOUNT, f"<old-{i}@mail>")
+
+    def tearDown(self):
+        self.repository.disconnect()
+        self.temp_dir.cleanup()
+
+    def _client(self, message_filter):
+        return GmailDeduplicationClient(
+            self.repository, ACCOUNT, session=self.repository._get_session(), message_filter=message_filter
+        )
+
+    def test_only_possible_hits_are_looked_up_in_the_database(self):
+        message_filter = ProcessedMessageFilter(snapshot_dir=self.snapshot_dir, min_capacity=1000)
+        client = self._client(message_filter)
+        emails = [{"Message-ID": f"<old-{i}@mail>"} for i in range(0, 100, 10)]
+        emails += [{"Message-ID": f"<new-{i}@mail>"} for i in range(50)]
+
+        with patch.object(self.repository, "get_processed_message_ids", wraps=self.repository.get_processed_message_ids) as lookup:
+            new_emails = client.filter_new_emails(emails)
+
+        self.assertEqual(new_emails, emails[10:])
+        [(_, checked), _] = lookup.call_args
+        self.assertTrue({e["Message-ID"] for e in emails[:10]} <= set(checked))
+        self.assertLess(len(checked), 20)
+
+        # Emails marked during the run are known to the filter without a database lookup
+        client.bulk_mark_as_processed(["<new-1@mail>"])
+        self.assertTrue(message_filter.might_contain(ACCOUNT, "<NEW-1@mail>"))
+
+        metrics = message_filter.get_metrics()
+        self.assertEqual(metrics["lookups"], 61)
+        self.assertEqual(metrics["definitely_new"] + metrics["false_positives"], 50)
+        self.assertEqual(metrics["observed_false_positive_rate"], metrics["false_positives"] / 50)
+
+    def test_restart_loads_the_snapshot_and_reads_only_newer_rows(self):
+        first = ProcessedMessageFilter(snapshot_dir=self.snapshot_dir, min_capacity=1000)
+        first.sync(ACCOUNT, self.repository)
+        self.repository.mark_email_processed(ACCOUNT, "<while-down@mail>")
+
+        restarted = ProcessedMessageFilter(snapshot_dir=self.snapshot_dir, min_capacity=1000)
+        with patch.object(self.repository, "list_processed_message_ids", wraps=self.repository.list_processed_message_ids) as rows:
+            client = self._client(restarted)
+
+        self.assertEqual(rows.call_args.kwargs["after_id"], 100)
+        self.assertEqual((restarted.builds, restarted.snapshot_loads), (0, 1))
+        self.assertTrue(client.is_email_processed("<while-down@mail>"))
+        self.assertTrue(client.is_email_processed("<old-5@mail>"))
+
+        # Deleting history drops the filter and its snapshot so it is rebuilt from the database
+        self.assertTrue(client.reset_account_history())
+        self.assertFalse(restarted.is_ready(ACCOUNT))
+        self.assertEqual(os.listdir(self.snapshot_dir), [])
+        self.assertFalse(client.is_email_processed("<old-5@mail>"))
+
+
+if __name__ == "__main__":
+    unittest.main()
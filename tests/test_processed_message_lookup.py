@@ -0,0 +1,107 @@
+"""
+Tests for the set-based lookup and bulk upsert of processed emails.
+"""
+import os
+import tempfile
+import unittest
+from datetime import datetime
+
+from sqlalchemy import event
+
+from clients.gmail_deduplication_client import GmailDeduplicationClient
+from models.database import ProcessedEmailLog
+from repositories.sqlalchemy_repository import PROCESSED_ID_CHUNK_SIZE, SQLAlchemyRepository
+
+ACCOUNT = "user@example.com"
+
+
+class TestProcessedMessageLookup(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.repository = SQLAlchemyRepository(self.db_path)
+
+        # Every third ID is processed for this account; a few more belong to another account
+        session = self.repository._get_session()
+        self.total = PROCESSED_ID_CHUNK_SIZE * 2 + 50
+        now = datetime.utcnow()
+        session.add_all(
+            ProcessedEmailLog(account_email=ACCOUNT, message_id=f"<{i}@mail>", processed_at=now)
+            for i in range(0, self.total, 3)
+        )
+        session.add_all(
+            ProcessedEmailLog(account_email="other@example.com", message_id=f"<{i}@mail>", processed_at=now)
+            for i in range(1, 30, 3)
+        )
+        session.commit()
+
+    def tearDown(self):
+        self.repository.disconnect()
+        os.unlink(self.db_path)
+
+    def test_batch_lookup_matches_per_message_lookup_with_one_query_per_chunk(self):
+        message_ids = [f"<{i}@mail>" for i in range(self.total)] + ["<0@mail>", ""]
+
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(self.repository.engine, "before_cursor_execute", listener)
+        try:
+            processed = self.repository.get_processed_message_ids(ACCOUNT, message_ids)
+        finally:
+            event.remove(self.repository.engine, "before_cursor_execute", listener)
+
+        expected = {m for m in message_ids if m and self.repository.is_email_processed(ACCOUNT, m)}
+        self.assertEqual(processed, expected)
+        self.assertEqual(len(expected), len(range(0, self.total, 3)))
+        self.assertEqual(len(statements), 3)  # 1050 distinct IDs in chunks of 500
+        self.assertEqual(self.repository.get_processed_message_ids(ACCOUNT, []), set())
+
+    def test_filter_new_emails_keeps_the_same_emails_as_per_message_checks(self):
+        client = GmailDeduplicationClient(self.repository, ACCOUNT, session=self.repository._get_session())
+        emails = [{"Message-ID": f" <{i}@mail> ", "Subject": str(i)} for i in range(40)]
+        emails.append({"Subject": "no id"})
+
+        new_emails = client.filter_new_emails(emails)
+
+        expected = [e for e in emails if not e.get("Message-ID") or not client.is_email_processed(e["Message-ID"])]
+        self.assertEqual(new_emails, expected)
+        stats = client.get_stats()
+        self.assertEqual((stats["duplicates_found"], stats["new_emails"], stats["errors"]), (2 * 14, 2 * 26, 0))
+
+
+class TestBulkMarkEmailsProcessed(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.repository = SQLAlchemyRepository(self.db_path)
+        self.repository.mark_email_processed(ACCOUNT, "<2@mail>")
+
+    def tearDown(self):
+        self.repository.disconnect()
+        os.unlink(self.db_path)
+
+    def test_duplicates_are_skipped_with_one_insert_per_chunk(self):
+        message_ids = [f"<{i}@mail>" for i in range(10)] + ["<3@mail>", " ", "<4@mail> "]
+
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(self.repository.engine, "before_cursor_execute", listener)
+        try:
+            inserted, skipped = self.repository.bulk_mark_emails_processed(ACCOUNT, message_ids, chunk_size=4)
+        finally:
+            event.remove(self.repository.engine, "before_cursor_execute", listener)
+
+        self.assertEqual((inserted, skipped), (9, 3))
+        self.assertEqual(len([s for s in statements if s.startswith("INSERT")]), 3)
+        self.assertTrue(all("ON CONFLICT" in s for s in statements if s.startswith("INSERT")))
+        self.assertEqual(self.repository.count(ProcessedEmailLog, account_email=ACCOUNT), 10)
+
+        client = GmailDeduplicationClient(self.repository, ACCOUNT, session=self.repository._get_session())
+        self.assertEqual(client.bulk_mark_as_processed(["<9@mail>", "<10@mail>"]), (2, 0))
+        self.assertEqual(client.get_stats()["logged"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
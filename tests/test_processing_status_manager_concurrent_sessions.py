@@ -0,0 +1,105 @@
+"""
+Tests for concurrent per-account sessions in ProcessingStatusManager.
+"""
+import threading
+import unittest
+
+from services.processing_status_manager import ProcessingState, ProcessingStatusManager
+
+
+class TestConcurrentProcessingSessions(unittest.TestCase):
+
+    def setUp(self):
+        self.manager = ProcessingStatusManager(max_concurrent_sessions=2)
+
+    def test_different_accounts_process_concurrently(self):
+        self.manager.start_processing("a@example.com")
+        self.manager.start_processing("b@example.com")
+
+        self.manager.update_status(ProcessingState.FETCHING, "Fetching", {"current": 1, "total": 4},
+                                   email_address="a@example.com")
+        self.manager.update_status(ProcessingState.CATEGORIZING, "Categorizing", email_address="b@example.com")
+        self.manager.increment_reviewed(3, email_address="a@example.com")
+
+        a = self.manager.get_current_status(email_address="a@example.com")
+        b = self.manager.get_current_status(email_address="B@example.com")
+        self.assertEqual((a["state"], a["progress"], a["emails_reviewed"]), ("FETCHING", {"current": 1, "total": 4}, 3))
+        self.assertEqual((b["state"], b["emails_reviewed"]), ("CATEGORIZING", 0))
+        self.assertTrue(self.manager.is_processing_account("a@example.com"))
+
+        self.manager.complete_processing(email_address="a@example.com")
+        self.assertEqual(self.manager.get_active_accounts(), ["b@example.com"])
+        self.assertEqual(self.manager.get_recent_runs(limit=1)[0]["email_address"], "a@example.com")
+
+    def test_conflicts_are_per_account_and_limit_is_enforced(self):
+        self.manager.start_processing("a@example.com")
+        with self.assertRaisesRegex(ValueError, "already active for a@example.com"):
+            self.manager.start_processing("A@example.com")
+
+        self.manager.start_processing("b@example.com")
+        self.assertFalse(self.manager.has_capacity())
+        with self.assertRaisesRegex(ValueError, "Maximum concurrent"):
+            self.manager.start_processing("c@example.com")
+
+    def test_implicit_calls_apply_to_the_calling_threads_session(self):
+        barrier = threading.Barrier(2)
+        errors = []
+
+        def worker(email_address, count):
+            try:
+                self.manager.start_processing(email_address)
+                barrier.wait(2)
+                for _ in range(count):
+                    self.manager.increment_categorized()
+                self.manager.update_status(ProcessingState.PROCESSING, f"Done with {email_address}")
+                barrier.wait(2)
+                self.manager.complete_processing()
+            except Exception as e:  # pragma: no cover - surfaced by the assertion below
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=("a@example.com", 5)),
+                   threading.Thread(target=worker, args=("b@example.com", 7))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        runs = {run["email_address"]: run for run in self.manager.get_recent_runs()}
+        self.assertEqual(runs["a@example.com"]["emails_categorized"], 5)
+        self.assertEqual(runs["b@example.com"]["emails_categorized"], 7)
+        self.assertFalse(self.manager.is_processing())
+
+    def test_aggregate_status_sums_sessions(self):
+        self.manager.start_processing("a@example.com")
+        self.manager.start_processing("b@example.com")
+        self.manager.increment_deleted(2, email_address="a@example.com")
+        self.manager.increment_deleted(1, email_address="b@example.com")
+
+        aggregate = self.manager.get_aggregate_status()
+        self.assertEqual(aggregate["active_count"], 2)
+        self.assertEqual(aggregate["max_concurrent_sessions"], 2)
+        self.assertEqual(aggregate["accounts"], ["a@example.com", "b@example.com"])
+        self.assertEqual(aggregate["totals"]["emails_deleted"], 3)
+
+    def test_ambiguous_implicit_update_is_rejected(self):
+        self.manager.start_processing("a@example.com")
+        self.manager.start_processing("b@example.com")
+        errors = []
+
+        def update_from_unbound_thread():
+            try:
+                self.manager.update_status(ProcessingState.PROCESSING, "step")
+            except RuntimeError as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=update_from_unbound_thread)
+        thread.start()
+        thread.join()
+
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(self.manager.get_current_status(email_address="a@example.com")["state"], "IDLE")
+
+
+if __name__ == "__main__":
+    unittest.main()
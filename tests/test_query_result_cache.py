@@ -0,0 +1,166 @@
+"""
+Tests for the read-through cache of dashboard query results.
+"""
+import os
+import tempfile
+import threading
+import time
+import unittest
+from datetime import datetime
+
+from sqlalchemy import event
+
+from repositories.sqlalchemy_repository import SQLAlchemyRepository
+from services.category_aggregator_service import CategoryAggregator
+from services.dashboard_service import DashboardService
+from services.database_service import DatabaseService
+from services.query_result_cache import QueryResultCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestQueryResultCache(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = QueryResultCache(ttl=60, clock=self.clock)
+        self.computations = []
+
+    def _compute(self, value):
+        def compute():
+            self.computations.append(value)
+            return {'value': value}
+        return compute
+
+    def test_results_are_served_until_they_expire(self):
+        first = self.cache.get_or_compute('weekly_summary', None, 0, self._compute(1))
+        first['value'] = 'changed by the caller'
+        self.assertEqual(self.cache.get_or_compute('weekly_summary', None, 0, self._compute(2)), {'value': 1})
+        self.assertEqual(self.cache.get_or_compute('weekly_summary', None, 1, self._compute(3)), {'value': 3})
+
+        self.clock.now = 60
+        self.assertEqual(self.cache.get_or_compute('weekly_summary', None, 0, self._compute(4)), {'value': 4})
+        self.assertEqual(self.computations, [1, 3, 4])
+
+        stats = self.cache.get_stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['entries']), (1, 3, 2))
+        self.assertEqual(stats['hit_rate'], 0.25)
+
+    def test_invalidating_an_account_keeps_other_accounts_results(self):
+        for account in ('a@gmail.com', 'b@gmail.com', None):
+            self.cache.get_or_compute('recommendations', account, 7, self._compute(account))
+
+        self.assertEqual(self.cache.invalidate('a@gmail.com'), 2)  # Its own and the all-accounts result
+        self.cache.get_or_compute('recommendations', 'b@gmail.com', 7, self._compute('again'))
+        self.assertEqual(self.computations, ['a@gmail.com', 'b@gmail.com', None])
+
+        self.cache.invalidate()
+        self.assertEqual(self.cache.get_stats()['entries'], 0)
+
+    def test_errors_are_not_cached(self):
+        def fail():
+            raise RuntimeError("database unavailable")
+        with self.assertRaises(RuntimeError):
+            self.cache.get_or_compute('weekly_summary', None, 0, fail)
+        self.assertEqual(self.cache.get_or_compute('weekly_summary', None, 0, self._compute(1)), {'value': 1})
+        self.assertEqual(self.cache.get_stats()['errors'], 1)
+
+    def test_concurrent_misses_compute_once(self):
+        started, release = threading.Event(), threading.Event()
+
+        def slow_compute():
+            started.set()
+            release.wait(5)
+            self.computations.append('summary')
+            return {'value': 'summary'}
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(
+            self.cache.get_or_compute('weekly_summary', None, 0, slow_compute))) for _ in range(8)]
+        threads[0].start()
+        self.assertTrue(started.wait(5))
+        for thread in threads[1:]:
+            thread.start()
+        while self.cache.get_stats()['coalesced'] < 7:
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(self.computations, ['summary'])
+        self.assertEqual(results, [{'value': 'summary'}] * 8)
+        self.assertEqual(self.cache.get_stats()['hit_rate'], 7 / 8)
+
+    def test_result_computed_across_an_invalidation_is_not_stored(self):
+        def compute_then_data_changes():
+            self.cache.invalidate()
+            return {'value': 'stale'}
+
+        self.assertEqual(self.cache.get_or_compute('weekly_summary', None, 0, compute_then_data_changes),
+                         {'value': 'stale'})
+        self.assertEqual(self.cache.get_or_compute('weekly_summary', None, 0, self._compute('fresh')),
+                         {'value': 'fresh'})
+
+
+class TestDatabaseServiceQueryCache(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.repository = SQLAlchemyRepository(os.path.join(self.temp_dir.name, "cache.db"))
+        self.db_service = DatabaseService(repository=self.repository)
+        self.dashboard = DashboardService(self.db_service)
+
+    def tearDown(self):
+        self.repository.disconnect()
+        self.temp_dir.cleanup()
+
+    def _save_summary(self, processed):
+        self.db_service.save_email_summary({
+            'total_processed': processed, 'total_deleted': 0, 'total_archived': 0,
+            'categories': {'Marketing': {'count': processed}},
+        })
+
+    def test_dashboard_reads_are_cached_until_data_changes(self):
+        self._save_summary(5)
+        self.dashboard.get_top_categories(period='week')
+
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(self.repository.engine, "before_cursor_execute", listener)
+        try:
+            top = self.dashboard.get_top_categories(period='week')
+            self.db_service.get_weekly_summary()
+        finally:
+            event.remove(self.repository.engine, "before_cursor_execute", listener)
+        self.assertEqual(statements, [])
+        self.assertEqual(top['total_emails'], 5)
+
+        # A completed run drops the cached results
+        self._save_summary(3)
+        self.assertEqual(self.dashboard.get_top_categories(period='week')['total_emails'], 8)
+        self.assertGreater(self.dashboard.get_cache_stats()['hit_rate'], 0)
+
+    def test_flushing_tallies_invalidates_cached_results(self):
+        self.db_service.get_processing_runs(limit=5)
+        invalidations = self.db_service.query_cache.get_stats()['invalidations']
+
+        class Repository:
+            def add_to_daily_tallies(self, increments):
+                return len(increments)
+
+        aggregator = CategoryAggregator(Repository(), buffer_size=100)
+        aggregator.record_category("a@gmail.com", "Marketing", datetime(2026, 10, 1, 9))
+        aggregator.flush()
+
+        stats = self.db_service.query_cache.get_stats()
+        self.assertEqual((stats['invalidations'], stats['entries']), (invalidations + 1, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+"""
+Tests for the compiled, cached repeat offender matchers.
+"""
+import os
+import re
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from models.database import RepeatOffenderPattern, get_session, init_database
+from services.repeat_offender_matcher import RepeatOffenderMatcherCache, bump_pattern_version
+from services.repeat_offender_service import RepeatOffenderService
+
+ACCOUNT = "user@example.com"
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestRepeatOffenderMatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.engine = init_database(os.path.join(self.temp_dir.name, "patterns.db"))
+        self.session = get_session(self.engine)
+        self.clock = _Clock()
+        self.cache = RepeatOffenderMatcherCache(check_interval=30, clock=self.clock)
+        self.service = RepeatOffenderService(self.session, ACCOUNT, matcher_cache=self.cache)
+
+    def tearDown(self):
+        self.session.close()
+        self.engine.dispose()
+        self.temp_dir.cleanup()
+
+    def _add(self, category, confidence=0.9, marked=True, days_ago=1, **identifier):
+        seen = datetime.now() - timedelta(days=days_ago)
+        self.session.add(RepeatOffenderPattern(
+            account_name=identifier.pop("account_name", ACCOUNT), category=category, total_occurrences=5,
+            deletion_count=5, confidence_score=confidence, first_seen=seen, last_seen=seen,
+            marked_as_repeat_offender=seen if marked else None, is_active=True, **identifier
+        ))
+        self.session.commit()
+
+    def _linear_scan(self, sender_email, sender_domain, subject):
+        # The per-email query and loop check_repeat_offender used before matchers were cached
+        patterns = self.session.query(RepeatOffenderPattern).filter(
+            RepeatOffenderPattern.account_name == ACCOUNT,
+            RepeatOffenderPattern.is_active == True,
+            RepeatOffenderPattern.marked_as_repeat_offender.isnot(None),
+            RepeatOffenderPattern.last_seen >= datetime.now() - timedelta(days=30)
+        ).order_by(
+            RepeatOffenderPattern.sender_email.desc(),
+            RepeatOffenderPattern.sender_domain.desc(),
+            RepeatOffenderPattern.confidence_score.desc()
+        ).all()
+        for p in patterns:
+            if p.sender_email:
+                matched = p.sender_email == sender_email
+            elif p.sender_domain:
+                matched = p.sender_domain == sender_domain
+            else:
+                matched = bool(re.search(p.subject_pattern, subject, re.IGNORECASE))
+            if matched:
+                return f"{p.category}-RepeatOffender"
+        return None
+
+    def test_matches_like_the_linear_scan_of_all_patterns(self):
+        self._add("Marketing", sender_email="spam@ads.com")
+        self._add("Advertising", sender_domain="ads.com")
+        self._add("Marketing", sender_domain="deals.com", confidence=0.85)
+        self._add("WantsMoney", subject_pattern=r'(?i)\b(credit|loan|mortgage|debt|refinance|insurance)\b', confidence=0.95)
+        self._add("Advertising", subject_pattern=r'(?i)\b(free|save|discount|offer|deal)\b', confidence=0.85)
+        self._add("Marketing", subject_pattern=r'\bbuy\s+now\b')
+        self._add("Marketing", sender_domain="old.com", days_ago=45)
+        self._add("Marketing", sender_domain="pending.com", marked=False)
+        self._add("Marketing", sender_domain="other.com", account_name="other@example.com")
+
+        emails = [
+            ("spam@ads.com", "ads.com", "Hello"),
+            ("news@ads.com", "ads.com", "Hello"),
+            ("a@deals.com", "deals.com", "Free loan offer"),
+            ("a@x.com", "x.com", "Free loan offer"),
+            ("a@x.com", "x.com", "SAVE big"),
+            ("a@x.com", "x.com", "Buy   NOW"),
+            ("a@x.com", "x.com", "Quarterly report"),
+            ("a@old.com", "old.com", "Hi"),
+            ("a@pending.com", "pending.com", "Hi"),
+            ("a@other.com", "other.com", "Hi"),
+            (None, "", ""),
+        ]
+        for email in emails:
+            self.assertEqual(self.service.check_repeat_offender(*email), self._linear_scan(*email), email)
+
+    def test_checks_are_served_from_the_cache_until_the_version_stamp_changes(self):
+        self._add("Advertising", sender_domain="ads.com")
+        self.assertEqual(self.service.check_repeat_offender("a@ads.com", "ads.com", "Hi"), "Advertising-RepeatOffender")
+
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(self.engine, "before_cursor_execute", listener)
+        try:
+            for _ in range(50):
+                self.service.check_repeat_offender("a@x.com", "x.com", "Weekly digest")
+        finally:
+            event.remove(self.engine, "before_cursor_execute", listener)
+        self.assertEqual(statements, [])
+
+        # A pattern marked by this process is used by the next check
+        for _ in range(3):
+            self.service.record_email_outcome("promo@shop.com", "shop.com", "Hi", "Marketing", was_deleted=True)
+        self.assertEqual(self.service.check_repeat_offender("promo@shop.com", "shop.com", "Hi"), "Marketing-RepeatOffender")
+
+        # Another process adds a pattern and bumps the stamp: seen once the check interval has passed
+        self._add("Marketing", sender_domain="x.com")
+        bump_pattern_version(self.session, ACCOUNT)
+        self.session.commit()
+        self.assertIsNone(self.service.check_repeat_offender("a@x.com", "x.com", "Weekly digest"))
+        self.clock.now += 31
+        self.assertEqual(self.service.check_repeat_offender("a@x.com", "x.com", "Weekly digest"), "Marketing-RepeatOffender")
+
+        stats = self.cache.get_stats()
+        self.assertEqual((stats["builds"], stats["invalidations"]), (3, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
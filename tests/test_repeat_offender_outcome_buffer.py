@@ -0,0 +1,90 @@
+"""
+Tests for the write-behind buffer of repeat offender outcomes.
+"""
+import os
+import random
+import tempfile
+import unittest
+
+from sqlalchemy import event
+
+from models.database import RepeatOffenderPattern, get_session, init_database
+from services.repeat_offender_matcher import RepeatOffenderMatcherCache
+from services.repeat_offender_outcome_buffer import RepeatOffenderOutcomeBuffer
+from services.repeat_offender_service import RepeatOffenderService
+
+ACCOUNT = "user@example.com"
+
+
+class TestRepeatOffenderOutcomeBuffer(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.engines, self.sessions, self.services = [], [], []
+        for name in ("immediate", "buffered"):
+            engine = init_database(os.path.join(self.temp_dir.name, f"{name}.db"))
+            session = get_session(engine)
+            self.engines.append(engine)
+            self.sessions.append(session)
+            self.services.append(RepeatOffenderService(session, ACCOUNT, matcher_cache=RepeatOffenderMatcherCache()))
+
+    def tearDown(self):
+        for session, engine in zip(self.sessions, self.engines):
+            session.close()
+            engine.dispose()
+        self.temp_dir.cleanup()
+
+    def _patterns(self, session):
+        return sorted(
+            (p.sender_email or "", p.sender_domain or "", p.subject_pattern or "", p.category,
+             p.total_occurrences, p.deletion_count, p.marked_as_repeat_offender is not None)
+            for p in session.query(RepeatOffenderPattern).all()
+        )
+
+    def test_flags_the_same_emails_and_patterns_as_recording_each_outcome(self):
+        immediate, buffered_service = self.services
+        buffer = RepeatOffenderOutcomeBuffer(buffered_service, flush_every=25)
+
+        rng = random.Random(7)
+        senders = [(f"user{i}@domain{i % 25}.com", f"domain{i % 25}.com") for i in range(100)]
+        subjects = ["Free offer inside", "Weekly digest", "Save big on loans", "Hello there", "Your order shipped"]
+        for _ in range(400):
+            sender_email, sender_domain = rng.choice(senders)
+            subject = rng.choice(subjects)
+            category = rng.choice(["Marketing", "Advertising", "Personal"])
+            was_deleted = rng.random() < 0.6
+
+            # Both see the same flags before each email, so in-run transitions are visible immediately
+            flagged = immediate.check_repeat_offender(sender_email, sender_domain, subject)
+            self.assertEqual(flagged, buffered_service.check_repeat_offender(sender_email, sender_domain, subject))
+            if flagged:
+                continue  # Outcomes of flagged emails are not recorded
+            immediate.record_email_outcome(sender_email, sender_domain, subject, category, was_deleted)
+            buffer.record(sender_email, sender_domain, subject, category, was_deleted)
+
+        buffer.flush()
+        self.assertEqual(self._patterns(self.sessions[0]), self._patterns(self.sessions[1]))
+        self.assertLess(buffer.flushes, buffer.recorded / 5)
+
+    def test_outcomes_are_written_in_one_transaction_per_batch(self):
+        buffer = RepeatOffenderOutcomeBuffer(self.services[1], flush_every=100)
+        buffer.record("a@x.com", "x.com", "Hi", "Marketing", was_deleted=False)  # Loads pattern counts once
+
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(self.engines[1], "before_cursor_execute", listener)
+        try:
+            for i in range(40):
+                buffer.record(f"s{i}@x.com", "x.com", "Hi", "Marketing", was_deleted=i % 2 == 0)
+            self.assertEqual(statements, [])
+            buffer.flush()
+        finally:
+            event.remove(self.engines[1], "before_cursor_execute", listener)
+
+        self.assertEqual(len([s for s in statements if s.startswith("SELECT")]), 1)
+        [domain] = [p for p in self._patterns(self.sessions[1]) if p[1] == "x.com"]
+        self.assertEqual(domain[4:], (41, 20, False))
+
+
+if __name__ == "__main__":
+    unittest.main()
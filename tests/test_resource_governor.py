@@ -0,0 +1,84 @@
+"""
+Tests for the process-wide resource governor.
+"""
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from repositories.sqlalchemy_repository import SQLAlchemyRepository
+from services.gmail_connection_service import GmailConnectionService
+from services.resource_governor import DB, IMAP, LLM, ResourceGovernor, ResourceTimeoutError
+
+
+class TestResourceGovernor(unittest.TestCase):
+
+    def test_global_limit_blocks_until_a_slot_is_released(self):
+        governor = ResourceGovernor()
+        governor.configure(LLM, limit=1)
+        first = governor.acquire(LLM)
+
+        acquired = threading.Event()
+        waiter = threading.Thread(target=lambda: (governor.acquire(LLM), acquired.set()))
+        waiter.start()
+        self.assertFalse(acquired.wait(0.1))
+        self.assertEqual(governor.get_metrics()[LLM]["waiting"], 1)
+
+        first.release()
+        first.release()  # idempotent
+        self.assertTrue(acquired.wait(2))
+        waiter.join()
+
+        metrics = governor.get_metrics()[LLM]
+        self.assertEqual((metrics["acquired"], metrics["waited"], metrics["in_use"]), (2, 1, 1))
+        self.assertGreater(metrics["max_wait_ms"], 50)
+
+    def test_per_key_limit_only_blocks_the_same_key(self):
+        governor = ResourceGovernor()
+        governor.configure(IMAP, limit=3, per_key_limit=1)
+        governor.acquire(IMAP, key="a@example.com")
+
+        with governor.slot(IMAP, key="b@example.com"):
+            self.assertEqual(governor.get_metrics()[IMAP]["in_use_by_key"], {"a@example.com": 1, "b@example.com": 1})
+        with self.assertRaises(ResourceTimeoutError):
+            governor.acquire(IMAP, key="A@example.com", timeout=0.05)
+
+        metrics = governor.get_metrics()[IMAP]
+        self.assertEqual((metrics["timeouts"], metrics["in_use"], metrics["peak_in_use"]), (1, 1, 2))
+
+    def test_failed_imap_connect_gives_its_slot_back(self):
+        governor = ResourceGovernor()
+        governor.configure(IMAP, limit=1)
+        service = GmailConnectionService("user@example.com", "app-password", governor=governor)
+
+        with patch("services.gmail_connection_service.imaplib.IMAP4_SSL", side_effect=OSError("unreachable")):
+            with self.assertRaises(OSError):
+                service.connect()
+        self.assertEqual(governor.get_metrics()[IMAP]["in_use"], 0)
+
+        with patch("services.gmail_connection_service.imaplib.IMAP4_SSL") as imap:
+            imap.return_value.authenticate.return_value = ("OK", [b""])
+            service.connect()
+            self.assertEqual(governor.get_metrics()[IMAP]["in_use"], 1)
+            service.release()
+        self.assertEqual(governor.get_metrics()[IMAP]["in_use"], 0)
+
+    def test_repository_connections_are_metered(self):
+        governor = ResourceGovernor()
+        handle, db_path = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+        repository = SQLAlchemyRepository(db_path, governor=governor)
+        try:
+            repository.create_processing_run("user@example.com")
+            metrics = governor.get_metrics()[DB]
+            self.assertGreater(metrics["acquired"], 0)
+            self.assertEqual(metrics["in_use"], repository.engine.pool.checkedout())
+        finally:
+            repository.disconnect()
+            os.unlink(db_path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,273 @@
+"""
+Tests for the materialized rollups of email summaries and category tallies.
+"""
+import os
+import random
+import tempfile
+import unittest
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import event
+
+from models.database import (
+    CategoryDailyTally, CategorySummary, DomainSummary, EmailAccount, EmailSummary, SenderSummary
+)
+from repositories.category_tally_repository import CategoryTallyRepository
+from repositories import rollup_repository
+from repositories.rollup_repository import RollupRepository, period_end, split_into_periods
+from repositories.sqlalchemy_repository import SQLAlchemyRepository
+from services.database_service import DatabaseService
+
+CATEGORIES = ["Marketing", "Advertising", "Personal", "Work-related", "Service-Updates"]
+FIRST_DAY = date(2025, 1, 1)
+
+
+def raw_category_totals(repository, email_address, start_date, end_date):
+    """Category totals and days with data summed from the daily tallies."""
+    totals = defaultdict(int)
+    tallies = repository.get_tallies_for_period(email_address, start_date, end_date)
+    for tally in tallies:
+        for category, count in tally.category_counts.items():
+            totals[category] += count
+    return dict(totals), len(tallies)
+
+
+class TestSplitIntoPeriods(unittest.TestCase):
+
+    def test_periods_cover_the_range_exactly(self):
+        rng = random.Random(3)
+        for _ in range(300):
+            start = FIRST_DAY + timedelta(days=rng.randrange(700))
+            end = start + timedelta(days=rng.randrange(400))
+            periods = split_into_periods(start, end)
+
+            covered = []
+            for period, period_start in periods:
+                day = period_start
+                while day <= period_end(period, period_start):
+                    covered.append(day)
+                    day += timedelta(days=1)
+            self.assertEqual(covered, [start + timedelta(days=i) for i in range((end - start).days + 1)])
+            # Whole months, plus days, weeks and days again for the partial month on either side
+            self.assertLessEqual(len(periods), 2 * (6 + 4 + 6) + (end - start).days // 28 + 1)
+
+    def test_whole_months_and_weeks_are_used(self):
+        self.assertEqual(split_into_periods(date(2025, 9, 29), date(2025, 11, 2)), [
+            ('day', date(2025, 9, 29)), ('day', date(2025, 9, 30)), ('month', date(2025, 10, 1)),
+            ('day', date(2025, 11, 1)), ('day', date(2025, 11, 2)),
+        ])
+        self.assertEqual(split_into_periods(date(2025, 11, 3), date(2025, 11, 16)), [
+            ('week', date(2025, 11, 3)), ('week', date(2025, 11, 10)),
+        ])
+
+
+class TestCategoryTallyRollups(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.repository = SQLAlchemyRepository(os.path.join(self.temp_dir.name, "rollups.db"))
+        self.session = self.repository._get_session()
+        self.tallies = CategoryTallyRepository(self.session)
+
+    def tearDown(self):
+        self.repository.disconnect()
+        self.temp_dir.cleanup()
+
+    def _assert_matches_daily_tallies(self, rng, accounts, days=500):
+        for _ in range(60):
+            email_address = rng.choice(accounts)
+            start = FIRST_DAY + timedelta(days=rng.randrange(days))
+            end = start + timedelta(days=rng.randrange(120))
+            aggregated = self.tallies.get_aggregated_tallies(email_address, start, end)
+            totals, days_with_data = raw_category_totals(self.tallies, email_address, start, end)
+
+            self.assertEqual({s.category: s.total_count for s in aggregated.category_summaries}, totals)
+            self.assertEqual(aggregated.days_with_data, days_with_data)
+            self.assertEqual(aggregated.total_emails, sum(totals.values()))
+            self.assertEqual(self.tallies.get_category_totals(email_address, start, end), totals)
+
+    def test_rollups_match_the_daily_tallies_after_adds_replacements_and_deletions(self):
+        rng = random.Random(11)
+        accounts = ["a@gmail.com", "b@gmail.com", "c@gmail.com"]
+        for _ in range(20):
+            increments = {}
+            for _ in range(25):
+                key = (rng.choice(accounts), FIRST_DAY + timedelta(days=rng.randrange(500)))
+                increments[key] = {c: rng.randint(0, 9) for c in rng.sample(CATEGORIES, rng.randint(1, 3))}
+            self.tallies.add_to_daily_tallies(increments)
+
+            email_address = rng.choice(accounts)
+            counts = {c: rng.randint(0, 20) for c in rng.sample(CATEGORIES, 2)}
+            self.tallies.save_daily_tally(email_address, FIRST_DAY + timedelta(days=rng.randrange(500)),
+                                          counts, sum(counts.values()))
+        self._assert_matches_daily_tallies(rng, accounts)
+
+        self.tallies.delete_tallies_before("a@gmail.com", date(2025, 6, 18))  # A Wednesday mid-month
+        self.tallies.delete_tallies_before("b@gmail.com", date(2025, 3, 1))
+        self._assert_matches_daily_tallies(rng, accounts)
+
+    def test_existing_tallies_are_rolled_up_on_first_use(self):
+        rng = random.Random(5)
+        for i in range(300):
+            self.session.add(CategoryDailyTally(
+                email_address="a@gmail.com", tally_date=FIRST_DAY + timedelta(days=i),
+                category=rng.choice(CATEGORIES), count=rng.randint(1, 9), total_emails=0
+            ))
+        self.session.commit()
+
+        self._assert_matches_daily_tallies(rng, ["a@gmail.com"], days=300)
+
+    def test_a_years_aggregate_runs_two_queries(self):
+        increments = {
+            ("a@gmail.com", FIRST_DAY + timedelta(days=i)): {c: 1 for c in CATEGORIES}
+            for i in range(700)
+        }
+        self.tallies.add_to_daily_tallies(increments)
+
+        fetched = []
+        listener = lambda conn, cursor, statement, parameters, context, executemany: fetched.append(statement)
+        event.listen(self.repository.engine, "after_cursor_execute", listener)
+        try:
+            aggregated = self.tallies.get_aggregated_tallies("a@gmail.com", date(2025, 3, 5), date(2026, 3, 4))
+        finally:
+            event.remove(self.repository.engine, "after_cursor_execute", listener)
+
+        self.assertEqual(len(fetched), 2)  # Whole weeks and months from the rollups, leftover days from the tallies
+        self.assertEqual((aggregated.total_emails, aggregated.days_with_data), (365 * len(CATEGORIES), 365))
+
+
+class TestSummaryRollups(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.repository = SQLAlchemyRepository(os.path.join(self.temp_dir.name, "summaries.db"))
+        self.db_service = DatabaseService(repository=self.repository)
+
+    def tearDown(self):
+        self.repository.disconnect()
+        self.temp_dir.cleanup()
+
+    def _summary(self, rng, day):
+        summary = EmailSummary(
+            account_id=rng.choice([None, 1, 2]),
+            date=datetime.combine(day, datetime.min.time()) + timedelta(minutes=rng.randrange(1440)),
+            total_emails_processed=rng.randint(0, 50), total_emails_deleted=rng.randint(0, 20),
+            total_emails_archived=rng.randint(0, 5), total_emails_skipped=rng.randint(0, 5),
+            processing_duration_seconds=rng.choice([None, rng.uniform(1, 30)])
+        )
+        for category in rng.sample(CATEGORIES, 3):
+            summary.categories.append(CategorySummary(category_name=category, email_count=rng.randint(1, 30),
+                                                      deleted_count=rng.randint(0, 5), archived_count=0))
+        for sender in rng.sample(range(6), 2):
+            summary.senders.append(SenderSummary(sender_email=f"news{sender}@shop.com", email_count=rng.randint(1, 9),
+                                                 sender_name=rng.choice([None, f"Shop {sender}"])))
+        for domain in rng.sample(range(6), 2):
+            summary.domains.append(DomainSummary(domain=f"shop{domain}.com", email_count=rng.randint(1, 9),
+                                                 deleted_count=rng.randint(0, 3), is_blocked=domain % 2 == 0))
+        return summary
+
+    def _write_summaries(self, rng, count, with_rollups=True):
+        with self.db_service.Session() as session:
+            rollups = RollupRepository(session)
+            for _ in range(count):
+                summary = self._summary(rng, FIRST_DAY + timedelta(days=rng.randrange(400)))
+                session.add(summary)
+                if with_rollups:
+                    rollups.add_summary(summary)
+            session.commit()
+
+    def _assert_matches_summaries(self, rng):
+        for _ in range(40):
+            start = FIRST_DAY + timedelta(days=rng.randrange(400))
+            end = start + timedelta(days=rng.randrange(100))
+            start_time = datetime.combine(start, datetime.min.time())
+            end_time = datetime.combine(end, datetime.max.time())
+
+            from_rollups = self.db_service.get_summary_by_period(start_time, end_time)
+            with self.db_service.Session() as session:
+                summaries, categories, domains, senders = self.db_service._aggregate_summaries(
+                    session, start_time, end_time
+                )
+
+            metrics = from_rollups['metrics']
+            self.assertEqual(
+                (metrics['total_processed'], metrics['total_deleted'], metrics['total_archived'],
+                 metrics['total_skipped'], metrics['summary_count']),
+                (summaries.total_processed or 0, summaries.total_deleted or 0, summaries.total_archived or 0,
+                 summaries.total_skipped or 0, summaries.summary_count or 0)
+            )
+            self.assertAlmostEqual(metrics['avg_processing_seconds'], summaries.avg_duration or 0)
+            self.assertEqual(sorted((c['name'], c['count'], c['deleted']) for c in from_rollups['categories']),
+                             sorted((c.category_name, c.total_count, c.total_deleted) for c in categories))
+            self.assertEqual(
+                sorted((d['domain'], d['count'], d['deleted'], d['is_blocked']) for d in from_rollups['domains']),
+                sorted((d.domain, d.total_count, d.total_deleted, d.is_blocked) for d in domains)
+            )
+            self.assertEqual(
+                sorted((s['email'], s['name'] or '', s['count']) for s in from_rollups['senders']),
+                sorted((s.sender_email, s.sender_name or '', s.total_count) for s in senders)
+            )
+
+    def test_period_summaries_match_the_saved_summaries(self):
+        rng = random.Random(21)
+        self._write_summaries(rng, 250)
+        self._assert_matches_summaries(rng)
+
+    def test_existing_summaries_are_rolled_up_on_first_use(self):
+        rng = random.Random(8)
+        self._write_summaries(rng, 150, with_rollups=False)
+        self._assert_matches_summaries(rng)
+
+    def test_saved_summaries_are_added_to_todays_rollups(self):
+        self.repository.save_email_summary({
+            'total_processed': 12, 'total_deleted': 4, 'total_archived': 1, 'processing_duration': 3.5,
+            'categories': {'Marketing': {'count': 8, 'deleted': 4}, 'Personal': {'count': 4}},
+            'senders': {'deals@shop.com': 5},
+            'domains': {'shop.com': {'count': 5, 'deleted': 4, 'is_blocked': True}},
+        })
+
+        for summary in (self.db_service.get_daily_summary(), self.db_service.get_weekly_summary(),
+                        self.db_service.get_monthly_summary()):
+            self.assertEqual(summary['metrics']['total_processed'], 12)
+            self.assertEqual(summary['metrics']['avg_processing_seconds'], 3.5)
+            self.assertEqual([c['name'] for c in summary['categories']], ['Marketing', 'Personal'])
+            self.assertEqual(summary['senders'], [{'email': 'deals@shop.com', 'name': None, 'count': 5, 'deleted': 0}])
+            self.assertEqual(summary['domains'][0]['is_blocked'], True)
+
+    def test_deleting_an_account_removes_its_rollups(self):
+        account = self.repository.add(EmailAccount(email_address="a@gmail.com"))
+        self.repository.save_email_summary({'total_processed': 7, 'total_deleted': 3, 'total_archived': 0,
+                                            'categories': {'Marketing': {'count': 7}}}, account_id=account.id)
+        self.repository.save_email_summary({'total_processed': 2, 'total_deleted': 1, 'total_archived': 0})
+        with self.db_service.Session() as session:
+            CategoryTallyRepository(session).add_to_daily_tallies({("a@gmail.com", date.today()): {'Marketing': 7}})
+
+        self.assertTrue(self.repository.delete_account("a@gmail.com"))
+
+        metrics = self.db_service.get_daily_summary()['metrics']
+        self.assertEqual((metrics['total_processed'], metrics['total_deleted']), (2, 1))
+        with self.db_service.Session() as session:
+            tallies = CategoryTallyRepository(session)
+            self.assertEqual(tallies.get_category_totals("a@gmail.com", date.today() - timedelta(days=60),
+                                                        date.today()), {})
+
+    def test_only_the_process_claiming_the_marker_backfills(self):
+        rng = random.Random(4)
+        self._write_summaries(rng, 20, with_rollups=False)
+
+        # Another process sharing the database claimed the backfill first
+        with self.db_service.Session() as session:
+            self.assertTrue(RollupRepository(session)._claim_backfill())
+            session.commit()
+        with self.db_service.Session() as session:
+            self.assertFalse(RollupRepository(session)._claim_backfill())
+
+        rollup_repository._backfilled_engines.discard(self.repository.engine)
+        with self.db_service.Session() as session:
+            RollupRepository(session).ensure_backfilled()
+            self.assertIsNone(session.query(rollup_repository.SummaryRollup.id).first())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,192 @@
+"""
+Tests for crash-safe checkpoints and resume of account processing runs.
+"""
+import os
+import re
+import tempfile
+import time
+import unittest
+from collections import Counter
+from datetime import datetime, timedelta
+from unittest.mock import Mock
+
+from models.database import init_database
+from repositories.run_checkpoint_repository import RunCheckpointRepository
+from services.account_email_processor_service import AccountEmailProcessorService
+from services.email_pipeline_config import EmailPipelineConfig
+from services.fake_email_categorizer import FakeEmailCategorizer
+from services.fake_email_deduplication_client import FakeEmailDeduplicationClient
+from services.processing_checkpointer import ProcessingCheckpointer
+from services.processing_status_manager import ProcessingStatusManager
+from tests.fake_account_category_client import FakeAccountCategoryClient
+from tests.fake_gmail_fetcher import FakeGmailFetcher
+
+ACCOUNT = "user@example.com"
+
+
+class TestProcessingCheckpointer(unittest.TestCase):
+
+    def test_flushes_by_batch_size_and_age(self):
+        dedup = FakeEmailDeduplicationClient(ACCOUNT)
+        now = [0.0]
+        flushed = []
+        checkpointer = ProcessingCheckpointer(
+            dedup, batch_size=3, flush_interval=10, on_flush=flushed.append, clock=lambda: now[0]
+        )
+
+        checkpointer.record("<1>")
+        checkpointer.record("<2>")
+        self.assertEqual(dedup.processed_emails, set())
+        checkpointer.record("<3>")
+        self.assertEqual(dedup.processed_emails, {"<1>", "<2>", "<3>"})
+
+        now[0] = 11
+        checkpointer.record("<4>")
+        self.assertTrue(checkpointer.is_processed("<4>"))
+        self.assertEqual(flushed, [3, 1])
+        self.assertEqual(checkpointer.get_stats(), {'checkpointed': 4, 'pending': 0, 'flushes': 2, 'errors': 0})
+
+    def test_lookup_resolves_dedup_status_one_batch_at_a_time(self):
+        dedup = FakeEmailDeduplicationClient(ACCOUNT)
+        dedup.bulk_mark_as_processed(["<1>", "<4>"])
+        dedup.filter_new_emails = Mock(wraps=dedup.filter_new_emails)
+        dedup.is_email_processed = Mock(wraps=dedup.is_email_processed)
+        checkpointer = ProcessingCheckpointer(dedup)
+
+        emails = [{'Message-ID': f"<{i}>"} for i in range(1, 8)]
+        passed = []
+        for email in checkpointer.lookup(emails, batch_size=3):
+            passed.append(email)
+            dedup.is_email_processed.reset_mock()
+            processed = checkpointer.is_processed(email['Message-ID'])
+            self.assertEqual(processed, email['Message-ID'] in ("<1>", "<4>"))
+            dedup.is_email_processed.assert_not_called()
+
+        self.assertEqual(passed, emails)
+        self.assertEqual(dedup.filter_new_emails.call_count, 3)
+
+
+class TestRunCheckpointRepository(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.engine = init_database(os.path.join(self.temp_dir.name, "checkpoints.db"))
+        self.repository = RunCheckpointRepository(self.engine)
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.temp_dir.cleanup()
+
+    def test_unfinished_run_is_reported_and_keeps_the_oldest_window(self):
+        first_window = datetime(2026, 1, 1, 10, 0)
+        self.assertIsNone(self.repository.begin_run(ACCOUNT, first_window, run_id="run-1"))
+        self.repository.record_progress(ACCOUNT, 7)
+
+        interrupted = self.repository.begin_run(ACCOUNT, first_window + timedelta(hours=1), run_id="run-2")
+
+        self.assertEqual((interrupted.run_id, interrupted.messages_checkpointed), ("run-1", 7))
+        current = self.repository.get_checkpoint(ACCOUNT)
+        self.assertEqual((current.window_start, current.resumed_runs), (first_window, 1))
+
+        self.repository.complete_run(ACCOUNT)
+        self.assertIsNone(self.repository.get_checkpoint(ACCOUNT))
+        self.assertIsNone(self.repository.begin_run(ACCOUNT, first_window, run_id="run-3"))
+
+
+class _RecordingFetcher(FakeGmailFetcher):
+    def __init__(self):
+        super().__init__()
+        self.requested_hours = []
+
+    def iter_recent_emails(self, hours=2):
+        self.requested_hours.append(hours)
+        return super().iter_recent_emails(hours)
+
+
+class _CrashingCategorizer(FakeEmailCategorizer):
+    """Counts classifications; on the first run, fails once the first 8 emails are checkpointed."""
+
+    def __init__(self, dedup, **kwargs):
+        super().__init__(**kwargs)
+        self.dedup = dedup
+        self.crash = True
+        self.classified = Counter()
+
+    def categorize(self, contents, model):
+        item = re.search(r"item (\d+)", contents)
+        if self.crash and item and int(item.group(1)) >= 8:
+            deadline = time.monotonic() + 2
+            while len(self.dedup.processed_emails) < 8 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            raise RuntimeError("LLM worker crashed")
+        self.classified[contents] += 1
+        return super().categorize(contents, model)
+
+
+class TestProcessAccountResume(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.engine = init_database(os.path.join(self.temp_dir.name, "checkpoints.db"))
+
+        self.account_client = FakeAccountCategoryClient()
+        account = self.account_client.get_or_create_account(ACCOUNT, None, None, None, None)
+        account.app_password = "app-password"
+
+        self.fetcher = _RecordingFetcher()
+        self.fetcher.summary_service = Mock()
+        self.fetcher.summary_service.run_metrics = {'fetched': 0}
+        self.fetcher.summary_service.db_service = None
+        self.fetcher.account_service = self.account_client
+        self.fetcher.stats = {'deleted': 0, 'kept': 0, 'categories': Counter()}
+        for i in range(12):
+            self.fetcher.add_test_email(subject=f"Sale {i}", body=f"buy item {i} now", sender="news@shop.com")
+
+        self.dedup = FakeEmailDeduplicationClient(ACCOUNT)
+        dedup_factory = Mock()
+        dedup_factory.create_deduplication_client.return_value = self.dedup
+        settings = Mock()
+        settings.get_lookback_hours.return_value = 2
+        self.categorizer = _CrashingCategorizer(self.dedup, default_category="Marketing")
+        self.checkpoints = RunCheckpointRepository(self.engine)
+        self.service = AccountEmailProcessorService(
+            processing_status_manager=ProcessingStatusManager(),
+            settings_service=settings,
+            email_categorizer=self.categorizer,
+            api_token="token",
+            llm_model="test-model",
+            account_category_client=self.account_client,
+            deduplication_factory=dedup_factory,
+            create_gmail_fetcher=lambda email, pwd, token: self.fetcher,
+            pipeline_config=EmailPipelineConfig(checkpoint_batch_size=4),
+            checkpoint_repository=self.checkpoints,
+        )
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.temp_dir.cleanup()
+
+    def test_crashed_run_is_resumed_without_reclassifying_checkpointed_emails(self):
+        crashed = self.service.process_account(ACCOUNT)
+
+        self.assertFalse(crashed["success"])
+        self.assertEqual(len(self.dedup.processed_emails), 8)
+        self.assertEqual(self.checkpoints.get_checkpoint(ACCOUNT).messages_checkpointed, 8)
+
+        self.categorizer.crash = False
+        resumed = self.service.process_account(ACCOUNT)
+
+        self.assertTrue(resumed["success"], resumed.get("error"))
+        self.assertTrue(resumed["resumed_interrupted_run"])
+        self.assertEqual(resumed["emails_processed"], 4)
+        self.assertEqual(resumed["checkpoints"]["checkpointed"], 4)
+        # Every email classified exactly once across the crash
+        self.assertEqual(sum(self.categorizer.classified.values()), 12)
+        self.assertEqual(set(self.categorizer.classified.values()), {1})
+        # The resumed run reaches back over the interrupted run's window
+        self.assertEqual(self.fetcher.requested_hours, [2, 3])
+        self.assertIsNone(self.checkpoints.get_checkpoint(ACCOUNT))
+
+
+if __name__ == "__main__":
+    unittest.main()
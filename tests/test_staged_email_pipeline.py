@@ -0,0 +1,133 @@
+"""
+Tests for the staged pipeline used by AccountEmailProcessorService.process_account.
+"""
+import contextvars
+import time
+import unittest
+from collections import Counter
+from unittest.mock import Mock
+
+from services.account_email_processor_service import AccountEmailProcessorService
+from services.email_pipeline_config import EmailPipelineConfig
+from services.fake_email_categorizer import FakeEmailCategorizer
+from services.fake_email_deduplication_client import FakeEmailDeduplicationClient
+from services.processing_status_manager import ProcessingStatusManager
+from services.staged_pipeline import PipelineStage, StagedPipeline
+from tests.fake_account_category_client import FakeAccountCategoryClient
+from tests.fake_gmail_fetcher import FakeGmailFetcher
+
+ACCOUNT = "user@example.com"
+_request_account = contextvars.ContextVar("request_account", default=None)
+
+
+class TestStagedPipeline(unittest.TestCase):
+
+    def test_items_flow_through_stages_and_drops_are_counted(self):
+        pipeline = StagedPipeline([
+            PipelineStage("double", lambda x: x * 2, workers=2),
+            PipelineStage("skip_multiples_of_4", lambda x: x if x % 4 else None),
+        ])
+
+        results = sorted(pipeline.run(range(10), source_name="numbers"))
+
+        self.assertEqual(results, [2, 6, 10, 14, 18])
+        metrics = pipeline.get_metrics()
+        self.assertEqual(metrics["numbers"]["emitted"], 10)
+        self.assertEqual(metrics["double"]["workers"], 2)
+        self.assertEqual((metrics["skip_multiples_of_4"]["emitted"], metrics["skip_multiples_of_4"]["dropped"]), (5, 5))
+
+    def test_bounded_queues_apply_backpressure(self):
+        pipeline = StagedPipeline([PipelineStage("slow", lambda x: time.sleep(0.01) or x, queue_size=2)])
+
+        self.assertEqual(len(list(pipeline.run(range(20)))), 20)
+        self.assertLessEqual(pipeline.get_metrics()["slow"]["max_queue_depth"], 2)
+
+    def test_stage_failure_aborts_run(self):
+        def explode(x):
+            if x == 3:
+                raise RuntimeError("LLM unavailable")
+            return x
+
+        pipeline = StagedPipeline([PipelineStage("classify", explode, workers=2)])
+        with self.assertRaisesRegex(RuntimeError, "LLM unavailable"):
+            list(pipeline.run(range(100)))
+        self.assertEqual(pipeline.get_metrics()["classify"]["errors"], 1)
+
+    def test_workers_inherit_callers_context(self):
+        _request_account.set(ACCOUNT)
+        pipeline = StagedPipeline([PipelineStage("read", lambda _: _request_account.get(), workers=3)])
+        self.assertEqual(set(pipeline.run(range(6))), {ACCOUNT})
+
+
+class _SlowLabelFetcher(FakeGmailFetcher):
+    def add_label(self, message_id, label):
+        time.sleep(0.04)
+        return super().add_label(message_id, label)
+
+
+class _SlowCategorizer(FakeEmailCategorizer):
+    def categorize(self, contents, model):
+        time.sleep(0.04)
+        return super().categorize(contents, model)
+
+
+class TestProcessAccountPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.account_client = FakeAccountCategoryClient()
+        account = self.account_client.get_or_create_account(ACCOUNT, None, None, None, None)
+        account.app_password = "app-password"
+
+        self.fetcher = _SlowLabelFetcher()
+        self.fetcher.summary_service = Mock()
+        self.fetcher.summary_service.run_metrics = {'fetched': 0}
+        self.fetcher.summary_service.db_service = None
+        self.fetcher.account_service = self.account_client
+        self.fetcher.stats = {'deleted': 0, 'kept': 0, 'categories': Counter()}
+        for i in range(12):
+            self.fetcher.add_test_email(subject=f"Sale {i}", body="buy now", sender="news@shop.com")
+
+        # Share one client so processed IDs persist across runs
+        self.dedup_factory = Mock()
+        self.dedup_factory.create_deduplication_client.return_value = FakeEmailDeduplicationClient(ACCOUNT)
+        settings = Mock()
+        settings.get_lookback_hours.return_value = 2
+        self.status_manager = ProcessingStatusManager()
+        self.service = AccountEmailProcessorService(
+            processing_status_manager=self.status_manager,
+            settings_service=settings,
+            email_categorizer=_SlowCategorizer(default_category="Marketing"),
+            api_token="token",
+            llm_model="test-model",
+            account_category_client=self.account_client,
+            deduplication_factory=self.dedup_factory,
+            create_gmail_fetcher=lambda email, pwd, token: self.fetcher,
+            pipeline_config=EmailPipelineConfig(queue_size=4, classify_workers=4),
+        )
+
+    def test_classification_overlaps_with_imap_actions(self):
+        started = time.monotonic()
+        result = self.service.process_account(ACCOUNT)
+        elapsed = time.monotonic() - started
+
+        self.assertTrue(result["success"], result.get("error"))
+        self.assertEqual((result["emails_found"], result["emails_processed"]), (12, 12))
+        self.assertEqual(self.fetcher.stats["categories"]["Marketing"], 12)
+        # Sequential processing needs 12 * (0.04 + 0.04) = 0.96s
+        self.assertLess(elapsed, 0.8)
+
+        metrics = result["pipeline_metrics"]
+        self.assertEqual(list(metrics), ["fetch", "parse", "prefilter", "classify", "action", "persist"])
+        self.assertEqual(metrics["persist"]["emitted"], 12)
+        self.assertEqual(self.status_manager.get_recent_runs(limit=1)[0]["emails_reviewed"], 12)
+
+    def test_already_processed_emails_are_dropped_before_classification(self):
+        self.service.process_account(ACCOUNT)
+        result = self.service.process_account(ACCOUNT)
+
+        self.assertEqual((result["emails_found"], result["emails_processed"]), (12, 0))
+        self.assertEqual(result["pipeline_metrics"]["prefilter"]["dropped"], 12)
+
+
+if __name__ == "__main__":
+    unittest.main()
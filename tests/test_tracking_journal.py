@@ -0,0 +1,95 @@
+"""
+Tests for the append-only journal of tracked emails.
+"""
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from migrate_json_archives import find_archive_files, parse_json_archive
+from services.email_summary_service import EmailSummaryService
+from services.tracking_journal import TrackingJournal
+
+
+class TestTrackingJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.data_dir = Path(self.temp_dir.name)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _track(self, service, i, action="kept"):
+        service.track_email(
+            message_id=f"<{i}@mail>", sender=f"user{i % 3}@example.com", subject=f"Subject {i}",
+            category="Marketing" if i % 2 else "Personal", action=action, sender_domain="example.com"
+        )
+
+    def test_tracking_appends_without_reading_the_journal(self):
+        service = EmailSummaryService(data_dir=str(self.data_dir), use_database=False)
+        with patch("services.email_summary_service.TrackingJournal.read") as read:
+            for i in range(20):
+                self._track(service, i, action="deleted" if i < 5 else "kept")
+            read.assert_not_called()
+
+        lines = service.journal_file.read_text().splitlines()
+        self.assertEqual(len(lines), 20)
+        self.assertEqual(json.loads(lines[0])["message_id"], "<0@mail>")
+        stats = service.tracking_journal.get_stats()
+        self.assertEqual((stats["entries"], stats["actions"]), (20, {"deleted": 5, "kept": 15}))
+
+        report = service.generate_summary("Daily")
+        self.assertEqual((report.stats.total_processed, report.stats.total_deleted), (20, 5))
+        self.assertEqual([e.message_id for e in report.processed_emails], [f"<{i}@mail>" for i in range(20)])
+        service.close()
+
+    def test_clearing_compacts_the_journal_into_an_archive_the_migration_reads(self):
+        service = EmailSummaryService(data_dir=str(self.data_dir), use_database=False)
+        for i in range(6):
+            self._track(service, i, action="deleted" if i % 3 == 0 else "kept")
+        service.clear_tracked_data()
+
+        self.assertEqual(service.journal_file.read_text(), "")
+        self.assertIsNone(service.generate_summary("Daily"))
+        [archive] = find_archive_files(service.archive_dir)
+        self.assertEqual(archive.suffix, ".jsonl")
+
+        summary = parse_json_archive(archive)
+        self.assertEqual((summary["total_processed"], summary["total_deleted"]), (6, 2))
+        self.assertEqual(summary["categories"]["Marketing"]["count"], 3)
+
+        # Appends after compaction start a new journal
+        self._track(service, 7)
+        self.assertEqual(len(service.generate_summary("Daily").processed_emails), 1)
+        service.close()
+
+    def test_legacy_tracking_file_is_imported_once(self):
+        legacy = [{"message_id": "<old@mail>", "sender": "a@example.com", "subject": "Old",
+                   "category": "Personal", "action": "KEPT", "sender_domain": "example.com",
+                   "was_pre_categorized": False, "processed_at": "2026-10-01T08:00:00"}]
+        (self.data_dir / "current_tracking.json").write_text(json.dumps(legacy))
+
+        service = EmailSummaryService(data_dir=str(self.data_dir), use_database=False)
+        self.assertFalse((self.data_dir / "current_tracking.json").exists())
+        self._track(service, 1)
+        service.close()
+
+        reopened = EmailSummaryService(data_dir=str(self.data_dir), use_database=False)
+        self.assertEqual([r["message_id"] for r in reopened.tracking_journal.read()], ["<old@mail>", "<1@mail>"])
+        self.assertEqual(reopened.tracking_journal.get_stats()["entries"], 2)
+        reopened.close()
+
+    def test_truncated_last_line_is_skipped(self):
+        journal = TrackingJournal(self.data_dir / "journal.jsonl", sync_every=2)
+        journal.append_many([{"message_id": "a"}, {"message_id": "b"}])
+        self.assertEqual(journal.get_stats()["unsynced"], 0)
+        with open(journal.path, "a") as handle:
+            handle.write('{"message_id": "c"')
+        self.assertEqual([r["message_id"] for r in journal.read()], ["a", "b"])
+        journal.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -64,7 +64,10 @@ def check_password_status(email_address: str):
 
         try:
             conn = connection_service.connect()
-            conn.logout()
+            try:
+                conn.logout()
+            finally:
+                connection_service.release()
             return ('valid', f"Password verified successfully for '{email_address}'", masked_pwd)
 
         except Exception as auth_error: